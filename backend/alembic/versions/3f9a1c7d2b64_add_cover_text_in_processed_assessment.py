@@ -0,0 +1,28 @@
+"""add cover text in processed assessment
+
+Revision ID: 3f9a1c7d2b64
+Revises: ca4152854e34
+Create Date: 2026-10-19 09:20:14.482113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c7d2b64'
+down_revision: Union[str, None] = 'ca4152854e34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('processed_assessment', sa.Column('cover_text', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('processed_assessment', 'cover_text')
@@ -0,0 +1,63 @@
+"""delta encoded snapshots
+
+Revision ID: 5c8e2a9f3d71
+Revises: e3a7c1f05b92
+Create Date: 2026-10-19 18:27:09.336150
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from utils.json_patch import apply_patch
+
+# revision identifiers, used by Alembic.
+revision: str = '5c8e2a9f3d71'
+down_revision: Union[str, None] = 'e3a7c1f05b92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DOCUMENTS = ['manual_report', 'full_report', 'ai_Competencies']
+
+snapshot = sa.table(
+    'snapshot',
+    sa.column('id', sa.BigInteger),
+    sa.column('parent_id', sa.BigInteger),
+    sa.column('delta', postgresql.JSONB),
+    sa.column('keyframe_distance', sa.Integer),
+    *(sa.column(name, postgresql.JSONB) for name in DOCUMENTS),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing snapshots stay keyframes; new ones may store a delta instead of the documents.
+    # The columns may already exist where create_all ran first
+    op.execute("ALTER TABLE snapshot ADD COLUMN IF NOT EXISTS delta JSONB")
+    op.execute("ALTER TABLE snapshot ADD COLUMN IF NOT EXISTS keyframe_distance INTEGER NOT NULL DEFAULT 0")
+    for column in DOCUMENTS:
+        op.alter_column('snapshot', column, existing_type=postgresql.JSONB(astext_type=sa.Text()), nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Store every delta snapshot in full again, parents before their children
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select(snapshot.c.id, snapshot.c.parent_id, snapshot.c.delta)
+        .where(snapshot.c.delta.is_not(None))
+        .order_by(snapshot.c.keyframe_distance, snapshot.c.id)
+    ).all()
+    for snapshot_id, parent_id, delta in rows:
+        parent = conn.execute(
+            sa.select(*(snapshot.c[name] for name in DOCUMENTS)).where(snapshot.c.id == parent_id)
+        ).one()
+        documents = apply_patch(dict(zip(DOCUMENTS, parent)), delta)
+        conn.execute(snapshot.update().where(snapshot.c.id == snapshot_id).values(**documents))
+
+    for column in DOCUMENTS:
+        op.alter_column('snapshot', column, existing_type=postgresql.JSONB(astext_type=sa.Text()), nullable=False)
+    op.drop_column('snapshot', 'keyframe_distance')
+    op.drop_column('snapshot', 'delta')
@@ -0,0 +1,28 @@
+"""add employee metadata in task
+
+Revision ID: 7b2e5d9a41c3
+Revises: 3f9a1c7d2b64
+Create Date: 2026-10-19 11:02:47.913528
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2e5d9a41c3'
+down_revision: Union[str, None] = '3f9a1c7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('task', sa.Column('employee_metadata', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('task', 'employee_metadata')
@@ -0,0 +1,46 @@
+"""add lookup indexes
+
+Revision ID: 9d4f6b2c8a17
+Revises: 7b2e5d9a41c3
+Create Date: 2026-10-19 14:36:05.271904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4f6b2c8a17'
+down_revision: Union[str, None] = '7b2e5d9a41c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_task_user_id_file_id', 'task', ['user_id', 'file_id']),
+    ('ix_task_user_id_file_name', 'task', ['user_id', 'file_name']),
+    ('ix_task_user_id_created_at', 'task', ['user_id', 'created_at']),
+    ('ix_task_file_id', 'task', ['file_id']),
+    ('ix_feedback_task_id', 'feedback', ['task_id']),
+    ('ix_advice_task_id', 'advice', ['task_id']),
+    ('ix_processed_assessment_task_id', 'processed_assessment', ['task_id']),
+    ('ix_snapshot_task_id_created_at', 'snapshot', ['task_id', 'created_at']),
+    ('ix_snapshot_task_id_trigger_type_created_at', 'snapshot', ['task_id', 'trigger_type', 'created_at']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built concurrently, outside the migration's transaction, so writes aren't blocked
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
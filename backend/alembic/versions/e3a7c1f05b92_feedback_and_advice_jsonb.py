@@ -0,0 +1,60 @@
+"""feedback and advice jsonb
+
+Revision ID: e3a7c1f05b92
+Revises: 9d4f6b2c8a17
+Create Date: 2026-10-19 16:12:40.518236
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a7c1f05b92'
+down_revision: Union[str, None] = '9d4f6b2c8a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column) stored as json until now
+COLUMNS = [
+    ('feedback', 'feedback'),
+    ('advice', 'advice'),
+]
+
+# (index name, table, indexed expression)
+GIN_INDEXES = [
+    ('ix_feedback_strengths_stakeholders', 'feedback', "(feedback -> 'strengths')"),
+    ('ix_feedback_areas_to_target_stakeholders', 'feedback', "(feedback -> 'areas_to_target')"),
+    ('ix_advice_stakeholders', 'advice', 'advice'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rewrites the tables, which are locked until the conversion commits
+    for table, column in COLUMNS:
+        op.alter_column(table, column,
+                        existing_type=postgresql.JSON(astext_type=sa.Text()),
+                        type_=postgresql.JSONB(astext_type=sa.Text()),
+                        postgresql_using=f'{column}::jsonb')
+
+    # The conversion is committed first; the indexes are then built without blocking writes
+    with op.get_context().autocommit_block():
+        for name, table, expression in GIN_INDEXES:
+            op.create_index(name, table, [sa.text(expression)], unique=False, postgresql_using='gin',
+                            if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(GIN_INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+
+    for table, column in COLUMNS:
+        op.alter_column(table, column,
+                        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+                        type_=postgresql.JSON(astext_type=sa.Text()),
+                        postgresql_using=f'{column}::json')
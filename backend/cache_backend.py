@@ -0,0 +1,338 @@
+"""
+Key-value backends shared by the workers of the application.
+
+The response caches in cache_manager and state.files_store keep their entries in
+one of these backends, chosen with the CACHE_BACKEND environment variable:
+
+- "disk": a SQLite database in the cache directory, shared by every worker on the host
+- "memory": a dict in the current process, for a single worker or tests
+- "redis": a Redis server, or any server speaking its protocol, at REDIS_URL
+
+Values are bytes; keys and set members are strings.
+"""
+import abc
+import threading
+import time
+import sqlite3
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+import orjson
+
+CACHE_BACKENDS = ("disk", "memory", "redis")
+
+# Largest code point, so prefix + _MAX_CHAR sorts after every key starting with prefix
+_MAX_CHAR = chr(0x10FFFF)
+
+
+class CacheBackend(abc.ABC):
+    """Interface of a key-value store with per-key TTLs and sets of strings"""
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Value of a key, or None if it is missing or expired"""
+
+    @abc.abstractmethod
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        """Set a key, expiring it after ttl seconds unless ttl is None"""
+
+    @abc.abstractmethod
+    def delete(self, *keys: str) -> int:
+        """Delete keys and sets, returning the number of keys that existed"""
+
+    @abc.abstractmethod
+    def scan(self, prefix: str) -> Iterator[str]:
+        """Iterate over the keys starting with prefix"""
+
+    @abc.abstractmethod
+    def sadd(self, key: str, *members: str) -> None:
+        """Add members to a set"""
+
+    @abc.abstractmethod
+    def smembers(self, key: str) -> Set[str]:
+        """Members of a set, empty if it doesn't exist"""
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Backend in the memory of the current process.
+
+    Values are kept in an LRU bounded by their total size in bytes. Entries aren't
+    visible to other workers, so this is meant for a single worker and for tests.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> (value, expires_at)
+        self._values: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self._sets: Dict[str, Set[str]] = {}
+
+    def _pop(self, key: str) -> Optional[Tuple[bytes, Optional[float]]]:
+        entry = self._values.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
+        return entry
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._pop(key)
+                return None
+            self._values.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        expires_at = None if ttl is None else time.time() + ttl
+        with self._lock:
+            self._pop(key)
+            self._values[key] = (value, expires_at)
+            self._bytes += len(value)
+            # Evict least recently used values over the budget, never the one just written
+            while self.max_bytes is not None and self._bytes > self.max_bytes and len(self._values) > 1:
+                self._pop(next(iter(self._values)))
+
+    def delete(self, *keys: str) -> int:
+        deleted = 0
+        with self._lock:
+            for key in keys:
+                entry = self._pop(key)
+                members = self._sets.pop(key, None)
+                deleted += entry is not None or members is not None
+        return deleted
+
+    def scan(self, prefix: str) -> Iterator[str]:
+        now = time.time()
+        with self._lock:
+            keys = [
+                key for key, (_, expires_at) in self._values.items()
+                if key.startswith(prefix) and (expires_at is None or expires_at > now)
+            ]
+        return iter(keys)
+
+    def sadd(self, key: str, *members: str) -> None:
+        with self._lock:
+            self._sets.setdefault(key, set()).update(members)
+
+    def smembers(self, key: str) -> Set[str]:
+        with self._lock:
+            return set(self._sets.get(key, ()))
+
+
+class SqliteBackend(CacheBackend):
+    """
+    Backend in a SQLite database file.
+
+    Every worker on the host opens the same file; WAL mode lets them read while
+    another one writes. Expired values are skipped on read and purged on write.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_kv_expires_at ON kv (expires_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv_sets ("
+            "key TEXT NOT NULL, member TEXT NOT NULL, PRIMARY KEY (key, member))"
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time())
+            ).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        expires_at = None if ttl is None else now + ttl
+        with self._lock:
+            self._conn.execute("DELETE FROM kv WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+                (key, value, expires_at)
+            )
+
+    def delete(self, *keys: str) -> int:
+        if not keys:
+            return 0
+        placeholders = ", ".join("?" for _ in keys)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                deleted = {row[0] for row in self._conn.execute(
+                    f"SELECT key FROM kv WHERE key IN ({placeholders})", keys
+                )}
+                deleted.update(row[0] for row in self._conn.execute(
+                    f"SELECT DISTINCT key FROM kv_sets WHERE key IN ({placeholders})", keys
+                ))
+                self._conn.execute(f"DELETE FROM kv WHERE key IN ({placeholders})", keys)
+                self._conn.execute(f"DELETE FROM kv_sets WHERE key IN ({placeholders})", keys)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(deleted)
+
+    def scan(self, prefix: str) -> Iterator[str]:
+        # A range on the primary key instead of LIKE, so the index is used
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM kv WHERE key >= ? AND key < ? AND (expires_at IS NULL OR expires_at > ?)",
+                (prefix, prefix + _MAX_CHAR, time.time())
+            ).fetchall()
+        return iter(row[0] for row in rows)
+
+    def sadd(self, key: str, *members: str) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO kv_sets (key, member) VALUES (?, ?)",
+                [(key, member) for member in members]
+            )
+
+    def smembers(self, key: str) -> Set[str]:
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT member FROM kv_sets WHERE key = ?", (key,))}
+
+
+class RedisBackend(CacheBackend):
+    """
+    Backend on a Redis server, shared by workers on any number of hosts.
+
+    Takes a client with the redis-py API, so any server speaking the Redis protocol
+    (or an in-process stand-in in tests) can be used. Expiry is left to the server.
+    """
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        # Imported here so the redis package is only needed when this backend is used
+        import redis
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        if ttl is None:
+            self.client.set(key, value)
+        else:
+            self.client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    def delete(self, *keys: str) -> int:
+        if not keys:
+            return 0
+        return self.client.delete(*keys)
+
+    def scan(self, prefix: str) -> Iterator[str]:
+        pattern = "".join("\\" + char if char in "*?[]\\" else char for char in prefix) + "*"
+        for key in self.client.scan_iter(match=pattern, count=500):
+            yield key.decode("utf-8") if isinstance(key, bytes) else key
+
+    def sadd(self, key: str, *members: str) -> None:
+        if members:
+            self.client.sadd(key, *members)
+
+    def smembers(self, key: str) -> Set[str]:
+        return {
+            member.decode("utf-8") if isinstance(member, bytes) else member
+            for member in self.client.smembers(key)
+        }
+
+
+def create_backend(kind: str, redis_url: Optional[str] = None, db_path: Optional[str] = None,
+                   max_memory_bytes: Optional[int] = None) -> CacheBackend:
+    """
+    Create the backend named by CACHE_BACKEND.
+
+    Args:
+        kind: "disk", "memory" or "redis"
+        redis_url: URL of the Redis server, required for "redis"
+        db_path: Path of the SQLite database, required for "disk"
+        max_memory_bytes: Size budget of the "memory" backend
+
+    Returns:
+        The backend
+    """
+    if kind == "disk":
+        return SqliteBackend(db_path)
+    if kind == "memory":
+        return MemoryBackend(max_memory_bytes)
+    if kind == "redis":
+        if not redis_url:
+            raise ValueError("REDIS_URL is required when CACHE_BACKEND is redis")
+        return RedisBackend.from_url(redis_url)
+    raise ValueError(f"Invalid cache backend: {kind}, expected one of {', '.join(CACHE_BACKENDS)}")
+
+
+def create_state_backend(kind: str, cache_backend: CacheBackend) -> CacheBackend:
+    """
+    Backend for shared state such as state.files_store, which must never be evicted.
+
+    The "memory" backend evicts to stay within its byte budget, so state gets an
+    unbounded one of its own there, and cached responses can't push uploads out.
+    The "disk" backend never evicts, and Redis doesn't evict keys without a TTL
+    under a volatile-* maxmemory policy, so those are shared with the caches.
+
+    Args:
+        kind: "disk", "memory" or "redis"
+        cache_backend: The backend created for the caches
+
+    Returns:
+        The backend
+    """
+    if kind == "memory":
+        return MemoryBackend()
+    return cache_backend
+
+
+class SharedDict(MutableMapping):
+    """
+    Dict of JSON-serializable values stored in a backend under a key prefix.
+
+    Every access goes to the backend, so all workers see the same entries. Values
+    are copies: mutate a value and assign it back to store the change.
+    """
+
+    def __init__(self, backend: CacheBackend, namespace: str):
+        self.backend = backend
+        self.prefix = f"{namespace}:"
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.backend.get(self.prefix + key)
+        if value is None:
+            raise KeyError(key)
+        return orjson.loads(value)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.backend.set(self.prefix + key, orjson.dumps(value))
+
+    def __delitem__(self, key: str) -> None:
+        if not self.backend.delete(self.prefix + key):
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.backend.get(self.prefix + key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.backend.scan(self.prefix):
+            yield key[len(self.prefix):]
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.backend.scan(self.prefix))
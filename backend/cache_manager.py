@@ -2,17 +2,34 @@
 Cache Manager for the Employee Assessment AI application.
 
 This module provides functions to manage caching of API responses to reduce
-the number of expensive LLM calls and improve response times.
+the number of expensive LLM calls and improve response times. Cached data is kept
+in an in-memory LRU over atomically written files on disk, with a TTL per cache
+type and a global byte budget, or in a key-value backend shared by every worker
+(see cache_backend) when CACHE_BACKEND is "memory" or "redis".
 """
 
 import os
 import json
 import time
-from typing import Any, Dict, Optional
+import struct
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import orjson
+
+from cache_backend import CacheBackend, create_backend, create_state_backend
 
 # Cache directory structure
 CACHE_DIR = "../data/cache"
+# Legacy JSON filename map, imported once into the SQLite store
 FILENAME_MAP_PATH = os.path.join(CACHE_DIR, "filename_map.json")
+FILENAME_MAP_DB_PATH = os.path.join(CACHE_DIR, "filename_map.sqlite3")
+
+# Per-file-id lists of cache entries, used for invalidation
+MANIFEST_DIR = os.path.join(CACHE_DIR, "manifests")
 
 # Cache subdirectories for different types of data
 CACHE_SUBDIRS = {
@@ -24,19 +41,145 @@ CACHE_SUBDIRS = {
     "development_areas": os.path.join(CACHE_DIR, "development_areas"),
 }
 
+DAY = 24 * 60 * 60
+
+# Time to live of each cache type in seconds (None never expires)
+CACHE_TTLS = {
+    "reports": 30 * DAY,
+    "raw_data": 30 * DAY,
+    "feedback": 30 * DAY,
+    "advice": 30 * DAY,
+    "strength_evidences": 7 * DAY,
+    "development_areas": 7 * DAY,
+}
+
+# Total size of the entries kept on disk, least recently used entries are evicted first
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+
+# Total size of the entries kept in memory
+MAX_MEMORY_CACHE_BYTES = 64 * 1024 * 1024
+
+# Where cached data and state shared by the workers (state.files_store) are kept:
+# "disk" keeps cached data in files and shared state in a SQLite database, "memory"
+# and "redis" keep both in the backend
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "disk").lower()
+REDIS_URL = os.getenv("REDIS_URL")
+SHARED_STATE_DB_PATH = os.path.join(CACHE_DIR, "shared_state.sqlite3")
+
 # Create cache directories if they don't exist
 os.makedirs(CACHE_DIR, exist_ok=True)
 for subdir in CACHE_SUBDIRS.values():
     os.makedirs(subdir, exist_ok=True)
 
 
-def get_cached_file_id(filename: str, use_cache: bool = True) -> Optional[str]:
+class FilenameMapStore:
+    """
+    Filename to file ID mapping in an indexed SQLite table.
+    
+    Upserts are single statements, so concurrent uploads (threads or worker
+    processes sharing the database file) never lose entries. Filename lookups
+    always read the table, which is a primary key lookup, so a mapping replaced by
+    another worker is seen on the next lookup. Each mapping records the SHA-256
+    of the uploaded content, so a lookup can require the same content and not
+    only the same name. File IDs are never reassigned, so known file IDs are
+    cached in memory.
+    """
+    
+    def __init__(self, db_path: str = FILENAME_MAP_DB_PATH, legacy_json_path: Optional[str] = FILENAME_MAP_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._file_ids: Set[str] = set()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS filename_map ("
+            "filename TEXT PRIMARY KEY, file_id TEXT NOT NULL, updated_at REAL NOT NULL, content_hash TEXT)"
+        )
+        if "content_hash" not in {row[1] for row in self._conn.execute("PRAGMA table_info(filename_map)")}:
+            try:
+                self._conn.execute("ALTER TABLE filename_map ADD COLUMN content_hash TEXT")
+            except sqlite3.OperationalError:
+                # Added by another worker in the meantime
+                pass
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_filename_map_file_id ON filename_map (file_id)")
+        if legacy_json_path:
+            self._import_legacy_json(legacy_json_path)
+    
+    def _import_legacy_json(self, path: str) -> None:
+        """Copy entries of the old filename_map.json into an empty table."""
+        if not os.path.exists(path):
+            return
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM filename_map LIMIT 1").fetchone():
+                return
+            try:
+                with open(path, 'r') as f:
+                    legacy_map = json.load(f)
+            except Exception as e:
+                print(f"Error reading filename map: {e}")
+                return
+            now = time.time()
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO filename_map (filename, file_id, updated_at) VALUES (?, ?, ?)",
+                [(filename, file_id, now) for filename, file_id in legacy_map.items()]
+            )
+            print(f"Imported {len(legacy_map)} entries from {path}")
+    
+    def upsert(self, filename: str, file_id: str, content_hash: Optional[str] = None) -> None:
+        """Map a filename to a file ID, replacing any earlier mapping of the filename."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO filename_map (filename, file_id, updated_at, content_hash) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(filename) DO UPDATE SET file_id = excluded.file_id, updated_at = excluded.updated_at, "
+                "content_hash = excluded.content_hash",
+                (filename, file_id, time.time(), content_hash)
+            )
+            self._file_ids.add(file_id)
+    
+    def get_file_id(self, filename: str, content_hash: Optional[str] = None) -> Optional[str]:
+        """
+        File ID of the latest upload of a filename.
+        
+        Args:
+            filename: The original filename
+            content_hash: If given, only an upload with this SHA-256 of its content matches
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file_id, content_hash FROM filename_map WHERE filename = ?", (filename,)
+            ).fetchone()
+        if row is None or (content_hash is not None and row[1] != content_hash):
+            return None
+        return row[0]
+    
+    def has_file_id(self, file_id: str) -> bool:
+        """Whether a file ID was recorded for any upload"""
+        if file_id in self._file_ids:
+            return True
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM filename_map WHERE file_id = ? LIMIT 1", (file_id,)).fetchone()
+            if row is None:
+                return False
+            self._file_ids.add(file_id)
+            return True
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM filename_map").fetchone()[0]
+
+
+filename_map_store = FilenameMapStore()
+
+
+def get_cached_file_id(filename: str, use_cache: bool = True, content_hash: Optional[str] = None) -> Optional[str]:
     """
     Get the file ID for a given filename from the cache.
     
     Args:
         filename: The original filename
         use_cache: Whether to use the cache
+        content_hash: SHA-256 of the uploaded content; if given, a different file
+                      uploaded under the same name doesn't match
         
     Returns:
         The file ID if found in cache, None otherwise
@@ -44,46 +187,487 @@ def get_cached_file_id(filename: str, use_cache: bool = True) -> Optional[str]:
     if not use_cache:
         return None
         
-    if not os.path.exists(FILENAME_MAP_PATH):
+    try:
+        return filename_map_store.get_file_id(filename, content_hash)
+    except Exception as e:
+        print(f"Error reading filename map: {e}")
         return None
+
+
+def is_known_file_id(file_id: str) -> bool:
+    """
+    Check whether a file ID was recorded in the filename map.
+    
+    Args:
+        file_id: The file ID
         
+    Returns:
+        True if an upload was mapped to the file ID
+    """
     try:
-        with open(FILENAME_MAP_PATH, 'r') as f:
-            filename_map = json.load(f)
-            
-        return filename_map.get(filename)
+        return filename_map_store.has_file_id(file_id)
     except Exception as e:
         print(f"Error reading filename map: {e}")
-        return None
+        return False
 
 
-def add_to_filename_map(filename: str, file_id: str) -> None:
+def add_to_filename_map(filename: str, file_id: str, content_hash: Optional[str] = None) -> None:
     """
     Add a filename to file ID mapping to the cache.
     
     Args:
         filename: The original filename
         file_id: The generated file ID
+        content_hash: SHA-256 of the uploaded content
+    """
+    try:
+        filename_map_store.upsert(filename, file_id, content_hash)
+    except Exception as e:
+        print(f"Error writing filename map: {e}")
+
+
+class CacheEntry(NamedTuple):
+    """Bookkeeping for one entry on disk"""
+    size: int
+    written_at: float
+    cache_type: str
+    file_id: str
+
+
+class FileVersion(NamedTuple):
+    """Identifies one write of an entry's file; atomic writes replace the inode"""
+    inode: int
+    mtime_ns: int
+    size: int
+    
+    @classmethod
+    def of(cls, stat: os.stat_result) -> "FileVersion":
+        return cls(stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def file_id_from_cache_name(filename: str) -> str:
+    """File ID of a cache file named {file_id}.json or {file_id}_{params}.json"""
+    return filename[:-len('.json')].split('_', 1)[0]
+
+
+class TwoTierCache:
     """
-    filename_map = {}
+    Cache of JSON-serializable data in memory over atomic files on disk.
+    
+    Entries are stored as compact orjson bytes. The memory tier is an LRU bounded
+    by total size; the disk tier is bounded by a global byte budget and evicts the
+    least recently used files. Each cache type has its own TTL, measured from the
+    time an entry was written (the file's modification time).
+    
+    The file on disk is the source of truth: a memory hit is only served after a
+    stat shows the file is still the one that was read, so an entry rewritten or
+    removed by another worker is read again or missed.
+    
+    Every write also appends the entry's path to a per-file-id manifest, so a file's
+    entries can be invalidated without listing the cache directories, including
+    entries written by other processes.
+    """
+    
+    def __init__(self, max_disk_bytes: int = MAX_CACHE_BYTES, max_memory_bytes: int = MAX_MEMORY_CACHE_BYTES,
+                 ttls: Optional[Dict[str, Optional[float]]] = None, cache_dirs: Optional[List[str]] = None,
+                 manifest_dir: str = MANIFEST_DIR):
+        self.cache_dirs = list(CACHE_SUBDIRS.values()) if cache_dirs is None else cache_dirs
+        self._type_dirs = {os.path.basename(directory): directory for directory in self.cache_dirs}
+        self.manifest_dir = manifest_dir
+        os.makedirs(manifest_dir, exist_ok=True)
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.ttls = dict(CACHE_TTLS if ttls is None else ttls)
+        self._lock = threading.RLock()
+        # path -> (payload, written_at, file_version)
+        self._memory: "OrderedDict[str, Tuple[bytes, float, FileVersion]]" = OrderedDict()
+        self._memory_bytes = 0
+        # path -> entry, least recently used first; built on first use
+        self._disk: Optional["OrderedDict[str, CacheEntry]"] = None
+        self._disk_bytes = 0
+        # file_id -> paths of its entries known to this process
+        self._by_file: Dict[str, Set[str]] = {}
+        # Bumped on every removal, so a read racing an invalidation isn't put back in memory
+        self._generation = 0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "stale": 0, "writes": 0,
+                      "evictions": 0, "invalidations": 0}
+    
+    def _load_disk_index(self) -> None:
+        """Index the entries already on disk, oldest first."""
+        entries = []
+        for subdir in self.cache_dirs:
+            cache_type = os.path.basename(subdir)
+            with os.scandir(subdir) as it:
+                for entry in it:
+                    if entry.name.endswith('.json') and entry.is_file():
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, entry.path, CacheEntry(
+                            stat.st_size, stat.st_mtime, cache_type, file_id_from_cache_name(entry.name)
+                        )))
+        entries.sort(key=lambda item: item[0])
+        self._disk = OrderedDict()
+        for _, path, entry in entries:
+            self._index(path, entry)
+    
+    def _disk_index(self) -> "OrderedDict[str, CacheEntry]":
+        if self._disk is None:
+            self._load_disk_index()
+        return self._disk
+    
+    def _index(self, path: str, entry: CacheEntry) -> None:
+        """Add or replace an entry in the disk index."""
+        previous = self._disk.pop(path, None)
+        if previous is not None:
+            self._disk_bytes -= previous.size
+        self._disk[path] = entry
+        self._disk_bytes += entry.size
+        self._by_file.setdefault(entry.file_id, set()).add(path)
+    
+    def _manifest_path(self, file_id: str) -> str:
+        return os.path.join(self.manifest_dir, f"{file_id}.txt")
+    
+    def _is_expired(self, cache_type: str, written_at: float) -> bool:
+        ttl = self.ttls.get(cache_type)
+        return ttl is not None and time.time() - written_at > ttl
+    
+    def _remember(self, path: str, payload: bytes, written_at: float, version: FileVersion) -> None:
+        """Put an entry in the memory tier; entries larger than the whole tier are skipped."""
+        if len(payload) > self.max_memory_bytes:
+            return
+        self._drop_from_memory(path)
+        self._memory[path] = (payload, written_at, version)
+        self._memory_bytes += len(payload)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, (evicted, _, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+    
+    def _drop_from_memory(self, path: str) -> None:
+        entry = self._memory.pop(path, None)
+        if entry is not None:
+            self._memory_bytes -= len(entry[0])
+    
+    def _forget(self, path: str) -> None:
+        """Drop an entry from both tiers' bookkeeping."""
+        self._generation += 1
+        self._drop_from_memory(path)
+        indexed = self._disk_index().pop(path, None)
+        if indexed is not None:
+            self._disk_bytes -= indexed.size
+            paths = self._by_file.get(indexed.file_id)
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del self._by_file[indexed.file_id]
+    
+    def _remove(self, path: str) -> None:
+        self._forget(path)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    
+    def get(self, cache_type: str, path: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._memory.get(path)
+            if entry is not None:
+                payload, written_at, version = entry
+                try:
+                    current = FileVersion.of(os.stat(path))
+                except FileNotFoundError:
+                    current = None
+                if current is None:
+                    # Removed by another worker
+                    self.stats["stale"] += 1
+                    self._forget(path)
+                    self.stats["misses"] += 1
+                    return None
+                if current != version:
+                    # Rewritten by another worker, read the new file below
+                    self.stats["stale"] += 1
+                    self._drop_from_memory(path)
+                elif self._is_expired(cache_type, written_at):
+                    self.stats["expired"] += 1
+                    self._remove(path)
+                    self.stats["misses"] += 1
+                    return None
+                else:
+                    self._memory.move_to_end(path)
+                    disk = self._disk_index()
+                    if path in disk:
+                        disk.move_to_end(path)
+                    self.stats["memory_hits"] += 1
+                    return orjson.loads(payload)
+            generation = self._generation
+        
+        try:
+            with open(path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                written_at = stat.st_mtime
+                payload = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        
+        with self._lock:
+            if self._is_expired(cache_type, written_at):
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                self._remove(path)
+                return None
+            # Legacy entries were written with json.dump and are read the same way
+            data = orjson.loads(payload)
+            if generation == self._generation:
+                self._remember(path, payload, written_at, FileVersion.of(stat))
+                disk = self._disk_index()
+                if path not in disk:
+                    self._index(path, CacheEntry(len(payload), written_at, cache_type,
+                                                 file_id_from_cache_name(os.path.basename(path))))
+                disk.move_to_end(path)
+            self.stats["disk_hits"] += 1
+            return data
     
-    # Load existing map if it exists
-    if os.path.exists(FILENAME_MAP_PATH):
+    def put(self, cache_type: str, file_id: str, path: str, data: Any) -> None:
+        payload = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        
+        # Record the entry in the file's manifest first, so an invalidation never misses it.
+        # Appends of a single short line are atomic, so concurrent writers don't interleave.
+        with open(self._manifest_path(file_id), 'a') as manifest:
+            manifest.write(path + '\n')
+        
+        # Write to a temporary file and rename it over the entry, so readers never see a partial file
+        directory = os.path.dirname(path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".tmp")
         try:
-            with open(FILENAME_MAP_PATH, 'r') as f:
-                filename_map = json.load(f)
-        except Exception as e:
-            print(f"Error reading filename map: {e}")
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+                stat = os.fstat(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        
+        with self._lock:
+            self.stats["writes"] += 1
+            disk = self._disk_index()
+            self._index(path, CacheEntry(len(payload), stat.st_mtime, cache_type, file_id))
+            self._remember(path, payload, stat.st_mtime, FileVersion.of(stat))
+            
+            # Evict least recently used entries over the budget, never the one just written
+            while self._disk_bytes > self.max_disk_bytes and len(disk) > 1:
+                evicted_path = next(iter(disk))
+                self._remove(evicted_path)
+                self.stats["evictions"] += 1
     
-    # Add new mapping
-    filename_map[file_id] = file_id
+    def discard(self, path: str) -> None:
+        """Remove an entry from both tiers."""
+        with self._lock:
+            self._remove(path)
     
-    # Save updated map
-    try:
-        with open(FILENAME_MAP_PATH, 'w') as f:
-            json.dump(filename_map, f, indent=2)
-    except Exception as e:
-        print(f"Error writing filename map: {e}")
+    def invalidate_file(self, file_id: str, cache_types: Optional[Set[str]] = None) -> int:
+        """
+        Remove the entries of one file ID.
+        
+        Only the file's manifest and its known entries are touched, so the cost is
+        proportional to the number of entries for the file.
+        
+        Args:
+            file_id: The file ID
+            cache_types: Cache types to remove entries from, all types if None
+            
+        Returns:
+            Number of entries removed
+        """
+        manifest_path = self._manifest_path(file_id)
+        with self._lock:
+            paths = set(self._by_file.get(file_id, ()))
+            try:
+                with open(manifest_path, 'r') as manifest:
+                    paths.update(line.strip() for line in manifest if line.strip())
+            except FileNotFoundError:
+                pass
+            
+            removed = 0
+            kept = []
+            for path in paths:
+                if cache_types is not None and os.path.basename(os.path.dirname(path)) not in cache_types:
+                    kept.append(path)
+                    continue
+                existed = os.path.exists(path)
+                self._remove(path)
+                removed += existed
+            
+            # Rewrite the manifest with the entries of the other cache types
+            if kept:
+                fd, tmp_path = tempfile.mkstemp(dir=self.manifest_dir, prefix=".tmp_", suffix=".tmp")
+                with os.fdopen(fd, 'w') as manifest:
+                    manifest.write(''.join(path + '\n' for path in kept))
+                os.replace(tmp_path, manifest_path)
+            else:
+                try:
+                    os.remove(manifest_path)
+                except FileNotFoundError:
+                    pass
+            
+            self.stats["invalidations"] += removed
+            return removed
+    
+    def invalidate_type(self, cache_type: str) -> int:
+        """
+        Remove every entry of a cache type.
+        
+        Args:
+            cache_type: The cache type
+            
+        Returns:
+            Number of entries removed
+        """
+        directory = self._type_dirs[cache_type]
+        with self._lock:
+            # List the directory rather than the index, to include entries written by other processes
+            with os.scandir(directory) as it:
+                paths = [entry.path for entry in it if entry.name.endswith('.json')]
+            for path in paths:
+                self._remove(path)
+            self.stats["invalidations"] += len(paths)
+            return len(paths)
+    
+    def invalidate_older_than(self, max_age: float, cache_types: Optional[Set[str]] = None) -> int:
+        """
+        Remove entries written more than max_age seconds ago.
+        
+        Args:
+            max_age: Maximum age in seconds
+            cache_types: Cache types to remove entries from, all types if None
+            
+        Returns:
+            Number of entries removed
+        """
+        cutoff = time.time() - max_age
+        with self._lock:
+            paths = [
+                path for path, entry in self._disk_index().items()
+                if entry.written_at < cutoff and (cache_types is None or entry.cache_type in cache_types)
+            ]
+            for path in paths:
+                self._remove(path)
+            self.stats["invalidations"] += len(paths)
+            return len(paths)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters and current sizes of both tiers"""
+        with self._lock:
+            return {
+                **self.stats,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk_index()),
+                "disk_bytes": self._disk_bytes
+            }
+
+
+class KeyValueCache:
+    """
+    Cache of JSON-serializable data in a key-value backend shared by the workers.
+    
+    Has the interface of TwoTierCache and is used in its place with the "memory"
+    and "redis" backends. Entries are keyed by cache type and the name the entry's
+    file would have; each value is the time it was written followed by the orjson
+    bytes, and expires through the backend's TTLs. Per-file-id manifests are sets
+    in the backend. The backend enforces its own size limit.
+    """
+    
+    def __init__(self, backend: CacheBackend, ttls: Optional[Dict[str, Optional[float]]] = None):
+        self.backend = backend
+        self.ttls = dict(CACHE_TTLS if ttls is None else ttls)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "invalidations": 0}
+    
+    @staticmethod
+    def _key(path: str) -> str:
+        cache_type = os.path.basename(os.path.dirname(path))
+        return f"cache:{cache_type}:{os.path.basename(path)[:-len('.json')]}"
+    
+    @staticmethod
+    def _manifest_key(file_id: str) -> str:
+        return f"cache:manifest:{file_id}"
+    
+    @staticmethod
+    def _cache_type(key: str) -> str:
+        return key.split(':', 2)[1]
+    
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats[counter] += amount
+    
+    def get(self, cache_type: str, path: str) -> Optional[Any]:
+        value = self.backend.get(self._key(path))
+        if value is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return orjson.loads(value[8:])
+    
+    def put(self, cache_type: str, file_id: str, path: str, data: Any) -> None:
+        key = self._key(path)
+        value = struct.pack("<d", time.time()) + orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        # Record the entry in the file's manifest first, so an invalidation never misses it
+        self.backend.sadd(self._manifest_key(file_id), key)
+        self.backend.set(key, value, self.ttls.get(cache_type))
+        self._count("writes")
+    
+    def discard(self, path: str) -> None:
+        self.backend.delete(self._key(path))
+    
+    def invalidate_file(self, file_id: str, cache_types: Optional[Set[str]] = None) -> int:
+        """Remove the entries of one file ID, returning the number removed."""
+        manifest_key = self._manifest_key(file_id)
+        keys = self.backend.smembers(manifest_key)
+        removing = [key for key in keys if cache_types is None or self._cache_type(key) in cache_types]
+        kept = [key for key in keys if key not in removing]
+        removed = self.backend.delete(*removing)
+        self.backend.delete(manifest_key)
+        if kept:
+            self.backend.sadd(manifest_key, *kept)
+        self._count("invalidations", removed)
+        return removed
+    
+    def invalidate_type(self, cache_type: str) -> int:
+        """Remove every entry of a cache type, returning the number removed."""
+        removed = self.backend.delete(*self.backend.scan(f"cache:{cache_type}:"))
+        self._count("invalidations", removed)
+        return removed
+    
+    def invalidate_older_than(self, max_age: float, cache_types: Optional[Set[str]] = None) -> int:
+        """Remove entries written more than max_age seconds ago, returning the number removed."""
+        cutoff = time.time() - max_age
+        removing = []
+        for cache_type in (CACHE_SUBDIRS if cache_types is None else cache_types):
+            for key in self.backend.scan(f"cache:{cache_type}:"):
+                value = self.backend.get(key)
+                if value is not None and struct.unpack_from("<d", value)[0] < cutoff:
+                    removing.append(key)
+        removed = self.backend.delete(*removing)
+        self._count("invalidations", removed)
+        return removed
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters of this process and the backend in use"""
+        with self._lock:
+            return {**self.stats, "backend": type(self.backend).__name__}
+
+
+# Backend shared by the workers
+shared_backend = create_backend(CACHE_BACKEND, REDIS_URL, SHARED_STATE_DB_PATH, MAX_MEMORY_CACHE_BYTES)
+# Backend of state.files_store, kept out of the cache's eviction
+state_backend = create_state_backend(CACHE_BACKEND, shared_backend)
+
+cache = TwoTierCache() if CACHE_BACKEND == "disk" else KeyValueCache(shared_backend)
 
 
 def get_cache_path(cache_type: str, file_id: str, params: Optional[Dict[str, Any]] = None) -> str:
@@ -121,22 +705,19 @@ def get_cached_data(cache_type: str, file_id: str, params: Optional[Dict[str, An
         params: Optional parameters that affect the cache key
         
     Returns:
-        The cached data if found, None otherwise
+        The cached data if found and not expired, None otherwise
     """
     cache_path = get_cache_path(cache_type, file_id, params)
     
-    if not os.path.exists(cache_path):
-        return None
-        
     try:
-        with open(cache_path, 'r') as f:
-            data = json.load(f)
-            
-        print(f"Cache hit for {cache_type} with file ID {file_id}")
-        return data
+        data = cache.get(cache_type, cache_path)
     except Exception as e:
         print(f"Error reading cached data: {e}")
         return None
+    
+    if data is not None:
+        print(f"Cache hit for {cache_type} with file ID {file_id}")
+    return data
 
 
 def save_cached_data(cache_type: str, file_id: str, data: Dict[str, Any], params: Optional[Dict[str, Any]] = None) -> None:
@@ -152,15 +733,23 @@ def save_cached_data(cache_type: str, file_id: str, data: Dict[str, Any], params
     cache_path = get_cache_path(cache_type, file_id, params)
     
     try:
-        with open(cache_path, 'w') as f:
-            json.dump(data, f, indent=2)
-            
+        cache.put(cache_type, file_id, cache_path, data)
         print(f"Cached {cache_type} data for file ID {file_id}")
     except Exception as e:
         print(f"Error saving cached data: {e}")
 
 
-def clear_cache(cache_type: Optional[str] = None, file_id: Optional[str] = None) -> None:
+def cache_stats() -> Dict[str, Any]:
+    """
+    Get the cache's hit, miss, expiry, write and eviction counters.
+    
+    Returns:
+        The counters, with the entry count and size of both tiers for the disk cache
+    """
+    return cache.snapshot()
+
+
+def clear_cache(cache_type: Optional[str] = None, file_id: Optional[str] = None, older_than: Optional[float] = None) -> int:
     """
     Clear the cache.
     
@@ -169,34 +758,24 @@ def clear_cache(cache_type: Optional[str] = None, file_id: Optional[str] = None)
                    If None, clear all cache types
         file_id: The file ID to clear
                 If None, clear all files for the specified cache type(s)
+        older_than: Only clear entries written more than this many seconds ago
+                If None, clear entries of any age
+        
+    Returns:
+        Number of entries removed
     """
-    if cache_type is None:
-        # Clear all cache types
-        for subdir in CACHE_SUBDIRS.values():
-            if file_id is None:
-                # Clear all files in the directory
-                for filename in os.listdir(subdir):
-                    if filename.endswith('.json'):
-                        os.remove(os.path.join(subdir, filename))
-            else:
-                # Clear only files for the specified file ID
-                for filename in os.listdir(subdir):
-                    if filename.startswith(f"{file_id}") and filename.endswith('.json'):
-                        os.remove(os.path.join(subdir, filename))
-    else:
-        # Clear only the specified cache type
-        if cache_type not in CACHE_SUBDIRS:
-            raise ValueError(f"Invalid cache type: {cache_type}")
-            
-        subdir = CACHE_SUBDIRS[cache_type]
-        
-        if file_id is None:
-            # Clear all files in the directory
-            for filename in os.listdir(subdir):
-                if filename.endswith('.json'):
-                    os.remove(os.path.join(subdir, filename))
-        else:
-            # Clear only files for the specified file ID
-            for filename in os.listdir(subdir):
-                if filename.startswith(f"{file_id}") and filename.endswith('.json'):
-                    os.remove(os.path.join(subdir, filename))
+    if cache_type is not None and cache_type not in CACHE_SUBDIRS:
+        raise ValueError(f"Invalid cache type: {cache_type}")
+    if file_id is not None and older_than is not None:
+        raise ValueError("older_than can't be combined with file_id")
+    
+    cache_types = None if cache_type is None else {cache_type}
+    
+    if file_id is not None:
+        # Only the entries listed in the file's manifest are touched
+        return cache.invalidate_file(file_id, cache_types)
+    if older_than is not None:
+        return cache.invalidate_older_than(older_than, cache_types)
+    if cache_type is not None:
+        return cache.invalidate_type(cache_type)
+    return sum(cache.invalidate_type(name) for name in CACHE_SUBDIRS)
@@ -8,8 +8,9 @@ from sqlalchemy.orm import Session
 from utils.loggers.db_logger import logger as dbLogger
 from utils.loggers.endPoint_logger import logger as ApiLogger
 
-from .file import get_cached_task, async_get_task_by_user_and_fileId
 from .models import DBAdvice
+from .sub_documents import advice_file_ids_statement, stakeholder_advice_statement
+from .task_lookup import async_get_task_with, get_task_with
 
 
 class Advice(BaseModel):
@@ -146,19 +147,13 @@ async def async_delete_advice(advice_id: int, session: AsyncSession) -> None:
 
 def get_cached_advice(user_id: str, file_id: str, session: Session) -> Optional[Dict[str, Any]]:
     dbLogger.debug(f"Looking for cached advice for user: {user_id}, file_id: {file_id}")
-    cached_task = get_cached_task(user_id, file_id, session)
+    # The task and its latest advice in one query
+    cached_task, db_advice = get_task_with(user_id, file_id, "advice", session)
     
     if not cached_task:
         dbLogger.debug(f"No cached task found for user: {user_id}, file_id: {file_id}")
         return None
     
-    dbLogger.debug(f"Found cached task with id: {cached_task.id}, looking for associated advice")
-    db_advice = (
-        session.query(DBAdvice)
-        .filter(DBAdvice.task_id == cached_task.id)
-        .first()
-    )
-    
     if not db_advice:
         dbLogger.debug(f"No advice found for task_id: {cached_task.id}")
         return None
@@ -168,18 +163,12 @@ def get_cached_advice(user_id: str, file_id: str, session: Session) -> Optional[
 
 async def async_get_cached_advice(user_id: str, file_id: str, session: AsyncSession) -> Optional[Dict[str, Any]]:
     dbLogger.debug(f"[ASYNC] Looking for cached advice for user: {user_id}, file_id: {file_id}")
-    cached_task = await async_get_task_by_user_and_fileId(user_id, file_id, session)
+    # The task and its latest advice in one query
+    cached_task, db_advice = await async_get_task_with(user_id, file_id, "advice", session)
     
     if not cached_task:
         dbLogger.debug(f"[ASYNC] No cached task found for user: {user_id}, file_id: {file_id}")
-        return None
-    
-    dbLogger.debug(f"[ASYNC] Found cached task with id: {cached_task.id}, looking for associated advice")
-    result = await session.execute(
-        select(DBAdvice)
-        .filter(DBAdvice.task_id == cached_task.id)
-    )
-    db_advice = result.scalars().first()
+        raise NotFoundError(f"Task with file id:{file_id} not found.")
     
     if not db_advice:
         dbLogger.debug(f"[ASYNC] No advice found for task_id: {cached_task.id}")
@@ -187,3 +176,37 @@ async def async_get_cached_advice(user_id: str, file_id: str, session: AsyncSess
     
     dbLogger.debug(f"[ASYNC] Found cached advice with id: {db_advice.id}")
     return db_advice.advice
+
+def get_stakeholder_advice(user_id: str, file_id: str, stakeholder: str, session: Session) -> Optional[Dict[str, Any]]:
+    """
+    Get one stakeholder's entry of a task's latest advice, extracted by the database.
+
+    Returns:
+        {"role": str, "advice": [str]}, or None if the task doesn't exist or has no
+        advice from the stakeholder
+    """
+    dbLogger.debug(f"Looking for advice of stakeholder {stakeholder} for user: {user_id}, file_id: {file_id}")
+    row = session.execute(stakeholder_advice_statement(user_id, file_id, stakeholder)).first()
+    return None if row is None else row[2]
+
+async def async_get_stakeholder_advice(user_id: str, file_id: str, stakeholder: str,
+                                       session: AsyncSession) -> Optional[Dict[str, Any]]:
+    """Async version of get_stakeholder_advice"""
+    dbLogger.debug(f"[ASYNC] Looking for advice of stakeholder {stakeholder} for user: {user_id}, file_id: {file_id}")
+    result = await session.execute(stakeholder_advice_statement(user_id, file_id, stakeholder))
+    row = result.first()
+    return None if row is None else row[2]
+
+def get_advice_file_ids_by_stakeholder(user_id: str, stakeholder: str, session: Session) -> List[str]:
+    dbLogger.debug(f"Finding advice of stakeholder {stakeholder} for user: {user_id}")
+    file_ids = session.execute(advice_file_ids_statement(user_id, stakeholder)).scalars().all()
+    dbLogger.debug(f"Found advice of stakeholder {stakeholder} in {len(file_ids)} files")
+    return list(file_ids)
+
+async def async_get_advice_file_ids_by_stakeholder(user_id: str, stakeholder: str, session: AsyncSession) -> List[str]:
+    """Async version of get_advice_file_ids_by_stakeholder"""
+    dbLogger.debug(f"[ASYNC] Finding advice of stakeholder {stakeholder} for user: {user_id}")
+    result = await session.execute(advice_file_ids_statement(user_id, stakeholder))
+    file_ids = result.scalars().all()
+    dbLogger.debug(f"[ASYNC] Found advice of stakeholder {stakeholder} in {len(file_ids)} files")
+    return list(file_ids)
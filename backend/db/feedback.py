@@ -8,8 +8,10 @@ from sqlalchemy.orm import Session
 from utils.loggers.db_logger import logger as dbLogger
 from utils.loggers.endPoint_logger import logger as ApiLogger
 
-from .file import get_cached_task, async_get_task_by_user_and_fileId
 from .models import DBFeedBack
+from .sub_documents import (FEEDBACK_CATEGORIES, feedback_category_statement,
+                            feedback_file_ids_statement, stakeholder_feedback_statement)
+from .task_lookup import async_get_task_with, get_task_with
 
 
 class FeedBack(BaseModel):
@@ -131,19 +133,13 @@ async def async_delete_feedback(feedback_id: int, session: AsyncSession) -> None
 
 def get_cached_feedback(user_id: str, file_id: str, session: Session ) -> Optional[Dict[str, Any]]:
     ApiLogger.info(f"Retrieving cached feedback for user_id: {user_id}, file_id: {file_id}")
-    cached_task = get_cached_task(user_id, file_id, session)
+    # The task and its latest feedback in one query
+    cached_task, db_feedback = get_task_with(user_id, file_id, "feedback", session)
     
     if not cached_task:
         ApiLogger.info(f"No cached task found for user_id: {user_id}, file_id: {file_id}")
         return None
     
-    dbLogger.info(f"Looking for feedback with task_id: {cached_task.id}")
-    db_feedback = (
-        session.query(DBFeedBack)
-        .filter(DBFeedBack.task_id == cached_task.id)
-        .first()
-    )
-    
     if not db_feedback:
         dbLogger.info(f"No feedback found for task_id: {cached_task.id}")
         return None
@@ -153,18 +149,12 @@ def get_cached_feedback(user_id: str, file_id: str, session: Session ) -> Option
 
 async def async_get_cached_feedback(user_id: str, file_id: str, session: AsyncSession) -> Optional[Dict[str, Any]]:
     ApiLogger.info(f"[ASYNC] Retrieving cached feedback for user_id: {user_id}, file_id: {file_id}")
-    cached_task = await async_get_task_by_user_and_fileId(user_id, file_id, session)
+    # The task and its latest feedback in one query
+    cached_task, db_feedback = await async_get_task_with(user_id, file_id, "feedback", session)
     
     if not cached_task:
         ApiLogger.info(f"[ASYNC] No cached task found for user_id: {user_id}, file_id: {file_id}")
-        return None
-    
-    dbLogger.info(f"[ASYNC] Looking for feedback with task_id: {cached_task.id}")
-    result = await session.execute(
-        select(DBFeedBack)
-        .filter(DBFeedBack.task_id == cached_task.id)
-    )
-    db_feedback = result.scalars().first()
+        raise NotFoundError(f"Task with file id:{file_id} not found.")
     
     if not db_feedback:
         dbLogger.info(f"[ASYNC] No feedback found for task_id: {cached_task.id}")
@@ -172,3 +162,67 @@ async def async_get_cached_feedback(user_id: str, file_id: str, session: AsyncSe
     
     ApiLogger.info(f"[ASYNC] Successfully retrieved cached feedback for user_id: {user_id}, file_id: {file_id}")
     return db_feedback.feedback
+
+def _category_from_row(row) -> Optional[Dict[str, Any]]:
+    # (task id, feedback id, category); None without feedback, {} if the category is missing
+    if row is None or row[1] is None:
+        return None
+    return row[2] or {}
+
+def _stakeholder_from_row(row) -> Optional[Dict[str, Any]]:
+    # (task id, feedback id, *categories)
+    if row is None or row[1] is None:
+        return None
+    return dict(zip(FEEDBACK_CATEGORIES, row[2:]))
+
+def get_feedback_category(user_id: str, file_id: str, category: str, session: Session) -> Optional[Dict[str, Any]]:
+    """
+    Get one category of a task's latest feedback, extracted by the database.
+
+    Returns:
+        {stakeholder: {"role": str, "feedback": [...]}}, or None if the task doesn't exist
+        or has no feedback
+    """
+    dbLogger.info(f"Retrieving {category} feedback for user_id: {user_id}, file_id: {file_id}")
+    row = session.execute(feedback_category_statement(user_id, file_id, category)).first()
+    return _category_from_row(row)
+
+async def async_get_feedback_category(user_id: str, file_id: str, category: str,
+                                      session: AsyncSession) -> Optional[Dict[str, Any]]:
+    """Async version of get_feedback_category"""
+    dbLogger.info(f"[ASYNC] Retrieving {category} feedback for user_id: {user_id}, file_id: {file_id}")
+    result = await session.execute(feedback_category_statement(user_id, file_id, category))
+    return _category_from_row(result.first())
+
+def get_stakeholder_feedback(user_id: str, file_id: str, stakeholder: str, session: Session) -> Optional[Dict[str, Any]]:
+    """
+    Get one stakeholder's entries of a task's latest feedback, extracted by the database.
+
+    Returns:
+        {category: {"role": str, "feedback": [...]} or None}, or None if the task doesn't
+        exist or has no feedback
+    """
+    dbLogger.info(f"Retrieving feedback of stakeholder {stakeholder} for user_id: {user_id}, file_id: {file_id}")
+    row = session.execute(stakeholder_feedback_statement(user_id, file_id, stakeholder)).first()
+    return _stakeholder_from_row(row)
+
+async def async_get_stakeholder_feedback(user_id: str, file_id: str, stakeholder: str,
+                                         session: AsyncSession) -> Optional[Dict[str, Any]]:
+    """Async version of get_stakeholder_feedback"""
+    dbLogger.info(f"[ASYNC] Retrieving feedback of stakeholder {stakeholder} for user_id: {user_id}, file_id: {file_id}")
+    result = await session.execute(stakeholder_feedback_statement(user_id, file_id, stakeholder))
+    return _stakeholder_from_row(result.first())
+
+def get_feedback_file_ids_by_stakeholder(user_id: str, stakeholder: str, session: Session) -> List[str]:
+    dbLogger.info(f"Finding feedback of stakeholder {stakeholder} for user_id: {user_id}")
+    file_ids = session.execute(feedback_file_ids_statement(user_id, stakeholder)).scalars().all()
+    dbLogger.info(f"Found feedback of stakeholder {stakeholder} in {len(file_ids)} files")
+    return list(file_ids)
+
+async def async_get_feedback_file_ids_by_stakeholder(user_id: str, stakeholder: str, session: AsyncSession) -> List[str]:
+    """Async version of get_feedback_file_ids_by_stakeholder"""
+    dbLogger.info(f"[ASYNC] Finding feedback of stakeholder {stakeholder} for user_id: {user_id}")
+    result = await session.execute(feedback_file_ids_statement(user_id, stakeholder))
+    file_ids = result.scalars().all()
+    dbLogger.info(f"[ASYNC] Found feedback of stakeholder {stakeholder} in {len(file_ids)} files")
+    return list(file_ids)
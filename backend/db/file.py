@@ -11,6 +11,7 @@ import env_variables
 from db.core import NotFoundError
 from db.models import DBAdvice, DBFeedBack, DBProcessedAssessment, DBTask
 from dir_config import SAVE_DIR
+from employee_metadata import employee_metadata_cache
 from fastapi import HTTPException, UploadFile
 from process_pdf import AssessmentProcessor
 from pydantic import BaseModel
@@ -18,10 +19,12 @@ from sqlalchemy import desc
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import Session
+from transcript_store import transcript_store
 from utils.loggers.db_logger import logger as dbLogger
 from utils.loggers.endPoint_logger import logger as ApiLogger
 
 from .models import DBSnapshot, DBTask
+from .task_lookup import async_get_task, forget_task, get_task
 
 
 class Task(BaseModel):
@@ -191,7 +194,7 @@ async def process_initial_transcripts_async(file_path:str=None, file_id:str=None
         if asyncio.iscoroutine(result):
             # If it's a coroutine, we need to await it
             dbLogger.info(f"Awaiting async processing task for task_id: {taskId}")
-            stakeholder_chunks, executive_chunks = await result
+            stakeholder_chunks, executive_chunks, cover_text = await result
             
             # Combine processed chunks and remove any duplicate whitespace
             filtered_feedback = "\n\n".join(stakeholder_chunks)
@@ -203,7 +206,7 @@ async def process_initial_transcripts_async(file_path:str=None, file_id:str=None
             
             # Save to database if task_id and db are provided
             if taskId is not None and db is not None:
-                await assessment_processor.save_to_database(db, taskId, filtered_feedback, executive_interview)
+                await assessment_processor.save_to_database(db, taskId, filtered_feedback, executive_interview, cover_text)
                 dbLogger.info(f"Saved to database for task ID: {taskId}")
             
             # Optionally save to files
@@ -233,6 +236,10 @@ async def process_initial_transcripts_async(file_path:str=None, file_id:str=None
                     dbLogger.info(f"No executive content found for task_id: {taskId}")
                 
                 dbLogger.info(f"Stakeholder feedback saved to: {stakeholder_path}")
+                assessment_processor.save_cover_text(SAVE_DIR, document_name, cover_text)
+            
+            # Drop transcripts cached from an earlier processing of this document
+            transcript_store.invalidate(os.path.splitext(os.path.basename(file_path))[0])
         else:
             # If it's a tuple, unpack it directly
             filtered_feedback, executive_interview = result
@@ -467,7 +474,7 @@ def get_db_task(task_id: int, user_id:str, session: Session) -> DBTask:
 
 def get_task_by_user_and_fileId(user_id: str, file_id:str, session: Session) -> Optional[DBTask]:
     dbLogger.debug(f"Retrieving task for user: {user_id} with file_id: {file_id}")
-    db_task = session.query(DBTask).filter(DBTask.file_id == file_id, DBTask.user_id == user_id).first()
+    db_task = get_task(user_id, file_id, session)
     if db_task is None:
         dbLogger.warning(f"Task with file_id: {file_id} not found for user: {user_id}")
         raise NotFoundError(f"Task with file id:{file_id} not found.")
@@ -476,7 +483,7 @@ def get_task_by_user_and_fileId(user_id: str, file_id:str, session: Session) ->
 
 def get_cached_task(user_id: str, file_id:str, session: Session) -> Optional[DBTask]:
     dbLogger.debug(f"Looking for cached task for user: {user_id}, file_id: {file_id}")
-    db_task = session.query(DBTask).filter(DBTask.file_id == file_id, DBTask.user_id == user_id).first()
+    db_task = get_task(user_id, file_id, session)
     if db_task is None:
         dbLogger.debug(f"No cached task found for user: {user_id}, file_id: {file_id}")
         return None
@@ -586,6 +593,9 @@ def delete_db_task(task_id: int, user_id: str, session: Session) -> None:
         # Delete the task itself
         session.delete(db_task)
         session.commit()
+        forget_task(session, db_task.user_id, db_task.file_id)
+        employee_metadata_cache.invalidate(db_task.user_id, db_task.file_id)
+        transcript_store.invalidate(db_task.file_id)
         dbLogger.info(f"Successfully deleted task with id: {task_id}")
     except Exception as e:
         dbLogger.error(f"Error deleting task {task_id}: {str(e)}")
@@ -651,9 +661,7 @@ async def async_get_task_by_user_and_fileId(user_id: str, file_id: str, session:
     """Async version of get_task_by_user_and_fileId"""
     dbLogger.debug(f"[ASYNC] Retrieving task for user: {user_id} with file_id: {file_id}")
     try:
-        stmt = select(DBTask).filter(DBTask.file_id == file_id, DBTask.user_id == user_id)
-        result = await session.execute(stmt)
-        db_task = result.scalars().first()
+        db_task = await async_get_task(user_id, file_id, session)
         
         if db_task is None:
             dbLogger.warning(f"[ASYNC] Task with file_id: {file_id} not found for user: {user_id}")
@@ -667,6 +675,29 @@ async def async_get_task_by_user_and_fileId(user_id: str, file_id: str, session:
         dbLogger.error(f"[ASYNC] Error retrieving task by file_id: {str(e)}")
         raise
 
+async def async_get_employee_metadata(user_id: str, file_id: str, session: AsyncSession) -> Optional[dict]:
+    """
+    Get the employee metadata extracted at ingest for a user's file.
+    Reads through the in-process LRU, so repeated requests don't query the database.
+    Returns None when the task doesn't exist or was processed before metadata was stored.
+    """
+    metadata = employee_metadata_cache.get(user_id, file_id)
+    if metadata is not None:
+        return metadata
+    
+    dbLogger.debug(f"[ASYNC] Loading employee metadata for user: {user_id} with file_id: {file_id}")
+    try:
+        stmt = select(DBTask.employee_metadata).filter(DBTask.user_id == user_id, DBTask.file_id == file_id)
+        result = await session.execute(stmt)
+        metadata = result.scalars().first()
+    except Exception as e:
+        dbLogger.error(f"[ASYNC] Error loading employee metadata: {str(e)}")
+        raise
+    
+    if metadata is not None:
+        employee_metadata_cache.put(user_id, file_id, metadata)
+    return metadata
+
 async def async_process_initial_transcripts(file_path: str = None, file_id: str = None, taskId: int = None, db: AsyncSession = None, save_to_files: bool = False):
     """Async version of process_initial_transcripts"""
     dbLogger.info(f"[ASYNC] Processing initial transcripts for task_id: {taskId}, file_id: {file_id}")
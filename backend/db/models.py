@@ -1,8 +1,8 @@
 import datetime
 from typing import Optional
 
-from sqlalchemy import ForeignKey, Text, func
-from sqlalchemy.dialects.postgresql import JSON, JSONB
+from sqlalchemy import ForeignKey, Index, Text, func, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -11,6 +11,13 @@ class Base(DeclarativeBase):
 
 class DBTask(Base):
     __tablename__ = "task"
+    __table_args__ = (
+        # Tasks are looked up by user and file id or file name, and listed per user by date
+        Index("ix_task_user_id_file_id", "user_id", "file_id"),
+        Index("ix_task_user_id_file_name", "user_id", "file_name"),
+        Index("ix_task_user_id_created_at", "user_id", "created_at"),
+        Index("ix_task_file_id", "file_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     created_at: Mapped[datetime.datetime] = mapped_column(default= func.now())
@@ -22,6 +29,9 @@ class DBTask(Base):
     s3_key: Mapped[Optional[str]] = mapped_column(nullable=True)
 
     current_snapshot_id: Mapped[int] = mapped_column(nullable=True)
+    # Extracted at ingest:
+    # {"employee_name": str, "report_date": str, "stakeholders": [{"name": str, "role": str}]}
+    employee_metadata: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
     feedbacks = relationship("DBFeedBack", back_populates="task")
     advices = relationship("DBAdvice", back_populates="task")
     snapshots = relationship("DBSnapshot", back_populates="task")
@@ -30,24 +40,44 @@ class DBTask(Base):
 
 class DBFeedBack(Base):
     __tablename__ = "feedback"
+    __table_args__ = (
+        # Stakeholders quoted in each category, for `?` key lookups across tasks
+        Index("ix_feedback_strengths_stakeholders", text("(feedback -> 'strengths')"), postgresql_using="gin"),
+        Index("ix_feedback_areas_to_target_stakeholders", text("(feedback -> 'areas_to_target')"), postgresql_using="gin"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    task_id: Mapped[int] = mapped_column(ForeignKey("task.id"))
-    feedback: Mapped[dict] = mapped_column(JSON)
+    task_id: Mapped[int] = mapped_column(ForeignKey("task.id"), index=True)
+    # {"strengths": {stakeholder: {"role": str, "feedback": [...]}}, "areas_to_target": {...}}
+    feedback: Mapped[dict] = mapped_column(JSONB)
 
     task = relationship("DBTask", back_populates="feedbacks")
 
 class DBAdvice(Base):
     __tablename__ = "advice"
+    __table_args__ = (
+        # Stakeholders who gave advice, for `?` key lookups across tasks
+        Index("ix_advice_stakeholders", "advice", postgresql_using="gin"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    task_id: Mapped[int] = mapped_column(ForeignKey("task.id"))
-    advice: Mapped[dict] = mapped_column(JSON)  
+    task_id: Mapped[int] = mapped_column(ForeignKey("task.id"), index=True)
+    # {stakeholder: {"role": str, "advice": [str]}}
+    advice: Mapped[dict] = mapped_column(JSONB)
 
     task = relationship("DBTask", back_populates="advices")
 
+
+# Documents of a snapshot, stored whole in keyframes and as JSON Patch deltas otherwise
+SNAPSHOT_DOCUMENTS = ("manual_report", "full_report", "ai_Competencies")
+
 class DBSnapshot(Base):
     __tablename__ = "snapshot"
+    __table_args__ = (
+        # Latest snapshots of a task, optionally of one trigger type
+        Index("ix_snapshot_task_id_created_at", "task_id", "created_at"),
+        Index("ix_snapshot_task_id_trigger_type_created_at", "task_id", "trigger_type", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     task_id: Mapped[int] = mapped_column(ForeignKey("task.id"))
@@ -67,22 +97,55 @@ class DBSnapshot(Base):
     #   }
     # }
 
-    manual_report: Mapped[dict]=mapped_column(JSONB)
-    full_report: Mapped[dict]=mapped_column(JSONB)
-    ai_Competencies: Mapped[dict]=mapped_column(JSONB)
+    # Keyframes store the three documents. Other snapshots leave them null and store
+    # `delta`, a JSON Patch from the parent's documents to theirs (see db/snapshot_delta.py)
+    stored_manual_report: Mapped[Optional[dict]] = mapped_column("manual_report", JSONB(none_as_null=True), nullable=True)
+    stored_full_report: Mapped[Optional[dict]] = mapped_column("full_report", JSONB(none_as_null=True), nullable=True)
+    stored_ai_Competencies: Mapped[Optional[dict]] = mapped_column("ai_Competencies", JSONB(none_as_null=True), nullable=True)
+    delta: Mapped[Optional[list]] = mapped_column(JSONB(none_as_null=True), nullable=True)
+    # Number of deltas between this snapshot and its keyframe; 0 for keyframes
+    keyframe_distance: Mapped[int] = mapped_column(default=0, server_default="0")
 
     task = relationship("DBTask", back_populates="snapshots")
 
     # Self-referencing relationship for undo tree
     parent = relationship("DBSnapshot", remote_side=[id], backref="children")
 
+    @property
+    def documents(self) -> dict:
+        """
+        {"manual_report", "full_report", "ai_Competencies"}. Delta snapshots have them
+        once db/snapshot_delta.py has reconstructed them; db/snapshot.py does that
+        for every snapshot it returns.
+        """
+        documents = self.__dict__.get("_documents")
+        if documents is not None:
+            return documents
+        if self.delta is None:
+            return {name: getattr(self, f"stored_{name}") for name in SNAPSHOT_DOCUMENTS}
+        raise RuntimeError(f"Documents of delta snapshot {self.id} haven't been reconstructed")
+
+    def _document(name):
+        # Reads the reconstructed document; writing stores it as a keyframe column
+        return property(
+            lambda self: self.documents[name],
+            lambda self, value: setattr(self, f"stored_{name}", value),
+        )
+
+    manual_report = _document("manual_report")
+    full_report = _document("full_report")
+    ai_Competencies = _document("ai_Competencies")
+    del _document
+
 
 class DBProcessedAssessment(Base):
     __tablename__ = "processed_assessment"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    task_id: Mapped[int] = mapped_column(ForeignKey("task.id"))
+    task_id: Mapped[int] = mapped_column(ForeignKey("task.id"), index=True)
     filtered_data: Mapped[str] = mapped_column(Text, nullable=True)
     executive_data: Mapped[str] = mapped_column(Text, nullable=True)
+    # Leading text of the uploaded document (header and first pages)
+    cover_text: Mapped[str] = mapped_column(Text, nullable=True)
 
     task = relationship("DBTask", back_populates="processed_assessments")
@@ -1,31 +1,49 @@
-from typing import Optional
+from typing import Optional, Tuple
 
+from employee_metadata import employee_metadata_cache
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
 from sqlalchemy.orm import Session
 from utils.loggers.db_logger import logger as dbLogger
 from utils.loggers.endPoint_logger import logger as ApiLogger
 
 from .models import DBProcessedAssessment, DBTask
+from .task_lookup import async_get_task_with, get_task_with
 
 
 def create_processed_assessment(
     db: Session,
     task_id: int,
     filtered_data: str,
-    executive_data: str
+    executive_data: str,
+    cover_text: Optional[str] = None,
+    employee_metadata: Optional[dict] = None
 ) -> DBProcessedAssessment:
     dbLogger.info(f"Creating processed assessment for task_id: {task_id}")
     try:
         db_processed_assessment = DBProcessedAssessment(
             task_id=task_id,
             filtered_data=filtered_data,
-            executive_data=executive_data
+            executive_data=executive_data,
+            cover_text=cover_text
         )
         
         db.add(db_processed_assessment)
+        
+        # Store the employee metadata on the task in the same transaction
+        db_task = None
+        if employee_metadata is not None:
+            db_task = db.get(DBTask, task_id)
+            if db_task is not None:
+                db_task.employee_metadata = employee_metadata
+        
         db.commit()
         db.refresh(db_processed_assessment)
         
+        if db_task is not None:
+            employee_metadata_cache.put(db_task.user_id, db_task.file_id, employee_metadata)
+            dbLogger.info(f"Stored employee metadata for task_id: {task_id}")
+        
         dbLogger.info(f"Successfully created processed assessment with id: {db_processed_assessment.id}")
         return db_processed_assessment
     except Exception as e:
@@ -68,6 +86,19 @@ def get_processed_assessment_by_task_id(
         raise
 
 
+def get_processed_assessment_by_file_id(
+    db: Session,
+    user_id: str,
+    file_id: str
+) -> Tuple[Optional[DBTask], Optional[DBProcessedAssessment]]:
+    """Get a user's task by file ID and its latest processed assessment in one query."""
+    dbLogger.info(f"Fetching task and processed assessment for file_id: {file_id}")
+    task, assessment = get_task_with(user_id, file_id, "processed_assessment", db)
+    if assessment is None:
+        dbLogger.info(f"No processed assessment found for file_id: {file_id}")
+    return task, assessment
+
+
 def update_processed_assessment(
     db: Session,
     assessment_id: int,
@@ -130,20 +161,35 @@ async def async_create_processed_assessment(
     db: AsyncSession,
     task_id: int,
     filtered_data: str,
-    executive_data: str
+    executive_data: str,
+    cover_text: Optional[str] = None,
+    employee_metadata: Optional[dict] = None
 ) -> DBProcessedAssessment:
     dbLogger.info(f"[ASYNC] Creating processed assessment for task_id: {task_id}")
     try:
         db_processed_assessment = DBProcessedAssessment(
             task_id=task_id,
             filtered_data=filtered_data,
-            executive_data=executive_data
+            executive_data=executive_data,
+            cover_text=cover_text
         )
         
         db.add(db_processed_assessment)
+        
+        # Store the employee metadata on the task in the same transaction
+        db_task = None
+        if employee_metadata is not None:
+            db_task = await db.get(DBTask, task_id)
+            if db_task is not None:
+                db_task.employee_metadata = employee_metadata
+        
         await db.commit()
         await db.refresh(db_processed_assessment)
         
+        if db_task is not None:
+            employee_metadata_cache.put(db_task.user_id, db_task.file_id, employee_metadata)
+            dbLogger.info(f"[ASYNC] Stored employee metadata for task_id: {task_id}")
+        
         dbLogger.info(f"[ASYNC] Successfully created processed assessment with id: {db_processed_assessment.id}")
         return db_processed_assessment
     except Exception as e:
@@ -159,7 +205,7 @@ async def async_get_processed_assessment_by_id(
     dbLogger.info(f"[ASYNC] Fetching processed assessment by id: {assessment_id}")
     try:
         result = await db.execute(
-            db.query(DBProcessedAssessment).filter(DBProcessedAssessment.id == assessment_id)
+            select(DBProcessedAssessment).filter(DBProcessedAssessment.id == assessment_id)
         )
         assessment = result.scalars().first()
         
@@ -180,7 +226,9 @@ async def async_get_processed_assessment_by_task_id(
     dbLogger.info(f"[ASYNC] Fetching processed assessment by task_id: {task_id}")
     try:
         result = await db.execute(
-            db.query(DBProcessedAssessment).filter(DBProcessedAssessment.task_id == task_id)
+            select(DBProcessedAssessment)
+            .filter(DBProcessedAssessment.task_id == task_id)
+            .order_by(DBProcessedAssessment.id.desc())
         )
         assessment = result.scalars().first()
         
@@ -194,6 +242,19 @@ async def async_get_processed_assessment_by_task_id(
         raise
 
 
+async def async_get_processed_assessment_by_file_id(
+    db: AsyncSession,
+    user_id: str,
+    file_id: str
+) -> Tuple[Optional[DBTask], Optional[DBProcessedAssessment]]:
+    """Async version of get_processed_assessment_by_file_id"""
+    dbLogger.info(f"[ASYNC] Fetching task and processed assessment for file_id: {file_id}")
+    task, assessment = await async_get_task_with(user_id, file_id, "processed_assessment", db)
+    if assessment is None:
+        dbLogger.info(f"[ASYNC] No processed assessment found for file_id: {file_id}")
+    return task, assessment
+
+
 async def async_update_processed_assessment(
     db: AsyncSession,
     assessment_id: int,
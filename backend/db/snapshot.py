@@ -8,7 +8,12 @@ from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 from utils.loggers.db_logger import logger as dbLogger
 
+from .core import NotFoundError
 from .models import DBSnapshot, DBTask
+from .snapshot_listing import DEFAULT_PAGE_SIZE, page_from_rows, snapshot_summaries_statement
+from .snapshot_delta import (async_detach_children, async_load_documents, async_load_many, detach_children,
+                             document_cache, encode_snapshot, load_documents, load_many)
+from .task_lookup import async_get_task_with, get_task_with
 
 
 class SortedBy(BaseModel):
@@ -31,6 +36,24 @@ class SnapshotCreate(BaseModel):
     full_report: SnapshotReport
     ai_Competencies: SnapshotReport
 
+def _documents(data: SnapshotCreate) -> Dict[str, Any]:
+    return {
+        "manual_report": data.manual_report.model_dump(),
+        "full_report": data.full_report.model_dump(),
+        "ai_Competencies": data.ai_Competencies.model_dump(),
+    }
+
+def _loaded(session: Session, snapshot: Optional[DBSnapshot]) -> Optional[DBSnapshot]:
+    # Snapshots are returned with their documents reconstructed from the deltas
+    if snapshot is not None:
+        load_documents(session, snapshot)
+    return snapshot
+
+async def _async_loaded(db: AsyncSession, snapshot: Optional[DBSnapshot]) -> Optional[DBSnapshot]:
+    if snapshot is not None:
+        await async_load_documents(db, snapshot)
+    return snapshot
+
 def create_snapshot(
     session: Session,
     data: SnapshotCreate,
@@ -40,16 +63,18 @@ def create_snapshot(
     snapshot = DBSnapshot(
         task_id=data.task_id,
         snapshot_name= data.snapshot_name,
-        manual_report=data.manual_report.model_dump(),
-        full_report=data.full_report.model_dump(),
-        ai_Competencies=data.ai_Competencies.model_dump(),
         trigger_type=trigger_type,
         parent_id=parent_id,
     )
+    # Stored as a delta against the parent where that is small
+    parent = _loaded(session, session.get(DBSnapshot, parent_id)) if parent_id else None
+    documents = _documents(data)
+    encode_snapshot(snapshot, documents, parent, parent.documents if parent else None)
     session.add(snapshot)
     session.commit()
     session.refresh(snapshot)
-    dbLogger.info(f"created snapshot for task id: {data.task_id}")
+    document_cache.put(snapshot.id, documents)
+    dbLogger.info(f"created snapshot for task id: {data.task_id} (keyframe distance: {snapshot.keyframe_distance})")
     return snapshot
 
 def get_latest_snapshot(session: Session, task_id: int) -> Optional[DBSnapshot]:
@@ -60,7 +85,7 @@ def get_latest_snapshot(session: Session, task_id: int) -> Optional[DBSnapshot]:
         .first()
     )
     dbLogger.info(f"Retrieved latest snapshot for task id: {task_id}")
-    return snapshot
+    return _loaded(session, snapshot)
 
 def get_snapshot_by_id(session: Session, snapshot_id: int) -> Optional[DBSnapshot]:
     snapshot = session.get(DBSnapshot, snapshot_id)
@@ -68,7 +93,7 @@ def get_snapshot_by_id(session: Session, snapshot_id: int) -> Optional[DBSnapsho
         dbLogger.info(f"Retrieved snapshot by id: {snapshot_id}")
     else:
         dbLogger.warning(f"Snapshot with id {snapshot_id} not found")
-    return snapshot
+    return _loaded(session, snapshot)
 
 def get_snapshot_history(
     session: Session, 
@@ -88,6 +113,7 @@ def get_snapshot_history(
         query = query.offset(offset)
     
     snapshots = query.all()
+    load_many(session, snapshots)
     dbLogger.info(f"Retrieved {len(snapshots)} snapshots from history for task id: {task_id} (limit: {limit}, offset: {offset})")
     return snapshots
 
@@ -109,17 +135,29 @@ def restore_snapshot(session: Session, task_id: int, snapshot_id: int) -> DBSnap
     task.current_snapshot_id = snapshot.id
     session.commit()
     dbLogger.info(f"Restored snapshot id: {snapshot_id} for task id: {task_id}")
-    return snapshot
+    return _loaded(session, snapshot)
 
 def get_current_snapshot(session: Session, task_id: int) -> Optional[DBSnapshot]:
     task = session.get(DBTask, task_id)
     if task and task.current_snapshot_id:
         snapshot = session.get(DBSnapshot, task.current_snapshot_id)
         dbLogger.info(f"Retrieved current snapshot id: {task.current_snapshot_id} for task id: {task_id}")
-        return snapshot
+        return _loaded(session, snapshot)
     dbLogger.info(f"No current snapshot found for task id: {task_id}")
     return None
 
+def get_current_snapshot_by_file_id(session: Session, user_id: str, file_id: str) -> Tuple[DBTask, Optional[DBSnapshot]]:
+    """Get a user's task by file ID and its current snapshot in one query."""
+    task, snapshot = get_task_with(user_id, file_id, "current_snapshot", session)
+    if task is None:
+        dbLogger.warning(f"Task with file_id: {file_id} not found for user: {user_id}")
+        raise NotFoundError(f"Task with file id:{file_id} not found.")
+    if snapshot:
+        dbLogger.info(f"Retrieved current snapshot id: {snapshot.id} for task id: {task.id}")
+    else:
+        dbLogger.info(f"No current snapshot found for task id: {task.id}")
+    return task, _loaded(session, snapshot)
+
 def undo_snapshot(session: Session, task_id: int) -> Optional[DBSnapshot]:
     current = get_current_snapshot(session, task_id)
     if current and current.parent_id:
@@ -150,7 +188,7 @@ def redo_snapshot(session: Session, task_id: int) -> Optional[DBSnapshot]:
             try:
                 restore_snapshot(session, task_id, next_snapshot.id)
                 dbLogger.info(f"Successfully redid to snapshot id: {next_snapshot.id} for task id: {task_id}")
-                return next_snapshot
+                return _loaded(session, next_snapshot)
             except HTTPException as e:
                 dbLogger.error(f"Failed to redo snapshot for task id: {task_id}: {str(e)}")
                 return None
@@ -160,6 +198,29 @@ def redo_snapshot(session: Session, task_id: int) -> Optional[DBSnapshot]:
         dbLogger.warning(f"Cannot redo snapshot for task id: {task_id}: No current snapshot")
     return None
 
+def get_snapshot_summaries(
+    session: Session,
+    task_id: int,
+    trigger_type: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None
+) -> Tuple[List[DBSnapshot], Optional[str]]:
+    """
+    Get a page of a task's snapshots without their documents, newest first.
+
+    Args:
+        trigger_type: Only snapshots of this type, e.g. "manual"
+        limit: Page size
+        cursor: next_cursor of the previous page
+
+    Returns:
+        (snapshots, next_cursor); next_cursor is None on the last page
+    """
+    rows = session.execute(snapshot_summaries_statement(task_id, trigger_type, limit, cursor)).scalars().all()
+    snapshots, next_cursor = page_from_rows(rows, limit)
+    dbLogger.info(f"Retrieved {len(snapshots)} snapshot summaries for task id: {task_id} (trigger_type: {trigger_type}, limit: {limit})")
+    return snapshots, next_cursor
+
 def get_manual_snapshots(
     session: Session, 
     task_id: int,
@@ -178,6 +239,7 @@ def get_manual_snapshots(
         query = query.offset(offset)
     
     snapshots = query.all()
+    load_many(session, snapshots)
     dbLogger.info(f"Retrieved {len(snapshots)} manual snapshots for task id: {task_id} (limit: {limit}, offset: {offset})")
     return snapshots
 
@@ -200,6 +262,7 @@ def get_snapshots_by_type(
         query = query.offset(offset)
     
     snapshots = query.all()
+    load_many(session, snapshots)
     dbLogger.info(f"Retrieved {len(snapshots)} snapshots of type '{trigger_type}' for task id: {task_id} (limit: {limit}, offset: {offset})")
     return snapshots
 
@@ -231,6 +294,10 @@ def delete_snapshot(session: Session, snapshot_id: int) -> bool:
         task.current_snapshot_id = snapshot.parent_id
         dbLogger.info(f"Updated current snapshot for task id: {task_id} to parent id: {snapshot.parent_id}")
     
+    # Children stored as deltas against this snapshot become keyframes
+    detached = detach_children(session, snapshot)
+    if detached:
+        dbLogger.info(f"Stored {detached} children of snapshot id: {snapshot_id} as keyframes")
     session.delete(snapshot)
     session.commit()
     dbLogger.info(f"Deleted snapshot id: {snapshot_id} for task id: {task_id}")
@@ -249,6 +316,7 @@ def get_snapshot_with_children(
         .order_by(DBSnapshot.created_at)
         .all()
     )
+    load_many(session, [snapshot, *children])
     
     return snapshot, children
 
@@ -271,16 +339,18 @@ async def async_create_snapshot(
     snapshot = DBSnapshot(
         task_id=data.task_id,
         snapshot_name=data.snapshot_name,
-        manual_report=data.manual_report.model_dump(),
-        full_report=data.full_report.model_dump(),
-        ai_Competencies=data.ai_Competencies.model_dump(),
         trigger_type=trigger_type,
         parent_id=parent_id,
     )
+    # Stored as a delta against the parent where that is small
+    parent = await _async_loaded(db, await db.get(DBSnapshot, parent_id)) if parent_id else None
+    documents = _documents(data)
+    encode_snapshot(snapshot, documents, parent, parent.documents if parent else None)
     db.add(snapshot)
     await db.commit()
     await db.refresh(snapshot)
-    dbLogger.info(f"[ASYNC] Created snapshot for task id: {data.task_id}")
+    document_cache.put(snapshot.id, documents)
+    dbLogger.info(f"[ASYNC] Created snapshot for task id: {data.task_id} (keyframe distance: {snapshot.keyframe_distance})")
     return snapshot
 
 async def async_get_latest_snapshot(db: AsyncSession, task_id: int) -> Optional[DBSnapshot]:
@@ -293,7 +363,7 @@ async def async_get_latest_snapshot(db: AsyncSession, task_id: int) -> Optional[
     result = await db.execute(stmt)
     snapshot = result.scalars().first()
     dbLogger.info(f"[ASYNC] Retrieved latest snapshot for task id: {task_id}")
-    return snapshot
+    return await _async_loaded(db, snapshot)
 
 async def async_get_snapshot_by_id(db: AsyncSession, snapshot_id: int) -> Optional[DBSnapshot]:
     """Async version of get_snapshot_by_id"""
@@ -302,7 +372,7 @@ async def async_get_snapshot_by_id(db: AsyncSession, snapshot_id: int) -> Option
         dbLogger.info(f"[ASYNC] Retrieved snapshot by id: {snapshot_id}")
     else:
         dbLogger.warning(f"[ASYNC] Snapshot with id {snapshot_id} not found")
-    return snapshot
+    return await _async_loaded(db, snapshot)
 
 async def async_get_snapshot_history(
     db: AsyncSession, 
@@ -324,6 +394,7 @@ async def async_get_snapshot_history(
     
     result = await db.execute(stmt)
     snapshots = result.scalars().all()
+    await async_load_many(db, snapshots)
     dbLogger.info(f"[ASYNC] Retrieved {len(list(snapshots))} snapshots from history for task id: {task_id} (limit: {limit}, offset: {offset})")
     return snapshots
 
@@ -346,7 +417,7 @@ async def async_restore_snapshot(db: AsyncSession, task_id: int, snapshot_id: in
     task.current_snapshot_id = snapshot.id
     await db.commit()
     dbLogger.info(f"[ASYNC] Restored snapshot id: {snapshot_id} for task id: {task_id}")
-    return snapshot
+    return await _async_loaded(db, snapshot)
 
 async def async_get_current_snapshot(db: AsyncSession, task_id: int) -> Optional[DBSnapshot]:
     """Async version of get_current_snapshot"""
@@ -354,10 +425,22 @@ async def async_get_current_snapshot(db: AsyncSession, task_id: int) -> Optional
     if task and task.current_snapshot_id:
         snapshot = await db.get(DBSnapshot, task.current_snapshot_id)
         dbLogger.info(f"[ASYNC] Retrieved current snapshot id: {task.current_snapshot_id} for task id: {task_id}")
-        return snapshot
+        return await _async_loaded(db, snapshot)
     dbLogger.info(f"[ASYNC] No current snapshot found for task id: {task_id}")
     return None
 
+async def async_get_current_snapshot_by_file_id(db: AsyncSession, user_id: str, file_id: str) -> Tuple[DBTask, Optional[DBSnapshot]]:
+    """Async version of get_current_snapshot_by_file_id"""
+    task, snapshot = await async_get_task_with(user_id, file_id, "current_snapshot", db)
+    if task is None:
+        dbLogger.warning(f"[ASYNC] Task with file_id: {file_id} not found for user: {user_id}")
+        raise NotFoundError(f"Task with file id:{file_id} not found.")
+    if snapshot:
+        dbLogger.info(f"[ASYNC] Retrieved current snapshot id: {snapshot.id} for task id: {task.id}")
+    else:
+        dbLogger.info(f"[ASYNC] No current snapshot found for task id: {task.id}")
+    return task, await _async_loaded(db, snapshot)
+
 async def async_undo_snapshot(db: AsyncSession, task_id: int) -> Optional[DBSnapshot]:
     """Async version of undo_snapshot"""
     current = await async_get_current_snapshot(db, task_id)
@@ -392,7 +475,7 @@ async def async_redo_snapshot(db: AsyncSession, task_id: int) -> Optional[DBSnap
             try:
                 await async_restore_snapshot(db, task_id, next_snapshot.id)
                 dbLogger.info(f"[ASYNC] Successfully redid to snapshot id: {next_snapshot.id} for task id: {task_id}")
-                return next_snapshot
+                return await _async_loaded(db, next_snapshot)
             except HTTPException as e:
                 dbLogger.error(f"[ASYNC] Failed to redo snapshot for task id: {task_id}: {str(e)}")
                 return None
@@ -402,6 +485,19 @@ async def async_redo_snapshot(db: AsyncSession, task_id: int) -> Optional[DBSnap
         dbLogger.warning(f"[ASYNC] Cannot redo snapshot for task id: {task_id}: No current snapshot")
     return None
 
+async def async_get_snapshot_summaries(
+    db: AsyncSession,
+    task_id: int,
+    trigger_type: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None
+) -> Tuple[List[DBSnapshot], Optional[str]]:
+    """Async version of get_snapshot_summaries"""
+    result = await db.execute(snapshot_summaries_statement(task_id, trigger_type, limit, cursor))
+    snapshots, next_cursor = page_from_rows(result.scalars().all(), limit)
+    dbLogger.info(f"[ASYNC] Retrieved {len(snapshots)} snapshot summaries for task id: {task_id} (trigger_type: {trigger_type}, limit: {limit})")
+    return snapshots, next_cursor
+
 async def async_get_manual_snapshots(
     db: AsyncSession, 
     task_id: int,
@@ -422,6 +518,7 @@ async def async_get_manual_snapshots(
     
     result = await db.execute(stmt)
     snapshots = result.scalars().all()
+    await async_load_many(db, snapshots)
     dbLogger.info(f"[ASYNC] Retrieved {len(list(snapshots))} manual snapshots for task id: {task_id} (limit: {limit}, offset: {offset})")
     return snapshots
 
@@ -446,6 +543,7 @@ async def async_get_snapshots_by_type(
     
     result = await db.execute(stmt)
     snapshots = result.scalars().all()
+    await async_load_many(db, snapshots)
     dbLogger.info(f"[ASYNC] Retrieved {len(list(snapshots))} snapshots of type '{trigger_type}' for task id: {task_id} (limit: {limit}, offset: {offset})")
     return snapshots
 
@@ -481,6 +579,10 @@ async def async_delete_snapshot(db: AsyncSession, snapshot_id: int) -> bool:
         task.current_snapshot_id = snapshot.parent_id
         dbLogger.info(f"[ASYNC] Updated current snapshot for task id: {task_id} to parent id: {snapshot.parent_id}")
     
+    # Children stored as deltas against this snapshot become keyframes
+    detached = await async_detach_children(db, snapshot)
+    if detached:
+        dbLogger.info(f"[ASYNC] Stored {detached} children of snapshot id: {snapshot_id} as keyframes")
     await db.delete(snapshot)
     await db.commit()
     dbLogger.info(f"[ASYNC] Deleted snapshot id: {snapshot_id} for task id: {task_id}")
@@ -501,6 +603,7 @@ async def async_get_snapshot_with_children(
     )
     result = await db.execute(stmt)
     children = result.scalars().all()
+    await async_load_many(db, [snapshot, *children])
     
     return snapshot, children
 
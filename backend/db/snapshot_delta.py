@@ -0,0 +1,248 @@
+"""
+Delta-encoded snapshot storage for the undo tree.
+
+Snapshots are mostly small edits of their parent, so only every
+KEYFRAME_INTERVAL-th snapshot along a parent_id chain stores its documents in
+full. The others store a JSON Patch from their parent's documents. A snapshot
+whose patch would be nearly as large as the documents is stored as a keyframe
+too.
+
+Reading a delta snapshot fetches its chain back to the nearest keyframe with
+one recursive query and applies the patches in order. Reconstructed documents
+are kept in an in-process LRU cache keyed by snapshot id. A snapshot's
+documents never change, so the cache needs no invalidation across workers,
+and a walk stops at the first cached ancestor.
+
+Deleting a snapshot first turns its delta children into keyframes, so no
+snapshot depends on a deleted one.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from utils.json_patch import apply_patch, make_patch
+from utils.loggers.db_logger import logger as dbLogger
+
+from .models import SNAPSHOT_DOCUMENTS, DBSnapshot
+
+# Longest run of deltas before a snapshot is stored in full again
+KEYFRAME_INTERVAL = 16
+
+# A delta larger than this fraction of the full documents is stored as a keyframe instead
+MAX_DELTA_RATIO = 0.5
+
+# Reconstructed snapshots kept in memory per worker
+DOCUMENT_CACHE_SIZE = 512
+
+
+class SnapshotDocumentCache:
+    """Thread-safe LRU cache of reconstructed documents by snapshot id."""
+    def __init__(self, max_entries: int = DOCUMENT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, snapshot_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            documents = self._entries.get(snapshot_id)
+            if documents is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(snapshot_id)
+            self.stats["hits"] += 1
+            return documents
+
+    def put(self, snapshot_id: int, documents: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[snapshot_id] = documents
+            self._entries.move_to_end(snapshot_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, snapshot_id: int) -> None:
+        with self._lock:
+            self._entries.pop(snapshot_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+document_cache = SnapshotDocumentCache()
+
+
+def _set_documents(snapshot: DBSnapshot, documents: Dict[str, Any]) -> Dict[str, Any]:
+    # Not a mapped attribute, so the session doesn't write it back
+    snapshot.__dict__["_documents"] = documents
+    return documents
+
+
+def encode_snapshot(snapshot: DBSnapshot, documents: Dict[str, Any],
+                    parent: Optional[DBSnapshot] = None,
+                    parent_documents: Optional[Dict[str, Any]] = None) -> DBSnapshot:
+    """
+    Store a new snapshot's documents as a delta against its parent, or in full.
+
+    Args:
+        snapshot: The new, unsaved snapshot
+        documents: Its {"manual_report", "full_report", "ai_Competencies"}
+        parent: The parent snapshot, if any
+        parent_documents: The parent's documents
+    """
+    delta = None
+    if (parent is not None and parent_documents is not None and parent.task_id == snapshot.task_id
+            and parent.keyframe_distance + 1 < KEYFRAME_INTERVAL):
+        patch = make_patch(parent_documents, documents)
+        if len(orjson.dumps(patch)) <= MAX_DELTA_RATIO * len(orjson.dumps(documents)):
+            delta = patch
+
+    if delta is None:
+        for name in SNAPSHOT_DOCUMENTS:
+            setattr(snapshot, f"stored_{name}", documents[name])
+        snapshot.delta = None
+        snapshot.keyframe_distance = 0
+    else:
+        for name in SNAPSHOT_DOCUMENTS:
+            setattr(snapshot, f"stored_{name}", None)
+        snapshot.delta = delta
+        snapshot.keyframe_distance = parent.keyframe_distance + 1
+    _set_documents(snapshot, documents)
+    return snapshot
+
+
+def _stored_documents(row) -> Dict[str, Any]:
+    return {name: getattr(row, f"stored_{name}") for name in SNAPSHOT_DOCUMENTS}
+
+
+def _documents_without_query(snapshot: DBSnapshot) -> Optional[Dict[str, Any]]:
+    """The documents if the snapshot is a keyframe, cached, or a delta on a cached parent."""
+    documents = snapshot.__dict__.get("_documents") or document_cache.get(snapshot.id)
+    if documents is None:
+        if snapshot.delta is None:
+            documents = _stored_documents(snapshot)
+        else:
+            parent_documents = document_cache.get(snapshot.parent_id)
+            if parent_documents is None:
+                return None
+            documents = apply_patch(parent_documents, snapshot.delta)
+        document_cache.put(snapshot.id, documents)
+    return _set_documents(snapshot, documents)
+
+
+def chain_statement(snapshot_id: int):
+    """The snapshot and its ancestors back to the nearest keyframe, in one recursive query"""
+    columns = lambda model: (
+        model.id, model.parent_id, model.keyframe_distance, model.delta,
+        *(getattr(model, f"stored_{name}").label(f"stored_{name}") for name in SNAPSHOT_DOCUMENTS),
+    )
+    chain = select(*columns(DBSnapshot)).filter(DBSnapshot.id == snapshot_id).cte("snapshot_chain", recursive=True)
+    ancestor = aliased(DBSnapshot)
+    chain = chain.union_all(
+        select(*columns(ancestor)).join(chain, ancestor.id == chain.c.parent_id).filter(chain.c.keyframe_distance > 0)
+    )
+    return select(chain)
+
+
+def documents_from_chain(snapshot_id: int, rows: Iterable[Any]) -> Dict[str, Any]:
+    """Reconstruct a snapshot's documents from the rows of chain_statement, caching every step."""
+    by_id = {row.id: row for row in rows}
+    path = []
+    row = by_id.get(snapshot_id)
+    while True:
+        if row is None:
+            raise ValueError(f"Snapshot chain of {snapshot_id} is broken at {path[-1].parent_id if path else snapshot_id}")
+        documents = document_cache.get(row.id)
+        if documents is not None:
+            break
+        if row.delta is None:
+            documents = _stored_documents(row)
+            document_cache.put(row.id, documents)
+            break
+        path.append(row)
+        row = by_id.get(row.parent_id)
+
+    for row in reversed(path):
+        documents = apply_patch(documents, row.delta)
+        document_cache.put(row.id, documents)
+    if path:
+        dbLogger.debug(f"Reconstructed snapshot {snapshot_id} from {len(path)} deltas")
+    return documents
+
+
+def load_documents(session: Session, snapshot: DBSnapshot) -> Dict[str, Any]:
+    """Reconstruct the documents of a snapshot, querying its chain only when needed."""
+    documents = _documents_without_query(snapshot)
+    if documents is None:
+        rows = session.execute(chain_statement(snapshot.id)).all()
+        documents = _set_documents(snapshot, documents_from_chain(snapshot.id, rows))
+    return documents
+
+
+async def async_load_documents(db: AsyncSession, snapshot: DBSnapshot) -> Dict[str, Any]:
+    """Async version of load_documents"""
+    documents = _documents_without_query(snapshot)
+    if documents is None:
+        result = await db.execute(chain_statement(snapshot.id))
+        documents = _set_documents(snapshot, documents_from_chain(snapshot.id, result.all()))
+    return documents
+
+
+def _oldest_first(snapshots: Iterable[Optional[DBSnapshot]]) -> List[DBSnapshot]:
+    # Parents are reconstructed before their children, which then need no query
+    return sorted((s for s in snapshots if s is not None), key=lambda s: (s.keyframe_distance, s.id))
+
+
+def load_many(session: Session, snapshots: Iterable[Optional[DBSnapshot]]) -> None:
+    """Reconstruct the documents of several snapshots, e.g. a history page."""
+    for snapshot in _oldest_first(snapshots):
+        load_documents(session, snapshot)
+
+
+async def async_load_many(db: AsyncSession, snapshots: Iterable[Optional[DBSnapshot]]) -> None:
+    """Async version of load_many"""
+    for snapshot in _oldest_first(snapshots):
+        await async_load_documents(db, snapshot)
+
+
+def _make_keyframe(child: DBSnapshot, documents: Dict[str, Any]) -> None:
+    for name in SNAPSHOT_DOCUMENTS:
+        setattr(child, f"stored_{name}", documents[name])
+    child.delta = None
+    child.keyframe_distance = 0
+
+
+def detach_children(session: Session, snapshot: DBSnapshot) -> int:
+    """
+    Store the delta children of a snapshot about to be deleted as keyframes.
+
+    Returns:
+        The number of children rewritten
+    """
+    children = session.execute(
+        select(DBSnapshot).filter(DBSnapshot.parent_id == snapshot.id, DBSnapshot.delta.is_not(None))
+    ).scalars().all()
+    if children:
+        load_documents(session, snapshot)
+    for child in children:
+        _make_keyframe(child, load_documents(session, child))
+    document_cache.discard(snapshot.id)
+    return len(children)
+
+
+async def async_detach_children(db: AsyncSession, snapshot: DBSnapshot) -> int:
+    """Async version of detach_children"""
+    result = await db.execute(
+        select(DBSnapshot).filter(DBSnapshot.parent_id == snapshot.id, DBSnapshot.delta.is_not(None))
+    )
+    children = result.scalars().all()
+    if children:
+        await async_load_documents(db, snapshot)
+    for child in children:
+        _make_keyframe(child, await async_load_documents(db, child))
+    document_cache.discard(snapshot.id)
+    return len(children)
@@ -0,0 +1,65 @@
+"""
+Metadata-only snapshot listings with keyset pagination.
+
+The history, manual and by-type endpoints return every snapshot with its three
+report documents. Listings only need the names, dates and tree links, so these
+statements load those columns and leave the documents and deltas unloaded.
+Accessing them raises instead of querying. Pages are ordered newest first by
+(created_at, id) and continue after a cursor holding the last row's key. A
+page costs the same however deep into the history it is, unlike OFFSET.
+"""
+import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import desc, select, tuple_
+from sqlalchemy.orm import load_only
+
+from .models import DBSnapshot
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+SUMMARY_COLUMNS = (
+    DBSnapshot.id, DBSnapshot.task_id, DBSnapshot.snapshot_name, DBSnapshot.created_at,
+    DBSnapshot.parent_id, DBSnapshot.trigger_type,
+)
+
+
+def encode_cursor(snapshot: DBSnapshot) -> str:
+    """Opaque cursor of the position after a snapshot"""
+    return f"{snapshot.created_at.isoformat()}_{snapshot.id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+    """
+    Raises:
+        ValueError: If the cursor wasn't made by encode_cursor
+    """
+    created_at, _, snapshot_id = cursor.rpartition("_")
+    return datetime.datetime.fromisoformat(created_at), int(snapshot_id)
+
+
+def snapshot_summaries_statement(task_id: int, trigger_type: Optional[str] = None,
+                                 limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None):
+    """
+    A page of a task's snapshots without their documents, newest first.
+
+    One row more than the page size is selected, to tell whether another page follows.
+    """
+    stmt = (
+        select(DBSnapshot)
+        .options(load_only(*SUMMARY_COLUMNS, raiseload=True))
+        .filter(DBSnapshot.task_id == task_id)
+    )
+    if trigger_type:
+        stmt = stmt.filter(DBSnapshot.trigger_type == trigger_type)
+    if cursor:
+        stmt = stmt.filter(tuple_(DBSnapshot.created_at, DBSnapshot.id) < tuple_(*decode_cursor(cursor)))
+    return stmt.order_by(desc(DBSnapshot.created_at), desc(DBSnapshot.id)).limit(limit + 1)
+
+
+def page_from_rows(snapshots: Sequence[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """Split the selected rows into the page and the cursor of the next page, if any."""
+    page = list(snapshots[:limit])
+    next_cursor = encode_cursor(page[-1]) if len(snapshots) > limit else None
+    return page, next_cursor
@@ -0,0 +1,65 @@
+"""
+Server-side extraction of parts of the feedback and advice JSONB documents.
+
+Endpoints that need one category of the feedback or one stakeholder's entries
+select just that sub-document, so the rest of the document never leaves the
+database. Lookups across tasks by stakeholder name use the `?` operator on the
+expressions covered by the GIN indexes declared on DBFeedBack and DBAdvice.
+"""
+from sqlalchemy import literal_column, or_, select
+from sqlalchemy.dialects.postgresql import JSONB
+
+from .models import DBAdvice, DBFeedBack, DBTask
+from .task_lookup import related_value_statement
+
+FEEDBACK_CATEGORIES = ("strengths", "areas_to_target")
+
+
+def feedback_category(category: str):
+    """
+    feedback -> category, with the key written inline like the index expressions,
+    so the planner matches them even for prepared statements.
+    """
+    if category not in FEEDBACK_CATEGORIES:
+        raise ValueError(f"Unknown feedback category: {category}")
+    return DBFeedBack.feedback.op("->", return_type=JSONB)(literal_column(f"'{category}'"))
+
+
+def feedback_category_statement(user_id: str, file_id: str, category: str):
+    """(task id, feedback id, category) of a task's latest feedback"""
+    return related_value_statement(user_id, file_id, "feedback", feedback_category(category))
+
+
+def stakeholder_feedback_statement(user_id: str, file_id: str, stakeholder: str):
+    """(task id, feedback id, entry in each of FEEDBACK_CATEGORIES) of a task's latest feedback"""
+    return related_value_statement(
+        user_id, file_id, "feedback", *(feedback_category(c)[stakeholder] for c in FEEDBACK_CATEGORIES)
+    )
+
+
+def stakeholder_advice_statement(user_id: str, file_id: str, stakeholder: str):
+    """(task id, advice id, stakeholder's advice) of a task's latest advice"""
+    return related_value_statement(user_id, file_id, "advice", DBAdvice.advice[stakeholder])
+
+
+def feedback_file_ids_statement(user_id: str, stakeholder: str):
+    """File ids of a user's tasks whose feedback quotes the stakeholder in either category"""
+    return (
+        select(DBTask.file_id)
+        .join(DBFeedBack, DBFeedBack.task_id == DBTask.id)
+        .filter(
+            DBTask.user_id == user_id,
+            or_(*(feedback_category(c).has_key(stakeholder) for c in FEEDBACK_CATEGORIES)),
+        )
+        .distinct()
+    )
+
+
+def advice_file_ids_statement(user_id: str, stakeholder: str):
+    """File ids of a user's tasks with advice from the stakeholder"""
+    return (
+        select(DBTask.file_id)
+        .join(DBAdvice, DBAdvice.task_id == DBTask.id)
+        .filter(DBTask.user_id == user_id, DBAdvice.advice.has_key(stakeholder))
+        .distinct()
+    )
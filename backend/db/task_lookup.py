@@ -0,0 +1,165 @@
+"""
+Task lookups with their related rows in one round trip.
+
+Nearly every request finds its task by (user_id, file_id) and then reads a row
+that belongs to it: the feedback, the advice, the processed assessment or the
+current snapshot. These helpers fetch the task and that row with one joined
+query, and remember the task in the session's info dict. The session lives for
+one request, so later lookups of the same task in that request don't query the
+database again. The remembered tasks are dropped when the session rolls back or
+the task is deleted.
+"""
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from utils.loggers.db_logger import logger as dbLogger
+
+from .models import DBAdvice, DBFeedBack, DBProcessedAssessment, DBSnapshot, DBTask
+
+# Key of the {(user_id, file_id): DBTask} dict in Session.info
+TASKS_INFO_KEY = "tasks_by_user_and_file_id"
+
+# Rows fetched together with their task: (model, join condition); the latest row is used
+# when a task has several
+TASK_RELATED = {
+    "feedback": (DBFeedBack, DBFeedBack.task_id == DBTask.id),
+    "advice": (DBAdvice, DBAdvice.task_id == DBTask.id),
+    "processed_assessment": (DBProcessedAssessment, DBProcessedAssessment.task_id == DBTask.id),
+    "current_snapshot": (DBSnapshot, DBSnapshot.id == DBTask.current_snapshot_id),
+}
+
+
+def _tasks(session) -> dict:
+    return session.info.setdefault(TASKS_INFO_KEY, {})
+
+
+def remembered_task(session, user_id: str, file_id: str) -> Optional[DBTask]:
+    """Task already loaded by this session, if any"""
+    return session.info.get(TASKS_INFO_KEY, {}).get((user_id, file_id))
+
+
+def remember_task(session, task: DBTask) -> DBTask:
+    _tasks(session)[(task.user_id, task.file_id)] = task
+    return task
+
+
+def forget_task(session, user_id: str, file_id: str) -> None:
+    session.info.get(TASKS_INFO_KEY, {}).pop((user_id, file_id), None)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_tasks_on_rollback(session, previous_transaction):
+    # Rolled back objects are expired; reloading one lazily isn't possible on an async session
+    session.info.pop(TASKS_INFO_KEY, None)
+
+
+def task_statement(user_id: str, file_id: str):
+    return select(DBTask).filter(DBTask.file_id == file_id, DBTask.user_id == user_id)
+
+
+def task_with_related_statement(user_id: str, file_id: str, related: str):
+    """The task and its related row, which is None when the task has none"""
+    model, condition = TASK_RELATED[related]
+    return (
+        select(DBTask, model)
+        .outerjoin(model, condition)
+        .filter(DBTask.file_id == file_id, DBTask.user_id == user_id)
+        .order_by(model.id.desc().nulls_last())
+        .limit(1)
+    )
+
+
+def related_value_statement(user_id: str, file_id: str, related: str, *values):
+    """
+    The task id, the related row's id and values computed server-side from that row.
+
+    Selecting parts of a JSONB document here keeps the rest of it in the database.
+    The row's id is None when the task has no related row.
+    """
+    model, condition = TASK_RELATED[related]
+    return (
+        select(DBTask.id, model.id, *values)
+        .select_from(DBTask)
+        .outerjoin(model, condition)
+        .filter(DBTask.file_id == file_id, DBTask.user_id == user_id)
+        .order_by(model.id.desc().nulls_last())
+        .limit(1)
+    )
+
+
+def related_statement(task: DBTask, related: str):
+    """The related row of a task that is already loaded"""
+    model, _ = TASK_RELATED[related]
+    if related == "current_snapshot":
+        return select(model).filter(model.id == task.current_snapshot_id)
+    return select(model).filter(model.task_id == task.id).order_by(model.id.desc()).limit(1)
+
+
+def get_task(user_id: str, file_id: str, session: Session) -> Optional[DBTask]:
+    """
+    Get a task by user and file id, from the session if this request already loaded it.
+
+    Returns:
+        The task, or None if it doesn't exist
+    """
+    task = remembered_task(session, user_id, file_id)
+    if task is not None:
+        return task
+    task = session.execute(task_statement(user_id, file_id)).scalars().first()
+    return None if task is None else remember_task(session, task)
+
+
+def get_task_with(user_id: str, file_id: str, related: str, session: Session) -> Tuple[Optional[DBTask], Optional[Any]]:
+    """
+    Get a task and one of its related rows in a single query.
+
+    Args:
+        user_id: Owner of the task
+        file_id: File ID of the task
+        related: "feedback", "advice", "processed_assessment" or "current_snapshot"
+        session: Database session
+
+    Returns:
+        (task, row); the task is None if it doesn't exist, the row is None if the task has none
+    """
+    task = remembered_task(session, user_id, file_id)
+    if task is not None:
+        if related == "current_snapshot" and task.current_snapshot_id is None:
+            return task, None
+        return task, session.execute(related_statement(task, related)).scalars().first()
+
+    row = session.execute(task_with_related_statement(user_id, file_id, related)).first()
+    if row is None:
+        dbLogger.debug(f"No task found for user: {user_id}, file_id: {file_id}")
+        return None, None
+    return remember_task(session, row[0]), row[1]
+
+
+async def async_get_task(user_id: str, file_id: str, session: AsyncSession) -> Optional[DBTask]:
+    """Async version of get_task"""
+    task = remembered_task(session, user_id, file_id)
+    if task is not None:
+        return task
+    result = await session.execute(task_statement(user_id, file_id))
+    task = result.scalars().first()
+    return None if task is None else remember_task(session, task)
+
+
+async def async_get_task_with(user_id: str, file_id: str, related: str,
+                              session: AsyncSession) -> Tuple[Optional[DBTask], Optional[Any]]:
+    """Async version of get_task_with"""
+    task = remembered_task(session, user_id, file_id)
+    if task is not None:
+        if related == "current_snapshot" and task.current_snapshot_id is None:
+            return task, None
+        result = await session.execute(related_statement(task, related))
+        return task, result.scalars().first()
+
+    result = await session.execute(task_with_related_statement(user_id, file_id, related))
+    row = result.first()
+    if row is None:
+        dbLogger.debug(f"[ASYNC] No task found for user: {user_id}, file_id: {file_id}")
+        return None, None
+    return remember_task(session, row[0]), row[1]
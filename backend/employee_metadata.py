@@ -0,0 +1,101 @@
+"""
+Employee metadata extracted once at ingest.
+
+The employee name, report date and stakeholder roster are read from the text
+parsed during upload processing and stored on the task, so content generation
+endpoints don't have to open the generated report to find the employee's name.
+An in-process LRU keeps recently used metadata keyed by user and file id.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from generate_report_llm import extract_employee_info_async
+from utils.transcript_sections import find_interview_headers
+
+# Number of tasks whose metadata is kept in memory
+MAX_CACHED_EMPLOYEE_METADATA = 256
+
+
+def extract_stakeholder_roster(transcript: str, employee_name: Optional[str] = None) -> List[Dict[str, str]]:
+    """
+    List the stakeholders whose interviews appear in a feedback transcript.
+
+    Args:
+        transcript: The filtered feedback transcript
+        employee_name: Name of the employee, excluded from the roster
+
+    Returns:
+        List of {"name", "role"} dictionaries in order of appearance; the role is
+        empty when the interview header doesn't state it
+    """
+    roster = []
+    seen = {employee_name.lower()} if employee_name else set()
+    for _, name, role in find_interview_headers(transcript):
+        if name.lower() in seen:
+            continue
+        seen.add(name.lower())
+        roster.append({"name": name, "role": role})
+    return roster
+
+
+async def build_employee_metadata(cover_text: Optional[str], transcript: str, pdf_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extract the employee metadata stored on a task at ingest.
+
+    Args:
+        cover_text: Leading text of the uploaded document
+        transcript: The filtered feedback transcript
+        pdf_path: Path to the PDF, only read when there is no cover text
+
+    Returns:
+        Dict with employee_name, report_date and stakeholders
+    """
+    info = await extract_employee_info_async(pdf_path, "", cover_text)
+    return {
+        "employee_name": info["employee_name"],
+        "report_date": info["report_date"],
+        "stakeholders": extract_stakeholder_roster(transcript, info["employee_name"])
+    }
+
+
+class EmployeeMetadataCache:
+    """Thread-safe LRU of employee metadata keyed by (user id, file id)"""
+
+    def __init__(self, max_entries: int = MAX_CACHED_EMPLOYEE_METADATA):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str, file_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            metadata = self._entries.get((user_id, file_id))
+            if metadata is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((user_id, file_id))
+            self.hits += 1
+            return metadata
+
+    def put(self, user_id: str, file_id: str, metadata: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[(user_id, file_id)] = metadata
+            self._entries.move_to_end((user_id, file_id))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str, file_id: str) -> None:
+        with self._lock:
+            self._entries.pop((user_id, file_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+employee_metadata_cache = EmployeeMetadataCache()
@@ -32,6 +32,9 @@ AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # For custom S3-compatible storage
 
+# Coalesce duplicate generation requests across workers with Postgres advisory locks
+SINGLE_FLIGHT_ADVISORY_LOCKS = os.getenv("SINGLE_FLIGHT_ADVISORY_LOCKS", "false").lower() in ["true", "yes", "1"]
+
 # VALIDATOR FUNCTION
 def validate_env_vars(
     required_vars: list[str],
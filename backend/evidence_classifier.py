@@ -0,0 +1,226 @@
+"""
+Local pre-classification of feedback evidence to headings.
+
+Each heading is described by its own words, the competencies it maps to and a
+short keyword list per competency. Feedback items and heading descriptions are
+embedded as TF-IDF vectors and compared with one matrix product. Items whose best
+heading is similar enough, clearly ahead of the runner-up and matched on more than
+one term are assigned locally; only the remaining, ambiguous items are sent to
+Claude for sorting.
+
+A single shared word is not evidence: "the team are great investors" shares only
+"team" with Team development yet scores as high as a genuine coaching comment.
+"""
+import re
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Competencies shown for each area heading (see transform_area_evidence in main.py)
+COMPETENCY_MAPPINGS = {
+    "Strategic thinking.": ["Strategic thinking", "Business acumen", "Problem solving"],
+    "Collaborative influence.": ["Influence", "Communication", "Positive relationships"],
+    "Directive leadership.": ["Communication", "Influence", "Driving results"],
+    "Team development.": ["Develops the team", "Inspiring the team", "Positive relationships"],
+    "External presence.": ["Business acumen", "Influence", "Org savvy"],
+    "Results orientation.": ["Driving results", "Execution", "Planning"],
+    "Organizational presence.": ["Org savvy", "Influence", "Positive relationships"],
+    "Talent acceleration.": ["Develops the team", "Learning agility", "Inspiring the team"],
+    "Additional areas.": ["Other"]
+}
+
+# Words that describe each competency, used to widen heading descriptions
+COMPETENCY_KEYWORDS = {
+    "Strategic thinking": "strategy strategic vision long term big picture direction future roadmap priorities",
+    "Business acumen": "business commercial market customers financial revenue industry clients growth",
+    "Problem solving": "problems solutions analytical analysis issues complex judgment decisions",
+    "Influence": "influence persuade stakeholders buy-in convince advocate align",
+    "Communication": "communication communicates listens clear concise articulate presentations messages transparent",
+    "Positive relationships": "relationships collaborative collaboration partners trust rapport peers partnership",
+    "Driving results": "results delivers outcomes goals targets performance accountable deadlines",
+    "Develops the team": "develops coaching mentoring growth talent feedback team members careers",
+    "Inspiring the team": "inspires motivates energy morale engaged team culture",
+    "Org savvy": "organization politics navigates cross-functional senior leadership executives visibility",
+    "Execution": "execution executes follow through detail operational delivery",
+    "Planning": "planning plans organized resources timelines prioritize",
+    "Learning agility": "learning learns adapts change curious open new ideas",
+}
+
+# Minimum cosine similarity to the best heading for a local assignment
+MIN_SIMILARITY = 0.15
+
+# Minimum lead of the best heading over the runner-up for a local assignment
+MIN_MARGIN = 0.15
+
+# Minimum number of distinct terms an item shares with the best heading's description
+MIN_SHARED_TERMS = 2
+
+_STOPWORDS = {
+    "a", "about", "all", "also", "an", "and", "are", "as", "at", "be", "been", "but", "by",
+    "can", "do", "does", "for", "from", "has", "have", "he", "her", "his", "i", "in", "is",
+    "it", "its", "more", "not", "of", "on", "or", "our", "she", "so", "that", "the", "their",
+    "them", "they", "this", "to", "very", "was", "we", "what", "when", "which", "who", "will",
+    "with", "would", "you", "really", "always", "just", "other", "additional", "areas", "strengths"
+}
+
+_SUFFIXES = ("ational", "ations", "ation", "ities", "ments", "ment", "ness", "ates", "ate", "ing", "ive", "ies", "ed", "es", "ly", "s")
+
+
+def _stem(word: str) -> str:
+    """Strip common suffixes so related word forms share a token."""
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase stemmed tokens without stopwords.
+
+    Args:
+        text: The text to tokenize
+
+    Returns:
+        List of tokens
+    """
+    return [_stem(word) for word in re.findall(r"[a-z]+", text.lower()) if word not in _STOPWORDS]
+
+
+def is_fallback_heading(heading: str) -> bool:
+    """Whether a heading is the catch-all bucket that only Claude assigns to"""
+    return heading.lower().startswith("additional")
+
+
+def heading_description(heading: str) -> str:
+    """
+    Describe a heading by its words, mapped competencies and their keywords.
+
+    Headings without a competency mapping (e.g. generated strength headings) are
+    widened with the keywords of every competency whose name shares a token with them.
+
+    Args:
+        heading: The heading text
+
+    Returns:
+        The heading description
+    """
+    competencies = COMPETENCY_MAPPINGS.get(heading)
+    if competencies is None:
+        heading_tokens = set(tokenize(heading))
+        competencies = [name for name in COMPETENCY_KEYWORDS if heading_tokens & set(tokenize(name))]
+    parts = [heading]
+    for competency in competencies:
+        parts.append(competency)
+        parts.append(COMPETENCY_KEYWORDS.get(competency, ""))
+    return " ".join(parts)
+
+
+def tfidf_matrix(documents: List[List[str]]) -> np.ndarray:
+    """
+    Build L2-normalized TF-IDF vectors for tokenized documents.
+
+    Args:
+        documents: List of token lists
+
+    Returns:
+        Matrix with one row per document
+    """
+    vocabulary: Dict[str, int] = {}
+    rows, cols = [], []
+    for row, tokens in enumerate(documents):
+        for token in tokens:
+            rows.append(row)
+            cols.append(vocabulary.setdefault(token, len(vocabulary)))
+
+    counts = np.zeros((len(documents), max(len(vocabulary), 1)))
+    np.add.at(counts, (np.array(rows, dtype=int), np.array(cols, dtype=int)), 1.0)
+
+    # Smoothed inverse document frequency
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+    vectors = counts * idf
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def score_headings(texts: List[str], headings: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Score feedback texts against headings by TF-IDF cosine similarity.
+
+    Args:
+        texts: Feedback texts
+        headings: Headings that may be assigned locally
+
+    Returns:
+        Tuple of best heading index, best similarity, margin over the runner-up and
+        number of distinct terms shared with the best heading per text
+    """
+    documents = [tokenize(heading_description(heading)) for heading in headings]
+    documents += [tokenize(text) for text in texts]
+    vectors = tfidf_matrix(documents)
+
+    similarity = vectors[len(headings):] @ vectors[:len(headings)].T
+    order = np.argsort(-similarity, axis=1)
+    best = order[:, 0]
+    best_score = np.take_along_axis(similarity, best[:, None], axis=1)[:, 0]
+    if len(headings) > 1:
+        runner_up = np.take_along_axis(similarity, order[:, 1:2], axis=1)[:, 0]
+    else:
+        runner_up = np.zeros(len(texts))
+
+    present = vectors > 0
+    shared = present[len(headings):].astype(int) @ present[:len(headings)].T.astype(int)
+    shared_terms = np.take_along_axis(shared, best[:, None], axis=1)[:, 0]
+    return best, best_score, best_score - runner_up, shared_terms
+
+
+def preclassify_evidence(stakeholder_data, headings, min_similarity=MIN_SIMILARITY, min_margin=MIN_MARGIN,
+                         min_shared_terms=MIN_SHARED_TERMS):
+    """
+    Assign clearly matching feedback items to headings without calling Claude.
+
+    Args:
+        stakeholder_data: Dictionary of stakeholder name to role and feedback items
+        headings: List of headings to sort evidence under
+        min_similarity: Minimum similarity to the best heading
+        min_margin: Minimum lead of the best heading over the runner-up
+        min_shared_terms: Minimum number of distinct terms shared with the best heading
+
+    Returns:
+        Tuple of sorted evidence for the assigned items, in the format returned by
+        process_batch, and the stakeholder data of the items left for Claude
+    """
+    candidates = [heading for heading in headings if not is_fallback_heading(heading)]
+    items = [
+        (person, data.get("role", ""), feedback_item)
+        for person, data in stakeholder_data.items()
+        for feedback_item in data.get("feedback", [])
+    ]
+    if not candidates or not items:
+        return [], stakeholder_data
+
+    best, best_score, margin, shared_terms = score_headings([item[2]["text"] for item in items], candidates)
+    confident = (best_score >= min_similarity) & (margin >= min_margin) & (shared_terms >= min_shared_terms)
+
+    evidence_by_heading: Dict[str, List[dict]] = {heading: [] for heading in candidates}
+    ambiguous = {}
+    for (person, role, feedback_item), heading_index, is_confident in zip(items, best, confident):
+        if is_confident:
+            evidence_by_heading[candidates[heading_index]].append({
+                "quote": feedback_item["text"],
+                "name": person,
+                "position": role,
+                "isStrong": feedback_item.get("is_strong", False)
+            })
+        else:
+            ambiguous.setdefault(person, {"role": role, "feedback": []})["feedback"].append(feedback_item)
+
+    sorted_evidence = [
+        {"heading": heading, "evidence": evidence}
+        for heading, evidence in evidence_by_heading.items()
+        if evidence
+    ]
+    print(f"Pre-classified {int(confident.sum())} of {len(items)} evidence items locally")
+    return sorted_evidence, ambiguous
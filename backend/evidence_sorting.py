@@ -0,0 +1,457 @@
+"""
+Evidence sorting engine for the sort-strengths-evidence and sort-areas-evidence endpoints
+and their streaming variants.
+
+Feedback items that clearly match one heading are assigned locally first (see
+evidence_classifier). The remaining stakeholder feedback is split into token-aware
+batches, each batch is sorted under the requested headings by Claude, and the
+results are merged.
+"""
+import asyncio
+import json
+import math
+import re
+import traceback
+
+from evidence_classifier import preclassify_evidence
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from prompt_loader import load_prompt
+from utils.batch_planner import plan_stakeholder_batches
+from utils.llm_gateway import llm_gateway
+from utils.llm_truncation import truncation_stats
+from utils.structured_output import (SortedEvidence, StructuredOutputError,
+                                     TruncatedOutputError)
+
+# max_tokens for evidence sorting calls, also the output budget for batch planning
+SORT_EVIDENCE_MAX_TOKENS = 2000
+
+# Batch sizes used for evidence sorting before token-aware planning, kept for reporting
+SORT_STRENGTHS_FIXED_BATCH_SIZE = 1
+SORT_AREAS_FIXED_BATCH_SIZE = 2
+
+# Word-set similarity at which two quotes under a heading count as duplicates,
+# when near-duplicate collapsing is turned on
+FUZZY_DUPLICATE_THRESHOLD = 0.8
+
+# Collapse near-duplicate quotes too, not only quotes that are equal once normalized.
+# Off by default: it is slower than the exact-key merge it extends
+COLLAPSE_NEAR_DUPLICATES = False
+
+# Most earlier quotes a new quote is compared with when collapsing near-duplicates
+MAX_FUZZY_CANDIDATES = 32
+
+_QUOTE_WORD = re.compile(r"\w+")
+
+# ASCII quotes are normalized with one bytes.translate: word characters are lowercased
+# and everything else becomes a space, the same words _QUOTE_WORD finds but ~3x faster
+_ASCII_QUOTE_WORDS = bytes(
+    ord(chr(b).lower()) if chr(b).isalnum() or chr(b) == "_" else ord(" ") for b in range(256)
+)
+
+# Assign clearly matching evidence locally and only send ambiguous items to Claude.
+# Off by default: keyword similarity misplaces real quotes that share one word with a heading
+PRECLASSIFY_EVIDENCE = False
+
+
+async def process_batch(batch_data, headings, is_strengths=True):
+    """
+    Process a single batch of stakeholders and their feedback.
+    
+    The call goes through the async LLM gateway, so batches awaited together run
+    concurrently, bounded by the gateway's global limits.
+    
+    Args:
+        batch_data: Dictionary of stakeholders and their feedback for this batch
+        headings: List of headings to sort evidence under
+        is_strengths: Whether this is for strengths (True) or areas to target (False)
+        
+    Returns:
+        Sorted evidence for this batch. Batches whose response is truncated at the
+        max_tokens limit are split in half and retried.
+    """
+    # Convert batch data to JSON
+    batch_json = json.dumps(batch_data, indent=2)
+    
+    # Load appropriate prompt
+    prompt_file = "sort_evidence_strenght.txt" if is_strengths else "sort_evidence_area_to_target.txt"
+    sort_prompt = load_prompt(prompt_file)
+    
+    # Format prompt for this batch
+    if is_strengths:
+        prompt = sort_prompt.format(strengths=batch_json, headings="\n".join(headings))
+    else:
+        prompt = sort_prompt.format(areas=batch_json, headings="\n".join(headings))
+    
+    # Get sorted evidence from Claude for this batch
+    try:
+        result = await llm_gateway.create_structured(
+            SortedEvidence,
+            "record_sorted_evidence",
+            "Record the evidence sorted under each heading",
+            model="claude-3-7-sonnet-latest",
+            max_tokens=SORT_EVIDENCE_MAX_TOKENS,
+            temperature=0,
+            messages=[{"role": "user", "content": prompt}],
+        )
+    except TruncatedOutputError:
+        if len(batch_data) <= 1:
+            truncation_stats.record(0)
+            raise HTTPException(
+                status_code=500,
+                detail="AI response exceeded the output limit for a single stakeholder",
+            )
+        # Split the batch instead of repairing a cut-off JSON
+        stakeholders = list(batch_data.keys())
+        middle = len(stakeholders) // 2
+        print(f"Sorting response truncated for {len(stakeholders)} stakeholders, splitting batch and retrying")
+        truncation_stats.record(2)
+        first_half, second_half = await asyncio.gather(
+            process_batch({k: batch_data[k] for k in stakeholders[:middle]}, headings, is_strengths),
+            process_batch({k: batch_data[k] for k in stakeholders[middle:]}, headings, is_strengths),
+        )
+        return first_half + second_half
+    except StructuredOutputError as e:
+        print(f"Error in sorted evidence response: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="AI response did not match the sorted evidence schema",
+        )
+    
+    return [item.model_dump() for item in result.headings]
+
+def plan_sort_batches(stakeholder_data, headings, batch_size=None, is_strengths=True):
+    """
+    Split stakeholders into batches for evidence sorting.
+    
+    Args:
+        stakeholder_data: Dictionary of all stakeholders and their feedback
+        headings: List of headings to sort evidence under
+        batch_size: Number of stakeholders to process in each batch, or None to plan
+            batches by estimated prompt and response tokens
+        is_strengths: Whether this is for strengths (True) or areas to target (False)
+        
+    Returns:
+        List of batch dictionaries of stakeholders and their feedback
+    """
+    stakeholders = list(stakeholder_data.keys())
+    batches = []
+    
+    if batch_size is None:
+        prompt_file = "sort_evidence_strenght.txt" if is_strengths else "sort_evidence_area_to_target.txt"
+        planned, _ = plan_stakeholder_batches(
+            list(stakeholder_data.items()),
+            feedback_of=lambda item: item[1].get("feedback", []),
+            prompt_template=load_prompt(prompt_file) + "\n".join(headings),
+            max_output_tokens=SORT_EVIDENCE_MAX_TOKENS,
+            base_output_tokens=20 * len(headings),
+            label="strengths evidence sorting" if is_strengths else "areas evidence sorting",
+            fixed_batch_size=SORT_STRENGTHS_FIXED_BATCH_SIZE if is_strengths else SORT_AREAS_FIXED_BATCH_SIZE,
+        )
+        batches = [dict(batch) for batch in planned]
+    else:
+        for i in range(0, len(stakeholders), batch_size):
+            batch_end = min(i + batch_size, len(stakeholders))
+            batch_stakeholders = stakeholders[i:batch_end]
+            batch_data = {k: stakeholder_data[k] for k in batch_stakeholders if k in stakeholder_data}
+            batches.append(batch_data)
+    
+    return batches
+
+async def process_batches_parallel(stakeholder_data, headings, batch_size=None, is_strengths=True, preclassify=PRECLASSIFY_EVIDENCE):
+    """
+    Process multiple batches of stakeholders in parallel.
+    
+    Args:
+        stakeholder_data: Dictionary of all stakeholders and their feedback
+        headings: List of headings to sort evidence under
+        batch_size: Number of stakeholders to process in each batch, or None to plan
+            batches by estimated prompt and response tokens
+        is_strengths: Whether this is for strengths (True) or areas to target (False)
+        preclassify: Whether to assign clearly matching evidence locally first
+        
+    Returns:
+        Merged result with all evidence sorted under headings
+    """
+    local_result = []
+    if preclassify:
+        local_result, stakeholder_data = preclassify_evidence(stakeholder_data, headings)
+    
+    # Create batches
+    batches = plan_sort_batches(stakeholder_data, headings, batch_size, is_strengths)
+    
+    print(f"Processing {len(batches)} batches in parallel")
+    
+    # Process batches in parallel
+    tasks = []
+    for batch in batches:
+        task = asyncio.create_task(process_batch(batch, headings, is_strengths))
+        tasks.append(task)
+    
+    # Wait for all tasks to complete
+    batch_results = await asyncio.gather(*tasks)
+    
+    # Merge results from all batches
+    return merge_sorted_evidence([local_result] + list(batch_results))
+
+async def stream_batches_parallel(stakeholder_data, headings, batch_size=None, is_strengths=True, preclassify=PRECLASSIFY_EVIDENCE):
+    """
+    Process batches of stakeholders in parallel and yield progress as each batch completes.
+    
+    Args:
+        stakeholder_data: Dictionary of all stakeholders and their feedback
+        headings: List of headings to sort evidence under
+        batch_size: Number of stakeholders to process in each batch, or None to plan
+            batches by estimated prompt and response tokens
+        is_strengths: Whether this is for strengths (True) or areas to target (False)
+        preclassify: Whether to assign clearly matching evidence locally first
+        
+    Yields:
+        A "batch" event with the merged evidence of every heading the batch changed,
+        then a "complete" event with the full merged result. Locally assigned evidence
+        is yielded first as a batch event with completed=0.
+    """
+    local_result = []
+    if preclassify:
+        local_result, stakeholder_data = preclassify_evidence(stakeholder_data, headings)
+    
+    batches = plan_sort_batches(stakeholder_data, headings, batch_size, is_strengths)
+    print(f"Streaming {len(batches)} batches")
+    
+    tasks = [asyncio.create_task(process_batch(batch, headings, is_strengths)) for batch in batches]
+    merger = EvidenceMerger()
+    try:
+        if local_result:
+            changed = merger.add_batch(local_result)
+            yield {
+                "type": "batch",
+                "completed": 0,
+                "total": len(batches),
+                "headings": [merger.heading(heading) for heading in changed],
+            }
+        for completed, task in enumerate(asyncio.as_completed(tasks), start=1):
+            batch_result = await task
+            changed = merger.add_batch(batch_result)
+            yield {
+                "type": "batch",
+                "completed": completed,
+                "total": len(batches),
+                "headings": [merger.heading(heading) for heading in changed],
+            }
+    finally:
+        for task in tasks:
+            task.cancel()
+    
+    yield {"type": "complete", "result": merger.result}
+
+def format_stream_event(event, stream_format):
+    """Serialize a sorting progress event as an SSE message or an NDJSON line."""
+    if stream_format == "ndjson":
+        return json.dumps(event) + "\n"
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+def stream_sorted_evidence(processed_data, headings, is_strengths, stream_format):
+    """
+    Build a streaming response that pushes sorted evidence as each batch completes.
+    
+    Args:
+        processed_data: Normalized stakeholder feedback to sort
+        headings: List of headings to sort evidence under
+        is_strengths: Whether this is for strengths (True) or areas to target (False)
+        stream_format: "sse" for server-sent events or "ndjson" for newline-delimited JSON
+        
+    Returns:
+        A StreamingResponse of progress events
+    """
+    async def event_stream():
+        events = stream_batches_parallel(processed_data, headings, is_strengths=is_strengths)
+        try:
+            async for event in events:
+                yield format_stream_event(event, stream_format)
+        except Exception as e:
+            print(f"Error while streaming sorted evidence: {str(e)}")
+            print(traceback.format_exc())
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            yield format_stream_event({"type": "error", "detail": detail}, stream_format)
+        finally:
+            # Close the batch stream now when the client disconnects, cancelling pending batches
+            await events.aclose()
+    
+    media_type = "application/x-ndjson" if stream_format == "ndjson" else "text/event-stream"
+    return StreamingResponse(event_stream(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+def normalize_quote(quote):
+    """
+    Normalize a quote for duplicate detection: lowercase words without punctuation.
+    
+    Args:
+        quote: The evidence quote
+        
+    Returns:
+        The normalized quote
+    """
+    if quote.isascii():
+        return b" ".join(quote.encode().translate(_ASCII_QUOTE_WORDS).split()).decode()
+    return " ".join(_QUOTE_WORD.findall(quote.lower()))
+
+class EvidenceMerger:
+    """
+    Incrementally merges sorted evidence batches under their headings.
+    
+    Each heading keeps a persistent index of its normalized quotes, so each quote
+    is merged with one lookup, in time independent of the evidence merged so far.
+    Quotes that differ only in case and punctuation are collapsed into the first one
+    seen. With collapse_near_duplicates, quotes with a word changed are collapsed as
+    well, comparing word-set (Jaccard) similarity with at most MAX_FUZZY_CANDIDATES
+    earlier quotes found through a prefix index.
+    """
+    def __init__(self, collapse_near_duplicates=COLLAPSE_NEAR_DUPLICATES, fuzzy_threshold=FUZZY_DUPLICATE_THRESHOLD,
+                 max_candidates=MAX_FUZZY_CANDIDATES):
+        self.fuzzy = collapse_near_duplicates and fuzzy_threshold < 1
+        self.fuzzy_threshold = fuzzy_threshold
+        self.max_candidates = max_candidates
+        self.stats = {"fuzzy_comparisons": 0}
+        self.result = []
+        self._heading_index = {}
+        # Per heading: normalized quote -> evidence
+        self._quotes = {}
+        # Per heading: anchor word -> list of (word set, evidence)
+        self._anchors = {}
+    
+    def heading(self, heading):
+        """The merged item for a heading"""
+        return self.result[self._heading_index[heading]]
+    
+    def add_batch(self, batch):
+        """
+        Merge one batch of sorted evidence.
+        
+        Args:
+            batch: Result of a single batch
+            
+        Returns:
+            List of headings that were added or whose evidence changed
+        """
+        changed = []
+        for item in batch:
+            heading = item["heading"]
+            if heading not in self._heading_index:
+                self._heading_index[heading] = len(self.result)
+                self.result.append({**item, "evidence": []})
+                self._quotes[heading] = {}
+                self._anchors[heading] = {}
+                changed.append(heading)
+            
+            added = False
+            for evidence in item["evidence"]:
+                added = self._add_evidence(heading, evidence) or added
+            if added and heading not in changed:
+                changed.append(heading)
+        
+        return changed
+    
+    def _add_evidence(self, heading, evidence):
+        """Add one evidence item unless it duplicates one already under the heading."""
+        normalized = normalize_quote(evidence["quote"])
+        quotes = self._quotes[heading]
+        duplicate = quotes.get(normalized)
+        
+        prefix = ()
+        if self.fuzzy:
+            words = frozenset(normalized.split())
+            prefix = self._prefix(words)
+            if duplicate is None:
+                duplicate = self._find_near_duplicate(heading, words, prefix)
+        
+        if duplicate is not None:
+            # Keep the first quote, but don't lose a strong marking
+            if evidence.get("isStrong") and not duplicate.get("isStrong"):
+                duplicate["isStrong"] = True
+                return True
+            return False
+        
+        quotes[normalized] = evidence
+        anchors = self._anchors[heading]
+        for word in prefix:
+            anchors.setdefault(word, []).append((words, evidence))
+        self.heading(heading)["evidence"].append(evidence)
+        return True
+    
+    def _prefix(self, words):
+        """
+        The words a near-duplicate must share with this quote.
+        
+        Two word sets with Jaccard similarity >= t share at least one of the first
+        len - ceil(t * len) + 1 words of either set under a common ordering, so only
+        quotes indexed under those words need comparing. Longer words come first
+        since they are rarer and keep the candidate lists short.
+        """
+        ordered = sorted(sorted(words), key=len, reverse=True)
+        return ordered[:len(ordered) - math.ceil(self.fuzzy_threshold * len(ordered)) + 1]
+    
+    def _find_near_duplicate(self, heading, words, prefix):
+        anchors = self._anchors[heading]
+        min_size = self.fuzzy_threshold * len(words)
+        max_size = len(words) / self.fuzzy_threshold
+        compared = 0
+        for word in prefix:
+            # Newest candidates first
+            for candidate_words, candidate in reversed(anchors.get(word, ())):
+                if compared == self.max_candidates:
+                    return None
+                compared += 1
+                self.stats["fuzzy_comparisons"] += 1
+                if not min_size <= len(candidate_words) <= max_size:
+                    continue
+                overlap = len(words & candidate_words)
+                if overlap >= self.fuzzy_threshold * (len(words) + len(candidate_words) - overlap):
+                    return candidate
+        return None
+
+def merge_sorted_evidence(batch_results):
+    """
+    Merge multiple batches of sorted evidence into a single result.
+    
+    Args:
+        batch_results: List of results from different batches
+        
+    Returns:
+        Merged result with all evidence
+    """
+    merger = EvidenceMerger()
+    for batch in batch_results:
+        merger.add_batch(batch)
+    return merger.result
+
+def prepare_evidence_for_sorting(category_data):
+    """
+    Normalize a feedback category so every item has text and an is_strong flag.
+    
+    Args:
+        category_data: Dictionary of stakeholder name to role and feedback items
+        
+    Returns:
+        Dictionary of stakeholder name to role and normalized feedback items
+    """
+    processed = {}
+    for person, data in category_data.items():
+        processed_feedback = []
+        for feedback_item in data.get("feedback", []):
+            if isinstance(feedback_item, dict):
+                # New format with is_strong flag
+                processed_feedback.append({
+                    "text": feedback_item.get("text", ""),
+                    "is_strong": feedback_item.get("is_strong", False)
+                })
+            else:
+                # Handle legacy format (plain string)
+                processed_feedback.append({
+                    "text": feedback_item,
+                    "is_strong": False
+                })
+        
+        processed[person] = {
+            "role": data.get("role", ""),
+            "feedback": processed_feedback
+        }
+    return processed
@@ -0,0 +1,977 @@
+"""
+Feedback extraction pipeline for the get_feedback endpoint.
+
+Stage 1 identifies the stakeholders in a transcript, Stage 2 extracts each
+stakeholder's feedback from their located interview section, and Stage 3 sorts
+the feedback into strengths, areas to target and advice. Every Claude call goes
+through the async LLM gateway, so calls awaited together run concurrently,
+bounded by the same global limits as the other routers.
+"""
+import asyncio
+import difflib
+import json
+import time
+from string import Template
+from typing import Any, Dict, List, Optional, Tuple
+
+from prompt_loader import load_prompt
+from utils.batch_planner import plan_section_batches, plan_stakeholder_batches
+from utils.llm_gateway import llm_gateway
+from utils.llm_truncation import truncation_stats
+from utils.loggers.feedback_logger import feedbackLogger
+from utils.structured_output import (CategorizedFeedback, StakeholderFeedback,
+                                     StakeholderFeedbackList, StakeholderList,
+                                     StructuredOutputError, TruncatedOutputError,
+                                     VerificationResult)
+from utils.transcript_sections import get_sections_text, get_stakeholder_section, locate_stakeholder_sections
+
+# Import the API config
+try:
+    from config.api_config import STAKEHOLDER_BATCH_SIZE
+except ImportError:
+    # Default values if config file doesn't exist
+    STAKEHOLDER_BATCH_SIZE = 2
+    feedbackLogger.warning("API config file not found, using default values")
+
+# Stage 2 batch mode: pack small stakeholder sections into one extraction call.
+# Sections estimated above the solo threshold (and stakeholders without a located
+# section) are still extracted with one call each.
+STAKEHOLDER_EXTRACTION_BATCH_MODE = True
+EXTRACTION_BATCH_TOKEN_BUDGET = 6000
+EXTRACTION_SOLO_TOKEN_THRESHOLD = 2500
+EXTRACTION_BATCH_MAX_TOKENS = 8000
+
+# max_tokens for single-stakeholder extraction calls. A truncated call is retried
+# once with EXTRACTION_BATCH_MAX_TOKENS, since a section can't be split safely
+EXTRACTION_MAX_TOKENS = 3000
+
+# max_tokens for Stage 3 categorization calls, also the output budget for batch planning
+CATEGORIZATION_MAX_TOKENS = 4000
+
+
+async def call_claude_structured(prompt, output_model, tool_name, tool_description, max_tokens=3000):
+    """
+    Wrapper for schema-constrained Claude API calls through the async LLM gateway,
+    which applies the global rate limit and concurrency limit shared with the other routers.
+    Claude is forced to answer through a single tool whose input is validated against output_model.
+    """
+    return await llm_gateway.create_structured(
+        output_model,
+        tool_name,
+        tool_description,
+        model="claude-3-7-sonnet-latest",
+        max_tokens=max_tokens,
+        temperature=0,
+        messages=[
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    )
+
+
+async def process_stakeholders_parallel(stakeholders, transcript, batch_mode=False):
+    """
+    Process multiple stakeholders in parallel to extract their feedback.
+    Limited by the LLM gateway's global limits.
+
+    Args:
+        stakeholders: List of stakeholder dictionaries
+        transcript: The full transcript text
+        batch_mode: Whether to pack small stakeholder sections into shared extraction calls
+
+    Returns:
+        List of stakeholder feedback dictionaries
+    """
+    feedbackLogger.info(f"Processing {len(stakeholders)} stakeholders in parallel (max {llm_gateway.max_concurrent} concurrent)")
+    start_time = time.time()
+
+    results = []
+
+    # Each unit of work is a list of stakeholders extracted with a single call
+    if batch_mode:
+        units = plan_section_batches(
+            stakeholders, transcript, EXTRACTION_BATCH_TOKEN_BUDGET, EXTRACTION_SOLO_TOKEN_THRESHOLD
+        )
+    else:
+        units = [[stakeholder] for stakeholder in stakeholders]
+
+    # Process units concurrently; the gateway bounds how many calls are in flight
+    unit_results = await asyncio.gather(
+        *(
+            extract_stakeholder_feedback(unit[0], transcript) if len(unit) == 1
+            else extract_stakeholder_feedback_batch(unit, transcript)
+            for unit in units
+        ),
+        return_exceptions=True,
+    )
+
+    for unit_index, (unit, feedback) in enumerate(zip(units, unit_results)):
+        if isinstance(feedback, Exception):
+            feedbackLogger.error(f"Error processing extraction call {unit_index+1}: {str(feedback)}")
+            # Add a minimal structure so the pipeline doesn't break
+            for stakeholder in unit:
+                results.append({
+                    "name": stakeholder.get("name", "Unknown"),
+                    "role": stakeholder.get("role", ""),
+                    "feedback": []
+                })
+            continue
+        feedbackLogger.info(f"Extraction call {unit_index+1}/{len(units)} complete ({len(unit)} stakeholders)")
+        if isinstance(feedback, list):
+            results.extend(feedback)
+        else:
+            results.append(feedback)
+
+    elapsed_time = time.time() - start_time
+    feedbackLogger.info(f"Parallel processing complete: processed {len(stakeholders)} stakeholders with {len(units)} extraction calls in {elapsed_time:.2f} seconds")
+
+    return results
+
+async def process_batches_parallel(stakeholder_feedback, batch_size=None):
+    """
+    Process batches of stakeholders in parallel for categorization.
+    Limited by the LLM gateway's global limits.
+
+    Args:
+        stakeholder_feedback: List of dictionaries with stakeholder feedback
+        batch_size: Fixed size of each batch, or None to plan batches by estimated tokens
+
+    Returns:
+        A dictionary with categorized feedback
+    """
+    start_time = time.time()
+
+    # Create batches
+    if batch_size is None:
+        batches, _ = plan_stakeholder_batches(
+            stakeholder_feedback,
+            feedback_of=lambda stakeholder: stakeholder.get("feedback", []),
+            prompt_template=load_prompt("feedback_categorize.txt"),
+            max_output_tokens=CATEGORIZATION_MAX_TOKENS,
+            label="categorization",
+            fixed_batch_size=STAKEHOLDER_BATCH_SIZE,
+        )
+    else:
+        batches = []
+        for i in range(0, len(stakeholder_feedback), batch_size):
+            batch_end = min(i + batch_size, len(stakeholder_feedback))
+            batches.append(stakeholder_feedback[i:batch_end])
+    feedbackLogger.info(f"Processing {len(stakeholder_feedback)} stakeholders in {len(batches)} parallel batches (max {llm_gateway.max_concurrent} concurrent)")
+
+    # Process batches in parallel
+    categorized_data = {
+        "strengths": {},
+        "areas_to_target": {},
+        "advice": {}
+    }
+
+    batch_results = await asyncio.gather(
+        *(categorize_stakeholder_batch(batch) for batch in batches),
+        return_exceptions=True,
+    )
+
+    for batch_index, batch_result in enumerate(batch_results):
+        if isinstance(batch_result, Exception):
+            feedbackLogger.error(f"Error processing batch {batch_index+1}: {str(batch_result)}")
+            continue
+        feedbackLogger.info(f"Batch {batch_index+1}/{len(batches)} processing complete")
+        merge_categorized_data(categorized_data, batch_result)
+
+    elapsed_time = time.time() - start_time
+    feedbackLogger.info(f"Parallel batch processing complete in {elapsed_time:.2f} seconds")
+
+    return categorized_data
+
+async def identify_stakeholders(transcript: str) -> List[Dict[str, str]]:
+    """
+    Stage 1: Identify all stakeholders who provided feedback in the transcript.
+
+    Args:
+        transcript: The full transcript text
+
+    Returns:
+        A list of dictionaries containing stakeholder information, excluding coaches and facilitators
+    """
+    feedbackLogger.info("Starting Stage 1: Identifying stakeholders")
+    start_time = time.time()
+
+    # Load the prompt
+    prompt_text = load_prompt("feedback_identify_stakeholders.txt")
+    feedbackLogger.debug("Loaded stakeholder identification prompt")
+
+    # Use Template instead of format to avoid issues with curly braces in JSON examples
+    template = Template(prompt_text)
+    updated_prompt = template.substitute(feedback=transcript)
+
+    # Call Claude API using the wrapper
+    feedbackLogger.info("Calling Claude API to identify stakeholders")
+
+    # Default structure in case the call fails validation
+    stakeholders = [{"name": "Unknown", "role": ""}]
+    try:
+        result = await call_claude_structured(
+            updated_prompt,
+            StakeholderList,
+            "record_stakeholders",
+            "Record every stakeholder who provided feedback in the transcript",
+            max_tokens=2000
+        )
+        stakeholders = [stakeholder.model_dump() for stakeholder in result.stakeholders]
+        feedbackLogger.info(f"Successfully parsed {len(stakeholders)} stakeholders from tool call")
+    except StructuredOutputError as e:
+        feedbackLogger.warning(f"Stakeholder identification returned no valid tool call: {str(e)}")
+    except Exception as e:
+        feedbackLogger.error(f"Error calling Claude API: {str(e)}")
+        raise
+
+    # The prompt now excludes coaches, but we'll do a basic check just in case
+    filtered_stakeholders = []
+    coach_keywords = ["coach", "facilitator", "administrator", "feedback provider", "consultant", "advisor"]
+
+    feedbackLogger.info("Filtering stakeholders to exclude coaches and meta sections")
+    for stakeholder in stakeholders:
+        role = stakeholder.get("role", "").lower()
+        name = stakeholder.get("name", "").lower()
+
+        # Check if the stakeholder is a coach based on role or name
+        is_coach = any(keyword in role for keyword in coach_keywords)
+
+        # Also check for "next steps" or similar sections that aren't from actual stakeholders
+        is_meta_section = "next step" in name.lower() or "action" in name.lower()
+
+        if not (is_coach or is_meta_section):
+            filtered_stakeholders.append(stakeholder)
+        else:
+            feedbackLogger.info(f"Filtering - excluding: {stakeholder.get('name', 'Unknown')} - {stakeholder.get('role', 'Unknown role')}")
+
+    locate_stakeholder_sections(filtered_stakeholders, transcript)
+
+    elapsed_time = time.time() - start_time
+    feedbackLogger.info(f"Stage 1 complete: {len(filtered_stakeholders)} stakeholders identified in {elapsed_time:.2f} seconds")
+    return filtered_stakeholders
+
+
+async def extract_stakeholder_feedback(stakeholder: Dict[str, str], transcript: str, max_tokens: int = EXTRACTION_MAX_TOKENS) -> Dict[str, Any]:
+    """
+    Stage 2: Extract all feedback provided by a specific stakeholder.
+
+    Args:
+        stakeholder: Dictionary containing stakeholder information
+        transcript: The full transcript text
+        max_tokens: max_tokens for the extraction call
+
+    Returns:
+        A dictionary with the stakeholder's feedback
+
+    Raises:
+        TruncatedOutputError: If the response is still truncated at EXTRACTION_BATCH_MAX_TOKENS
+    """
+    start_time = time.time()
+    name = stakeholder["name"]
+    role = stakeholder["role"]
+
+    feedbackLogger.info(f"Stage 2: Extracting feedback for stakeholder '{name}' ({role})")
+
+    # Only send the stakeholder's own interview section when it was located
+    section = get_stakeholder_section(stakeholder, transcript)
+    if len(section) < len(transcript):
+        feedbackLogger.info(f"Using transcript section for '{name}' ({len(section)} of {len(transcript)} characters)")
+
+    # Load the prompt
+    prompt_text = load_prompt("feedback_extract_stakeholder.txt")
+
+    # Use Template instead of format to avoid issues with curly braces in JSON examples
+    template = Template(prompt_text)
+    formatted_prompt = template.substitute(
+        name=name,
+        role=role,
+        feedback=section
+    )
+
+    # Call Claude API using the wrapper
+    feedbackLogger.info(f"Calling Claude API to extract feedback for '{name}'")
+
+    # Default structure in case the call fails validation
+    feedback_data = {
+        "name": name,
+        "role": role,
+        "feedback": []
+    }
+    try:
+        result = await call_claude_structured(
+            formatted_prompt,
+            StakeholderFeedback,
+            "record_stakeholder_feedback",
+            "Record every feedback item provided by the stakeholder",
+            max_tokens=max_tokens
+        )
+        feedback_data["feedback"] = [item.model_dump(exclude_none=True) for item in result.feedback]
+    except TruncatedOutputError:
+        if max_tokens >= EXTRACTION_BATCH_MAX_TOKENS:
+            truncation_stats.record(0)
+            feedbackLogger.error(f"Feedback extraction for '{name}' truncated at max_tokens={max_tokens}")
+            raise
+        feedbackLogger.warning(f"Feedback extraction for '{name}' truncated, retrying with max_tokens={EXTRACTION_BATCH_MAX_TOKENS}")
+        truncation_stats.record(1)
+        return await extract_stakeholder_feedback(stakeholder, transcript, EXTRACTION_BATCH_MAX_TOKENS)
+    except StructuredOutputError as e:
+        feedbackLogger.warning(f"Feedback extraction for '{name}' returned no valid tool call: {str(e)}")
+    except Exception as e:
+        feedbackLogger.error(f"Error calling Claude API for stakeholder '{name}': {str(e)}")
+        raise
+
+    feedback_count = len(feedback_data.get("feedback", []))
+    elapsed_time = time.time() - start_time
+    feedbackLogger.info(f"Extracted {feedback_count} feedback items for '{name}' in {elapsed_time:.2f} seconds")
+
+    return feedback_data
+
+
+async def extract_stakeholder_feedback_batch(stakeholders: List[Dict[str, Any]], transcript: str) -> List[Dict[str, Any]]:
+    """
+    Stage 2 (batch mode): Extract feedback for several stakeholders with a single API call.
+
+    Only the located sections of the given stakeholders are sent. Stakeholders missing
+    from the response are retried individually with extract_stakeholder_feedback, and
+    a response truncated at the max_tokens limit is retried as two smaller batches.
+
+    Args:
+        stakeholders: List of stakeholder dictionaries with located sections
+        transcript: The full transcript text
+
+    Returns:
+        A list of dictionaries with each stakeholder's feedback, in input order
+    """
+    start_time = time.time()
+    names = [stakeholder["name"] for stakeholder in stakeholders]
+    feedbackLogger.info(f"Stage 2: Extracting feedback for {len(stakeholders)} stakeholders in one call: {', '.join(names)}")
+
+    stakeholder_list = "\n".join(f"- {stakeholder['name']} ({stakeholder['role']})" for stakeholder in stakeholders)
+    sections = get_sections_text(stakeholders, transcript)
+
+    # Load the prompt
+    prompt_text = load_prompt("feedback_extract_stakeholder_batch.txt")
+
+    # Use Template instead of format to avoid issues with curly braces in JSON examples
+    template = Template(prompt_text)
+    formatted_prompt = template.substitute(
+        stakeholders=stakeholder_list,
+        feedback=sections
+    )
+
+    # Call Claude API using the wrapper
+    extracted = {}
+    try:
+        result = await call_claude_structured(
+            formatted_prompt,
+            StakeholderFeedbackList,
+            "record_stakeholders_feedback",
+            "Record every feedback item provided by each listed stakeholder",
+            max_tokens=EXTRACTION_BATCH_MAX_TOKENS
+        )
+        # Match entries back to stakeholders by exact name
+        for entry in result.stakeholders:
+            if entry.name in names:
+                extracted[entry.name] = entry
+    except TruncatedOutputError:
+        # Split the batch instead of losing every stakeholder in it
+        middle = len(stakeholders) // 2
+        feedbackLogger.warning(f"Batch extraction for {names} truncated, splitting batch and retrying")
+        truncation_stats.record(2)
+        halves = await asyncio.gather(*(
+            extract_stakeholder_feedback(half[0], transcript) if len(half) == 1
+            else extract_stakeholder_feedback_batch(half, transcript)
+            for half in (stakeholders[:middle], stakeholders[middle:])
+        ))
+        feedback_list = []
+        for half in halves:
+            feedback_list.extend(half if isinstance(half, list) else [half])
+        return feedback_list
+    except StructuredOutputError as e:
+        feedbackLogger.warning(f"Batch extraction for {names} returned no valid tool call: {str(e)}")
+    except Exception as e:
+        feedbackLogger.error(f"Error calling Claude API for stakeholder batch {names}: {str(e)}")
+        raise
+
+    missing = [stakeholder for stakeholder in stakeholders if stakeholder["name"] not in extracted]
+    for stakeholder in missing:
+        feedbackLogger.warning(f"'{stakeholder['name']}' missing from batch response, extracting individually")
+    retried = await asyncio.gather(*(extract_stakeholder_feedback(stakeholder, transcript) for stakeholder in missing))
+
+    feedback_list = []
+    for stakeholder in stakeholders:
+        entry = extracted.get(stakeholder["name"])
+        if entry is None:
+            feedback_list.append(retried[missing.index(stakeholder)])
+            continue
+        feedback_list.append({
+            "name": stakeholder["name"],
+            "role": stakeholder["role"],
+            "feedback": [item.model_dump(exclude_none=True) for item in entry.feedback]
+        })
+
+    feedback_count = sum(len(item.get("feedback", [])) for item in feedback_list)
+    elapsed_time = time.time() - start_time
+    feedbackLogger.info(f"Extracted {feedback_count} feedback items for {len(stakeholders)} stakeholders in {elapsed_time:.2f} seconds")
+
+    return feedback_list
+
+
+async def categorize_with_strength_assessment(stakeholder_feedback: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Stage 3: Categorize feedback and assess strength using parallel processing.
+
+    Args:
+        stakeholder_feedback: List of dictionaries with stakeholder feedback
+
+    Returns:
+        A dictionary with categorized feedback
+    """
+    start_time = time.time()
+    feedbackLogger.info("Starting Stage 3: Categorizing feedback and assessing strength using parallel processing")
+
+    # Process all stakeholders in parallel batches
+    categorized_data = await process_batches_parallel(stakeholder_feedback)
+
+    # Ensure all required categories exist
+    if "strengths" not in categorized_data:
+        categorized_data["strengths"] = {}
+        feedbackLogger.debug("Added missing strengths category")
+    if "areas_to_target" not in categorized_data:
+        categorized_data["areas_to_target"] = {}
+        feedbackLogger.debug("Added missing areas_to_target category")
+    if "advice" not in categorized_data:
+        categorized_data["advice"] = {}
+        feedbackLogger.debug("Added missing advice category")
+
+    # Count items in each category
+    strengths_count = sum(len(data.get("feedback", [])) for data in categorized_data.get("strengths", {}).values())
+    areas_count = sum(len(data.get("feedback", [])) for data in categorized_data.get("areas_to_target", {}).values())
+    advice_count = sum(len(data.get("feedback", [])) for data in categorized_data.get("advice", {}).values())
+
+    elapsed_time = time.time() - start_time
+    feedbackLogger.info(f"Stage 3 complete: Categorized {strengths_count} strengths, {areas_count} areas to target, {advice_count} advice items in {elapsed_time:.2f} seconds")
+
+    return categorized_data
+
+def split_stakeholder_batch(stakeholder_batch: List[Dict[str, Any]]) -> Optional[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+    """
+    Split a batch whose categorization was truncated into two smaller batches.
+
+    Several stakeholders are split into two halves; a single stakeholder's feedback
+    items are split instead.
+
+    Args:
+        stakeholder_batch: The stakeholder feedback that was sent
+
+    Returns:
+        The two halves, or None if the batch is a single feedback item
+    """
+    if len(stakeholder_batch) > 1:
+        middle = len(stakeholder_batch) // 2
+        return stakeholder_batch[:middle], stakeholder_batch[middle:]
+
+    stakeholder = stakeholder_batch[0]
+    feedback = stakeholder.get("feedback", [])
+    if len(feedback) <= 1:
+        return None
+    middle = len(feedback) // 2
+    return [{**stakeholder, "feedback": feedback[:middle]}], [{**stakeholder, "feedback": feedback[middle:]}]
+
+
+async def categorize_stakeholder_batch(stakeholder_batch: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Process a batch of stakeholders for categorization.
+
+    Args:
+        stakeholder_batch: A subset of stakeholder feedback to process
+
+    Returns:
+        A dictionary with categorized feedback for this batch. Batches whose response
+        is truncated at the max_tokens limit are split in half and retried.
+
+    Raises:
+        TruncatedOutputError: If the response for a single feedback item is truncated
+    """
+    start_time = time.time()
+    batch_stakeholders = [s.get("name", "Unknown") for s in stakeholder_batch]
+    feedbackLogger.info(f"Categorizing batch with stakeholders: {', '.join(batch_stakeholders)}")
+
+    # Prepare the input for Claude
+    input_data = json.dumps(stakeholder_batch, indent=2)
+
+    # Load the prompt
+    prompt_text = load_prompt("feedback_categorize.txt")
+
+    # Use Template instead of format to avoid issues with curly braces in JSON examples
+    template = Template(prompt_text)
+    formatted_prompt = template.substitute(input_data=input_data)
+
+    # Call Claude API using the wrapper
+    feedbackLogger.info("Calling Claude API for batch categorization")
+    try:
+        result = await call_claude_structured(
+            formatted_prompt,
+            CategorizedFeedback,
+            "record_categorized_feedback",
+            "Record each stakeholder's feedback sorted into strengths, areas to target and advice",
+            max_tokens=CATEGORIZATION_MAX_TOKENS
+        )
+        batch_result = result.model_dump()
+        feedbackLogger.info("Successfully parsed batch categorization from tool call")
+    except TruncatedOutputError:
+        halves = split_stakeholder_batch(stakeholder_batch)
+        if halves is None:
+            truncation_stats.record(0)
+            feedbackLogger.error(f"Batch categorization truncated for a single feedback item of {batch_stakeholders[0]}")
+            raise
+        # Split the batch instead of dropping its evidence
+        feedbackLogger.warning(f"Batch categorization truncated for {', '.join(batch_stakeholders)}, splitting batch and retrying")
+        truncation_stats.record(2)
+        batch_result = {
+            "strengths": {},
+            "areas_to_target": {},
+            "advice": {}
+        }
+        for half_result in await asyncio.gather(*(categorize_stakeholder_batch(half) for half in halves)):
+            merge_categorized_data(batch_result, half_result)
+    except StructuredOutputError as e:
+        feedbackLogger.warning(f"Batch categorization returned no valid tool call, using default structure: {str(e)}")
+        batch_result = {
+            "strengths": {},
+            "areas_to_target": {},
+            "advice": {}
+        }
+    except Exception as e:
+        feedbackLogger.error(f"Error calling Claude API for batch categorization: {str(e)}")
+        raise
+
+    # Count items in each category
+    strengths_count = sum(len(data.get("feedback", [])) for data in batch_result.get("strengths", {}).values())
+    areas_count = sum(len(data.get("feedback", [])) for data in batch_result.get("areas_to_target", {}).values())
+    advice_count = sum(len(data.get("feedback", [])) for data in batch_result.get("advice", {}).values())
+
+    elapsed_time = time.time() - start_time
+    feedbackLogger.info(f"Batch categorization complete: {strengths_count} strengths, {areas_count} areas, {advice_count} advice in {elapsed_time:.2f} seconds")
+
+    return batch_result
+
+def deduplicate_feedback(stakeholder_feedback: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Identify and resolve duplicate feedback across stakeholders.
+
+    Args:
+        stakeholder_feedback: List of dictionaries with stakeholder feedback
+
+    Returns:
+        Deduplicated stakeholder feedback
+    """
+    start_time = time.time()
+    feedbackLogger.info("Starting feedback deduplication process")
+
+    # Create a dictionary to track all feedback items
+    all_feedback = {}
+
+    # First pass: collect all feedback items with their stakeholders
+    feedbackLogger.info("Collecting all feedback items for comparison")
+    for stakeholder_data in stakeholder_feedback:
+        stakeholder_name = stakeholder_data.get("name", "Unknown")
+        for item in stakeholder_data.get("feedback", []):
+            text = item.get("text", "").strip()
+            if text:
+                if text not in all_feedback:
+                    all_feedback[text] = []
+                all_feedback[text].append((stakeholder_name, item))
+
+    feedbackLogger.info(f"Collected {len(all_feedback)} unique feedback items for deduplication")
+
+    # Second pass: identify potential duplicates using string similarity
+    feedbackLogger.info("Identifying potential duplicates using string similarity")
+    duplicates = []
+    processed = set()
+
+    for text1 in all_feedback:
+        if text1 in processed:
+            continue
+
+        group = [text1]
+        processed.add(text1)
+
+        for text2 in all_feedback:
+            if text2 in processed or text1 == text2:
+                continue
+
+            # Calculate similarity ratio
+            similarity = difflib.SequenceMatcher(None, text1, text2).ratio()
+
+            # If similarity is above threshold, consider it a duplicate
+            if similarity > 0.85:  # 85% similarity threshold
+                group.append(text2)
+                processed.add(text2)
+                feedbackLogger.debug(f"Found duplicate with {similarity:.2f} similarity")
+
+        if len(group) > 1:
+            duplicates.append(group)
+
+    # If no duplicates found, return original data
+    if not duplicates:
+        feedbackLogger.info("No duplicates found, returning original data")
+        return stakeholder_feedback
+
+    feedbackLogger.info(f"Found {len(duplicates)} duplicate groups")
+
+    # Create a copy of the original data to modify
+    feedbackLogger.info("Creating deduplicated feedback data")
+    result = []
+    total_removed = 0
+
+    for stakeholder_data in stakeholder_feedback:
+        stakeholder_name = stakeholder_data.get("name", "Unknown")
+        new_stakeholder_data = {
+            "name": stakeholder_name,
+            "role": stakeholder_data.get("role", ""),
+            "feedback": []
+        }
+
+        original_count = len(stakeholder_data.get("feedback", []))
+
+        # Only include non-duplicate feedback or the canonical version of duplicates
+        for item in stakeholder_data.get("feedback", []):
+            text = item.get("text", "").strip()
+
+            # Check if this text is in a duplicate group
+            is_duplicate = False
+            for group in duplicates:
+                if text in group and text != group[0]:  # Not the canonical version
+                    is_duplicate = True
+                    break
+
+            if not is_duplicate:
+                new_stakeholder_data["feedback"].append(item)
+            else:
+                total_removed += 1
+
+        new_count = len(new_stakeholder_data["feedback"])
+        if original_count != new_count:
+            feedbackLogger.info(f"Removed {original_count - new_count} duplicates from stakeholder '{stakeholder_name}'")
+
+        result.append(new_stakeholder_data)
+
+    elapsed_time = time.time() - start_time
+    feedbackLogger.info(f"Deduplication complete: removed {total_removed} duplicate items in {elapsed_time:.2f} seconds")
+
+    return result
+
+def validate_stakeholder_attribution(stakeholder_feedback: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Validate stakeholder attribution and flag unusual patterns.
+
+    Args:
+        stakeholder_feedback: List of dictionaries with stakeholder feedback
+
+    Returns:
+        Validated stakeholder feedback with warnings
+    """
+    start_time = time.time()
+    feedbackLogger.info("Starting stakeholder attribution validation")
+
+    # Calculate average feedback items per stakeholder
+    total_items = sum(len(s.get("feedback", [])) for s in stakeholder_feedback)
+    avg_items = total_items / len(stakeholder_feedback) if stakeholder_feedback else 0
+
+    feedbackLogger.info(f"Average feedback items per stakeholder: {avg_items:.2f} ({total_items} total items across {len(stakeholder_feedback)} stakeholders)")
+
+    # Track stakeholders with unusual feedback counts
+    unusual_counts = []
+
+    # Check each stakeholder
+    for stakeholder_data in stakeholder_feedback:
+        name = stakeholder_data.get("name", "Unknown")
+        feedback_count = len(stakeholder_data.get("feedback", []))
+
+        # Flag stakeholders with unusually high or low feedback counts
+        if feedback_count > avg_items * 2:
+            feedbackLogger.warning(f"Stakeholder '{name}' has unusually high feedback count: {feedback_count} (avg: {avg_items:.1f})")
+            unusual_counts.append((name, feedback_count, "high"))
+        elif feedback_count < avg_items * 0.5 and feedback_count > 0:
+            feedbackLogger.warning(f"Stakeholder '{name}' has unusually low feedback count: {feedback_count} (avg: {avg_items:.1f})")
+            unusual_counts.append((name, feedback_count, "low"))
+        elif feedback_count == 0:
+            feedbackLogger.warning(f"Stakeholder '{name}' has no feedback items")
+            unusual_counts.append((name, feedback_count, "none"))
+
+    # Check for identical feedback across stakeholders
+    feedback_by_text = {}
+    for stakeholder_data in stakeholder_feedback:
+        name = stakeholder_data.get("name", "Unknown")
+        for item in stakeholder_data.get("feedback", []):
+            # Check if item is a dictionary or a string
+            if isinstance(item, dict):
+                text = item.get("text", "").strip()
+            else:
+                # Handle case where item is a string
+                text = str(item).strip()
+            if text:
+                if text not in feedback_by_text:
+                    feedback_by_text[text] = []
+                feedback_by_text[text].append(name)
+
+    # Flag feedback items that appear for multiple stakeholders
+    duplicate_feedback = []
+    for text, stakeholders in feedback_by_text.items():
+        if len(stakeholders) > 1:
+            feedbackLogger.warning(f"Identical feedback found across multiple stakeholders: {', '.join(stakeholders)}")
+            feedbackLogger.warning(f"  Text: {text[:100]}...")
+            duplicate_feedback.append((text, stakeholders))
+
+    elapsed_time = time.time() - start_time
+    feedbackLogger.info(f"Validation complete: found {len(unusual_counts)} stakeholders with unusual counts and {len(duplicate_feedback)} duplicate feedback items in {elapsed_time:.2f} seconds")
+
+    # Return the original data, as this is just a validation step
+    return stakeholder_feedback
+
+def analyze_sentiment(text: str) -> Dict[str, float]:
+    """
+    Analyze sentiment of text to help with categorization.
+
+    Args:
+        text: The text to analyze
+
+    Returns:
+        Dictionary with sentiment scores
+    """
+    # Initialize scores
+    scores = {
+        "strength": 0.0,
+        "area_to_target": 0.0,
+        "advice": 0.0
+    }
+
+    # Strength keywords
+    strength_keywords = [
+        "excellent", "exceptional", "outstanding", "impressive", "great",
+        "strong", "brilliant", "superb", "remarkable", "extraordinary",
+        "talented", "skilled", "expert", "proficient", "adept",
+        "accomplished", "successful", "effective", "efficient", "valuable"
+    ]
+
+    # Area to target keywords
+    area_keywords = [
+        "improve", "could", "should", "needs to", "would benefit from",
+        "lacks", "missing", "insufficient", "inadequate", "limited",
+        "challenge", "difficult", "struggle", "issue", "problem",
+        "concern", "weakness", "gap", "opportunity", "development area"
+    ]
+
+    # Advice keywords
+    advice_keywords = [
+        "recommend", "suggest", "advise", "consider", "try",
+        "might want to", "could benefit from", "would be better if",
+        "next steps", "going forward", "in the future", "plan",
+        "strategy", "approach", "method", "technique", "tactic"
+    ]
+
+    # Convert text to lowercase for case-insensitive matching
+    lower_text = text.lower()
+
+    # Check for strength keywords
+    for keyword in strength_keywords:
+        if keyword in lower_text:
+            scores["strength"] += 1.0
+
+    # Check for area to target keywords
+    for keyword in area_keywords:
+        if keyword in lower_text:
+            scores["area_to_target"] += 1.0
+
+    # Check for advice keywords
+    for keyword in advice_keywords:
+        if keyword in lower_text:
+            scores["advice"] += 1.0
+
+    # Normalize scores
+    total = sum(scores.values())
+    if total > 0:
+        for key in scores:
+            scores[key] /= total
+
+    return scores
+
+def merge_categorized_data(target: Dict[str, Any], source: Dict[str, Any]) -> None:
+    """
+    Merge source categorized data into target.
+
+    Args:
+        target: The target dictionary to merge into
+        source: The source dictionary to merge from
+    """
+    # Merge strengths
+    for stakeholder, data in source.get("strengths", {}).items():
+        if stakeholder in target["strengths"]:
+            # Stakeholder already exists, append feedback
+            target["strengths"][stakeholder]["feedback"].extend(data.get("feedback", []))
+        else:
+            # New stakeholder, add to target
+            target["strengths"][stakeholder] = data
+
+    # Merge areas_to_target
+    for stakeholder, data in source.get("areas_to_target", {}).items():
+        if stakeholder in target["areas_to_target"]:
+            # Stakeholder already exists, append feedback
+            target["areas_to_target"][stakeholder]["feedback"].extend(data.get("feedback", []))
+        else:
+            # New stakeholder, add to target
+            target["areas_to_target"][stakeholder] = data
+
+    # Merge advice
+    for stakeholder, data in source.get("advice", {}).items():
+        if stakeholder in target["advice"]:
+            # Stakeholder already exists, append feedback
+            target["advice"][stakeholder]["feedback"].extend(data.get("feedback", []))
+        else:
+            # New stakeholder, add to target
+            target["advice"][stakeholder] = data
+
+
+async def verify_extraction(categorized_feedback: Dict[str, Any], transcript: str) -> Dict[str, Any]:
+    """
+    Stage 4: Verify the completeness of the extraction.
+
+    Args:
+        categorized_feedback: Dictionary with categorized feedback
+        transcript: The full transcript text
+
+    Returns:
+        A dictionary with verification results
+    """
+    # Prepare the input for Claude
+    categorized_data = json.dumps(categorized_feedback, indent=2)
+
+    # Load the prompt
+    prompt_text = load_prompt("feedback_verify.txt")
+
+    # Use Template instead of format to avoid issues with curly braces in JSON examples
+    template = Template(prompt_text)
+    formatted_prompt = template.substitute(
+        categorized_data=categorized_data,
+        feedback=transcript
+    )
+
+    # Call Claude API using the wrapper
+    try:
+        result = await call_claude_structured(
+            formatted_prompt,
+            VerificationResult,
+            "record_verification",
+            "Record stakeholders and feedback missing from the extraction, and miscategorized feedback",
+            max_tokens=3000
+        )
+        verification_data = result.model_dump()
+    except StructuredOutputError as e:
+        print(f"[DEBUG] Verification returned no valid tool call, using default structure: {str(e)}")
+        verification_data = {
+            "missing_stakeholders": [],
+            "missing_feedback": [],
+            "miscategorized_feedback": []
+        }
+
+    return verification_data
+
+
+def add_missing_feedback(categorized_feedback: Dict[str, Any], missing_feedback: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Add missing feedback identified in the verification stage.
+
+    Args:
+        categorized_feedback: Dictionary with categorized feedback
+        missing_feedback: List of missing feedback items
+
+    Returns:
+        Updated categorized feedback
+    """
+    result = categorized_feedback.copy()
+
+    for item in missing_feedback:
+        stakeholder = item.get("stakeholder", "Unknown")
+        text = item.get("text", "")
+        category = item.get("category", "strengths")
+
+        # Skip if text is empty
+        if not text:
+            continue
+
+        # Ensure the category exists
+        if category not in result:
+            result[category] = {}
+
+        # Ensure the stakeholder exists in the category
+        if stakeholder not in result[category]:
+            result[category][stakeholder] = {
+                "role": "",
+                "feedback": []
+            }
+
+        # Add the feedback item
+        result[category][stakeholder]["feedback"].append({
+            "text": text,
+            "is_strong": False  # Default to false for missing items
+        })
+
+    return result
+
+
+def format_final_result(categorized_feedback: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Format the final result to match the expected output structure.
+
+    Args:
+        categorized_feedback: Dictionary with categorized feedback
+
+    Returns:
+        Formatted result
+    """
+    start_time = time.time()
+    feedbackLogger.info("Formatting final result")
+
+    result = {
+        "strengths": {},
+        "areas_to_target": {}
+    }
+
+    # Process strengths
+    strengths_count = 0
+    for stakeholder, data in categorized_feedback.get("strengths", {}).items():
+        feedback_items = data.get("feedback", [])
+        strengths_count += len(feedback_items)
+        result["strengths"][stakeholder] = {
+            "role": data.get("role", ""),
+            "feedback": feedback_items
+        }
+
+    # Process areas to target
+    areas_count = 0
+    for stakeholder, data in categorized_feedback.get("areas_to_target", {}).items():
+        feedback_items = data.get("feedback", [])
+        areas_count += len(feedback_items)
+        result["areas_to_target"][stakeholder] = {
+            "role": data.get("role", ""),
+            "feedback": feedback_items
+        }
+
+    # Process advice - temporarily removed from final result
+    # We still collect advice in categorized_feedback but don't include it in the result
+    # advice_count = 0
+    # for stakeholder, data in categorized_feedback.get("advice", {}).items():
+    #     feedback_items = data.get("feedback", [])
+    #     advice_count += len(feedback_items)
+    #     result["advice"][stakeholder] = {
+    #         "role": data.get("role", ""),
+    #         "feedback": feedback_items
+    #     }
+
+    elapsed_time = time.time() - start_time
+    feedbackLogger.info(f"Final result formatted with {strengths_count} strengths and {areas_count} areas to target in {elapsed_time:.2f} seconds")
+
+    return result
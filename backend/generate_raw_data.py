@@ -1,7 +1,8 @@
 import anthropic
 import json
 import os
-from generate_report_llm import parse_gpt_response, process_json
+from utils.structured_output import (AreasToTargetData, RawData, StrengthsData,
+                                     StructuredOutputError, create_structured)
 
 
 
@@ -41,34 +42,24 @@ Please analyze this transcript and provide the evidence in the specified JSON fo
 {transcript}
 """
 
-    response = client.messages.create(
-        model="claude-3-7-sonnet-latest",
-        max_tokens=4000,
-        temperature=0,
-        messages=[{
-            "role": "user",
-            "content": prompt
-        }]
-    )
-    
-    raw_data = response.content
-    if isinstance(raw_data, list) and len(raw_data) > 0 and hasattr(raw_data[0], 'text'):
-        json_str = raw_data[0].text
-    else:
-        json_str = raw_data
-        
     try:
-        parsed_data = parse_gpt_response(json_str.replace("\n",""))
-        if parsed_data:
-            return parsed_data
-        else:
-            print("\nNo valid JSON structure found in the response.")
-            return {"error": "No valid JSON structure found", "raw_response": json_str}
-    except Exception as e:
+        result = create_structured(
+            client,
+            StrengthsData,
+            "record_strengths_evidence",
+            "Record the quotes supporting each strength",
+            model="claude-3-7-sonnet-latest",
+            max_tokens=4000,
+            temperature=0,
+            messages=[{
+                "role": "user",
+                "content": prompt
+            }]
+        )
+        return result.model_dump()
+    except StructuredOutputError as e:
         print(f"\nError processing response: {str(e)}")
-        print("Raw response content:")
-        print(json_str)
-        return {"error": str(e), "raw_response": json_str}
+        return {"error": str(e)}
 
 def get_areas_to_target_data(transcript, areas_to_target, api_key):
     client = anthropic.Anthropic(api_key=api_key)
@@ -106,34 +97,24 @@ Please analyze this transcript and provide the evidence in the specified JSON fo
 {transcript}
 """
 
-    response = client.messages.create(
-        model="claude-3-7-sonnet-latest",
-        max_tokens=4000,
-        temperature=0,
-        messages=[{
-            "role": "user",
-            "content": prompt
-        }]
-    )
-    
-    raw_data = response.content
-    if isinstance(raw_data, list) and len(raw_data) > 0 and hasattr(raw_data[0], 'text'):
-        json_str = raw_data[0].text
-    else:
-        json_str = raw_data
-        
     try:
-        parsed_data = parse_gpt_response(json_str.replace("\n",""))
-        if parsed_data:
-            return parsed_data
-        else:
-            print("\nNo valid JSON structure found in the response.")
-            return {"error": "No valid JSON structure found", "raw_response": json_str}
-    except Exception as e:
+        result = create_structured(
+            client,
+            AreasToTargetData,
+            "record_areas_to_target_evidence",
+            "Record the quotes supporting each area to target",
+            model="claude-3-7-sonnet-latest",
+            max_tokens=4000,
+            temperature=0,
+            messages=[{
+                "role": "user",
+                "content": prompt
+            }]
+        )
+        return result.model_dump()
+    except StructuredOutputError as e:
         print(f"\nError processing response: {str(e)}")
-        print("Raw response content:")
-        print(json_str)
-        return {"error": str(e), "raw_response": json_str}
+        return {"error": str(e)}
 
 
 
@@ -184,35 +165,24 @@ Rules:
 Please analyze this transcript and provide the evidence in the specified JSON format:
 {transcript}
 """
-    response = client.messages.create(
-        model="claude-3-7-sonnet-latest",
-        max_tokens=4000,
-        temperature=0,
-        messages=[{
-            "role": "user",
-            "content": prompt
-        }]
-    )
-    raw_data = response.content
-
-    # The response is a list of TextBlock objects, so we need to extract the text from the first one
-    if isinstance(raw_data, list) and len(raw_data) > 0 and hasattr(raw_data[0], 'text'):
-        json_str = raw_data[0].text
-    else:
-        json_str = raw_data  # Fallback to using raw_data as is
-
     try:
-        parsed_data = parse_gpt_response(json_str)
-        if parsed_data:
-            return parsed_data
-        else:
-            print("\nNo valid JSON structure found in the response.")
-            return {"error": "No valid JSON structure found", "raw_response": json_str}
-    except Exception as e:
+        result = create_structured(
+            client,
+            RawData,
+            "record_raw_evidence",
+            "Record the quotes supporting each strength and area to target",
+            model="claude-3-7-sonnet-latest",
+            max_tokens=4000,
+            temperature=0,
+            messages=[{
+                "role": "user",
+                "content": prompt
+            }]
+        )
+        return result.model_dump()
+    except StructuredOutputError as e:
         print(f"\nError processing response: {str(e)}")
-        print("Raw response content:")
-        print(json_str)
-        return {"error": str(e), "raw_response": json_str}
+        return {"error": str(e)}
 
 
 # The rest of your code remains the same
@@ -7,86 +7,50 @@ from uuid import uuid4
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple, Any
 
-from anthropic import Anthropic
 from PyPDF2 import PdfReader
+from utils.json_stream import parse_partial_json
+from utils.llm_gateway import llm_gateway
 
-# Import the API config
-try:
-    from config.api_config import MAX_CONCURRENT_API_CALLS, MAX_API_CALLS_PER_MINUTE
-except ImportError:
-    # Default values if config file doesn't exist
-    MAX_CONCURRENT_API_CALLS = 3
-    MAX_API_CALLS_PER_MINUTE = 50
+# Prompts containing this marker only reformat the previous answer as JSON
+FORMAT_PROMPT_MARKER = "jsonify"
 
-# API Call Manager for controlling concurrency
-class ApiCallManager:
-    """
-    Manages concurrent API calls to ensure we don't exceed the maximum limit.
-    Uses a semaphore to control concurrency.
-    """
-    def __init__(self, max_concurrent=MAX_CONCURRENT_API_CALLS):
-        self.semaphore = asyncio.Semaphore(max_concurrent)
-        self.active_calls = 0
-        self.lock = asyncio.Lock()
-        self.max_concurrent = max_concurrent
-        
-    async def __aenter__(self):
-        """Acquire the semaphore before making an API call"""
-        # Log if we're about to wait
-        async with self.lock:
-            current = self.active_calls
-            if current >= self.max_concurrent:
-                print(f"Waiting for API call slot (current: {current}/{self.max_concurrent})")
-        
-        # Acquire semaphore (will block if at max concurrent calls)
-        await self.semaphore.acquire()
-        
-        async with self.lock:
-            self.active_calls += 1
-            current = self.active_calls
-        
-        print(f"API call started. Active calls: {current}/{self.max_concurrent}")
-        return self
-    
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Release the semaphore after the API call completes"""
-        async with self.lock:
-            self.active_calls -= 1
-            current = self.active_calls
-        self.semaphore.release()
-        print(f"API call completed. Active calls: {current}/{self.max_concurrent}")
-
-# Rate Limiter for controlling API call frequency
-class RateLimiter:
+# Cache the transcript and conversation prefixes of report prompt chains
+REPORT_PROMPT_CACHING = True
+
+class TokenUsage:
     """
-    Limits the rate of API calls to prevent hitting rate limits.
-    Tracks calls over a rolling 60-second window.
+    Accumulates token usage over the Claude calls of a report.
+    Cached prompt tokens are counted separately from uncached input tokens.
     """
-    def __init__(self, max_calls_per_minute=MAX_API_CALLS_PER_MINUTE):
-        self.max_calls = max_calls_per_minute
-        self.calls = []
-        self.lock = asyncio.Lock()
-        
-    async def wait_if_needed(self):
-        """Wait if we've exceeded our rate limit"""
-        now = time.time()
-        async with self.lock:
-            # Remove calls older than 1 minute
-            self.calls = [t for t in self.calls if now - t < 60]
-            
-            # If we're at the limit, wait
-            if len(self.calls) >= self.max_calls:
-                sleep_time = 60 - (now - self.calls[0])
-                if sleep_time > 0:
-                    print(f"Rate limit reached, waiting {sleep_time:.2f} seconds")
-                    await asyncio.sleep(sleep_time)
-            
-            # Add this call
-            self.calls.append(time.time())
-
-# Create global instances
-api_call_manager = ApiCallManager()
-rate_limiter = RateLimiter()
+    def __init__(self):
+        self.calls = 0
+        self.input_tokens = 0
+        self.cache_creation_input_tokens = 0
+        self.cache_read_input_tokens = 0
+        self.output_tokens = 0
+    
+    def record(self, usage):
+        """Add the usage of one response"""
+        self.calls += 1
+        self.input_tokens += getattr(usage, "input_tokens", 0) or 0
+        self.cache_creation_input_tokens += getattr(usage, "cache_creation_input_tokens", 0) or 0
+        self.cache_read_input_tokens += getattr(usage, "cache_read_input_tokens", 0) or 0
+        self.output_tokens += getattr(usage, "output_tokens", 0) or 0
+    
+    @property
+    def total_input_tokens(self):
+        """All prompt tokens, cached or not"""
+        return self.input_tokens + self.cache_creation_input_tokens + self.cache_read_input_tokens
+    
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "input_tokens": self.input_tokens,
+            "cache_creation_input_tokens": self.cache_creation_input_tokens,
+            "cache_read_input_tokens": self.cache_read_input_tokens,
+            "total_input_tokens": self.total_input_tokens,
+            "output_tokens": self.output_tokens
+        }
 
 def read_file_content(file_path: str) -> str:
     """Read and return content from a file."""
@@ -97,24 +61,13 @@ def read_file_content(file_path: str) -> str:
         print(f"Error reading file {file_path}: {str(e)}")
         return ""
 
-def process_json(s):
-    s = s.replace('```json\n', '').replace('\n```', '').replace('\n', '').replace("```","").replace("json","")
-    start_index = s.find("{")
-    end_index = s.rfind("}")
-    inner_text = s[start_index:end_index+1]
-    return inner_text
-
 def parse_gpt_response(response_text: str) -> dict:
-    try:
-        escape_char_pattern = re.compile(r'\\.')
-        cleaned_string = escape_char_pattern.sub('', response_text)
-        # Clean up any formatting issues
-        cleaned_string = ' '.join(cleaned_string.split())
-        res = json.loads(process_json(cleaned_string))
-        return res
-    except Exception as e:
-        print(f"Error parsing GPT response: {str(e)}")
+    # Single pass over the response that tolerates fences, raw newlines, trailing commas and truncation
+    res = parse_partial_json(response_text, start_chars="{")
+    if not isinstance(res, dict):
+        print(f"Error parsing GPT response: no JSON object found")
         return {}
+    return res
 
 def get_reflection_prompts(executive_interview: str):
     # [Previous str1 remains the same]
@@ -214,7 +167,7 @@ Please note:
 * Include relevant transcript quotes below each paragraph to justify your assessment
 Example format:
 "[Name/Subject] is [character quality adjective]". [Name/Subject] [specific example]. [Impact statement with transition]."
-Given the transcript:"""
+Use the transcript provided above."""
 
     str3 = """Now for each strength the description should be in 100 words. Structure each strength as:
 1. Opening statement with character quality adjectives ("[Name/Subject] is [character quality adjective]")
@@ -558,149 +511,243 @@ Note: Do not include explicit impact sections or quantified metrics."""
 
 
 async def call_claude_api(
-    client: Anthropic,
     messages: List[Dict[str, Any]],
     system_prompt: str,
     model_name: str = "claude-3-5-sonnet-20241022",
     max_tokens: int = 4000,
-    temperature: float = 0.0
+    temperature: float = 0.0,
+    token_usage: Optional[TokenUsage] = None
 ) -> str:
     """
-    Call Claude API with rate limiting and concurrency control.
+    Call Claude API through the LLM gateway's global rate and concurrency limits.
     
     Args:
-        client: Anthropic client
         messages: List of message objects
         system_prompt: System prompt
         model_name: Model name
         max_tokens: Maximum tokens
         temperature: Temperature
+        token_usage: Optional accumulator for the response's token usage
         
     Returns:
         Response text
     """
-    # Apply rate limiting
-    await rate_limiter.wait_if_needed()
-    
-    # Use API call manager to control concurrency
-    async with api_call_manager:
-        response = client.messages.create(
-            model=model_name,
-            max_tokens=max_tokens,
-            temperature=temperature,
-            messages=messages,
-            system=system_prompt
-        )
-        return response.content[0].text
-
-async def process_single_prompt(
-    client: Anthropic,
-    prompt_category: list,
+    response = await llm_gateway.create(
+        model=model_name,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        messages=messages,
+        system=system_prompt
+    )
+    if token_usage is not None:
+        token_usage.record(response.usage)
+    return response.content[0].text
+
+def is_format_prompt(prompt: str) -> bool:
+    """Whether a prompt only reformats the previous answer, e.g. as JSON"""
+    return FORMAT_PROMPT_MARKER in prompt.lower()
+
+def first_turn_content(prompt: str, file_content: str) -> List[Dict[str, Any]]:
+    """
+    Build the first user message of a prompt chain.
+    
+    The transcript comes first in its own block so the system prompt and transcript
+    form a prefix shared by every chain of the report; with caching enabled that
+    prefix is written to the prompt cache once and read by later calls.
+    """
+    transcript_block = {"type": "text", "text": f"Content:\n{file_content}"}
+    if REPORT_PROMPT_CACHING:
+        transcript_block["cache_control"] = {"type": "ephemeral"}
+    return [transcript_block, {"type": "text", "text": prompt}]
+
+def with_cache_breakpoint(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Mark the end of the latest user turn as a cache breakpoint.
+    
+    The next turn of the chain then reads the whole conversation so far from the
+    prompt cache instead of processing it again. The messages are not modified.
+    """
+    if not REPORT_PROMPT_CACHING:
+        return messages
+    last = messages[-1]
+    content = last["content"]
+    if isinstance(content, str):
+        content = [{"type": "text", "text": content}]
+    content = content[:-1] + [{**content[-1], "cache_control": {"type": "ephemeral"}}]
+    return messages[:-1] + [{**last, "content": content}]
+
+class PromptNode:
+    """
+    One Claude call of report generation.
+    
+    A turn node continues the conversation of the node it comes after (or starts a
+    new conversation with the transcript). A format node reformats the answer of
+    the node it comes after in a single-turn call and is not continued.
+    """
+    def __init__(self, name: str, prompt: str, after: Optional[str] = None, formats: bool = False):
+        self.name = name
+        self.prompt = prompt
+        self.after = after
+        self.formats = formats
+
+def build_prompt_dag(categories: Dict[str, List[str]]) -> Tuple[List[PromptNode], Dict[str, List[str]]]:
+    """
+    Declare the dependencies between the prompts of each report category.
+    
+    Each conversational prompt depends on the previous conversational prompt of its
+    category; each format prompt (see is_format_prompt) depends only on the answer
+    it formats, so format prompts and later turns run concurrently.
+    
+    Args:
+        categories: Dictionary of category name to its prompts, in order
+        
+    Returns:
+        Tuple of the nodes in dependency order and, per category, the names of the
+        nodes whose answers are the category's two results
+    """
+    nodes = []
+    outputs = {}
+    for category, prompts in categories.items():
+        last_turn = None
+        formatted = []
+        for i, prompt in enumerate(prompts):
+            name = f"{category}_{i}"
+            if is_format_prompt(prompt):
+                nodes.append(PromptNode(name, prompt, after=last_turn, formats=True))
+                formatted.append(name)
+            else:
+                nodes.append(PromptNode(name, prompt, after=last_turn))
+                last_turn = name
+        # The last two formatted answers, or the last answer if nothing is formatted
+        outputs[category] = ([None] + (formatted or [last_turn]))[-2:]
+    return nodes, outputs
+
+async def run_prompt_node(
+    node: PromptNode,
+    parent: Optional[Tuple[List[Dict[str, Any]], str]],
     file_content: str,
     structured_system_prompt: str,
     temperature: float = 0.0,
-    model_name: str = "claude-3-5-sonnet-20241022"
-) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    model_name: str = "claude-3-5-sonnet-20241022",
+    token_usage: Optional[TokenUsage] = None
+) -> Tuple[List[Dict[str, Any]], str]:
     """
-    Process a single prompt category with multiple prompts.
+    Make the Claude call of one prompt node.
     
     Args:
-        client: Anthropic client
-        prompt_category: List of prompts
-        file_content: Content to process
+        node: The node to run
+        parent: The conversation and answer of the node it comes after, if any
+        file_content: The feedback transcript
         structured_system_prompt: System prompt
         temperature: Temperature
         model_name: Model name
+        token_usage: Optional accumulator for token usage
         
     Returns:
-        Tuple of (parsed_response1, parsed_response2)
+        Tuple of the conversation including this node's answer, and the answer
     """
-    messages = []
-    final_response1 = "{}"
-    
-    for i, prompt in enumerate(prompt_category):
-        if i == 0:
-            messages.append({
-                "role": "user",
-                "content": f"{prompt}\n\nContent:\n{file_content}"
-            })
-        else:
-            messages.append({
-                "role": "user",
-                "content": prompt
-            })
-        
-        response_text = await call_claude_api(
-            client=client,
-            messages=messages,
-            system_prompt=structured_system_prompt,
-            model_name=model_name,
-            temperature=temperature
-        )
-        
-        if len(prompt_category) > 5 and i == 6:
-            final_response1 = response_text
-            messages = messages[:-1]
-            continue
-            
-        messages.append({
-            "role": "assistant",
-            "content": response_text
-        })
+    parent_messages, parent_answer = parent or ([], "")
+    if node.formats:
+        messages = [{"role": "user", "content": f"{node.prompt}\n\nResponse:\n{parent_answer}"}]
+    elif parent_messages:
+        messages = parent_messages + [{"role": "user", "content": node.prompt}]
+    else:
+        messages = [{"role": "user", "content": first_turn_content(node.prompt, file_content)}]
+    
+    answer = await call_claude_api(
+        messages=messages if node.formats else with_cache_breakpoint(messages),
+        system_prompt=structured_system_prompt,
+        model_name=model_name,
+        temperature=temperature,
+        token_usage=token_usage
+    )
+    return messages + [{"role": "assistant", "content": answer}], answer
+
+async def run_prompt_dag(
+    nodes: List[PromptNode],
+    file_content: str,
+    structured_system_prompt: str,
+    temperature: float = 0.0,
+    model_name: str = "claude-3-5-sonnet-20241022",
+    token_usage: Optional[TokenUsage] = None
+) -> Dict[str, str]:
+    """
+    Run prompt nodes as soon as the node they come after has finished.
+    
+    Every node is a task that waits only for its own dependency, so independent
+    nodes run concurrently (bounded by the LLM gateway) and the total time is the
+    longest dependency chain rather than the sum of each category's prompts.
+    
+    Args:
+        nodes: Prompt nodes in dependency order
+        file_content: The feedback transcript
+        structured_system_prompt: System prompt
+        temperature: Temperature
+        model_name: Model name
+        token_usage: Optional accumulator for token usage
         
-    raw_result = messages[-1]["content"]
-    return parse_gpt_response(final_response1), parse_gpt_response(raw_result)
+    Returns:
+        Dictionary of node name to answer
+    """
+    tasks = {}
+    
+    async def run(node, parent_task):
+        parent = await parent_task if parent_task else None
+        node_start = time.time()
+        result = await run_prompt_node(node, parent, file_content, structured_system_prompt, temperature, model_name, token_usage)
+        print(f"Prompt node {node.name} finished in {time.time() - node_start:.2f} seconds")
+        return result
+    
+    try:
+        for node in nodes:
+            tasks[node.name] = asyncio.create_task(run(node, tasks.get(node.after)))
+        results = await asyncio.gather(*tasks.values())
+    finally:
+        for task in tasks.values():
+            task.cancel()
+    
+    return {name: answer for name, (_, answer) in zip(tasks, results)}
 
-async def process_prompts(feedback_content: str, executive_interview: str, api_key: str, system_prompt: str):
+async def process_prompts(feedback_content: str, executive_interview: str, api_key: str, system_prompt: str, token_usage: Optional[TokenUsage] = None):
     """
-    Process multiple prompt categories in parallel.
+    Process the reflection, strengths and development prompts as one dependency graph.
     
     Args:
         feedback_content: Content to process
         executive_interview: Executive interview content
-        api_key: Anthropic API key
+        api_key: Anthropic API key (calls go through the LLM gateway's client)
         system_prompt: System prompt
+        token_usage: Optional accumulator for the report's token usage
         
     Returns:
         List of results from processing all prompts
     """
-    client = Anthropic(api_key=api_key)
+    report_usage = TokenUsage()
     
-    reflection_prompt = get_reflection_prompts(executive_interview)
-    consumer_prompt = get_strengths_prompts()
-    pain_points_prompt = get_development_prompts()
+    categories = {
+        "reflection": get_reflection_prompts(executive_interview),
+        "strengths": get_strengths_prompts(),
+        "development": get_development_prompts()
+    }
+    nodes, outputs = build_prompt_dag(categories)
     
-    print(f"Starting parallel processing of {len([reflection_prompt, consumer_prompt, pain_points_prompt])} prompt categories")
+    print(f"Starting {len(nodes)} prompts of {len(categories)} categories as a dependency graph")
     start_time = time.time()
     
-    # Process all prompt categories in parallel
-    async def process_category(prompt_category):
-        category_start = time.time()
-        result, result1 = await process_single_prompt(
-            client=client,
-            prompt_category=prompt_category,
-            file_content=feedback_content,
-            structured_system_prompt=system_prompt
-        )
-        category_end = time.time()
-        print(f"Processed category with {len(prompt_category)} prompts in {category_end - category_start:.2f} seconds")
-        return result, result1
-    
-    # Use asyncio.gather to run all categories in parallel
-    category_results = await asyncio.gather(
-        process_category(reflection_prompt),
-        process_category(consumer_prompt),
-        process_category(pain_points_prompt)
-    )
+    answers = await run_prompt_dag(nodes, feedback_content, system_prompt, token_usage=report_usage)
     
-    # Flatten the results
+    # Two results per category, in category order
     results = []
-    for result_pair in category_results:
-        results.append(result_pair[0])  # Add the first result
-        results.append(result_pair[1])  # Add the second result
+    for category in categories:
+        for name in outputs[category]:
+            results.append(parse_gpt_response(answers[name]) if name else {})
     
     end_time = time.time()
     print(f"Completed all prompt processing in {end_time - start_time:.2f} seconds")
+    print(f"Report token usage: {report_usage.snapshot()}")
+    if token_usage is not None:
+        for key, value in vars(report_usage).items():
+            setattr(token_usage, key, getattr(token_usage, key) + value)
     
     return results
 
@@ -775,31 +822,95 @@ def transform_content_to_report_format(content_list, employee_name, report_date)
     return report_data
 
 
-async def extract_employee_info_async(pdf_path: str, api_key: str) -> Dict[str, Optional[str]]:
+_MONTH = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?"
+
+# Report date formats, most complete first
+_DATE_PATTERNS = [
+    re.compile(rf"\b{_MONTH}[ \t]+\d{{1,2}},?[ \t]+\d{{4}}\b"),
+    re.compile(r"\b\d{1,2}/\d{1,2}/\d{4}\b"),
+    re.compile(rf"\b{_MONTH}[ \t]+\d{{4}}\b"),
+]
+_YEAR_PATTERN = re.compile(r"\b(?:19|20)\d{2}\b")
+
+# A date is only taken as the report date on a line with one of these labels, or alone
+# on the line after one; dates on interview lines are never the report date
+_DATE_LABEL = re.compile(r"(?i)\b(?:report|prepared|dated?)\b")
+_INTERVIEW = re.compile(r"(?i)\binterview")
+
+_NAME = r"((?:[A-Z][a-zA-Z'’\-]+\.?[ \t]+){1,3}[A-Z][a-zA-Z'’\-]+)"
+
+# Lines that name the person a report is prepared for
+_NAME_PATTERNS = [
+    re.compile(rf"(?m)^[ \t]*(?i:prepared for|report for|feedback report for|feedback for|assessment of|assessment for|participant|executive|leader|candidate|employee|name)[ \t]*[:\-–]?[ \t]*{_NAME}[ \t]*$"),
+    re.compile(rf"(?m)^[ \t]*{_NAME}[ \t]*[\-–|:][ \t]*.*\b(?:360|Q360|E360|Feedback|Assessment|Report)\b"),
+]
+
+# Words that appear in report titles but not in names, compared in lowercase
+_NON_NAME_WORDS = {"report", "feedback", "assessment", "summary", "confidential", "leadership",
+                   "executive", "interview", "prepared", "date", "page", "stakeholder", "draft"}
+
+
+def _find_report_date(text: str) -> Optional[str]:
+    """Return the most complete date next to a report or prepared label, or None."""
+    lines = [line for line in text.splitlines() if line.strip()]
+    for pattern in _DATE_PATTERNS:
+        for i, line in enumerate(lines):
+            match = pattern.search(line)
+            if not match or _INTERVIEW.search(line):
+                continue
+            date_only = not line.replace(match.group(0), "").strip(" \t,.:-–|")
+            if _DATE_LABEL.search(line) or (date_only and i > 0 and _DATE_LABEL.search(lines[i - 1])):
+                return " ".join(match.group(0).split())
+    return None
+
+
+def extract_employee_info_heuristic(text: str) -> Dict[str, Optional[str]]:
     """
-    Extract employee name and full report date from E360 report using LLM (async version).
+    Extract the employee name and report date from a report's cover text with regexes.
     
     Args:
-        pdf_path (str): Path to the PDF file
-        api_key (str): Anthropic API key
+        text: Leading text of the report
+    
+    Returns:
+        Dict containing employee_name and report_date; a value is None when it could
+        not be found, and report_date is None when only a year or an unlabeled date
+        was found
+    """
+    name = None
+    for pattern in _NAME_PATTERNS:
+        for match in pattern.finditer(text):
+            candidate = " ".join(match.group(1).split())
+            if not _NON_NAME_WORDS & set(candidate.replace(".", "").lower().split()):
+                name = candidate
+                break
+        if name:
+            break
+    
+    return {
+        'employee_name': name,
+        'report_date': _find_report_date(text)
+    }
+
+def read_cover_text_from_pdf(pdf_path: str) -> str:
+    """Read the text of the first 3 pages of a PDF with PyPDF2."""
+    reader = PdfReader(pdf_path)
+    text = ""
+    for i in range(min(3, len(reader.pages))):
+        text += reader.pages[i].extract_text() + "\n\n"
+    return text
+
+async def extract_employee_info_llm(text: str) -> Dict[str, Optional[str]]:
+    """
+    Extract employee name and full report date from report text using the LLM.
+    
+    Args:
+        text: Leading text of the report
     
     Returns:
         Dict containing employee_name and report_date (full date if available)
     """
-    try:
-        # Initialize Anthropic client
-        client = Anthropic(api_key=api_key)
-        
-        # Read the PDF
-        reader = PdfReader(pdf_path)
-        
-        # Extract text from first 3 pages
-        text = ""
-        for i in range(min(3, len(reader.pages))):
-            text += reader.pages[i].extract_text() + "\n\n"
-        
-        # Construct prompt for Claude
-        prompt = f"""Please help me extract exactly two pieces of information from this E360 report text:
+    # Construct prompt for Claude
+    prompt = f"""Please help me extract exactly two pieces of information from this E360 report text:
 1. The full name of the employee for whom this report is prepared
 2. The most complete date of the report you can find. This could be:
    - Full date (e.g., "July 24, 2024" or "7/24/2024")
@@ -817,31 +928,62 @@ Here's the text:
 {text[:4000]}  # Limiting text length for API
 
 Only return the exact format specified above, nothing else."""
+    
+    # Get response from Claude using our rate limiting and concurrency control
+    response_text = await call_claude_api(
+        messages=[{"role": "user", "content": prompt}],
+        system_prompt="You are a precise data extraction assistant. Only return the exact format requested, nothing else.",
+        model_name="claude-3-opus-20240229",
+        max_tokens=100,
+        temperature=0
+    )
+    
+    # Parse response
+    # Extract name and date using simple parsing
+    name = None
+    date = None
+    
+    for line in response_text.split('\n'):
+        if line.startswith('Name:'):
+            name = line.replace('Name:', '').strip()
+        elif line.startswith('Date:'):
+            date = line.replace('Date:', '').strip()
+    
+    return {
+        'employee_name': name,
+        'report_date': date
+    }
+
+async def extract_employee_info_async(pdf_path: str, api_key: str, cover_text: Optional[str] = None) -> Dict[str, Optional[str]]:
+    """
+    Extract employee name and full report date from E360 report (async version).
+    
+    The cover text parsed at ingest is used when available, so the PDF is not read
+    again. Regex heuristics run first; the LLM is only called when they can't find
+    both the name and a date more complete than a year.
+    
+    Args:
+        pdf_path (str): Path to the PDF file, read only when no cover text is given
+        api_key (str): Anthropic API key (calls go through the LLM gateway's client)
+        cover_text (str): Leading text of the report stored at ingest
+    
+    Returns:
+        Dict containing employee_name and report_date (full date if available)
+    """
+    try:
+        if not cover_text:
+            cover_text = await asyncio.to_thread(read_cover_text_from_pdf, pdf_path)
         
-        # Get response from Claude using our rate limiting and concurrency control
-        response_text = await call_claude_api(
-            client=client,
-            messages=[{"role": "user", "content": prompt}],
-            system_prompt="You are a precise data extraction assistant. Only return the exact format requested, nothing else.",
-            model_name="claude-3-opus-20240229",
-            max_tokens=100,
-            temperature=0
-        )
-        
-        # Parse response
-        # Extract name and date using simple parsing
-        name = None
-        date = None
-        
-        for line in response_text.split('\n'):
-            if line.startswith('Name:'):
-                name = line.replace('Name:', '').strip()
-            elif line.startswith('Date:'):
-                date = line.replace('Date:', '').strip()
+        info = extract_employee_info_heuristic(cover_text)
+        if info['employee_name'] and info['report_date']:
+            print("Extracted employee info from cover text without LLM")
+            return info
         
+        llm_info = await extract_employee_info_llm(cover_text)
+        year = _YEAR_PATTERN.search(cover_text)
         return {
-            'employee_name': name,
-            'report_date': date
+            'employee_name': llm_info['employee_name'] or info['employee_name'],
+            'report_date': llm_info['report_date'] or info['report_date'] or (year.group(0) if year else None)
         }
         
     except Exception as e:
@@ -851,32 +993,30 @@ Only return the exact format specified above, nothing else."""
             'report_date': None
         }
 
-def extract_employee_info(pdf_path: str, api_key: str) -> Dict[str, Optional[str]]:
+def extract_employee_info(pdf_path: str, api_key: str, cover_text: Optional[str] = None) -> Dict[str, Optional[str]]:
     """
-    Extract employee name and full report date from E360 report using LLM.
-    This is a synchronous wrapper around the async version.
+    Extract employee name and full report date from E360 report.
+    This is a synchronous wrapper around the async version for scripts; async code
+    should await extract_employee_info_async instead.
     
     Args:
         pdf_path (str): Path to the PDF file
         api_key (str): Anthropic API key
+        cover_text (str): Leading text of the report stored at ingest
     
     Returns:
         Dict containing employee_name and report_date (full date if available)
     """
     try:
-        # Use asyncio to run the async version
-        import asyncio
-        
-        # Check if we're already in an event loop
-        if asyncio.get_event_loop().is_running():
-            # We're already in an async context, create a task
-            print("Using existing event loop for employee info extraction")
-            loop = asyncio.get_event_loop()
-            return loop.run_until_complete(extract_employee_info_async(pdf_path, api_key))
-        else:
-            # We're not in an async context, use asyncio.run
-            print("Creating new event loop for employee info extraction")
-            return asyncio.run(extract_employee_info_async(pdf_path, api_key))
+        asyncio.get_running_loop()
+    except RuntimeError:
+        # We're not in an async context, use asyncio.run
+        return asyncio.run(extract_employee_info_async(pdf_path, api_key, cover_text))
+    
+    # A running loop can't be blocked on; only the local heuristics are available here
+    print("extract_employee_info called inside an event loop, use extract_employee_info_async; using heuristics only")
+    try:
+        return extract_employee_info_heuristic(cover_text or read_cover_text_from_pdf(pdf_path))
     except Exception as e:
         print(f"Error in extract_employee_info: {str(e)}")
         return {
@@ -1,3 +1,4 @@
+import hashlib
 import json
 import os
 import traceback
@@ -14,21 +15,25 @@ import special_name_processor
 import uvicorn
 from auth.user import User, get_current_user
 from cache_manager import (add_to_filename_map, get_cached_data,
-                           get_cached_file_id, save_cached_data)
-from db.core import get_async_db, get_db
-from db.feedback import get_cached_feedback
+                           get_cached_file_id, is_known_file_id,
+                           save_cached_data)
+from db.core import get_async_db, get_db, session_local
+from db.file import async_get_employee_metadata
+from db.feedback import get_feedback_category
 from docx import Document
+from evidence_classifier import COMPETENCY_MAPPINGS
+from evidence_sorting import (SORT_EVIDENCE_MAX_TOKENS, prepare_evidence_for_sorting,
+                              process_batches_parallel, stream_sorted_evidence)
 from docx.shared import Inches
 from dotenv import load_dotenv
 from fastapi import (Depends, FastAPI, Header, HTTPException, Query, Response,
                      UploadFile, status)
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from generate_raw_data import (get_areas_to_target_data, get_raw_data,
                                get_strengths_data)
-from generate_report_llm import (extract_employee_info, process_prompts,
-                                 read_file_content,
+from generate_report_llm import (extract_employee_info_async, process_prompts,
                                  transform_content_to_report_format)
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -40,9 +45,15 @@ from prompt_loader import (format_area_content_prompt,
 from pydantic import BaseModel
 from report_generation import (create_360_feedback_report,
                                create_360_feedback_report_for_word)
+from single_flight import single_flight
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from state import files_store
+from transcript_store import transcript_store
+from utils.structured_output import (AdviceByStakeholder, AreasFeedback, Headings,
+                                     NextSteps, ReflectionPoints, SortedEvidence,
+                                     StrengthsFeedback, StructuredOutputError,
+                                     UpdatedReport, create_structured)
 from utils.jwt_utils import verify_clerk_token
 from utils.postgreSql_uitls import get_db_connection
 from utils.validate_envs import validate_required_env
@@ -53,29 +64,6 @@ from routers.file import router as file_routers
 from routers.snapshot import router as snapshot_routers
 
 
-def read_filename_map():
-    try:
-        # Define the path to the filename_map.json file
-        CACHE_DIR = "../data/cache"
-        filepath = os.path.join(CACHE_DIR, "filename_map.json")
-        
-        # Open and read the file
-        with open(filepath, 'r') as file:
-            filename_map = json.load(file)
-            
-        print(f"Successfully loaded filename map with {len(filename_map)} entries")
-        return filename_map
-    
-    except FileNotFoundError:
-        print(f"Error: File not found at {filepath}")
-        return {}
-    except json.JSONDecodeError:
-        print(f"Error: Invalid JSON format in {filepath}")
-        return {}
-    except Exception as e:
-        print(f"Error reading filename map: {str(e)}")
-        return {}
-
 # Example usage:
 
 
@@ -255,6 +243,14 @@ def get_name_from_report(file_id: str) -> str:
     return report_data.get("name", "")
 
 
+async def get_employee_name(user_id: str, file_id: str, db: AsyncSession) -> str:
+    """Employee name extracted at ingest, falling back to the generated report for older tasks."""
+    metadata = await async_get_employee_metadata(user_id, file_id, db)
+    if metadata and metadata.get("employee_name"):
+        return metadata["employee_name"]
+    return get_name_from_report(file_id)
+
+
 @app.post("/api/old/upload_file", tags=["old"])
 async def upload_file(
     file: UploadFile,
@@ -263,9 +259,12 @@ async def upload_file(
     ),
 ):
     try:
-        # Check if we have this file cached
+        content = await file.read()
+        content_hash = hashlib.sha256(content).hexdigest()
+
+        # Check if we have this file cached; only an upload of the same content matches
         if use_cache:
-            cached_file_id = get_cached_file_id(file.filename, use_cache=True)
+            cached_file_id = get_cached_file_id(file.filename, use_cache=True, content_hash=content_hash)
             if cached_file_id:
                 print(f"Using cached file ID {cached_file_id} for {file.filename}")
                 # Check if the file still exists
@@ -285,7 +284,6 @@ async def upload_file(
 
         # Save file to disk
         with open(file_path, "wb") as f:
-            content = await file.read()
             f.write(content)
 
         # Process the file
@@ -299,7 +297,7 @@ async def upload_file(
 
         # Add to cache mapping
         # breakpoint()
-        add_to_filename_map(file.filename, file_id)
+        add_to_filename_map(file.filename, file_id, content_hash)
 
         return {"file_id": file_id}
     except Exception as e:
@@ -313,8 +311,7 @@ async def generate_report(
         True, description="Whether to use cached results if available"
     ),
 ):  
-    files_store = read_filename_map()
-    if file_id not in files_store:
+    if not is_known_file_id(file_id):
         raise HTTPException(status_code=404, detail="File not found")
 
     try:
@@ -326,18 +323,19 @@ async def generate_report(
                 return cached_data
 
         # If not cached or cache disabled, process normally
-        self_transcript = SAVE_DIR + "/executive_" + file_id + ".txt"
-        others_transcript = SAVE_DIR + "/filtered_" + file_id + ".txt"
-
-        feedback_content = read_file_content(others_transcript)
-        executive_interview = read_file_content(self_transcript)
+        feedback_content = transcript_store.get(file_id, "filtered") or ""
+        executive_interview = transcript_store.get(file_id, "executive") or ""
+        
+        # Cover text parsed at ingest, so name extraction doesn't re-read the PDF
+        cover_text = transcript_store.get(file_id, "cover")
 
         system_prompt = ""
 
-        results = await process_prompts(
-            feedback_content, executive_interview, api_key, system_prompt
+        # Name and date extraction doesn't depend on the report prompts, start both at once
+        results, name_data = await asyncio.gather(
+            process_prompts(feedback_content, executive_interview, api_key, system_prompt),
+            extract_employee_info_async(UPLOAD_DIR + "/" + file_id + ".pdf", api_key, cover_text),
         )
-        name_data = extract_employee_info(UPLOAD_DIR + "/" + file_id + ".pdf", api_key)
 
         employee_name = name_data.get("employee_name", "")
         report_date = name_data.get("report_date", "")
@@ -393,13 +391,10 @@ async def get_raw_data_endpoint(
             report_data = json.load(f)
 
         # Get the transcript
-        transcript_path = os.path.join(SAVE_DIR, f"filtered_{file_id}.txt")
-        if not os.path.exists(transcript_path):
+        transcript = transcript_store.get(file_id, "filtered")
+        if transcript is None:
             raise HTTPException(status_code=404, detail="Transcript not found.")
 
-        with open(transcript_path, "r") as f:
-            transcript = f.read()
-
         # Extract strengths and areas_to_target from the report data
         strengths = report_data.get("strengths", {})
         areas_to_target = report_data.get("areas_to_target", {})
@@ -538,37 +533,25 @@ async def upload_updated_report(
         # Load and format prompt
         prompt = load_prompt("upload_updated_report.txt").format(text=text)
 
-        response = client.messages.create(
-            model="claude-3-7-sonnet-latest",
-            max_tokens=4000,
-            temperature=0,
-            messages=[{"role": "user", "content": prompt}],
-        )
-
-        # Parse response with better error handling
-        response_text = response.content[0].text
         try:
-            # Try direct JSON parsing first
-            parsed_data = json.loads(response_text)
-        except json.JSONDecodeError:
-            # Try to extract JSON if surrounded by other text
-            try:
-                start = response_text.find("{")
-                end = response_text.rfind("}") + 1
-                if start >= 0 and end > 0:
-                    json_str = response_text[start:end]
-                    parsed_data = json.loads(json_str)
-                else:
-                    raise ValueError("No JSON content found in response")
-            except Exception as e:
-                print(f"Error parsing response: {str(e)}")
-                print(f"Raw response: {response_text}")
-                raise HTTPException(
-                    status_code=500,
-                    detail="Failed to parse AI response into valid JSON",
-                )
+            report = create_structured(
+                client,
+                UpdatedReport,
+                "record_report",
+                "Record the name, date, sections and next steps of the report",
+                model="claude-3-7-sonnet-latest",
+                max_tokens=4000,
+                temperature=0,
+                messages=[{"role": "user", "content": prompt}],
+            )
+        except StructuredOutputError as e:
+            print(f"Error in updated report response: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail="AI response did not match the report schema",
+            )
 
-        return parsed_data
+        return report.model_dump()
 
     except Exception as e:
         print(f"Error in upload_updated_report: {str(e)}")
@@ -598,35 +581,24 @@ async def generate_reflection_points(
             feedback_transcript, executive_transcript
         )
 
-        response = client.messages.create(
-            model="claude-3-7-sonnet-latest",
-            max_tokens=1000,
-            temperature=0,
-            messages=[{"role": "user", "content": prompt}],
-        )
-
-        # Extract JSON from response
-        # print(response.content[0].text)
-        response_text = response.content[0].text.replace("\n", "").replace("\\", "")
         try:
-            result = json.loads(response_text)
-        except json.JSONDecodeError:
-            try:
-                start = response_text.find("{")
-                end = response_text.rfind("}") + 1
-                if start >= 0 and end > 0:
-                    json_str = response_text[start:end]
-                    result = json.loads(json_str)
-                else:
-                    raise ValueError("No JSON content found in response")
-            except Exception as e:
-                print(f"Error parsing reflection points response: {str(e)}")
-                print(f"Raw response: {response_text}")
-                raise HTTPException(
-                    status_code=500, detail="Failed to parse reflection points response"
-                )
+            result = create_structured(
+                client,
+                ReflectionPoints,
+                "record_reflection_points",
+                "Record the discussion prompt, its bullet points and the context summary",
+                model="claude-3-7-sonnet-latest",
+                max_tokens=1000,
+                temperature=0,
+                messages=[{"role": "user", "content": prompt}],
+            )
+        except StructuredOutputError as e:
+            print(f"Error in reflection points response: {str(e)}")
+            raise HTTPException(
+                status_code=500, detail="AI response did not match the reflection points schema"
+            )
 
-        return result
+        return result.model_dump()
     except Exception as e:
         print(f"Error generating reflection points: {str(e)}")
         print(traceback.format_exc())
@@ -647,6 +619,8 @@ async def generate_next_steps_options():
 @app.post("/api/generate_next_steps")
 async def generate_next_steps(
     request: dict,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         print("\n=== Generate Next Steps Request ===")
@@ -662,22 +636,14 @@ async def generate_next_steps(
         print(f"Number of areas: {len(areas_to_target)}")
 
         # Load both transcripts using file ID
-        feedback_path = f"../data/processed_assessments/filtered_{file_id}.txt"
-        executive_path = f"../data/processed_assessments/executive_{file_id}.txt"
-
-        if not os.path.exists(feedback_path):
+        feedback_transcript = transcript_store.get(file_id, "filtered")
+        if feedback_transcript is None:
             raise HTTPException(
                 status_code=404,
-                detail=f"Feedback transcript not found at {feedback_path}",
+                detail=f"Feedback transcript not found at {transcript_store.path(file_id, 'filtered')}",
             )
 
-        with open(feedback_path, "r") as f:
-            feedback_transcript = f.read()
-
-        executive_transcript = ""
-        if os.path.exists(executive_path):
-            with open(executive_path, "r") as f:
-                executive_transcript = f.read()
+        executive_transcript = transcript_store.get(file_id, "executive") or ""
 
         # Get reflection points first
         reflection_points = await generate_reflection_points(
@@ -695,45 +661,27 @@ async def generate_next_steps(
 
         # Generate content using Claude
         client = anthropic.Anthropic(api_key=api_key)
-        name = get_name_from_report(file_id)
+        name = await get_employee_name(current_user.user_id, file_id, db)
         prompt = format_next_steps_prompt(name, areas_text, feedback_transcript)
 
-        response = client.messages.create(
-            model="claude-3-7-sonnet-latest",
-            max_tokens=2000,
-            temperature=0,
-            messages=[{"role": "user", "content": prompt}],
-        )
-
-        # Extract JSON from response
-        response_text = response.content[0].text.replace("\n", "").replace("\\", "")
-        print("\n=== Claude Response ===")
-        print(response_text)
         try:
-            # Try to parse the entire response as JSON first
-            result = json.loads(response_text)
-        except json.JSONDecodeError:
-            # If that fails, try to extract JSON from the text
-            try:
-                # Find JSON-like content between curly braces
-                start = response_text.find("{")
-                end = response_text.rfind("}") + 1
-                if start >= 0 and end > 0:
-                    json_str = response_text[start:end]
-                    result = json.loads(json_str)
-                else:
-                    raise ValueError("No JSON content found in response")
-            except Exception as e:
-                print(f"Error parsing response: {str(e)}")
-                print(f"Raw response: {response_text}")
-                raise HTTPException(
-                    status_code=500,
-                    detail="Failed to parse AI response into valid JSON",
-                )
-
-        # Ensure the response has the expected structure
-        if "next_steps" not in result:
-            result = {"next_steps": result}
+            next_steps = create_structured(
+                client,
+                NextSteps,
+                "record_next_steps",
+                "Record the next steps, each with its main point and sub-points",
+                model="claude-3-7-sonnet-latest",
+                max_tokens=2000,
+                temperature=0,
+                messages=[{"role": "user", "content": prompt}],
+            )
+        except StructuredOutputError as e:
+            print(f"Error in next steps response: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail="AI response did not match the next steps schema",
+            )
+        result = next_steps.model_dump()
 
         # Combine reflection points and action steps
         if "reflection_prompts" in reflection_points:
@@ -758,7 +706,9 @@ async def generate_next_steps(
 
 @app.post("/api/generate_area_content")
 async def generate_area_content(
-    request: GenerateContentRequest 
+    request: GenerateContentRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         print(
@@ -766,19 +716,16 @@ async def generate_area_content(
         )
         # print("Existing content: ",request.existing_content)
         # Load transcript using file ID
-        feedback_path = f"../data/processed_assessments/filtered_{request.file_id}.txt"
-        if not os.path.exists(feedback_path):
+        feedback_transcript = transcript_store.get(request.file_id, "filtered")
+        if feedback_transcript is None:
             raise HTTPException(
                 status_code=404,
-                detail=f"Feedback transcript not found at {feedback_path}",
+                detail=f"Feedback transcript not found at {transcript_store.path(request.file_id, 'filtered')}",
             )
 
-        with open(feedback_path, "r") as f:
-            feedback_transcript = f.read()
-
         # Generate content using Claude
         client = anthropic.Anthropic(api_key=api_key)
-        name = get_name_from_report(request.file_id)
+        name = await get_employee_name(current_user.user_id, request.file_id, db)
         prompt = format_area_content_prompt(
             name, request.heading, feedback_transcript, request.existing_content
         )
@@ -797,293 +744,6 @@ async def generate_area_content(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def repair_json(json_str):
-    """
-    Advanced JSON repair algorithm that can handle nested structures.
-    
-    Args:
-        json_str: The JSON string to repair
-        
-    Returns:
-        Repaired JSON string
-    """
-    # Track nesting levels and string context
-    in_string = False
-    escape_next = False
-    brace_stack = []
-    bracket_stack = []
-    
-    # Process character by character
-    repaired = []
-    for i, char in enumerate(json_str):
-        repaired.append(char)
-        
-        # Handle string context
-        if char == '"' and not escape_next:
-            in_string = not in_string
-        
-        # Track escape sequences
-        if char == '\\' and not escape_next:
-            escape_next = True
-        else:
-            escape_next = False
-            
-        # Only track structure outside of strings
-        if not in_string:
-            # Track array nesting
-            if char == '[':
-                bracket_stack.append(i)
-            elif char == ']' and bracket_stack:
-                bracket_stack.pop()
-                
-            # Track object nesting
-            if char == '{':
-                brace_stack.append(i)
-            elif char == '}' and brace_stack:
-                brace_stack.pop()
-    
-    # Fix unterminated strings
-    if in_string:
-        repaired.append('"')
-    
-    # Close any unclosed arrays
-    while bracket_stack:
-        bracket_stack.pop()
-        repaired.append(']')
-    
-    # Close any unclosed objects
-    while brace_stack:
-        brace_stack.pop()
-        repaired.append('}')
-    
-    return ''.join(repaired)
-
-
-def parse_claude_response(response_text):
-    """
-    Enhanced JSON parsing with repair capability for Claude API responses.
-    
-    Args:
-        response_text: The raw response text from Claude API
-        
-    Returns:
-        Parsed JSON object
-        
-    Raises:
-        Exception: If parsing fails after repair attempts
-    """
-    try:
-        # First try direct parsing
-        return json.loads(response_text)
-    except json.JSONDecodeError as e:
-        print(f"Initial JSON parsing failed: {str(e)}")
-        try:
-            # Find JSON array
-            if response_text.strip().startswith('['):
-                start = response_text.find("[")
-                end = response_text.rfind("]") + 1
-                if start >= 0 and end > 0:
-                    json_str = response_text[start:end]
-                    
-                    # Basic repair for unterminated strings and other common issues
-                    lines = json_str.split('\n')
-                    repaired_lines = []
-                    
-                    for i, line in enumerate(lines):
-                        # Check for unterminated strings in name field
-                        if '"name": "' in line and not (line.strip().endswith('",') or line.strip().endswith('"')):
-                            line = line.rstrip() + '",'
-                        
-                        # Check for unterminated strings in position field
-                        if '"position": "' in line and not (line.strip().endswith('",') or line.strip().endswith('"')):
-                            line = line.rstrip() + '",'
-                        
-                        # Check for unterminated strings in quote field
-                        if '"quote": "' in line and not (line.strip().endswith('",') or line.strip().endswith('"')):
-                            line = line.rstrip() + '",'
-                        
-                        # Handle unterminated isStrong field
-                        if '"isStrong": ' in line and not any(line.strip().endswith(x) for x in ['true', 'false', 'true,', 'false,']):
-                            if 'true' in line.lower():
-                                line = line.rstrip() + 'true,'
-                            else:
-                                line = line.rstrip() + 'false,'
-                        
-                        # Check for missing commas between objects
-                        if i < len(lines) - 1:
-                            next_line = lines[i+1].strip()
-                            if line.strip().endswith('}') and next_line.startswith('{'):
-                                line = line.rstrip() + ','
-                            elif line.strip().endswith(']') and next_line.startswith('['):
-                                line = line.rstrip() + ','
-                        
-                        repaired_lines.append(line)
-                    
-                    repaired_json = '\n'.join(repaired_lines)
-                    
-                    try:
-                        return json.loads(repaired_json)
-                    except json.JSONDecodeError:
-                        # If still failing, try a more aggressive approach
-                        print("First repair attempt failed, trying more aggressive repair")
-                        repaired_json = repaired_json.replace('}\n  {', '},\n  {')
-                        repaired_json = repaired_json.replace(']\n  [', '],\n  [')
-                        
-                        try:
-                            return json.loads(repaired_json)
-                        except json.JSONDecodeError:
-                            # If still failing, try the advanced repair algorithm
-                            print("Second repair attempt failed, trying advanced repair")
-                            repaired_json = repair_json(json_str)
-                            return json.loads(repaired_json)
-            
-            # Find JSON object if not an array
-            start = response_text.find("{")
-            end = response_text.rfind("}") + 1
-            if start >= 0 and end > 0:
-                json_str = response_text[start:end]
-                try:
-                    return json.loads(json_str)
-                except json.JSONDecodeError:
-                    # Try advanced repair
-                    repaired_json = repair_json(json_str)
-                    return json.loads(repaired_json)
-                
-            raise ValueError("No JSON content found in response")
-        except Exception as nested_e:
-            print(f"Error in JSON repair: {str(nested_e)}")
-            print(f"Original error: {str(e)}")
-            print(f"Raw response: {response_text}")
-            raise Exception(f"Failed to parse AI response into valid JSON: {str(e)}")
-
-
-async def process_batch(batch_data, headings, is_strengths=True):
-    """
-    Process a single batch of stakeholders and their feedback.
-    
-    Args:
-        batch_data: Dictionary of stakeholders and their feedback for this batch
-        headings: List of headings to sort evidence under
-        is_strengths: Whether this is for strengths (True) or areas to target (False)
-        
-    Returns:
-        Sorted evidence for this batch
-    """
-    # Convert batch data to JSON
-    batch_json = json.dumps(batch_data, indent=2)
-    
-    # Load appropriate prompt
-    prompt_file = "sort_evidence_strenght.txt" if is_strengths else "sort_evidence_area_to_target.txt"
-    sort_prompt = load_prompt(prompt_file)
-    
-    # Format prompt for this batch
-    if is_strengths:
-        prompt = sort_prompt.format(strengths=batch_json, headings="\n".join(headings))
-    else:
-        prompt = sort_prompt.format(areas=batch_json, headings="\n".join(headings))
-    
-    # Initialize Claude client
-    client = anthropic.Anthropic(api_key=api_key)
-    
-    # Get sorted evidence from Claude for this batch
-    response = client.messages.create(
-        model="claude-3-7-sonnet-latest",
-        max_tokens=2000,
-        temperature=0,
-        messages=[{"role": "user", "content": prompt}],
-    )
-    
-    # Parse JSON response
-    response_text = response.content[0].text
-    
-    try:
-        # Use enhanced parser that can handle common JSON issues
-        return parse_claude_response(response_text)
-    except Exception as e:
-        print(f"Error parsing response: {str(e)}")
-        print(f"Raw response: {response_text}")
-        raise HTTPException(
-            status_code=500,
-            detail="Failed to parse AI response into valid JSON",
-        )
-
-async def process_batches_parallel(stakeholder_data, headings, batch_size, is_strengths=True):
-    """
-    Process multiple batches of stakeholders in parallel.
-    
-    Args:
-        stakeholder_data: Dictionary of all stakeholders and their feedback
-        headings: List of headings to sort evidence under
-        batch_size: Number of stakeholders to process in each batch
-        is_strengths: Whether this is for strengths (True) or areas to target (False)
-        
-    Returns:
-        Merged result with all evidence sorted under headings
-    """
-    # Create batches
-    stakeholders = list(stakeholder_data.keys())
-    batches = []
-    
-    for i in range(0, len(stakeholders), batch_size):
-        batch_end = min(i + batch_size, len(stakeholders))
-        batch_stakeholders = stakeholders[i:batch_end]
-        batch_data = {k: stakeholder_data[k] for k in batch_stakeholders if k in stakeholder_data}
-        batches.append(batch_data)
-    
-    print(f"Processing {len(batches)} batches in parallel")
-    
-    # Process batches in parallel
-    tasks = []
-    for batch in batches:
-        task = asyncio.create_task(process_batch(batch, headings, is_strengths))
-        tasks.append(task)
-    
-    # Wait for all tasks to complete
-    batch_results = await asyncio.gather(*tasks)
-    
-    # Merge results from all batches
-    return merge_sorted_evidence(batch_results)
-
-def merge_sorted_evidence(batch_results):
-    """
-    Merge multiple batches of sorted evidence into a single result.
-    
-    Args:
-        batch_results: List of results from different batches
-        
-    Returns:
-        Merged result with all evidence
-    """
-    if not batch_results:
-        return []
-        
-    # Initialize with the structure from the first batch
-    merged_result = []
-    heading_map = {}  # To track headings we've already seen
-    
-    # Process each batch
-    for batch in batch_results:
-        for item in batch:
-            heading = item["heading"]
-            
-            # If we've seen this heading before, append evidence
-            if heading in heading_map:
-                existing_item = merged_result[heading_map[heading]]
-                
-                # Add new evidence, avoiding duplicates
-                existing_quotes = {e["quote"] for e in existing_item["evidence"]}
-                for evidence in item["evidence"]:
-                    if evidence["quote"] not in existing_quotes:
-                        existing_item["evidence"].append(evidence)
-                        existing_quotes.add(evidence["quote"])
-            else:
-                # New heading, add to result
-                heading_map[heading] = len(merged_result)
-                merged_result.append(item)
-    
-    return merged_result
-
-
 @app.post("/api/sort-strengths-evidence")
 async def sort_strengths_evidence(
     request: SortEvidenceRequest,
@@ -1093,26 +753,24 @@ async def sort_strengths_evidence(
     try:
         # Get previously generated strengths from the database
         user_id = current_user.user_id
-        feedback_data = None
+        strengths_data = None
         
         #  TODO: implement db feedback_transcript
         if user_id:
             try:
-                feedback_data = get_cached_feedback(user_id, request.file_id, db)
+                # Only the strengths are read out of the feedback document
+                strengths_data = get_feedback_category(user_id, request.file_id, "strengths", db)
             except Exception as e:
                 print(f"Error getting cached feedback: {str(e)}")
         
-        if not feedback_data:
+        if strengths_data is None:
             # If no cached feedback data, use the transcript directly
-            feedback_path = f"../data/processed_assessments/filtered_{request.file_id}.txt"
-            if not os.path.exists(feedback_path):
+            transcript = transcript_store.get(request.file_id, "filtered")
+            if transcript is None:
                 raise HTTPException(
                     status_code=404,
-                    detail=f"Feedback transcript not found at {feedback_path}",
+                    detail=f"Feedback transcript not found at {transcript_store.path(request.file_id, 'filtered')}",
                 )
-
-            with open(feedback_path, "r") as f:
-                transcript = f.read()
                 
             # Initialize Claude client
             client = anthropic.Anthropic(api_key=api_key)
@@ -1124,70 +782,38 @@ async def sort_strengths_evidence(
             )
             
             # Get sorted evidence from Claude
-            response = client.messages.create(
-                model="claude-3-7-sonnet-latest",
-                max_tokens=2000,
-                temperature=0,
-                messages=[{"role": "user", "content": prompt}],
-            )
-
-            # Parse JSON response
-            response_text = response.content[0].text
-
             try:
-                result = json.loads(response_text)
-            except json.JSONDecodeError:
-                try:
-                    start = response_text.find("[")
-                    end = response_text.rfind("]") + 1
-                    if start >= 0 and end > 0:
-                        json_str = response_text[start:end]
-                        result = json.loads(json_str)
-                    else:
-                        raise ValueError("No JSON content found in response")
-                except Exception as e:
-                    print(f"Error parsing response: {str(e)}")
-                    print(f"Raw response: {response_text}")
-                    raise HTTPException(
-                        status_code=500,
-                        detail="Failed to parse AI response into valid JSON",
-                    )
+                sorted_evidence = create_structured(
+                    client,
+                    SortedEvidence,
+                    "record_sorted_evidence",
+                    "Record the evidence sorted under each heading",
+                    model="claude-3-7-sonnet-latest",
+                    max_tokens=SORT_EVIDENCE_MAX_TOKENS,
+                    temperature=0,
+                    messages=[{"role": "user", "content": prompt}],
+                )
+            except StructuredOutputError as e:
+                print(f"Error in sorted evidence response: {str(e)}")
+                raise HTTPException(
+                    status_code=500,
+                    detail="AI response did not match the sorted evidence schema",
+                )
+            result = [item.model_dump() for item in sorted_evidence.headings]
 
             return result
         else:
             # Use the previously generated strengths from the database
-            strengths_data = feedback_data.get("strengths", {})
-            
             # Process the strengths data to ensure it has the is_strong flag
-            processed_strengths = {}
-            for person, data in strengths_data.items():
-                processed_feedback = []
-                for feedback_item in data.get("feedback", []):
-                    if isinstance(feedback_item, dict):
-                        # New format with is_strong flag
-                        processed_feedback.append({
-                            "text": feedback_item.get("text", ""),
-                            "is_strong": feedback_item.get("is_strong", False)
-                        })
-                    else:
-                        # Handle legacy format (plain string)
-                        processed_feedback.append({
-                            "text": feedback_item,
-                            "is_strong": False
-                        })
-                
-                processed_strengths[person] = {
-                    "role": data.get("role", ""),
-                    "feedback": processed_feedback
-                }
+            processed_strengths = prepare_evidence_for_sorting(strengths_data)
             
             # Count total feedback items for verification
             total_feedback_items = sum(len(data.get("feedback", [])) for data in processed_strengths.values())
             print(f"Total feedback items to process: {total_feedback_items}")
             
-            # Process in parallel with batch size 1 for maximum reliability
-            print(f"Processing strengths evidence in parallel with batch size 1")
-            result = await process_batches_parallel(processed_strengths, request.headings, batch_size=1, is_strengths=True)
+            # Process in parallel with batches sized to fit the response token limit
+            print(f"Processing strengths evidence in parallel with token-aware batches")
+            result = await process_batches_parallel(processed_strengths, request.headings, is_strengths=True)
             
             # Verify total evidence count
             total_evidence = sum(len(item.get("evidence", [])) for item in result)
@@ -1283,19 +909,6 @@ def transform_area_evidence(sorted_result):
     """
     transformed = {"developmentAreas": {}}
     
-    # Default competency mappings based on heading
-    competency_mappings = {
-        "Strategic thinking.": ["Strategic thinking", "Business acumen", "Problem solving"],
-        "Collaborative influence.": ["Influence", "Communication", "Positive relationships"],
-        "Directive leadership.": ["Communication", "Influence", "Driving results"],
-        "Team development.": ["Develops the team", "Inspiring the team", "Positive relationships"],
-        "External presence.": ["Business acumen", "Influence", "Org savvy"],
-        "Results orientation.": ["Driving results", "Execution", "Planning"],
-        "Organizational presence.": ["Org savvy", "Influence", "Positive relationships"],
-        "Talent acceleration.": ["Develops the team", "Learning agility", "Inspiring the team"],
-        "Additional areas.": ["Other"]
-    }
-    
     for item in sorted_result:
         heading = item["heading"]
         evidence = item["evidence"]
@@ -1311,7 +924,7 @@ def transform_area_evidence(sorted_result):
             })
         
         # Get competency alignment from mapping or use defaults
-        competencies = competency_mappings.get(heading, ["Communication", "Influence"])
+        competencies = COMPETENCY_MAPPINGS.get(heading, ["Communication", "Influence"])
         
         transformed["developmentAreas"][heading] = {
             "competencyAlignment": competencies,
@@ -1321,6 +934,82 @@ def transform_area_evidence(sorted_result):
     return transformed
 
 
+async def generate_strength_evidences(file_id: str, numCompetencies: int, user_id: Optional[str]):
+    """
+    Generate strength headings, sort the evidence under them and cache the result.
+
+    Runs as a single-flight task that other requests join and that outlives a
+    cancelled caller, so it opens a session of its own instead of using the
+    caller's request-scoped one.
+    """
+    with session_local() as db:
+        return await _generate_strength_evidences(file_id, numCompetencies, user_id, db)
+
+
+async def _generate_strength_evidences(file_id: str, numCompetencies: int, user_id: Optional[str], db: Session):
+    # Get previously generated strengths from the database
+    strengths_data = None
+    
+    if user_id:
+        try:
+            strengths_data = get_feedback_category(user_id, file_id, "strengths", db)
+        except Exception as e:
+            print(f"Error getting cached feedback: {str(e)}")
+    
+    if strengths_data is None:
+        # If not in database, we need to generate it first
+        raise HTTPException(
+            status_code=400,
+            detail="Feedback data not found. Please generate feedback data first."
+        )
+        
+    print(f"Step 1: Generating competency headings for strengths")
+    
+    # Step 1: Generate competency headings using the new simplified prompt
+    strength_prompt = load_prompt("strength_headings.txt")
+    prompt = strength_prompt.format(num_competencies=numCompetencies)
+    
+    # Generate headings using Claude
+    client = anthropic.Anthropic(api_key=api_key)
+    try:
+        headings_result = create_structured(
+            client,
+            Headings,
+            "record_headings",
+            "Record the competency headings",
+            model="claude-3-7-sonnet-latest",
+            max_tokens=1000,
+            temperature=0,
+            messages=[{"role": "user", "content": prompt}],
+        )
+    except StructuredOutputError as e:
+        print(f"Error in headings response: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="AI response did not match the headings schema",
+        )
+    
+    # Extract headings as a simple list
+    headings = headings_result.headings
+    print(f"Generated {len(headings)} headings: {headings}")
+    
+    # Step 2: Use sort_strengths_evidence to organize evidence under these headings
+    print(f"Step 2: Sorting evidence under generated headings")
+    sort_request = SortEvidenceRequest(file_id=file_id, headings=headings)
+    sorted_result = await sort_strengths_evidence(sort_request, User(user_id=user_id), db)
+    
+    # Step 3: Transform the result to match the expected frontend format
+    print(f"Step 3: Transforming result to match expected frontend format")
+    transformed_result = transform_strength_evidence(sorted_result)
+    
+    # Save to cache with parameters
+    save_cached_data(
+        "strength_evidences", file_id, transformed_result, {"num_competencies": numCompetencies}
+    )
+    
+    return transformed_result
+
+
 @app.get("/api/get_strength_evidences/{file_id}")
 async def get_strength_evidences(
     file_id: str,
@@ -1329,7 +1018,6 @@ async def get_strength_evidences(
         True, description="Whether to use cached results if available"
     ),
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_db)
 ):
     try:
         # Check cache first with parameters
@@ -1343,69 +1031,15 @@ async def get_strength_evidences(
                 )
                 return cached_data
 
-        # Get previously generated strengths from the database
+        # Duplicate requests await the evidences already being generated
         user_id = current_user.user_id if current_user else None
-        feedback_data = None
-        
-        if user_id:
-            try:
-                feedback_data = get_cached_feedback(user_id, file_id, db)
-            except Exception as e:
-                print(f"Error getting cached feedback: {str(e)}")
-        
-        if not feedback_data:
-            # If not in database, we need to generate it first
-            raise HTTPException(
-                status_code=400,
-                detail="Feedback data not found. Please generate feedback data first."
-            )
-            
-        print(f"Step 1: Generating competency headings for strengths")
-        
-        # Step 1: Generate competency headings using the new simplified prompt
-        strength_prompt = load_prompt("strength_headings.txt")
-        prompt = strength_prompt.format(num_competencies=numCompetencies)
-        
-        # Generate headings using Claude
-        client = anthropic.Anthropic(api_key=api_key)
-        response = client.messages.create(
-            model="claude-3-7-sonnet-latest",
-            max_tokens=1000,
-            temperature=0,
-            messages=[{"role": "user", "content": prompt}],
-        )
-        
-        # Parse JSON response
-        response_text = response.content[0].text
-        try:
-            headings_result = parse_claude_response(response_text)
-        except Exception as e:
-            print(f"Error parsing headings response: {str(e)}")
-            print(f"Raw response: {response_text}")
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to parse AI response into valid JSON",
-            )
-        
-        # Extract headings as a simple list
-        headings = headings_result.get("headings", [])
-        print(f"Generated {len(headings)} headings: {headings}")
-        
-        # Step 2: Use sort_strengths_evidence to organize evidence under these headings
-        print(f"Step 2: Sorting evidence under generated headings")
-        sort_request = SortEvidenceRequest(file_id=file_id, headings=headings)
-        sorted_result = await sort_strengths_evidence(sort_request, current_user, db)
-        
-        # Step 3: Transform the result to match the expected frontend format
-        print(f"Step 3: Transforming result to match expected frontend format")
-        transformed_result = transform_strength_evidence(sorted_result)
-        
-        # Save to cache with parameters
-        save_cached_data(
-            "strength_evidences", file_id, transformed_result, {"num_competencies": numCompetencies}
+        return await single_flight.run(
+            ("get_strength_evidences", user_id, file_id, numCompetencies),
+            lambda: generate_strength_evidences(file_id, numCompetencies, user_id),
+            reuse=lambda: asyncio.to_thread(
+                get_cached_data, "strength_evidences", file_id, {"num_competencies": numCompetencies}
+            ),
         )
-        
-        return transformed_result
     except Exception as e:
         print(f"Error in get_strength_evidences: {str(e)}")
         print(traceback.format_exc())
@@ -1431,47 +1065,34 @@ async def get_advice(
 
         # If not cached or cache disabled, process normally
         # Get the feedback transcript
-        feedback_path = os.path.join(SAVE_DIR, f"filtered_{file_id}.txt")
-        if not os.path.exists(feedback_path):
+        feedback_transcript = transcript_store.get(file_id, "filtered")
+        if feedback_transcript is None:
             raise HTTPException(status_code=404, detail="Feedback transcript not found")
 
-        with open(feedback_path, "r") as f:
-            feedback_transcript = f.read()
-
         # Load and format prompt
         advice_prompt = load_prompt("advice.txt")
         prompt = advice_prompt.format(feedback=feedback_transcript)
 
         # Generate analysis using Claude
         client = anthropic.Anthropic(api_key=api_key)
-        response = client.messages.create(
-            model="claude-3-7-sonnet-latest",
-            max_tokens=3000,
-            temperature=0,
-            messages=[{"role": "user", "content": prompt}],
-        )
-
-        # Parse JSON response
-        response_text = response.content[0].text
         try:
-            result = json.loads(response_text)
-        except json.JSONDecodeError:
-            try:
-                # Find JSON-like content between curly braces
-                start = response_text.find("{")
-                end = response_text.rfind("}") + 1
-                if start >= 0 and end > 0:
-                    json_str = response_text[start:end]
-                    result = json.loads(json_str)
-                else:
-                    raise ValueError("No JSON content found in response")
-            except Exception as e:
-                print(f"Error parsing response: {str(e)}")
-                print(f"Raw response: {response_text}")
-                raise HTTPException(
-                    status_code=500,
-                    detail="Failed to parse AI response into valid JSON",
-                )
+            advice_result = create_structured(
+                client,
+                AdviceByStakeholder,
+                "record_advice",
+                "Record the advice given by each stakeholder",
+                model="claude-3-7-sonnet-latest",
+                max_tokens=3000,
+                temperature=0,
+                messages=[{"role": "user", "content": prompt}],
+            )
+        except StructuredOutputError as e:
+            print(f"Error in advice response: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail="AI response did not match the advice schema",
+            )
+        result = advice_result.model_dump()
 
         # Save to cache
         save_cached_data("advice", file_id, result)
@@ -1551,14 +1172,11 @@ async def get_feedback(
 
         # If not cached or cache disabled, process normally
         # Get the feedback transcript
-        feedback_path = os.path.join(SAVE_DIR, f"filtered_{file_id}.txt")
-        if not os.path.exists(feedback_path):
-            print(feedback_path)
+        feedback_transcript = transcript_store.get(file_id, "filtered")
+        if feedback_transcript is None:
+            print(transcript_store.path(file_id, "filtered"))
             raise HTTPException(status_code=404, detail="Feedback transcript not found")
 
-        with open(feedback_path, "r") as f:
-            feedback_transcript = f.read()
-
         # Load and format prompts
         strengths_prompt = load_prompt("feedback_strengths.txt")
         areas_prompt = load_prompt("feedback_areas.txt")
@@ -1566,123 +1184,72 @@ async def get_feedback(
         # Initialize Claude client
         client = anthropic.Anthropic(api_key=api_key)
 
-        # Get strengths analysis
-        strengths_response = client.messages.create(
-            model="claude-3-7-sonnet-latest",
-            max_tokens=3000,
-            temperature=0,
-            messages=[
-                {
-                    "role": "user",
-                    "content": strengths_prompt.format(feedback=feedback_transcript),
-                }
-            ],
-        )
-
-        # Get areas analysis
-        areas_response = client.messages.create(
-            model="claude-3-7-sonnet-latest",
-            max_tokens=3000,
-            temperature=0,
-            messages=[
-                {
-                    "role": "user",
-                    "content": areas_prompt.format(feedback=feedback_transcript),
-                }
-            ],
-        )
-
-        # Parse JSON responses
         try:
-            strengths_text = strengths_response.content[0].text
-            areas_text = areas_response.content[0].text
+            # Get strengths analysis
+            strengths_data = create_structured(
+                client,
+                StrengthsFeedback,
+                "record_strengths",
+                "Record the strengths feedback quoted from each stakeholder",
+                model="claude-3-7-sonnet-latest",
+                max_tokens=3000,
+                temperature=0,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": strengths_prompt.format(feedback=feedback_transcript),
+                    }
+                ],
+            )
 
-            # Extract JSON from strengths response
-            try:
-                strengths_data = json.loads(strengths_text)
-            except json.JSONDecodeError:
-                start = strengths_text.find("{")
-                end = strengths_text.rfind("}") + 1
-                if start >= 0 and end > 0:
-                    strengths_data = json.loads(strengths_text[start:end])
-                else:
-                    raise ValueError("No JSON content found in strengths response")
-
-            # Extract JSON from areas response
-            try:
-                areas_data = json.loads(areas_text)
-            except json.JSONDecodeError:
-                start = areas_text.find("{")
-                end = areas_text.rfind("}") + 1
-                if start >= 0 and end > 0:
-                    areas_data = json.loads(areas_text[start:end])
-                else:
-                    raise ValueError("No JSON content found in areas response")
-
-            # Process the strengths data to handle the new structure with is_strong flag
-            processed_strengths = {}
-            for person, data in strengths_data.get("strengths", {}).items():
-                processed_feedback = []
-                for feedback_item in data.get("feedback", []):
-                    if isinstance(feedback_item, dict):
-                        # New format with is_strong flag
-                        processed_feedback.append({
-                            "text": feedback_item.get("text", ""),
-                            "is_strong": feedback_item.get("is_strong", False)
-                        })
-                    else:
-                        # Handle legacy format (plain string)
-                        processed_feedback.append({
-                            "text": feedback_item,
-                            "is_strong": False
-                        })
-                
-                processed_strengths[person] = {
-                    "role": data.get("role", ""),
-                    "feedback": processed_feedback
-                }
-            
-            # Process the areas_to_target data to handle the new structure with is_strong flag
-            processed_areas = {}
-            for person, data in areas_data.get("areas_to_target", {}).items():
-                processed_feedback = []
-                for feedback_item in data.get("feedback", []):
-                    if isinstance(feedback_item, dict):
-                        # New format with is_strong flag
-                        processed_feedback.append({
-                            "text": feedback_item.get("text", ""),
-                            "is_strong": feedback_item.get("is_strong", False)
-                        })
-                    else:
-                        # Handle legacy format (plain string)
-                        processed_feedback.append({
-                            "text": feedback_item,
-                            "is_strong": False
-                        })
-                
-                processed_areas[person] = {
-                    "role": data.get("role", ""),
-                    "feedback": processed_feedback
-                }
-
-            # Combine results
-            result = {
-                "strengths": processed_strengths,
-                "areas_to_target": processed_areas,
+            # Get areas analysis
+            areas_data = create_structured(
+                client,
+                AreasFeedback,
+                "record_areas_to_target",
+                "Record the areas to target feedback quoted from each stakeholder",
+                model="claude-3-7-sonnet-latest",
+                max_tokens=3000,
+                temperature=0,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": areas_prompt.format(feedback=feedback_transcript),
+                    }
+                ],
+            )
+        except StructuredOutputError as e:
+            print(f"Error in feedback response: {str(e)}")
+            raise HTTPException(
+                status_code=500, detail="AI response did not match the feedback schema"
+            )
+
+        # Quotes are plain strings; the report expects the is_strong flag on each one
+        processed_strengths = {
+            person: {
+                "role": data.role,
+                "feedback": [{"text": text, "is_strong": False} for text in data.feedback],
+            }
+            for person, data in strengths_data.strengths.items()
+        }
+        processed_areas = {
+            person: {
+                "role": data.role,
+                "feedback": [{"text": text, "is_strong": False} for text in data.feedback],
             }
+            for person, data in areas_data.areas_to_target.items()
+        }
 
-            # Save to cache
-            save_cached_data("feedback", file_id, result)
+        # Combine results
+        result = {
+            "strengths": processed_strengths,
+            "areas_to_target": processed_areas,
+        }
 
-            return result
+        # Save to cache
+        save_cached_data("feedback", file_id, result)
 
-        except Exception as e:
-            print(f"Error parsing responses: {str(e)}")
-            print(f"Strengths response: {strengths_text}")
-            print(f"Areas response: {areas_text}")
-            raise HTTPException(
-                status_code=500, detail="Failed to parse AI responses into valid JSON"
-            )
+        return result
 
     except Exception as e:
         print(f"Error in get_feedback: {str(e)}")
@@ -1714,15 +1281,15 @@ async def get_development_areas(
 
         # Get previously generated areas to target from the database
         user_id = current_user.user_id if current_user else None
-        feedback_data = None
+        areas_data = None
         
         if user_id:
             try:
-                feedback_data = get_cached_feedback(user_id, file_id, db)
+                areas_data = get_feedback_category(user_id, file_id, "areas_to_target", db)
             except Exception as e:
                 print(f"Error getting cached feedback: {str(e)}")
         
-        if not feedback_data:
+        if areas_data is None:
             # If not in database, we need to generate it first
             raise HTTPException(
                 status_code=400,
@@ -1737,27 +1304,26 @@ async def get_development_areas(
         
         # Generate headings using Claude
         client = anthropic.Anthropic(api_key=api_key)
-        response = client.messages.create(
-            model="claude-3-7-sonnet-latest",
-            max_tokens=1000,
-            temperature=0,
-            messages=[{"role": "user", "content": prompt}],
-        )
-        
-        # Parse JSON response
-        response_text = response.content[0].text
         try:
-            headings_result = parse_claude_response(response_text)
-        except Exception as e:
-            print(f"Error parsing headings response: {str(e)}")
-            print(f"Raw response: {response_text}")
+            headings_result = create_structured(
+                client,
+                Headings,
+                "record_headings",
+                "Record the competency headings",
+                model="claude-3-7-sonnet-latest",
+                max_tokens=1000,
+                temperature=0,
+                messages=[{"role": "user", "content": prompt}],
+            )
+        except StructuredOutputError as e:
+            print(f"Error in headings response: {str(e)}")
             raise HTTPException(
                 status_code=500,
-                detail="Failed to parse AI response into valid JSON",
+                detail="AI response did not match the headings schema",
             )
         
         # Extract headings as a simple list
-        headings = headings_result.get("headings", [])
+        headings = headings_result.headings
         print(f"Generated {len(headings)} headings: {headings}")
         
         # Step 2: Use sort_areas_evidence to organize evidence under these headings
@@ -1790,54 +1356,33 @@ async def sort_areas_evidence(
     try:
         # Get previously generated areas to target from the database
         user_id = current_user.user_id
-        feedback_data = None
+        areas_data = None
         
         #  TODO: implement db feedback_transcript
         if user_id:
             try:
-                feedback_data = get_cached_feedback(user_id, request.file_id, db)
+                # Only the areas to target are read out of the feedback document
+                areas_data = get_feedback_category(user_id, request.file_id, "areas_to_target", db)
             except Exception as e:
                 print(f"Error getting cached feedback: {str(e)}")
         
-        if not feedback_data:
+        if areas_data is None:
             raise HTTPException(
                 status_code=400,
                 detail="Feedback data not found. Please generate feedback data first."
             )
             
         # Use the previously generated areas to target from the database
-        areas_data = feedback_data.get("areas_to_target", {})
-        
         # Process the areas data to ensure it has the is_strong flag
-        processed_areas = {}
-        for person, data in areas_data.items():
-            processed_feedback = []
-            for feedback_item in data.get("feedback", []):
-                if isinstance(feedback_item, dict):
-                    # New format with is_strong flag
-                    processed_feedback.append({
-                        "text": feedback_item.get("text", ""),
-                        "is_strong": feedback_item.get("is_strong", False)
-                    })
-                else:
-                    # Handle legacy format (plain string)
-                    processed_feedback.append({
-                        "text": feedback_item,
-                        "is_strong": False
-                    })
-            
-            processed_areas[person] = {
-                "role": data.get("role", ""),
-                "feedback": processed_feedback
-            }
+        processed_areas = prepare_evidence_for_sorting(areas_data)
         
         # Count total feedback items for verification
         total_feedback_items = sum(len(data.get("feedback", [])) for data in processed_areas.values())
         print(f"Total feedback items to process: {total_feedback_items}")
         
-        # Process in parallel with batch size 2 for better reliability
-        print(f"Processing areas evidence in parallel with batch size 2")
-        result = await process_batches_parallel(processed_areas, request.headings, batch_size=2, is_strengths=False)
+        # Process in parallel with batches sized to fit the response token limit
+        print(f"Processing areas evidence in parallel with token-aware batches")
+        result = await process_batches_parallel(processed_areas, request.headings, is_strengths=False)
         
         # Verify total evidence count
         total_evidence = sum(len(item.get("evidence", [])) for item in result)
@@ -1853,6 +1398,50 @@ async def sort_areas_evidence(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/sort-strengths-evidence/stream")
+async def sort_strengths_evidence_stream(
+    request: SortEvidenceRequest,
+    stream_format: str = Query("sse", pattern="^(sse|ndjson)$", description="sse or ndjson"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Streaming variant of /api/sort-strengths-evidence.
+    Pushes each heading's merged evidence as soon as the batch that changed it completes.
+    """
+    category_data = get_feedback_category(current_user.user_id, request.file_id, "strengths", db)
+    if category_data is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Feedback data not found. Please generate feedback data first."
+        )
+    
+    processed_strengths = prepare_evidence_for_sorting(category_data)
+    return stream_sorted_evidence(processed_strengths, request.headings, True, stream_format)
+
+
+@app.post("/api/sort-areas-evidence/stream")
+async def sort_areas_evidence_stream(
+    request: SortEvidenceRequest,
+    stream_format: str = Query("sse", pattern="^(sse|ndjson)$", description="sse or ndjson"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Streaming variant of /api/sort-areas-evidence.
+    Pushes each heading's merged evidence as soon as the batch that changed it completes.
+    """
+    category_data = get_feedback_category(current_user.user_id, request.file_id, "areas_to_target", db)
+    if category_data is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Feedback data not found. Please generate feedback data first."
+        )
+    
+    processed_areas = prepare_evidence_for_sorting(category_data)
+    return stream_sorted_evidence(processed_areas, request.headings, False, stream_format)
+
+
 @app.options("/api/excel")
 async def excel_options():
     headers = {
@@ -1887,7 +1476,9 @@ async def get_excel_file():
 
 @app.post("/api/generate_strength_content")
 async def generate_strength_content(
-    request: GenerateContentRequest, 
+    request: GenerateContentRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         print(
@@ -1895,19 +1486,16 @@ async def generate_strength_content(
         )
 
         # Load transcript using file ID
-        feedback_path = f"../data/processed_assessments/filtered_{request.file_id}.txt"
-        if not os.path.exists(feedback_path):
+        feedback_transcript = transcript_store.get(request.file_id, "filtered")
+        if feedback_transcript is None:
             raise HTTPException(
                 status_code=404,
-                detail=f"Feedback transcript not found at {feedback_path}",
+                detail=f"Feedback transcript not found at {transcript_store.path(request.file_id, 'filtered')}",
             )
 
-        with open(feedback_path, "r") as f:
-            feedback_transcript = f.read()
-
         # Generate content using Claude
         client = anthropic.Anthropic(api_key=api_key)
-        name = get_name_from_report(request.file_id)
+        name = await get_employee_name(current_user.user_id, request.file_id, db)
         prompt = format_strength_content_prompt(
             name, request.heading, feedback_transcript, request.existing_content
         )
@@ -13,9 +13,11 @@ from functools import partial
 import aspose.words as aw
 from anthropic import Anthropic, AsyncAnthropic
 from db.processed_assessment import create_processed_assessment, async_create_processed_assessment
+from employee_metadata import build_employee_metadata
 from PyPDF2 import PdfReader
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from transcript_store import transcript_store
 
 # Import the API config
 try:
@@ -26,6 +28,9 @@ except ImportError:
     MAX_API_CALLS_PER_MINUTE = 50
     PDF_CHUNK_BATCH_SIZE = 4  # Process 4 chunks at a time by default
 
+# Leading characters of the document kept as its cover text (report header and first pages)
+COVER_TEXT_CHARS = 4000
+
 # API Call Manager for controlling concurrency
 class ApiCallManager:
     """
@@ -121,20 +126,16 @@ class AssessmentProcessor:
         filename = os.path.basename(pdf_path)
         return os.path.splitext(filename)[0]
 
-    def read_pdf_in_chunks(self, pdf_path: str, chunk_size: int = 1500, overlap: int = 200) -> List[str]:
+    def read_pdf_text(self, pdf_path: str) -> str:
         """
-        Read PDF using Aspose.Words and split into chunks based on word count.
+        Read the text of a PDF using Aspose.Words, one paragraph per line.
         
         Args:
             pdf_path: Path to the PDF file
-            chunk_size: Number of words per chunk (default: 1500)
-            overlap: Number of words to overlap between chunks (default: 200)
             
         Returns:
-            List of text chunks from the PDF
+            The document text
         """
-        chunks = []
-        
         try:
             self.logger.info(f"Loading PDF with Aspose.Words: {pdf_path}")
             
@@ -158,28 +159,65 @@ class AssessmentProcessor:
                     full_text += paragraph.get_text() + "\n"
             
             self.logger.info(f"Extracted {len(full_text.split())} words from PDF")
-            
-            # Split text into words
-            words = full_text.split()
-            
-            # Create chunks with overlap
-            for i in range(0, len(words), chunk_size - overlap):
-                # Ensure we don't go beyond the array bounds
-                end_idx = min(i + chunk_size, len(words))
-                current_chunk = words[i:end_idx]
-                chunk_text = " ".join(current_chunk)
-                chunks.append(chunk_text)
-                self.logger.info(f"Created chunk {len(chunks)} with words {i+1} to {end_idx}")
-                
-                # If this is the last chunk, break
-                if end_idx == len(words):
-                    break
-            
-            return chunks
+            return full_text
         except Exception as e:
             self.logger.error(f"Error reading PDF {pdf_path}: {str(e)}")
             raise
 
+    def split_into_chunks(self, full_text: str, chunk_size: int = 1500, overlap: int = 200) -> List[str]:
+        """
+        Split document text into chunks based on word count.
+        
+        Args:
+            full_text: The document text
+            chunk_size: Number of words per chunk (default: 1500)
+            overlap: Number of words to overlap between chunks (default: 200)
+            
+        Returns:
+            List of text chunks
+        """
+        chunks = []
+        
+        # Split text into words
+        words = full_text.split()
+        
+        # Create chunks with overlap
+        for i in range(0, len(words), chunk_size - overlap):
+            # Ensure we don't go beyond the array bounds
+            end_idx = min(i + chunk_size, len(words))
+            current_chunk = words[i:end_idx]
+            chunk_text = " ".join(current_chunk)
+            chunks.append(chunk_text)
+            self.logger.info(f"Created chunk {len(chunks)} with words {i+1} to {end_idx}")
+            
+            # If this is the last chunk, break
+            if end_idx == len(words):
+                break
+        
+        return chunks
+
+    def read_pdf_in_chunks(self, pdf_path: str, chunk_size: int = 1500, overlap: int = 200) -> List[str]:
+        """
+        Read PDF using Aspose.Words and split into chunks based on word count.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            chunk_size: Number of words per chunk (default: 1500)
+            overlap: Number of words to overlap between chunks (default: 200)
+            
+        Returns:
+            List of text chunks from the PDF
+        """
+        return self.split_into_chunks(self.read_pdf_text(pdf_path), chunk_size, overlap)
+
+    def save_cover_text(self, SAVE_DIR: str, document_name: str, cover_text: str) -> None:
+        """Save the cover text next to the processed transcripts for name and date extraction."""
+        os.makedirs(SAVE_DIR, exist_ok=True)
+        cover_path = os.path.join(SAVE_DIR, f"cover_{document_name}.txt")
+        with open(cover_path, 'w', encoding='utf-8') as f:
+            f.write(cover_text)
+        self.logger.info(f"Cover text saved to: {cover_path}")
+
     def create_filtering_prompt(self, document_name: str, chunk_text: str) -> str:
         """Create prompt for Claude to filter self-reflective content for a single candidate."""
         return f"""
@@ -492,6 +530,9 @@ class AssessmentProcessor:
             
             self.logger.info(f"Stakeholder feedback saved to: {stakeholder_path}")
             
+            # Drop transcripts cached from an earlier processing of this document
+            transcript_store.invalidate(document_name)
+            
             return stakeholder_text, executive_text
             
         except Exception as e:
@@ -575,8 +616,12 @@ class AssessmentProcessor:
             document_name = self.extract_candidate_name(pdf_path)
             self.logger.info(f"Starting assessment processing for: {document_name}")
             
+            # Parse the PDF once; the cover text is kept for name and date extraction
+            full_text = self.read_pdf_text(pdf_path)
+            cover_text = full_text[:COVER_TEXT_CHARS]
+            
             # Use the improved chunking method with overlap
-            chunks = self.read_pdf_in_chunks(pdf_path, chunk_size=1500, overlap=200)
+            chunks = self.split_into_chunks(full_text, chunk_size=1500, overlap=200)
             self.logger.info(f"Total chunks to process: {len(chunks)}")
             
             # Process chunks in parallel using asyncio
@@ -589,12 +634,15 @@ class AssessmentProcessor:
                 
                 # Create a task that will run in the background
                 # This returns a coroutine that will be processed asynchronously
-                processing_task = self.process_chunks_parallel(document_name, chunks, PDF_CHUNK_BATCH_SIZE)
+                async def processing_task():
+                    stakeholder_chunks, executive_chunks = await self.process_chunks_parallel(document_name, chunks, PDF_CHUNK_BATCH_SIZE)
+                    return stakeholder_chunks, executive_chunks, cover_text
                 
                 # Since we're in an async context, we need to await the task
                 # But we can't use await directly here, so we'll return the task
-                # The caller will need to handle this appropriately
-                return processing_task
+                # The caller will need to handle this appropriately; it resolves to
+                # (stakeholder_chunks, executive_chunks, cover_text)
+                return processing_task()
             else:
                 # We're not in an async context, use asyncio.run
                 self.logger.info("Creating new event loop for parallel processing")
@@ -616,10 +664,10 @@ class AssessmentProcessor:
 
                 # Use asyncio.run for the async method if we're in a synchronous context
                 if asyncio.get_event_loop().is_running():
-                    asyncio.create_task(self.save_to_database(db, task_id, stakeholder_text, executive_text))
+                    asyncio.create_task(self.save_to_database(db, task_id, stakeholder_text, executive_text, cover_text))
                     self.logger.info(f"Scheduled database save for task ID: {task_id}")
                 else:
-                    asyncio.run(self.save_to_database(db, task_id, stakeholder_text, executive_text))
+                    asyncio.run(self.save_to_database(db, task_id, stakeholder_text, executive_text, cover_text))
                     self.logger.info(f"Saved to database for task ID: {task_id}")
             
             # Optionally save to files
@@ -648,6 +696,10 @@ class AssessmentProcessor:
                     self.logger.info(f"No executive content found for: {document_name}")
                 
                 self.logger.info(f"Stakeholder feedback saved to: {stakeholder_path}")
+                self.save_cover_text(SAVE_DIR, document_name, cover_text)
+            
+            # Drop transcripts cached from an earlier processing of this document
+            transcript_store.invalidate(document_name)
             
             return stakeholder_text, executive_text
         except Exception as e:
@@ -672,8 +724,12 @@ class AssessmentProcessor:
             document_name = self.extract_candidate_name(pdf_path)
             self.logger.info(f"[ASYNC] Starting assessment processing for: {document_name}")
             
+            # Parse the PDF once; the cover text is kept for name and date extraction
+            full_text = self.read_pdf_text(pdf_path)
+            cover_text = full_text[:COVER_TEXT_CHARS]
+            
             # Use the improved chunking method with overlap
-            chunks = self.read_pdf_in_chunks(pdf_path, chunk_size=1500, overlap=200)
+            chunks = self.split_into_chunks(full_text, chunk_size=1500, overlap=200)
             stakeholder_chunks = []
             executive_chunks = []
             
@@ -719,7 +775,7 @@ class AssessmentProcessor:
             
             # Save to database if task_id and db are provided
             if task_id is not None and db is not None:
-                await self.async_save_to_database(db, task_id, stakeholder_text, executive_text)
+                await self.async_save_to_database(db, task_id, stakeholder_text, executive_text, cover_text)
                 self.logger.info(f"[ASYNC] Saved to database for task ID: {task_id}")
             
             # Optionally save to files
@@ -748,6 +804,10 @@ class AssessmentProcessor:
                     self.logger.info(f"[ASYNC] No executive content found for: {document_name}")
                 
                 self.logger.info(f"[ASYNC] Stakeholder feedback saved to: {stakeholder_path}")
+                self.save_cover_text(SAVE_DIR, document_name, cover_text)
+            
+            # Drop transcripts cached from an earlier processing of this document
+            transcript_store.invalidate(document_name)
             
             return stakeholder_text, executive_text
         except Exception as e:
@@ -759,7 +819,8 @@ class AssessmentProcessor:
         db: Session, 
         task_id: int, 
         stakeholder_text: str, 
-        executive_text: str
+        executive_text: str,
+        cover_text: Optional[str] = None
     ) -> None:
         """
         Save the processed assessment to the database.
@@ -769,13 +830,20 @@ class AssessmentProcessor:
             task_id: ID of the task this assessment belongs to
             stakeholder_text: Content of the filtered assessment (stakeholder feedback)
             executive_text: Content of the executive assessment (executive's own words)
+            cover_text: Leading text of the document, used for name and date extraction
+        
+        The employee metadata (name, report date, stakeholder roster) is extracted
+        here and stored on the task.
         """
         try:
+            employee_metadata = await build_employee_metadata(cover_text, stakeholder_text)
             create_processed_assessment(
                 db=db,
                 task_id=task_id,
                 filtered_data=stakeholder_text,
-                executive_data=executive_text
+                executive_data=executive_text,
+                cover_text=cover_text,
+                employee_metadata=employee_metadata
             )
             self.logger.info(f"Processed assessment saved to database for task ID: {task_id}")
         except Exception as e:
@@ -787,7 +855,8 @@ class AssessmentProcessor:
         db: AsyncSession, 
         task_id: int, 
         stakeholder_text: str, 
-        executive_text: str
+        executive_text: str,
+        cover_text: Optional[str] = None
     ) -> None:
         """
         Save the processed assessment to the database asynchronously.
@@ -797,13 +866,20 @@ class AssessmentProcessor:
             task_id: ID of the task this assessment belongs to
             stakeholder_text: Content of the filtered assessment (stakeholder feedback)
             executive_text: Content of the executive assessment (executive's own words)
+            cover_text: Leading text of the document, used for name and date extraction
+        
+        The employee metadata (name, report date, stakeholder roster) is extracted
+        here and stored on the task.
         """
         try:
+            employee_metadata = await build_employee_metadata(cover_text, stakeholder_text)
             await async_create_processed_assessment(
                 db=db,
                 task_id=task_id,
                 filtered_data=stakeholder_text,
-                executive_data=executive_text
+                executive_data=executive_text,
+                cover_text=cover_text,
+                employee_metadata=employee_metadata
             )
             self.logger.info(f"[ASYNC] Processed assessment saved to database for task ID: {task_id}")
         except Exception as e:
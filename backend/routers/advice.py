@@ -1,19 +1,21 @@
-import json
 import os
 
 import anthropic
 import env_variables
 from auth.user import User, get_current_user
 from db.advice import AdviceCreate, async_create_advice, async_get_cached_advice
-from db.core import get_async_db
+from db.advice import async_get_advice_file_ids_by_stakeholder, async_get_stakeholder_advice
+from db.core import async_session_local, get_async_db
 from db.file import async_get_task_by_user_and_fileId
-from db.processed_assessment import async_get_processed_assessment_by_task_id
-from dir_config import SAVE_DIR
 from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.params import Depends
 from prompt_loader import load_prompt
+from single_flight import single_flight
 from sqlalchemy.ext.asyncio import AsyncSession
+from transcript_store import transcript_store
 from utils.loggers.advice_logger import advice_logger
+from utils.structured_output import (AdviceByStakeholder,
+                                     StructuredOutputError, create_structured)
 from utils.loggers.endPoint_logger import logger as apiLogger
 
 router = APIRouter(
@@ -21,6 +23,78 @@ router = APIRouter(
 )
 
 
+async def _generate_advice(user_id: str, file_id: str, db: AsyncSession):
+    """Generate a task's advice with Claude and save it to the database."""
+    db_task = await async_get_task_by_user_and_fileId(user_id, file_id, db)
+    apiLogger.info(f"Processing advice for task ID {db_task.id}")
+
+    # Get the feedback transcript from the processed assessment or its file
+    feedback_transcript = await transcript_store.async_get(file_id, "filtered", db_task.id, db)
+    if not feedback_transcript:
+        apiLogger.error(f"Feedback transcript not found for file ID {file_id}")
+        raise HTTPException(status_code=404, detail="Feedback transcript not found or generated.")
+    advice_logger.info(f"Loaded feedback transcript for task ID {db_task.id} ({len(feedback_transcript)} characters)")
+
+    # Load and format prompt
+    advice_prompt = load_prompt("advice.txt")
+    prompt = advice_prompt.format(feedback=feedback_transcript)
+    advice_logger.info(f"Prompt prepared for AI analysis for task ID {db_task.id}")
+
+    # Generate analysis using Claude
+    apiLogger.info(f"Sending request to Claude API for advice generation for task ID {db_task.id}")
+    advice_logger.info(f"Using Claude model: claude-3-7-sonnet-latest with temperature=0")
+    client = anthropic.Anthropic(api_key=env_variables.ANTHROPIC_API_KEY)
+    try:
+        advice_result = create_structured(
+            client,
+            AdviceByStakeholder,
+            "record_advice",
+            "Record the advice given by each stakeholder",
+            model="claude-3-7-sonnet-latest",
+            max_tokens=3000,
+            temperature=0,
+            messages=[{"role": "user", "content": prompt}],
+        )
+    except StructuredOutputError as e:
+        advice_logger.error(f"Advice response did not match the schema for task ID {db_task.id}: {str(e)}")
+        apiLogger.error(f"Failed to parse AI response for task ID {db_task.id}: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="AI response did not match the advice schema",
+        )
+    apiLogger.info(f"Received response from Claude API for task ID {db_task.id}")
+    result = advice_result.model_dump()
+    advice_logger.info(f"Successfully validated advice response for task ID {db_task.id}")
+
+    advice_data = {
+        "task_id": db_task.id,
+        "advice": result
+    }
+    # Save to db
+    apiLogger.info(f"Saving advice to database for task ID {db_task.id}")
+    db_advice = await async_create_advice(AdviceCreate(**advice_data), db)
+    advice_logger.info(f"Successfully saved advice to database for task ID {db_task.id}, advice ID: {db_advice.id}")
+    apiLogger.info(f"Successfully generated and saved advice for file ID {file_id}, task ID {db_task.id}")
+    return db_advice.advice
+
+
+async def generate_advice(user_id: str, file_id: str):
+    """
+    Generate and save a task's advice in a session of its own.
+
+    Runs as a single-flight task that other requests join and that outlives a
+    cancelled caller, so it can't use the caller's request-scoped session.
+    """
+    async with async_session_local() as db:
+        return await _generate_advice(user_id, file_id, db)
+
+
+async def read_cached_advice(user_id: str, file_id: str):
+    """async_get_cached_advice in a session of its own, for single-flight reuse"""
+    async with async_session_local() as db:
+        return await async_get_cached_advice(user_id, file_id, db)
+
+
 # here tasks will be created
 @router.get("/api/get_advice/{file_id}")
 async def get_advice(
@@ -43,85 +117,42 @@ async def get_advice(
                 advice_logger.info(f"Returned cached advice for user {user_id}, file ID {file_id}")
                 return cached_data
 
-        db_task = await async_get_task_by_user_and_fileId(user_id, file_id, db)
-        apiLogger.info(f"Processing advice for task ID {db_task.id}")
-
-        # try to get or generate transcripts
-        feedback_transcript = None
-        assess_data = await async_get_processed_assessment_by_task_id(db, db_task.id)
-        if assess_data and assess_data.filtered_data:
-            advice_logger.info(f"Using filtered data from processed assessment for task ID {db_task.id}")
-            feedback_transcript = assess_data.filtered_data
-        if not feedback_transcript:
-            # Get the feedback transcript from file
-            feedback_path = os.path.join(SAVE_DIR, f"filtered_{file_id}.txt")
-            advice_logger.info(f"Attempting to read feedback transcript from file: {feedback_path}")
-            if not os.path.exists(feedback_path):
-                apiLogger.error(f"Feedback transcript not found for file ID {file_id}")
-                raise HTTPException(status_code=404, detail="Feedback transcript not found or generated.")
-
-            with open(feedback_path, "r") as f:
-                feedback_transcript = f.read()
-                advice_logger.info(f"Successfully read feedback transcript from file for file ID {file_id}")
-
-        # Load and format prompt
-        advice_prompt = load_prompt("advice.txt")
-        prompt = advice_prompt.format(feedback=feedback_transcript)
-        advice_logger.info(f"Prompt prepared for AI analysis for task ID {db_task.id}")
-
-        # Generate analysis using Claude
-        apiLogger.info(f"Sending request to Claude API for advice generation for task ID {db_task.id}")
-        advice_logger.info(f"Using Claude model: claude-3-7-sonnet-latest with temperature=0")
-        client = anthropic.Anthropic(api_key=env_variables.ANTHROPIC_API_KEY)
-        response = client.messages.create(
-            model="claude-3-7-sonnet-latest",
-            max_tokens=3000,
-            temperature=0,
-            messages=[{"role": "user", "content": prompt}],
+        # Duplicate requests await the advice already being generated
+        return await single_flight.run(
+            ("get_advice", user_id, file_id),
+            lambda: generate_advice(user_id, file_id),
+            reuse=lambda: read_cached_advice(user_id, file_id),
         )
-        apiLogger.info(f"Received response from Claude API for task ID {db_task.id}")
-
-        # Parse JSON response
-        response_text = response.content[0].text
-        advice_logger.info(f"Parsing JSON response for task ID {db_task.id}")
-        try:
-            result = json.loads(response_text)
-            advice_logger.info(f"Successfully parsed JSON response for task ID {db_task.id}")
-        except json.JSONDecodeError:
-            advice_logger.warning(f"Initial JSON parsing failed for task ID {db_task.id}, attempting to extract JSON content")
-            try:
-                # Find JSON-like content between curly braces
-                start = response_text.find("{")
-                end = response_text.rfind("}") + 1
-                if start >= 0 and end > 0:
-                    json_str = response_text[start:end]
-                    result = json.loads(json_str)
-                    advice_logger.info(f"Successfully extracted and parsed JSON content for task ID {db_task.id}")
-                else:
-                    advice_logger.error(f"No JSON content found in response for task ID {db_task.id}")
-                    raise ValueError("No JSON content found in response")
-            except Exception as e:
-                error_msg = f"Error parsing response: {str(e)}"
-                advice_logger.error(f"{error_msg} for task ID {db_task.id}")
-                advice_logger.debug(f"Raw response for task ID {db_task.id}: {response_text[:500]}...")
-                apiLogger.error(f"Failed to parse AI response for task ID {db_task.id}: {str(e)}")
-                raise HTTPException(
-                    status_code=500,
-                    detail="Failed to parse AI response into valid JSON",
-                )
-
-        advice_data = {
-            "task_id": db_task.id,
-            "advice": result
-        }
-        # Save to db
-        apiLogger.info(f"Saving advice to database for task ID {db_task.id}")
-        db_advice = await async_create_advice(AdviceCreate(**advice_data), db)
-        advice_logger.info(f"Successfully saved advice to database for task ID {db_task.id}, advice ID: {db_advice.id}")
-        apiLogger.info(f"Successfully generated and saved advice for file ID {file_id}, task ID {db_task.id}")
-        return db_advice.advice
     except Exception as e:
         error_msg = f"Error in get_advice: {str(e)}"
         advice_logger.error(error_msg)
         apiLogger.error(f"Error generating advice for file ID {file_id}, user ID {user_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/api/get_advice/{file_id}/stakeholder/{stakeholder}")
+async def get_stakeholder_advice(
+    file_id: str,
+    stakeholder: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Returns one stakeholder's saved advice, {"role", "advice"}, without the rest of the document."""
+    user_id = current_user.user_id
+    apiLogger.info(f"User {user_id} requesting advice of stakeholder {stakeholder} for file ID {file_id}")
+    stakeholder_advice = await async_get_stakeholder_advice(user_id, file_id, stakeholder, db)
+    if stakeholder_advice is None:
+        raise HTTPException(status_code=404, detail=f"No advice found for stakeholder {stakeholder}.")
+    return stakeholder_advice
+
+
+@router.get("/api/advice_files/{stakeholder}")
+async def get_advice_files_by_stakeholder(
+    stakeholder: str,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Returns the file IDs of the user's assessments with advice from the stakeholder."""
+    user_id = current_user.user_id
+    apiLogger.info(f"User {user_id} requesting files with advice of stakeholder {stakeholder}")
+    return await async_get_advice_file_ids_by_stakeholder(user_id, stakeholder, db)
@@ -12,11 +12,13 @@ from db.snapshot import (SnapshotCreate, SnapshotReport,
                          get_snapshot_with_children, get_snapshots_by_type,
                          redo_snapshot, restore_snapshot, undo_snapshot,
                          async_count_snapshots, async_create_snapshot, async_delete_snapshot,
-                         async_get_current_snapshot, async_get_last_auto_snapshot,
+                         async_get_current_snapshot, async_get_current_snapshot_by_file_id,
+                         async_get_last_auto_snapshot,
                          async_get_latest_snapshot, async_get_manual_snapshots,
                          async_get_snapshot_by_id, async_get_snapshot_history,
                          async_get_snapshot_with_children, async_get_snapshots_by_type,
-                         async_redo_snapshot, async_restore_snapshot, async_undo_snapshot
+                         async_redo_snapshot, async_restore_snapshot, async_undo_snapshot,
+                         async_get_snapshot_summaries
                          
                          )
 from fastapi import APIRouter, Depends, HTTPException, Query
@@ -24,6 +26,7 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 from db.core import get_async_db
+from db.snapshot_listing import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from utils.loggers.endPoint_logger import logger as apiLogger
 
 router = APIRouter(
@@ -51,6 +54,25 @@ class SnapshotResponse(BaseModel):
     full_report: dict
     ai_Competencies: dict
 
+class SnapshotSummary(BaseModel):
+    id: int
+    task_id: int
+    snapshot_name: Optional[str] = None
+    created_at: str
+    parent_id: Optional[int] = None
+    trigger_type: str
+
+class SnapshotPage(BaseModel):
+    snapshots: List[SnapshotSummary]
+    # Pass as `cursor` to get the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+class SnapshotBody(BaseModel):
+    id: int
+    manual_report: dict
+    full_report: dict
+    ai_Competencies: dict
+
 
 @router.post("/create", response_model=SnapshotResponse)
 async def create_snapshot_endpoint(
@@ -146,11 +168,8 @@ async def get_current_snapshot_endpoint(
     user_id = user.user_id
     apiLogger.info(f"User {user_id} requesting current snapshot for file {file_id}")
     
-    # Verify task belongs to user
-    task = await async_get_task_by_user_and_fileId(user_id, file_id, db)
-    
-    # Get current snapshot
-    snapshot = await async_get_current_snapshot(db, task.id)
+    # Verify task belongs to user and get its current snapshot in one query
+    task, snapshot = await async_get_current_snapshot_by_file_id(db, user_id, file_id)
     
     if not snapshot:
         return None
@@ -270,6 +289,46 @@ async def get_snapshots_by_type_endpoint(
         for snapshot in snapshots
     ]
 
+@router.get("/list/{file_id}", response_model=SnapshotPage)
+async def list_snapshots_endpoint(
+    file_id: str,
+    trigger_type: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Lists a task's snapshots newest first without their report bodies, which
+    are fetched on demand from /{snapshot_id}/body.
+    """
+    user_id = user.user_id
+    apiLogger.info(f"User {user_id} listing snapshots for file {file_id} (trigger_type={trigger_type}, limit={limit})")
+    
+    # Verify task belongs to user
+    task = await async_get_task_by_user_and_fileId(user_id, file_id, db)
+    
+    try:
+        snapshots, next_cursor = await async_get_snapshot_summaries(db, task.id, trigger_type, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    # Convert datetime to string for JSON response
+    return SnapshotPage(
+        snapshots=[
+            SnapshotSummary(
+                id=snapshot.id,
+                snapshot_name=snapshot.snapshot_name,
+                task_id=snapshot.task_id,
+                created_at=snapshot.created_at.isoformat(),
+                parent_id=snapshot.parent_id,
+                trigger_type=snapshot.trigger_type
+            )
+            for snapshot in snapshots
+        ],
+        next_cursor=next_cursor
+    )
+
 @router.get("/count/{file_id}")
 async def count_snapshots_endpoint(
     file_id: str,
@@ -441,6 +500,35 @@ async def get_snapshot_by_id_endpoint(
         ai_Competencies=snapshot.ai_Competencies
     )
 
+@router.get("/{snapshot_id}/body", response_model=SnapshotBody)
+async def get_snapshot_body_endpoint(
+    snapshot_id: int,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user_id = user.user_id
+    # Get snapshot with its documents
+    snapshot = await async_get_snapshot_by_id(db, snapshot_id)
+    
+    if not snapshot:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    
+    # Get task to verify ownership
+    task = await async_get_db_task(snapshot.task_id, user_id, db)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    # Verify task belongs to user
+    if task.user_id != user_id:
+        raise HTTPException(status_code=403, detail="Not authorized to access this snapshot")
+    
+    return SnapshotBody(
+        id=snapshot.id,
+        manual_report=snapshot.manual_report,
+        full_report=snapshot.full_report,
+        ai_Competencies=snapshot.ai_Competencies
+    )
+
 @router.post("/set-current/{file_id}/{snapshot_id}", response_model=SnapshotResponse)
 async def set_current_snapshot_endpoint(
     file_id: str,
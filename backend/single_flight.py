@@ -0,0 +1,139 @@
+"""
+Single-flight coalescing of expensive generation requests.
+
+Concurrent requests with the same key (endpoint, user, file id and parameters)
+await one in-flight computation instead of each running the LLM pipeline and
+saving its own copy of the result. Within a worker the computation is shared
+through a task; with SINGLE_FLIGHT_ADVISORY_LOCKS set, a Postgres advisory lock
+also serializes the computation across workers, and a request that had to wait
+for the lock reads the result the other worker saved instead of recomputing it.
+"""
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+from sqlalchemy import text
+from utils.loggers.endPoint_logger import logger as apiLogger
+
+T = TypeVar("T")
+
+# Seconds between attempts to take an advisory lock held by another worker
+ADVISORY_LOCK_POLL_INTERVAL = 0.5
+
+
+def advisory_lock_key(key: Hashable) -> int:
+    """Signed 64-bit Postgres advisory lock key for a single-flight key"""
+    digest = hashlib.sha256(repr(key).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+class SingleFlight:
+    """
+    Runs one computation per key at a time and shares its result with every caller.
+
+    The computation runs in its own task, so a caller that is cancelled doesn't
+    cancel it for the others. Since it can outlive the request that started it,
+    compute and reuse must open their own database sessions rather than use that
+    request's, which is closed when the request ends. The advisory lock mode and its engine are resolved on
+    first use from env_variables and db.core, like LLMGateway's client.
+    """
+    def __init__(self, advisory_locks: Optional[bool] = None, lock_engine=None,
+                 poll_interval: float = ADVISORY_LOCK_POLL_INTERVAL):
+        self._advisory_locks = advisory_locks
+        self._lock_engine = lock_engine
+        self.poll_interval = poll_interval
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.stats = {"computed": 0, "coalesced": 0, "waited_for_lock": 0, "reused_after_lock": 0}
+
+    @property
+    def advisory_locks(self) -> bool:
+        if self._advisory_locks is None:
+            import env_variables
+            self._advisory_locks = env_variables.SINGLE_FLIGHT_ADVISORY_LOCKS
+        return self._advisory_locks
+
+    @property
+    def lock_engine(self):
+        """The async engine holding the advisory locks"""
+        if self._lock_engine is None:
+            from db.core import async_engine
+            self._lock_engine = async_engine
+        return self._lock_engine
+
+    def configure(self, advisory_locks: Optional[bool] = None, lock_engine=None):
+        if advisory_locks is not None:
+            self._advisory_locks = advisory_locks
+        if lock_engine is not None:
+            self._lock_engine = lock_engine
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    @asynccontextmanager
+    async def _advisory_lock(self, key: Hashable):
+        """
+        Hold a session-level advisory lock on a dedicated connection.
+
+        The lock is polled with pg_try_advisory_lock rather than waited on with
+        pg_advisory_lock, so waiting longer than the statement timeout is fine.
+        Yields whether another worker held the lock first.
+        """
+        lock_key = advisory_lock_key(key)
+        async with self.lock_engine.connect() as conn:
+            # Autocommit, so the connection isn't left idle in a transaction while the lock is held
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            waited = False
+            while not (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": lock_key})).scalar():
+                waited = True
+                await asyncio.sleep(self.poll_interval)
+            try:
+                yield waited
+            finally:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": lock_key})
+
+    async def _compute(self, key: Hashable, compute: Callable[[], Awaitable[T]],
+                       reuse: Optional[Callable[[], Awaitable[Optional[T]]]]) -> T:
+        if not self.advisory_locks:
+            self.stats["computed"] += 1
+            return await compute()
+
+        async with self._advisory_lock(key) as waited:
+            if waited:
+                self.stats["waited_for_lock"] += 1
+                apiLogger.info(f"Waited for another worker computing {key}")
+                if reuse is not None:
+                    result = await reuse()
+                    if result is not None:
+                        self.stats["reused_after_lock"] += 1
+                        return result
+            self.stats["computed"] += 1
+            return await compute()
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[T]],
+                  reuse: Optional[Callable[[], Awaitable[Optional[T]]]] = None) -> T:
+        """
+        Run compute, or await the computation already in flight for the key.
+
+        Args:
+            key: Identifies duplicate requests, e.g. (endpoint, user_id, file_id, params)
+            compute: Produces and saves the result
+            reuse: Reads the saved result; called instead of compute after waiting
+                   for another worker's advisory lock, and compute still runs if it
+                   returns None
+
+        Returns:
+            The result of the computation, shared by every concurrent caller
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            apiLogger.info(f"Joining in-flight computation for {key}")
+        else:
+            task = asyncio.ensure_future(self._compute(key, compute, reuse))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+
+single_flight = SingleFlight()
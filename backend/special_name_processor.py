@@ -3,6 +3,8 @@ import asyncio
 from anthropic import Anthropic
 from typing import Dict, Optional
 
+from utils.structured_output import ReportPayload, create_structured
+
 # List of special names that require custom processing
 SPECIAL_NAMES = ["Ian Fujiyama", "Kelly Vohs", "Pam Cain", "Martin Sumner"]
 
@@ -32,28 +34,6 @@ Maintain exactly the same structure and language patterns as in the report, but
 Return the result in the same JSON format.
 """
 
-def parse_gpt_response(response_text: str) -> dict:
-    """Parse GPT response to extract JSON."""
-    try:
-        # Find JSON content between triple backticks
-        import re
-        json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', response_text)
-        if json_match:
-            json_str = json_match.group(1)
-        else:
-            # If no backticks, try to find JSON directly
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
-            if start_idx >= 0 and end_idx > start_idx:
-                json_str = response_text[start_idx:end_idx]
-            else:
-                return {}
-        
-        return json.loads(json_str)
-    except Exception as e:
-        print(f"Error parsing GPT response: {str(e)}")
-        return {}
-
 async def process_special_name_report(client: Anthropic, name: str, report_data: dict, system_prompt: str) -> dict:
     """
     Process special name case if the name is in the special list.
@@ -83,9 +63,13 @@ async def process_special_name_report(client: Anthropic, name: str, report_data:
     try:
         # Process the prompt using run_in_executor like in generate_report_llm.py
         loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
+        result = await loop.run_in_executor(
             None,
-            lambda: client.messages.create(
+            lambda: create_structured(
+                client,
+                ReportPayload,
+                "record_report",
+                "Record the reworded report in the same JSON structure as the input report",
                 model="claude-3-5-sonnet-20241022",
                 max_tokens=4000,
                 temperature=0.0,
@@ -94,8 +78,8 @@ async def process_special_name_report(client: Anthropic, name: str, report_data:
             )
         )
         
-        # Parse and return the modified results
-        modified_result = parse_gpt_response(response.content[0].text)
+        # Return the modified results
+        modified_result = result.model_dump()
         print(f"Successfully processed special report for {name}")
         return modified_result
     except Exception as e:
@@ -1 +1,5 @@
-files_store = {}
+from cache_backend import SharedDict
+from cache_manager import state_backend
+
+# Uploaded files by file ID, shared by every worker through the state backend
+files_store = SharedDict(state_backend, "files_store")
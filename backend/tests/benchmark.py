@@ -0,0 +1,34 @@
+import os
+import json
+from datetime import datetime
+
+
+def print_header(title, *details):
+    """Print the banner that starts a benchmark run."""
+    print("="*80)
+    print(f"STARTING {title}: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    for line in details:
+        print(line)
+    print("="*80)
+
+
+def save_results(name, results):
+    """
+    Save benchmark results to output/performance/<name>_<timestamp>.json.
+
+    Returns:
+        The results with the time of the run added first
+    """
+    results = {"timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), **results}
+
+    output_dir = os.path.join("output", "performance")
+    os.makedirs(output_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_path = os.path.join(output_dir, f"{name}_{timestamp}.json")
+
+    with open(output_path, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"Benchmark results saved to: {output_path}")
+    return results
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.llm_gateway import llm_gateway
+
+
+@pytest.fixture
+def gateway():
+    """The shared LLM gateway; the client and limits a test sets are restored afterwards."""
+    client = llm_gateway._client
+    max_concurrent, max_calls_per_minute = llm_gateway.max_concurrent, llm_gateway.max_calls_per_minute
+    yield llm_gateway
+    llm_gateway.client = client
+    llm_gateway.configure(max_concurrent=max_concurrent, max_calls_per_minute=max_calls_per_minute)
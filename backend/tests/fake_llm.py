@@ -0,0 +1,91 @@
+import json
+import asyncio
+from types import SimpleNamespace
+
+
+def default_responder(kwargs):
+    """Return an empty but schema-valid answer for the forced tool, or plain text."""
+    tools = kwargs.get("tools")
+    if tools:
+        return {"headings": []} if tools[0]["name"] == "record_sorted_evidence" else {}
+    return "{}"
+
+
+class FakeMessages:
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def create(self, **kwargs):
+        """Simulate a Claude call: wait for the configured latency, then answer."""
+        backend = self.backend
+        backend.calls += 1
+        backend.active += 1
+        backend.peak_active = max(backend.peak_active, backend.active)
+        try:
+            await asyncio.sleep(backend.latency)
+            answer = backend.responder(kwargs)
+        finally:
+            backend.active -= 1
+
+        usage = backend.prompt_usage(kwargs)
+        usage.output_tokens = len(json.dumps(answer)) // 4
+        # Answers longer than max_tokens are cut off, as the API does
+        truncated = usage.output_tokens > kwargs.get("max_tokens", usage.output_tokens)
+        if truncated:
+            usage.output_tokens = kwargs["max_tokens"]
+        if kwargs.get("tools"):
+            block = SimpleNamespace(type="tool_use", name=kwargs["tools"][0]["name"], input={} if truncated else answer)
+            return SimpleNamespace(content=[block], stop_reason="max_tokens" if truncated else "tool_use", usage=usage)
+        block = SimpleNamespace(type="text", text=answer[:kwargs["max_tokens"] * 4] if truncated else answer)
+        return SimpleNamespace(content=[block], stop_reason="max_tokens" if truncated else "end_turn", usage=usage)
+
+
+class FakeAsyncAnthropic:
+    """
+    Stand-in for anthropic.AsyncAnthropic used by benchmarks.
+    Each call sleeps for a fixed latency and answers through a responder function;
+    answers estimated above the call's max_tokens come back truncated.
+    """
+    def __init__(self, latency=0.5, responder=default_responder):
+        self.latency = latency
+        self.responder = responder
+        self.calls = 0
+        self.active = 0
+        self.peak_active = 0
+        self.messages = FakeMessages(self)
+        # Prompt prefixes written to the simulated prompt cache
+        self.cache = set()
+
+    def prompt_usage(self, kwargs):
+        """
+        Count prompt tokens like the API does with prompt caching.
+
+        The longest prefix ending at a cache_control block that was cached by an
+        earlier call is read from the cache; the rest of the prompt up to the last
+        cache_control block is written to it; anything after that is plain input.
+        """
+        blocks = [{"text": kwargs.get("system") or ""}]
+        for message in kwargs.get("messages", []):
+            content = message["content"]
+            blocks.extend([{"text": content}] if isinstance(content, str) else content)
+
+        prefix = ""
+        read_chars = written_chars = 0
+        for block in blocks:
+            prefix += message_text(block)
+            if "cache_control" in block:
+                if prefix in self.cache:
+                    read_chars = len(prefix)
+                else:
+                    self.cache.add(prefix)
+                    written_chars = len(prefix)
+        written_chars = max(written_chars - read_chars, 0)
+        return SimpleNamespace(
+            input_tokens=(len(prefix) - read_chars - written_chars) // 4,
+            cache_creation_input_tokens=written_chars // 4,
+            cache_read_input_tokens=read_chars // 4,
+        )
+
+
+def message_text(block):
+    return block.get("text", "") if isinstance(block, dict) else json.dumps(block)
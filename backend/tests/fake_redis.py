@@ -0,0 +1,102 @@
+import re
+import time
+import threading
+
+
+def glob_to_regex(pattern):
+    """Translate a Redis MATCH pattern (*, ?, [...] and backslash escapes) to a regex."""
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            i += 1
+            regex += re.escape(pattern[i])
+        elif char == "*":
+            regex += ".*"
+        elif char == "?":
+            regex += "."
+        elif char == "[":
+            end = pattern.index("]", i)
+            regex += "[" + pattern[i + 1:end] + "]"
+            i = end
+        else:
+            regex += re.escape(char)
+        i += 1
+    return re.compile(regex + r"\Z", re.DOTALL)
+
+
+class FakeRedisServer:
+    """Data of a simulated Redis server, shared by every FakeRedis client connected to it."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key -> (value, expires_at) for strings, key -> set for sets
+        self.strings = {}
+        self.sets = {}
+        self.commands = 0
+
+
+def to_bytes(value):
+    return value if isinstance(value, bytes) else str(value).encode("utf-8")
+
+
+class FakeRedis:
+    """
+    Stand-in for redis.Redis used by tests and benchmarks.
+    Implements the commands used by cache_backend.RedisBackend and, like the real
+    client, returns bytes.
+    """
+    def __init__(self, server=None):
+        self.server = server or FakeRedisServer()
+
+    def _live(self, key):
+        entry = self.server.strings.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del self.server.strings[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self.server.lock:
+            self.server.commands += 1
+            entry = self._live(to_bytes(key))
+            return None if entry is None else entry[0]
+
+    def set(self, key, value, px=None):
+        with self.server.lock:
+            self.server.commands += 1
+            expires_at = None if px is None else time.time() + px / 1000
+            self.server.strings[to_bytes(key)] = (to_bytes(value), expires_at)
+            return True
+
+    def delete(self, *keys):
+        with self.server.lock:
+            self.server.commands += 1
+            deleted = 0
+            for key in map(to_bytes, keys):
+                found_string = self._live(key) is not None
+                self.server.strings.pop(key, None)
+                found_set = self.server.sets.pop(key, None) is not None
+                deleted += found_string or found_set
+            return deleted
+
+    def scan_iter(self, match=None, count=None):
+        with self.server.lock:
+            self.server.commands += 1
+            regex = glob_to_regex(match) if match else None
+            keys = [key for key in list(self.server.strings) if self._live(key)] + list(self.server.sets)
+        return iter([key for key in keys if regex is None or regex.match(key.decode("utf-8"))])
+
+    def sadd(self, key, *members):
+        with self.server.lock:
+            self.server.commands += 1
+            members = set(map(to_bytes, members))
+            existing = self.server.sets.setdefault(to_bytes(key), set())
+            added = len(members - existing)
+            existing.update(members)
+            return added
+
+    def smembers(self, key):
+        with self.server.lock:
+            self.server.commands += 1
+            return set(self.server.sets.get(to_bytes(key), ()))
@@ -0,0 +1,132 @@
+import os
+import sys
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.batch_planner import (ITEM_OUTPUT_OVERHEAD_TOKENS, OUTPUT_SAFETY_RATIO, estimate_feedback_output_tokens,
+                                 estimate_tokens, plan_section_batches, plan_stakeholder_batches,
+                                 plan_token_batches)
+from utils.transcript_sections import get_sections_text, locate_stakeholder_sections
+
+NAMES = ["Matt Savino", "Mark Marengo", "Ian Fujiyama", "Ann Lee"]
+
+
+def make_transcript(names=NAMES, words=100):
+    """A cover page followed by one interview of the given length per stakeholder."""
+    interviews = [
+        f"{name} interview, 20 June 2024\n" + " ".join(f"word{i}.{j}" for j in range(words)) + "\n"
+        for i, name in enumerate(names)
+    ]
+    return "Cover page\n\n" + "".join(interviews)
+
+
+def located_stakeholders(transcript, names=NAMES):
+    return locate_stakeholder_sections([{"name": name, "role": "Peer"} for name in names], transcript)
+
+
+def planned_names(batches):
+    return [[stakeholder["name"] for stakeholder in batch] for batch in batches]
+
+
+def plan_by_output(items, max_output_tokens, **kwargs):
+    """Plan integer items whose value is their estimated output tokens."""
+    return plan_token_batches(items, input_cost=lambda item: 0, output_cost=lambda item: item,
+                              max_output_tokens=max_output_tokens, **kwargs)
+
+
+def test_token_estimates():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("x" * 400) == 101
+    # Items are dicts with a "text" or plain strings
+    text = "Great at building teams"
+    assert estimate_feedback_output_tokens([{"text": text}, text]) == 2 * (estimate_tokens(text) + ITEM_OUTPUT_OVERHEAD_TOKENS)
+    assert estimate_feedback_output_tokens([]) == 0
+
+
+def test_first_fit_decreasing_packing():
+    # 125 max_tokens leave an output budget of 100
+    assert int(125 * OUTPUT_SAFETY_RATIO) == 100
+    # Largest first: 50 and 40 share a batch, 30 opens a second one, 20 joins it and 10 fills the first;
+    # each batch keeps the original order of its items
+    assert plan_by_output([10, 50, 20, 40, 30], 125) == [[10, 50, 40], [20, 30]]
+    # Shared response tokens come out of every batch's budget, leaving 80
+    assert plan_by_output([10, 50, 20, 40, 30], 125, base_output_tokens=20) == [[50, 30], [10, 20, 40]]
+
+
+def test_input_budget_is_respected():
+    items = [30, 30, 30]
+    batches = plan_token_batches(items, input_cost=lambda item: item, output_cost=lambda item: 1,
+                                 max_output_tokens=1000, base_input_tokens=10, max_input_tokens=80)
+    assert batches == [[30, 30], [30]]
+
+
+def test_oversize_item_gets_its_own_batch():
+    assert plan_by_output([60, 500, 30], 125) == [[500], [60, 30]]
+    assert plan_by_output([500], 125) == [[500]]
+
+
+def test_empty_input():
+    assert plan_by_output([], 125) == []
+    batches, report = plan_stakeholder_batches([], lambda stakeholder: [], "Prompt", 4000, fixed_batch_size=2)
+    assert batches == []
+    assert report["planned_batches"] == 0 and report["fixed_size_batches"] == 0
+
+
+def test_stakeholder_batches_report_the_fixed_size_count():
+    stakeholders = [{"name": f"Stakeholder {i}", "feedback": [{"text": "Clear thinker"}] * 3} for i in range(6)]
+    batches, report = plan_stakeholder_batches(stakeholders, lambda stakeholder: stakeholder["feedback"], "Prompt",
+                                               max_output_tokens=4000, fixed_batch_size=2)
+    assert batches == [stakeholders]
+    assert report == {"label": "stakeholder batches", "items": 6, "planned_batches": 1,
+                      "fixed_batch_size": 2, "fixed_size_batches": 3}
+
+
+def test_adjacent_sections_are_merged_before_packing(margin=200):
+    transcript = make_transcript()
+    stakeholders = located_stakeholders(transcript)
+    padded = sum(estimate_tokens(get_sections_text([stakeholder], transcript, margin)) for stakeholder in stakeholders)
+    merged = estimate_tokens(get_sections_text(stakeholders, transcript, margin))
+    assert merged < padded
+
+    # The merged sections fit the budget even though the padded sections together don't
+    budget = (merged + padded) // 2
+    batches = plan_section_batches(stakeholders, transcript, token_budget=budget, solo_threshold=budget, margin=margin)
+    assert planned_names(batches) == [NAMES]
+
+
+def test_batches_respect_the_token_budget(margin=200, budget=600):
+    transcript = make_transcript()
+    stakeholders = located_stakeholders(transcript)
+    batches = plan_section_batches(stakeholders, transcript, token_budget=budget, solo_threshold=400, margin=margin)
+    assert sorted(name for batch in planned_names(batches) for name in batch) == sorted(NAMES)
+    assert all(estimate_tokens(get_sections_text(batch, transcript, margin)) <= budget for batch in batches)
+    assert len(batches) > 1
+
+
+def test_large_and_unlocated_sections_are_extracted_alone(margin=0):
+    transcript = make_transcript(NAMES[:3]) + "Closing notes mention Ann Lee only in passing.\n"
+    transcript = transcript.replace("word1.0 ", "word1.0 " + "long " * 400)
+    stakeholders = located_stakeholders(transcript)
+    assert "section_start" not in stakeholders[3]
+
+    batches = plan_section_batches(stakeholders, transcript, token_budget=1000, solo_threshold=300, margin=margin)
+    assert planned_names(batches) == [["Mark Marengo"], ["Ann Lee"], ["Matt Savino", "Ian Fujiyama"]]
+
+
+def test_merged_sections_do_not_repeat_text(margin=200):
+    transcript = make_transcript()
+    stakeholders = located_stakeholders(transcript)
+    first, second, third = stakeholders[:3]
+
+    # Adjacent sections come back as one contiguous slice
+    assert get_sections_text([second, first], transcript, margin) == transcript[:second["section_end"] + margin]
+
+    # Sections whose margins don't meet stay separate, in transcript order
+    assert get_sections_text([third, first], transcript, margin) == "\n\n".join([
+        transcript[:first["section_end"] + margin],
+        transcript[third["section_start"] - margin:third["section_end"] + margin],
+    ])
+
+    # Without a located section the full transcript is needed
+    assert get_sections_text([first, {"name": "Unknown", "role": ""}], transcript, margin) == transcript
@@ -0,0 +1,204 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_backend import (CacheBackend, MemoryBackend, RedisBackend, SharedDict, SqliteBackend,
+                           create_state_backend)
+from cache_manager import KeyValueCache
+from tests.benchmark import print_header, save_results
+from tests.fake_redis import FakeRedis, FakeRedisServer
+
+FEEDBACK = {"strengths": {f"Strength {i}": ["Stakeholders value her judgment."] * 5 for i in range(6)}}
+
+
+def make_backends(directory):
+    """One backend of each kind; the disk and redis ones get a second client, like a second worker."""
+    server = FakeRedisServer()
+    db_path = os.path.join(directory, "shared_state.sqlite3")
+    return {
+        "memory": (MemoryBackend(), None),
+        "disk": (SqliteBackend(db_path), SqliteBackend(db_path)),
+        "redis": (RedisBackend(FakeRedis(server)), RedisBackend(FakeRedis(server))),
+    }
+
+
+def entry_path(cache_type, name):
+    return os.path.join("cache", cache_type, f"{name}.json")
+
+
+def test_backends_behave_alike():
+    with tempfile.TemporaryDirectory() as directory:
+        for kind, (backend, _) in make_backends(directory).items():
+            backend.set("files_store:a", b"1")
+            backend.set("files_store:b", b"2", ttl=0.05)
+            backend.set("cache:reports:a", b"3")
+            assert backend.get("files_store:a") == b"1", kind
+            assert sorted(backend.scan("files_store:")) == ["files_store:a", "files_store:b"], kind
+            time.sleep(0.06)
+            assert backend.get("files_store:b") is None, kind
+            assert list(backend.scan("files_store:")) == ["files_store:a"], kind
+
+            backend.sadd("cache:manifest:a", "cache:reports:a", "cache:advice:a")
+            backend.sadd("cache:manifest:a", "cache:reports:a")
+            assert backend.smembers("cache:manifest:a") == {"cache:reports:a", "cache:advice:a"}, kind
+            assert backend.delete("files_store:a", "cache:manifest:a", "missing") == 2, kind
+            assert backend.smembers("cache:manifest:a") == set(), kind
+            assert backend.get("files_store:a") is None, kind
+
+
+def test_scan_prefix_is_literal():
+    with tempfile.TemporaryDirectory() as directory:
+        for kind, (backend, _) in make_backends(directory).items():
+            backend.set("files_store:a*", b"1")
+            backend.set("files_store:ab", b"2")
+            assert list(backend.scan("files_store:a*")) == ["files_store:a*"], kind
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_bytes=10)
+    backend.set("a", b"12345")
+    backend.set("b", b"12345")
+    backend.get("a")
+    backend.set("c", b"12345")
+    assert (backend.get("a"), backend.get("b"), backend.get("c")) == (b"12345", None, b"12345")
+
+
+def test_cached_data_doesnt_evict_files_store():
+    cache_backend = MemoryBackend(max_bytes=4096)
+    files_store = SharedDict(create_state_backend("memory", cache_backend), "files_store")
+    files_store["abc"] = {"file_path": "../data/uploads/abc.pdf", "original_name": "report.pdf"}
+    cache = KeyValueCache(cache_backend)
+    for i in range(20):
+        cache.put("feedback", str(i), entry_path("feedback", str(i)), FEEDBACK)
+    assert cache.get("feedback", entry_path("feedback", "0")) is None
+    assert files_store["abc"]["original_name"] == "report.pdf"
+    with tempfile.TemporaryDirectory() as directory:
+        disk = SqliteBackend(os.path.join(directory, "shared_state.sqlite3"))
+        assert create_state_backend("disk", disk) is disk
+
+
+def test_backends_implement_the_whole_interface():
+    class Partial(CacheBackend):
+        def get(self, key):
+            return None
+    try:
+        Partial()
+        assert False
+    except TypeError:
+        pass
+
+
+def test_files_store_is_shared_between_workers():
+    with tempfile.TemporaryDirectory() as directory:
+        for kind, (backend, other) in make_backends(directory).items():
+            if other is None:
+                continue
+            worker_a, worker_b = SharedDict(backend, "files_store"), SharedDict(other, "files_store")
+            worker_a["abc"] = {"file_path": "../data/uploads/abc.pdf", "original_name": "report.pdf"}
+            assert "abc" in worker_b, kind
+            assert worker_b["abc"]["file_path"] == "../data/uploads/abc.pdf", kind
+            assert (list(worker_b), len(worker_b)) == (["abc"], 1), kind
+            del worker_b["abc"]
+            assert "abc" not in worker_a, kind
+            try:
+                del worker_a["abc"]
+                assert False, kind
+            except KeyError:
+                pass
+
+
+def test_key_value_cache_invalidation():
+    cache = KeyValueCache(RedisBackend(FakeRedis()))
+    for cache_type in ("feedback", "advice"):
+        cache.put(cache_type, "abc", entry_path(cache_type, "abc"), FEEDBACK)
+        cache.put(cache_type, "def", entry_path(cache_type, "def"), FEEDBACK)
+    cache.put("advice", "abc", entry_path("advice", "abc_version_2"), FEEDBACK)
+    assert cache.get("feedback", entry_path("feedback", "abc")) == FEEDBACK
+
+    assert cache.invalidate_file("abc", {"advice"}) == 2
+    assert cache.get("advice", entry_path("advice", "abc")) is None
+    assert cache.get("feedback", entry_path("feedback", "abc")) == FEEDBACK
+    # The manifest still lists the entries of the other types
+    assert cache.invalidate_file("abc") == 1
+
+    assert cache.invalidate_type("advice") == 1
+    assert cache.invalidate_older_than(60) == 0
+    assert cache.invalidate_older_than(0) == 1
+    assert cache.snapshot()["invalidations"] == 5
+
+
+def test_key_value_cache_is_shared_and_expires():
+    server = FakeRedisServer()
+    worker_a = KeyValueCache(RedisBackend(FakeRedis(server)), ttls={"feedback": 0.05})
+    worker_b = KeyValueCache(RedisBackend(FakeRedis(server)), ttls={"feedback": 0.05})
+    path = entry_path("feedback", "abc")
+    worker_a.put("feedback", "abc", path, {1: "int keys become strings"})
+    assert worker_b.get("feedback", path) == {"1": "int keys become strings"}
+    time.sleep(0.06)
+    assert worker_b.get("feedback", path) is None
+
+
+def simulate_workers(workers, files, requests, shared, seed=0):
+    """
+    Route cache reads to random workers after each file's feedback was generated on one of them.
+
+    With per-worker caches a read only hits on the worker that generated the entry;
+    with a shared backend every worker sees it.
+    """
+    rng = random.Random(seed)
+    server = FakeRedisServer()
+    caches = [
+        KeyValueCache(RedisBackend(FakeRedis(server)) if shared else MemoryBackend())
+        for _ in range(workers)
+    ]
+    for i in range(files):
+        file_id = f"file{i:05d}"
+        rng.choice(caches).put("feedback", file_id, entry_path("feedback", file_id), FEEDBACK)
+    start = time.time()
+    for _ in range(requests):
+        file_id = f"file{rng.randrange(files):05d}"
+        rng.choice(caches).get("feedback", entry_path("feedback", file_id))
+    elapsed = time.time() - start
+    misses = sum(cache.stats["misses"] for cache in caches)
+    return misses, elapsed
+
+
+def test_shared_backend_removes_cross_worker_misses():
+    local_misses, _ = simulate_workers(4, 50, 400, shared=False)
+    shared_misses, _ = simulate_workers(4, 50, 400, shared=True)
+    assert local_misses > 200
+    assert shared_misses == 0
+
+
+def run_benchmark(workers, files, requests):
+    """Compare cache misses of per-worker caches with a backend shared by the workers."""
+    print_header("SHARED CACHE BACKEND BENCHMARK", f"{workers} workers, {files} files, {requests} reads")
+
+    runs = {}
+    for label, shared in (("per_worker", False), ("shared", True)):
+        misses, elapsed = simulate_workers(workers, files, requests, shared)
+        runs[label] = {"misses": misses, "miss_rate": misses / requests, "elapsed": elapsed}
+        print(f"{label:>10}: {misses} misses ({misses / requests:.1%}), {elapsed * 1000:.1f} ms")
+
+    return save_results("cache_backend", {
+        "config": {"workers": workers, "files": files, "requests": requests},
+        "runs": runs
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark cache misses across workers with a shared cache backend.")
+    parser.add_argument("--workers", type=int, default=4, help="Number of simulated workers")
+    parser.add_argument("--files", type=int, default=500, help="Number of processed files")
+    parser.add_argument("--requests", type=int, default=10000, help="Number of cache reads")
+
+    args = parser.parse_args()
+
+    run_benchmark(args.workers, args.files, args.requests)
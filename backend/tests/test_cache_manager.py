@@ -0,0 +1,221 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_manager import TwoTierCache
+from tests.benchmark import print_header, save_results
+
+REPORT = {"name": "Ian Fujiyama", "strengths": {f"Strength {i}": "Stakeholders value his judgment. " * 20 for i in range(8)}}
+
+
+def make_cache(directory, **kwargs):
+    """Cache over one "reports" directory inside directory, with its manifests next to it."""
+    reports_dir = os.path.join(directory, "reports")
+    os.makedirs(reports_dir, exist_ok=True)
+    return TwoTierCache(cache_dirs=[reports_dir], manifest_dir=os.path.join(directory, "manifests"), **kwargs)
+
+
+def entry_path(directory, name):
+    return os.path.join(directory, "reports", f"{name}.json")
+
+
+def legacy_get(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def legacy_save(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def test_round_trip_through_both_tiers():
+    with tempfile.TemporaryDirectory() as directory:
+        path = entry_path(directory, "abc")
+        cache = make_cache(directory)
+        cache.put("reports", "abc", path, {1: "int keys become strings", "nested": [1, 2]})
+        assert cache.get("reports", path) == {"1": "int keys become strings", "nested": [1, 2]}
+        # A new process only has the disk tier
+        other = make_cache(directory)
+        assert other.get("reports", path) == {"1": "int keys become strings", "nested": [1, 2]}
+        assert (cache.stats["memory_hits"], other.stats["disk_hits"]) == (1, 1)
+        # Nothing but the entry is left behind by the atomic write
+        assert os.listdir(os.path.join(directory, "reports")) == ["abc.json"]
+
+
+def test_returned_data_is_a_copy():
+    with tempfile.TemporaryDirectory() as directory:
+        path = entry_path(directory, "abc")
+        cache = make_cache(directory)
+        cache.put("reports", "abc", path, {"items": [1]})
+        cache.get("reports", path)["items"].append(2)
+        assert cache.get("reports", path) == {"items": [1]}
+
+
+def test_legacy_entries_are_readable():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = make_cache(directory)
+        path = entry_path(directory, "abc")
+        legacy_save(path, REPORT)
+        assert cache.get("reports", path) == REPORT
+
+
+def test_expired_entries_are_removed():
+    with tempfile.TemporaryDirectory() as directory:
+        path = entry_path(directory, "abc")
+        cache = make_cache(directory, ttls={"reports": 60})
+        cache.put("reports", "abc", path, REPORT)
+        old = time.time() - 120
+        os.utime(path, (old, old))
+        # The memory tier notices the file's new modification time and reads it again
+        assert cache.get("reports", path) is None
+        assert cache.stats["stale"] == 1 and cache.stats["expired"] == 1
+        assert not os.path.exists(path)
+
+
+def test_memory_tier_follows_other_workers_writes():
+    with tempfile.TemporaryDirectory() as directory:
+        path = entry_path(directory, "abc")
+        cache, other = make_cache(directory), make_cache(directory)
+        cache.put("reports", "abc", path, {"version": 1})
+        assert cache.get("reports", path) == {"version": 1}
+        # Another worker regenerates the entry, e.g. get_advice?use_cache=false
+        other.put("reports", "abc", path, {"version": 2})
+        assert cache.get("reports", path) == {"version": 2}
+        assert cache.get("reports", path) == {"version": 2}
+        assert cache.stats["memory_hits"] == 2 and cache.stats["stale"] == 1
+        # ... and then removes it
+        other.discard(path)
+        assert cache.get("reports", path) is None
+        assert cache.snapshot()["memory_entries"] == 0
+
+
+def test_disk_budget_evicts_least_recently_used():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = make_cache(directory, max_disk_bytes=250)
+        paths = [entry_path(directory, str(i)) for i in range(3)]
+        cache.put("reports", "0", paths[0], {"data": "a" * 90})
+        cache.put("reports", "1", paths[1], {"data": "b" * 90})
+        cache.get("reports", paths[0])
+        cache.put("reports", "2", paths[2], {"data": "c" * 90})
+        assert cache.stats["evictions"] == 1
+        assert not os.path.exists(paths[1])
+        assert os.path.exists(paths[0]) and os.path.exists(paths[2])
+        assert cache.snapshot()["disk_bytes"] <= 250
+
+
+def test_invalidate_file_removes_only_its_entries():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = make_cache(directory)
+        for name, file_id in (("abc", "abc"), ("abc_num_competencies_3", "abc"), ("abd", "abd")):
+            cache.put("reports", file_id, entry_path(directory, name), REPORT)
+        # Another process only knows the entries through the manifest
+        other = make_cache(directory)
+        assert other.invalidate_file("abc") == 2
+        assert os.listdir(os.path.join(directory, "reports")) == ["abd.json"]
+        # This process's memory tier no longer serves them either
+        assert cache.invalidate_file("abc") == 0
+        assert cache.get("reports", entry_path(directory, "abc")) is None
+        assert cache.get("reports", entry_path(directory, "abd")) == REPORT
+
+
+def test_invalidate_file_by_type_keeps_other_types():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = make_cache(directory)
+        cache.put("reports", "abc", entry_path(directory, "abc"), REPORT)
+        assert cache.invalidate_file("abc", {"advice"}) == 0
+        assert cache.get("reports", entry_path(directory, "abc")) == REPORT
+        assert cache.invalidate_file("abc", {"reports"}) == 1
+
+
+def test_invalidate_by_type_and_age():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = make_cache(directory)
+        cache.put("reports", "old", entry_path(directory, "old"), REPORT)
+        cache.put("reports", "new", entry_path(directory, "new"), REPORT)
+        old = time.time() - 3600
+        os.utime(entry_path(directory, "old"), (old, old))
+        fresh = make_cache(directory)
+        assert fresh.invalidate_older_than(600) == 1
+        assert fresh.get("reports", entry_path(directory, "new")) == REPORT
+        assert fresh.invalidate_type("reports") == 1
+        assert fresh.get("reports", entry_path(directory, "new")) is None
+
+
+def legacy_clear_file(directory, file_id):
+    """The previous clear_cache(file_id=...): list the whole directory and match prefixes."""
+    for filename in os.listdir(directory):
+        if filename.startswith(f"{file_id}") and filename.endswith('.json'):
+            os.remove(os.path.join(directory, filename))
+
+
+def run_benchmark(entries, reads):
+    """Compare json.load/json.dump(indent=2) on every access with the two-tier cache."""
+    print_header("CACHE MANAGER BENCHMARK", f"{entries} entries, {reads} reads")
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.makedirs(os.path.join(directory, "reports"), exist_ok=True)
+        paths = [entry_path(directory, f"legacy{i:05d}") for i in range(entries)]
+        start = time.time()
+        for path in paths:
+            legacy_save(path, REPORT)
+        legacy_write = time.time() - start
+        start = time.time()
+        for i in range(reads):
+            legacy_get(paths[i % entries])
+        legacy_read = time.time() - start
+        legacy_bytes = sum(os.path.getsize(path) for path in paths)
+
+        cache = make_cache(directory)
+        paths = [entry_path(directory, f"cache{i:05d}") for i in range(entries)]
+        start = time.time()
+        for i, path in enumerate(paths):
+            cache.put("reports", f"cache{i:05d}", path, REPORT)
+        cache_write = time.time() - start
+        start = time.time()
+        for i in range(reads):
+            cache.get("reports", paths[i % entries])
+        cache_read = time.time() - start
+        cache_bytes = sum(os.path.getsize(path) for path in paths)
+
+        # Invalidate the entries of a handful of files
+        start = time.time()
+        for i in range(10):
+            legacy_clear_file(os.path.join(directory, "reports"), f"legacy{i:05d}")
+        legacy_clear = time.time() - start
+        start = time.time()
+        for i in range(10):
+            cache.invalidate_file(f"cache{i:05d}")
+        cache_clear = time.time() - start
+
+    print(f"Legacy:    write {legacy_write * 1000:.1f} ms, read {legacy_read * 1000:.1f} ms, {legacy_bytes} bytes on disk")
+    print(f"Two-tier:  write {cache_write * 1000:.1f} ms, read {cache_read * 1000:.1f} ms, {cache_bytes} bytes on disk")
+    print(f"Invalidating 10 files: legacy scan {legacy_clear * 1000:.1f} ms, manifest {cache_clear * 1000:.1f} ms")
+    print(f"Counters:  {cache.snapshot()}")
+
+    return save_results("cache_manager", {
+        "config": {"entries": entries, "reads": reads},
+        "legacy": {"write_ms": legacy_write * 1000, "read_ms": legacy_read * 1000, "disk_bytes": legacy_bytes,
+                   "invalidate_10_files_ms": legacy_clear * 1000},
+        "two_tier": {"write_ms": cache_write * 1000, "read_ms": cache_read * 1000, "disk_bytes": cache_bytes,
+                     "invalidate_10_files_ms": cache_clear * 1000,
+                     "counters": cache.snapshot()}
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark cache reads and writes.")
+    parser.add_argument("--entries", type=int, default=100, help="Number of cache entries")
+    parser.add_argument("--reads", type=int, default=2000, help="Number of reads")
+
+    args = parser.parse_args()
+
+    run_benchmark(args.entries, args.reads)
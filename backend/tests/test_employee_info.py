@@ -0,0 +1,83 @@
+import os
+import sys
+import asyncio
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_report_llm import (extract_employee_info, extract_employee_info_async,
+                                 extract_employee_info_heuristic)
+from tests.fake_llm import FakeAsyncAnthropic
+
+COVER_TEXT = """Confidential
+Q360 Leadership Assessment
+Prepared for: Ian Fujiyama
+July 24, 2024
+"""
+
+
+def test_heuristic_reads_labeled_name_and_full_date():
+    assert extract_employee_info_heuristic(COVER_TEXT) == {"employee_name": "Ian Fujiyama", "report_date": "July 24, 2024"}
+
+
+def test_heuristic_reads_title_line_and_month_year():
+    info = extract_employee_info_heuristic("Ian Fujiyama - US Buyout Q360 Report\nSeptember 2024")
+    assert info == {"employee_name": "Ian Fujiyama", "report_date": "September 2024"}
+
+
+def test_heuristic_rejects_report_titles_and_bare_years():
+    info = extract_employee_info_heuristic("Executive 360 Feedback Report\nGenerated in 2024")
+    assert info == {"employee_name": None, "report_date": None}
+
+
+def test_heuristic_label_is_case_insensitive_but_name_is_not():
+    info = extract_employee_info_heuristic("PREPARED FOR: Ian Fujiyama\nReport date: July 24, 2024")
+    assert info == {"employee_name": "Ian Fujiyama", "report_date": "July 24, 2024"}
+
+    # Lowercase words after a label are not a name, and the unlabeled date is not the report date
+    info = extract_employee_info_heuristic("Executive leadership team\nJune 2024")
+    assert info == {"employee_name": None, "report_date": None}
+    info = extract_employee_info_heuristic("Participant feedback collected\nMarch 3, 2024")
+    assert info == {"employee_name": None, "report_date": None}
+
+
+def test_heuristic_rejects_title_words_in_any_case():
+    info = extract_employee_info_heuristic("Executive LEADERSHIP Team\nPrepared for: Ian Fujiyama")
+    assert info["employee_name"] == "Ian Fujiyama"
+
+
+def test_heuristic_ignores_interview_dates():
+    info = extract_employee_info_heuristic("Prepared for: Ian Fujiyama\nMatt Savino interview, June 20, 2024")
+    assert info == {"employee_name": "Ian Fujiyama", "report_date": None}
+    info = extract_employee_info_heuristic("Interview date: June 20, 2024\nReport date: July 24, 2024")
+    assert info["report_date"] == "July 24, 2024"
+    # A date elsewhere in the text is not taken either
+    info = extract_employee_info_heuristic("Prepared for: Ian Fujiyama\nNotes\nWe spoke on June 20, 2024")
+    assert info["report_date"] is None
+
+
+def test_heuristic_hit_skips_llm(gateway):
+    fake = FakeAsyncAnthropic(responder=lambda kwargs: "Name: Someone Else\nDate: 2020")
+    gateway.client = fake
+    info = asyncio.run(extract_employee_info_async("missing.pdf", "", cover_text=COVER_TEXT))
+    assert info["employee_name"] == "Ian Fujiyama"
+    assert fake.calls == 0
+
+
+def test_llm_fallback_when_heuristic_misses(gateway):
+    fake = FakeAsyncAnthropic(responder=lambda kwargs: "Name: Ian Fujiyama\nDate: July 2024")
+    gateway.client = fake
+    info = asyncio.run(extract_employee_info_async("missing.pdf", "", cover_text="Executive 360 Feedback Report\n2024"))
+    assert info == {"employee_name": "Ian Fujiyama", "report_date": "July 2024"}
+    assert fake.calls == 1
+
+
+def test_sync_wrapper_does_not_block_running_loop(gateway):
+    fake = FakeAsyncAnthropic(responder=lambda kwargs: "Name: Ian Fujiyama\nDate: July 2024")
+    gateway.client = fake
+
+    async def call_from_loop():
+        return extract_employee_info("missing.pdf", "", cover_text=COVER_TEXT)
+
+    assert asyncio.run(call_from_loop())["report_date"] == "July 24, 2024"
+    assert fake.calls == 0
@@ -0,0 +1,57 @@
+import os
+import sys
+import asyncio
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from employee_metadata import (EmployeeMetadataCache, build_employee_metadata,
+                               extract_stakeholder_roster)
+from tests.fake_llm import FakeAsyncAnthropic
+
+TRANSCRIPT = """Matt Savino interview, 20 June 2024
+So even keeled it's scary: measured.
+- Mark Marengo (MD, JP Morgan) interview
+Worked with him for over 20 years.
+Ian Fujiyama interview, 21 June 2024
+Matt Savino interview, follow up
+Being more direct more frequently.
+"""
+
+
+def test_roster_lists_each_stakeholder_once_without_the_employee():
+    assert extract_stakeholder_roster(TRANSCRIPT, "Ian Fujiyama") == [
+        {"name": "Matt Savino", "role": ""},
+        {"name": "Mark Marengo", "role": "MD, JP Morgan"},
+    ]
+
+
+def test_metadata_is_built_from_cover_text_without_llm(gateway):
+    fake = FakeAsyncAnthropic(responder=lambda kwargs: "Name: Someone Else\nDate: 2020")
+    gateway.client = fake
+    metadata = asyncio.run(build_employee_metadata("Prepared for: Ian Fujiyama\nJune 2024", TRANSCRIPT))
+    assert metadata["employee_name"] == "Ian Fujiyama"
+    assert metadata["report_date"] == "June 2024"
+    assert [s["name"] for s in metadata["stakeholders"]] == ["Matt Savino", "Mark Marengo"]
+    assert fake.calls == 0
+
+
+def test_cache_evicts_least_recently_used():
+    cache = EmployeeMetadataCache(max_entries=2)
+    cache.put("user", "a", {"employee_name": "A"})
+    cache.put("user", "b", {"employee_name": "B"})
+    assert cache.get("user", "a") == {"employee_name": "A"}
+    cache.put("user", "c", {"employee_name": "C"})
+    assert cache.get("user", "b") is None
+    assert cache.get("user", "a") is not None and cache.get("user", "c") is not None
+    cache.invalidate("user", "a")
+    assert cache.get("user", "a") is None
+    assert (cache.hits, cache.misses) == (3, 2)
+
+
+def test_cache_is_scoped_to_the_user():
+    cache = EmployeeMetadataCache()
+    cache.put("user-1", "file", {"employee_name": "A"})
+    assert cache.get("user-2", "file") is None
+    cache.invalidate("user-2", "file")
+    assert cache.get("user-1", "file") == {"employee_name": "A"}
@@ -0,0 +1,153 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from evidence_classifier import COMPETENCY_MAPPINGS, preclassify_evidence
+from evidence_sorting import PRECLASSIFY_EVIDENCE, process_batches_parallel
+from tests.benchmark import print_header, save_results
+from tests.fake_llm import FakeAsyncAnthropic
+from utils.llm_gateway import llm_gateway
+
+AREA_HEADINGS = ["Strategic thinking.", "Collaborative influence.", "Team development.", "Results orientation.", "Additional areas."]
+
+FEEDBACK = {
+    "Strategic thinking.": [
+        "She needs to think more about the long term strategy and big picture vision",
+        "Could set clearer strategic direction and priorities for the roadmap",
+    ],
+    "Team development.": [
+        "He could do more coaching and mentoring of his direct reports",
+        "Should invest in developing talent and growing careers on the team",
+    ],
+    "Results orientation.": [
+        "Sometimes misses deadlines and targets",
+        "Needs to deliver outcomes against goals more consistently",
+    ],
+    None: [
+        "He is nice",
+        "Great person to work with",
+    ],
+}
+
+# Quotes from real assessments that share a word with a heading but belong elsewhere
+REAL_AMBIGUOUS_QUOTES = [
+    "All good investments and the team are great investors",
+    "Can spend more time ingratiating himself with management teams",
+    "He's very direct, so I trust him",
+    "Two great MD partners who work for him",
+]
+
+
+def make_stakeholder_data():
+    """Build one stakeholder per feedback item, cycling through the sample feedback."""
+    texts = [(text, heading) for heading, items in FEEDBACK.items() for text in items]
+    return {
+        f"Stakeholder {i}": {"role": "Peer", "feedback": [{"text": text, "is_strong": i % 2 == 0}]}
+        for i, (text, _) in enumerate(texts)
+    }
+
+
+def expected_heading(text):
+    return next(heading for heading, items in FEEDBACK.items() if text in items)
+
+
+def echo_responder(kwargs):
+    """Put every evidence item of the prompt under the fallback heading."""
+    prompt = kwargs["messages"][0]["content"]
+    return {
+        "headings": [{
+            "heading": "Additional areas.",
+            "evidence": [
+                {"quote": text, "name": "Stakeholder", "position": "Peer", "isStrong": False}
+                for items in FEEDBACK.values() for text in items if text in prompt
+            ]
+        }]
+    }
+
+
+def test_clear_items_are_assigned_locally():
+    local_result, ambiguous = preclassify_evidence(make_stakeholder_data(), AREA_HEADINGS)
+    for item in local_result:
+        for evidence in item["evidence"]:
+            assert expected_heading(evidence["quote"]) == item["heading"], evidence["quote"]
+    assigned = sum(len(item["evidence"]) for item in local_result)
+    assert assigned >= 4
+    # Vague feedback is always left to Claude
+    ambiguous_texts = [f["text"] for data in ambiguous.values() for f in data["feedback"]]
+    for text in FEEDBACK[None]:
+        assert text in ambiguous_texts
+    assert assigned + len(ambiguous_texts) == sum(len(items) for items in FEEDBACK.values())
+
+
+def test_real_quotes_are_left_for_claude():
+    stakeholder_data = {"Stakeholder": {"role": "Peer", "feedback": [{"text": text} for text in REAL_AMBIGUOUS_QUOTES]}}
+    for headings in (list(COMPETENCY_MAPPINGS), AREA_HEADINGS):
+        local_result, ambiguous = preclassify_evidence(stakeholder_data, headings)
+        assert local_result == [], local_result
+        assert [f["text"] for f in ambiguous["Stakeholder"]["feedback"]] == REAL_AMBIGUOUS_QUOTES
+
+
+def test_preclassification_is_off_by_default():
+    assert PRECLASSIFY_EVIDENCE is False
+
+
+def test_evidence_fields_are_preserved():
+    local_result, _ = preclassify_evidence(make_stakeholder_data(), AREA_HEADINGS)
+    evidence = local_result[0]["evidence"][0]
+    assert set(evidence) == {"quote", "name", "position", "isStrong"}
+    assert evidence["position"] == "Peer"
+
+
+def test_fallback_heading_is_never_assigned_locally():
+    local_result, _ = preclassify_evidence(make_stakeholder_data(), AREA_HEADINGS)
+    assert all(item["heading"] != "Additional areas." for item in local_result)
+
+
+async def time_sort(preclassify, latency):
+    """Sort the sample evidence against the fake backend and time it."""
+    fake = FakeAsyncAnthropic(latency=latency, responder=echo_responder)
+    llm_gateway.client = fake
+    start = time.time()
+    result = await process_batches_parallel(make_stakeholder_data(), AREA_HEADINGS, batch_size=1, is_strengths=False, preclassify=preclassify)
+    return time.time() - start, fake, result
+
+
+def test_preclassification_reduces_llm_calls(gateway, latency=0.01):
+    gateway.configure(max_concurrent=16, max_calls_per_minute=10000)
+    _, baseline, baseline_result = asyncio.run(time_sort(False, latency))
+    _, fake, result = asyncio.run(time_sort(True, latency))
+    assert fake.calls < baseline.calls
+    # Every evidence item still appears exactly once
+    count = lambda sorted_result: sum(len(item["evidence"]) for item in sorted_result)
+    assert count(result) == count(baseline_result)
+
+
+async def run_benchmark(latency):
+    """Compare sort calls and wall time with and without local pre-classification."""
+    print_header("EVIDENCE PRE-CLASSIFICATION BENCHMARK", f"Fake LLM latency: {latency:.2f}s")
+
+    llm_gateway.configure(max_concurrent=3, max_calls_per_minute=100000)
+    runs = {}
+    for label, preclassify in (("llm_only", False), ("preclassified", True)):
+        elapsed, fake, result = await time_sort(preclassify, latency)
+        print(f"{label:>14}: {fake.calls} sort calls, {elapsed:.2f}s")
+        runs[label] = {"calls": fake.calls, "elapsed": elapsed, "evidence": sum(len(item["evidence"]) for item in result)}
+
+    return save_results("evidence_preclassification", {
+        "config": {"latency": latency},
+        "runs": runs
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark local evidence pre-classification against a fake LLM backend.")
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated seconds per LLM call")
+
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args.latency))
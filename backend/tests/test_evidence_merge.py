@@ -0,0 +1,171 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from evidence_sorting import EvidenceMerger, merge_sorted_evidence
+from tests.benchmark import print_header, save_results
+
+WORDS = ["leader", "team", "strategy", "listens", "delivers", "results", "clear", "vision", "coaching",
+         "stakeholders", "decisions", "priorities", "trust", "execution", "growth", "customers"]
+WORDS += [f"{word}{i}" for word in WORDS for i in range(150)]
+
+
+def legacy_merge(batch_results):
+    """The previous merge: rebuilds each heading's quote set whenever the heading reappears."""
+    merged_result = []
+    heading_map = {}
+    for batch in batch_results:
+        for item in batch:
+            heading = item["heading"]
+            if heading in heading_map:
+                existing_item = merged_result[heading_map[heading]]
+                existing_quotes = {e["quote"] for e in existing_item["evidence"]}
+                for evidence in item["evidence"]:
+                    if evidence["quote"] not in existing_quotes:
+                        existing_item["evidence"].append(evidence)
+                        existing_quotes.add(evidence["quote"])
+            else:
+                heading_map[heading] = len(merged_result)
+                merged_result.append({"heading": heading, "evidence": list(item["evidence"])})
+    return merged_result
+
+
+def make_batches(batch_count, heading_count, evidence_per_heading, seed=0):
+    """Build synthetic sorting batches with unique quotes under every heading."""
+    rng = random.Random(seed)
+    batches = []
+    for b in range(batch_count):
+        batch = []
+        for h in range(heading_count):
+            evidence = []
+            for e in range(evidence_per_heading):
+                quote = f"Quote {b}-{h}-{e}: " + " ".join(rng.choice(WORDS) for _ in range(12))
+                evidence.append({"quote": quote, "name": f"Stakeholder {b}", "position": "Peer", "isStrong": rng.random() < 0.3})
+            batch.append({"heading": f"Heading {h}", "evidence": evidence})
+        batches.append(batch)
+    return batches
+
+
+def test_merge_matches_legacy_for_unique_quotes():
+    batches = make_batches(10, 5, 3)
+    assert merge_sorted_evidence(batches) == legacy_merge(batches)
+
+
+def test_normalized_duplicates_are_collapsed():
+    batches = [
+        [{"heading": "Vision", "evidence": [{"quote": "She sets a clear vision.", "name": "A", "position": "CEO", "isStrong": False}]}],
+        [{"heading": "Vision", "evidence": [{"quote": "she sets a clear vision", "name": "A", "position": "CEO", "isStrong": True}]}],
+    ]
+    result = merge_sorted_evidence(batches)
+    assert len(result[0]["evidence"]) == 1
+    # The strong marking of the duplicate is kept
+    assert result[0]["evidence"][0]["isStrong"] is True
+
+
+def test_near_duplicates_are_collapsed_when_enabled():
+    merger = EvidenceMerger(collapse_near_duplicates=True)
+    merger.add_batch([{"heading": "Listening", "evidence": [{"quote": "He is a great leader who listens to everyone on the team", "isStrong": False}]}])
+    changed = merger.add_batch([{"heading": "Listening", "evidence": [
+        {"quote": "He is a great leader who listens to everybody on the team", "isStrong": False},
+        {"quote": "He could delegate more", "isStrong": False},
+    ]}])
+    assert changed == ["Listening"]
+    assert [e["quote"] for e in merger.heading("Listening")["evidence"]] == [
+        "He is a great leader who listens to everyone on the team",
+        "He could delegate more",
+    ]
+    # By default only quotes equal once normalized are collapsed
+    assert len(merge_sorted_evidence([[{"heading": "Listening", "evidence": [
+        {"quote": "He is a great leader who listens to everyone on the team", "isStrong": False},
+        {"quote": "He is a great leader who listens to everybody on the team", "isStrong": False},
+    ]}]])[0]["evidence"]) == 2
+
+
+def test_near_duplicate_search_is_capped_per_quote():
+    merger = EvidenceMerger(collapse_near_duplicates=True, max_candidates=4)
+    # Quotes sharing most words but below the similarity threshold all land in the same anchor lists
+    quotes = [f"the team trusts her judgment on difficult decisions {i} {i + 1000} {i + 2000}" for i in range(200)]
+    merger.add_batch([{"heading": "Judgment", "evidence": [{"quote": quote, "isStrong": False} for quote in quotes]}])
+    assert len(merger.heading("Judgment")["evidence"]) == 200
+    assert merger.stats["fuzzy_comparisons"] <= 4 * 200
+
+
+def test_default_merge_is_faster_than_legacy():
+    batches = make_batches(100, 20, 5)
+    assert merge_sorted_evidence(batches) == legacy_merge(batches)
+    legacy_time = min(time_merge(legacy_merge, batches, 1) for _ in range(3))
+    merge_time = min(time_merge(merge_sorted_evidence, batches, 1) for _ in range(3))
+    assert merge_time < legacy_time
+
+
+def test_same_quote_under_different_headings_is_kept():
+    result = merge_sorted_evidence([
+        [{"heading": "A", "evidence": [{"quote": "Same quote", "isStrong": False}]}],
+        [{"heading": "B", "evidence": [{"quote": "Same quote", "isStrong": False}]}],
+    ])
+    assert [len(item["evidence"]) for item in result] == [1, 1]
+
+
+def merge_fuzzy(batch_results):
+    merger = EvidenceMerger(collapse_near_duplicates=True)
+    for batch in batch_results:
+        merger.add_batch(batch)
+    return merger.result
+
+
+def time_merge(merge, batches, repeats):
+    elapsed = 0
+    for _ in range(repeats):
+        # The mergers keep references to evidence dicts, so merge a fresh copy each time
+        copy = json.loads(json.dumps(batches))
+        start = time.time()
+        merge(copy)
+        elapsed += time.time() - start
+    return elapsed / repeats
+
+
+def run_benchmark(batch_count, heading_count, evidence_per_heading, repeats):
+    """Compare the incremental merge with the legacy merge."""
+    print_header(
+        "EVIDENCE MERGE BENCHMARK",
+        f"{batch_count} batches x {heading_count} headings x {evidence_per_heading} evidence items",
+    )
+
+    batches = make_batches(batch_count, heading_count, evidence_per_heading)
+    legacy_time = time_merge(legacy_merge, batches, repeats)
+    exact_time = time_merge(merge_sorted_evidence, batches, repeats)
+    fuzzy_time = time_merge(merge_fuzzy, batches, repeats)
+
+    print(f"Legacy merge:               {legacy_time * 1000:.1f} ms")
+    print(f"Indexed merge (default):    {exact_time * 1000:.1f} ms")
+    print(f"Indexed merge (fuzzy):      {fuzzy_time * 1000:.1f} ms")
+
+    return save_results("evidence_merge", {
+        "config": {
+            "batches": batch_count,
+            "headings": heading_count,
+            "evidence_per_heading": evidence_per_heading,
+            "repeats": repeats
+        },
+        "legacy_ms": legacy_time * 1000,
+        "indexed_exact_ms": exact_time * 1000,
+        "indexed_fuzzy_ms": fuzzy_time * 1000
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark merging sorted evidence batches.")
+    parser.add_argument("--batches", type=int, default=100, help="Number of batches")
+    parser.add_argument("--headings", type=int, default=20, help="Headings per batch")
+    parser.add_argument("--evidence", type=int, default=5, help="Evidence items per heading per batch")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed repetitions")
+
+    args = parser.parse_args()
+
+    run_benchmark(args.batches, args.headings, args.evidence, args.repeats)
@@ -1,7 +1,7 @@
 import os
 import sys
 import json
-import anthropic
+import asyncio
 import argparse
 from datetime import datetime
 
@@ -9,14 +9,13 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import the necessary functions
-from routers.feedback import (
+from feedback_extraction import (
     identify_stakeholders,
     extract_stakeholder_feedback,
     categorize_with_strength_assessment,
     format_final_result
 )
 from dir_config import SAVE_DIR
-import env_variables
 
 def save_stage_output(data, stage, file_id):
     """Save the output of a stage to a JSON file."""
@@ -57,9 +56,6 @@ def run_test(start_stage=1, end_stage=4, file_id="7ed8e3d5-9c28-48a4-a5fb-2bd6bb
     print(f"Running stages {start_stage} to {end_stage}")
     print("="*80)
     
-    # Initialize Claude client
-    client = anthropic.Anthropic(api_key=env_variables.ANTHROPIC_API_KEY)
-    
     print(f"Using filtered file: {filtered_file}")
     print(f"File ID: {file_id}")
     
@@ -78,7 +74,7 @@ def run_test(start_stage=1, end_stage=4, file_id="7ed8e3d5-9c28-48a4-a5fb-2bd6bb
     # Stage 1: Identify stakeholders
     if start_stage <= 1 and end_stage >= 1:
         print("\n[STAGE 1] Identifying stakeholders...")
-        stakeholders = identify_stakeholders(feedback_transcript, client)
+        stakeholders = asyncio.run(identify_stakeholders(feedback_transcript))
         print(f"[STAGE 1] Found {len(stakeholders)} stakeholders:")
         for i, s in enumerate(stakeholders):
             print(f"  {i+1}. {s.get('name', 'Unknown')} - {s.get('role', 'Unknown role')}")
@@ -103,7 +99,7 @@ def run_test(start_stage=1, end_stage=4, file_id="7ed8e3d5-9c28-48a4-a5fb-2bd6bb
         stakeholder_feedback = []
         for i, stakeholder in enumerate(stakeholders):
             print(f"  [STAGE 2.{i+1}] Processing stakeholder: {stakeholder['name']} ({i+1}/{len(stakeholders)})")
-            feedback = extract_stakeholder_feedback(stakeholder, feedback_transcript, client)
+            feedback = asyncio.run(extract_stakeholder_feedback(stakeholder, feedback_transcript))
             
             # Verify that the stakeholder name and role are preserved correctly
             if feedback.get("name") != stakeholder["name"]:
@@ -127,7 +123,7 @@ def run_test(start_stage=1, end_stage=4, file_id="7ed8e3d5-9c28-48a4-a5fb-2bd6bb
     # Stage 3: Categorize feedback and assess strength
     if start_stage <= 3 and end_stage >= 3:
         print("\n[STAGE 3] Categorizing feedback and assessing strength...")
-        categorized_feedback = categorize_with_strength_assessment(stakeholder_feedback, client)
+        categorized_feedback = asyncio.run(categorize_with_strength_assessment(stakeholder_feedback))
         
         # Count items in each category
         strengths_count = sum(len(data.get("feedback", [])) for data in categorized_feedback.get("strengths", {}).values())
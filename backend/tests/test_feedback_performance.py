@@ -2,7 +2,6 @@ import os
 import sys
 import json
 import time
-import anthropic
 import argparse
 from datetime import datetime
 
@@ -11,30 +10,28 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import the necessary modules
 from utils.loggers.feedback_logger import feedbackLogger
-from routers.feedback import (
+from feedback_extraction import (
     identify_stakeholders,
     process_stakeholders_parallel,
     process_batches_parallel,
     format_final_result,
-    MAX_CONCURRENT_API_CALLS,
-    MAX_API_CALLS_PER_MINUTE,
     STAKEHOLDER_BATCH_SIZE
 )
+from utils.llm_gateway import llm_gateway
+from utils.llm_truncation import truncation_stats
 from dir_config import SAVE_DIR
-import env_variables
 
-async def run_parallel_test(file_id):
+async def run_parallel_test(file_id, batch_extraction=False):
     """Run the feedback extraction flow using the parallel implementation."""
+    extraction_mode = "batch" if batch_extraction else "solo"
     print("="*80)
     print(f"STARTING PARALLEL FEEDBACK EXTRACTION TEST: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"Using max concurrent API calls: {MAX_CONCURRENT_API_CALLS}")
+    print(f"Using stage 2 extraction mode: {extraction_mode}")
+    print(f"Using max concurrent API calls: {llm_gateway.max_concurrent}")
     print(f"Using stakeholder batch size: {STAKEHOLDER_BATCH_SIZE}")
-    print(f"Using max API calls per minute: {MAX_API_CALLS_PER_MINUTE}")
+    print(f"Using max API calls per minute: {llm_gateway.max_calls_per_minute}")
     print("="*80)
     
-    # Initialize Claude client
-    client = anthropic.Anthropic(api_key=env_variables.ANTHROPIC_API_KEY)
-    
     # Read the file content
     # Try different possible locations for the file
     possible_paths = [
@@ -70,25 +67,29 @@ async def run_parallel_test(file_id):
     with open(filtered_file, "r") as f:
         feedback_transcript = f.read()
     
+    calls_before = llm_gateway.total_calls
+    
     # Stage 1: Identify stakeholders
     print("\n[STAGE 1] Identifying stakeholders...")
     stage1_start = time.time()
-    stakeholders = identify_stakeholders(feedback_transcript, client)
+    stakeholders = await identify_stakeholders(feedback_transcript)
     stage1_time = time.time() - stage1_start
     print(f"[STAGE 1] Found {len(stakeholders)} stakeholders in {stage1_time:.2f} seconds")
     
     # Stage 2: Extract feedback per stakeholder (parallel)
     print("\n[STAGE 2] Extracting feedback for all stakeholders in parallel...")
     stage2_start = time.time()
-    stakeholder_feedback = await process_stakeholders_parallel(stakeholders, feedback_transcript, client)
+    stage2_calls_before = llm_gateway.total_calls
+    stakeholder_feedback = await process_stakeholders_parallel(stakeholders, feedback_transcript, batch_mode=batch_extraction)
+    stage2_calls = llm_gateway.total_calls - stage2_calls_before
     stage2_time = time.time() - stage2_start
     total_feedback_count = sum(len(feedback.get("feedback", [])) for feedback in stakeholder_feedback)
-    print(f"[STAGE 2] Extracted {total_feedback_count} total feedback items in {stage2_time:.2f} seconds")
+    print(f"[STAGE 2] Extracted {total_feedback_count} total feedback items with {stage2_calls} API calls in {stage2_time:.2f} seconds")
     
     # Stage 3: Categorize feedback (parallel)
     print("\n[STAGE 3] Categorizing feedback in parallel batches...")
     stage3_start = time.time()
-    categorized_feedback = await process_batches_parallel(stakeholder_feedback, client, batch_size=STAKEHOLDER_BATCH_SIZE)
+    categorized_feedback = await process_batches_parallel(stakeholder_feedback, batch_size=STAKEHOLDER_BATCH_SIZE)
     stage3_time = time.time() - stage3_start
     
     # Count items in each category
@@ -105,12 +106,15 @@ async def run_parallel_test(file_id):
     stage4_time = time.time() - stage4_start
     print(f"[STAGE 4] Formatted results in {stage4_time:.2f} seconds")
     
-    # Calculate total time
+    # Calculate total time and API calls for the whole assessment
     total_time = stage1_time + stage2_time + stage3_time + stage4_time
+    total_calls = llm_gateway.total_calls - calls_before
     
     print("="*80)
     print(f"PARALLEL FEEDBACK EXTRACTION TEST COMPLETE: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"Total processing time: {total_time:.2f} seconds")
+    print(f"Total API calls: {total_calls} ({stage2_calls} in stage 2)")
+    print(f"Truncated responses: {truncation_stats.snapshot()}")
     print(f"- Stage 1 (Identify stakeholders): {stage1_time:.2f}s ({stage1_time/total_time*100:.1f}%)")
     print(f"- Stage 2 (Extract feedback): {stage2_time:.2f}s ({stage2_time/total_time*100:.1f}%)")
     print(f"- Stage 3 (Categorize feedback): {stage3_time:.2f}s ({stage3_time/total_time*100:.1f}%)")
@@ -122,9 +126,10 @@ async def run_parallel_test(file_id):
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "file_id": file_id,
         "config": {
-            "max_concurrent_api_calls": MAX_CONCURRENT_API_CALLS,
+            "extraction_mode": extraction_mode,
+            "max_concurrent_api_calls": llm_gateway.max_concurrent,
             "stakeholder_batch_size": STAKEHOLDER_BATCH_SIZE,
-            "max_api_calls_per_minute": MAX_API_CALLS_PER_MINUTE
+            "max_api_calls_per_minute": llm_gateway.max_calls_per_minute
         },
         "performance": {
             "total_time": total_time,
@@ -136,6 +141,9 @@ async def run_parallel_test(file_id):
         "stats": {
             "stakeholders_count": len(stakeholders),
             "feedback_count": total_feedback_count,
+            "api_calls": total_calls,
+            "stage2_api_calls": stage2_calls,
+            "truncation": truncation_stats.snapshot(),
             "strengths_count": strengths_count,
             "areas_count": areas_count,
             "advice_count": advice_count
@@ -147,7 +155,7 @@ async def run_parallel_test(file_id):
     os.makedirs(output_dir, exist_ok=True)
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_path = os.path.join(output_dir, f"parallel_performance_{timestamp}.json")
+    output_path = os.path.join(output_dir, f"parallel_performance_{extraction_mode}_{timestamp}.json")
     
     with open(output_path, "w") as f:
         json.dump(results, f, indent=2)
@@ -161,8 +169,24 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description="Test performance of parallel feedback extraction implementation.")
     parser.add_argument("--file-id", type=str, default="cbecdeff-1cf5-4734-b2a4-bf460c70c4d4", help="File ID to process")
+    parser.add_argument("--extraction-mode", choices=["solo", "batch", "compare"], default="solo",
+                        help="Stage 2 extraction mode: one call per stakeholder, packed batches, or both for comparison")
     
     args = parser.parse_args()
     
     # Run the async function
-    asyncio.run(run_parallel_test(args.file_id))
+    if args.extraction_mode == "compare":
+        solo_results = asyncio.run(run_parallel_test(args.file_id, batch_extraction=False))
+        batch_results = asyncio.run(run_parallel_test(args.file_id, batch_extraction=True))
+        if solo_results and batch_results:
+            print("="*80)
+            print("STAGE 2 EXTRACTION MODE COMPARISON")
+            for mode, results in (("solo", solo_results), ("batch", batch_results)):
+                print(f"- {mode}: {results['stats']['stage2_api_calls']} stage 2 calls, "
+                      f"{results['stats']['api_calls']} calls per assessment, "
+                      f"stage 2 {results['performance']['stage2_time']:.2f}s, "
+                      f"total {results['performance']['total_time']:.2f}s, "
+                      f"{results['stats']['feedback_count']} feedback items")
+            print("="*80)
+    else:
+        asyncio.run(run_parallel_test(args.file_id, batch_extraction=args.extraction_mode == "batch"))
@@ -0,0 +1,124 @@
+import os
+import re
+import sys
+import json
+import asyncio
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feedback_extraction import (CATEGORIZATION_MAX_TOKENS, EXTRACTION_BATCH_MAX_TOKENS, EXTRACTION_MAX_TOKENS,
+                                 categorize_stakeholder_batch, extract_stakeholder_feedback,
+                                 process_batches_parallel)
+from tests.fake_llm import FakeAsyncAnthropic
+from utils.llm_truncation import truncation_stats
+from utils.structured_output import TruncatedOutputError
+
+
+def categorized_responder(kwargs):
+    """Answer each categorization call with one strength for each stakeholder in the prompt."""
+    names = re.findall(r'"name": "([^"]+)"', kwargs["messages"][0]["content"])
+    return {"strengths": {name: {"role": "Peer", "feedback": [{"text": f"Strength of {name}"}]} for name in names}}
+
+
+def echo_categorized_responder(kwargs):
+    """Answer each categorization call with every feedback item in the prompt as a strength."""
+    content = kwargs["messages"][0]["content"]
+    batch, _ = json.JSONDecoder().raw_decode(content, content.index('[\n  {\n    "name"'))
+    return {"strengths": {stakeholder["name"]: {"role": stakeholder["role"], "feedback": stakeholder["feedback"]}
+                          for stakeholder in batch}}
+
+
+def make_stakeholder_feedback(count, items=3, text_length=None):
+    def text(i, j):
+        text = f"Feedback item {j} from stakeholder {i}"
+        return text.ljust(text_length, ".") if text_length else text
+
+    return [
+        {"name": f"Stakeholder {i}", "role": "Peer", "feedback": [{"text": text(i, j)} for j in range(items)]}
+        for i in range(count)
+    ]
+
+
+def item_length(tokens):
+    """Length of a feedback text whose echoed answer is about the given number of tokens"""
+    return tokens * 4
+
+
+def categorize(batch):
+    return asyncio.run(categorize_stakeholder_batch(batch))
+
+
+def strength_texts(result):
+    return sorted(item["text"] for data in result["strengths"].values() for item in data["feedback"])
+
+
+def test_categorization_goes_through_the_gateway(gateway, batch_count=6, max_concurrent=2):
+    fake = FakeAsyncAnthropic(latency=0.02, responder=categorized_responder)
+    gateway.client = fake
+    gateway.configure(max_concurrent=max_concurrent, max_calls_per_minute=10000)
+    calls_before = gateway.total_calls
+
+    result = asyncio.run(process_batches_parallel(make_stakeholder_feedback(batch_count), batch_size=1))
+
+    assert fake.calls == batch_count and gateway.total_calls - calls_before == batch_count
+    # Batches are awaited together but bounded by the gateway's global limit
+    assert fake.peak_active == max_concurrent
+    assert sorted(result["strengths"]) == [f"Stakeholder {i}" for i in range(batch_count)]
+    assert result["areas_to_target"] == {} and result["advice"] == {}
+
+
+def test_truncated_categorization_is_split_by_stakeholder(gateway):
+    # Each stakeholder's answer fits the output limit, both together don't
+    batch = make_stakeholder_feedback(2, items=3, text_length=item_length(CATEGORIZATION_MAX_TOKENS // 4))
+    fake = FakeAsyncAnthropic(latency=0, responder=echo_categorized_responder)
+    gateway.client = fake
+    before = truncation_stats.snapshot()
+
+    result = categorize(batch)
+
+    assert fake.calls == 3
+    assert strength_texts(result) == sorted(item["text"] for stakeholder in batch for item in stakeholder["feedback"])
+    after = truncation_stats.snapshot()
+    assert after["truncated_responses"] - before["truncated_responses"] == 1
+    assert after["retries"] - before["retries"] == 2
+
+
+def test_truncated_single_stakeholder_is_split_by_feedback_item(gateway):
+    batch = make_stakeholder_feedback(1, items=6, text_length=item_length(CATEGORIZATION_MAX_TOKENS // 4))
+    gateway.client = FakeAsyncAnthropic(latency=0, responder=echo_categorized_responder)
+
+    result = categorize(batch)
+
+    # Halves of one stakeholder are merged back under their name, in order
+    assert list(result["strengths"]) == ["Stakeholder 0"]
+    merged = result["strengths"]["Stakeholder 0"]["feedback"]
+    assert [item["text"] for item in merged] == [item["text"] for item in batch[0]["feedback"]]
+
+
+def test_truncated_single_feedback_item_raises(gateway):
+    batch = make_stakeholder_feedback(1, items=1, text_length=item_length(2 * CATEGORIZATION_MAX_TOKENS))
+    gateway.client = FakeAsyncAnthropic(latency=0, responder=echo_categorized_responder)
+    before = truncation_stats.snapshot()
+
+    try:
+        categorize(batch)
+    except TruncatedOutputError:
+        pass
+    else:
+        raise AssertionError("Expected TruncatedOutputError")
+    assert truncation_stats.snapshot()["incomplete_responses"] - before["incomplete_responses"] == 1
+
+
+def test_truncated_extraction_is_retried_with_the_batch_limit(gateway):
+    feedback = [{"text": "x" * item_length(EXTRACTION_MAX_TOKENS // 4)} for _ in range(6)]
+    fake = FakeAsyncAnthropic(latency=0, responder=lambda kwargs: {"name": "Ann Lee", "feedback": feedback})
+    gateway.client = fake
+    calls = []
+    responder = fake.responder
+    fake.responder = lambda kwargs: calls.append(kwargs["max_tokens"]) or responder(kwargs)
+
+    result = asyncio.run(extract_stakeholder_feedback({"name": "Ann Lee", "role": "Peer"}, "Ann Lee interview\nGreat."))
+
+    assert calls == [EXTRACTION_MAX_TOKENS, EXTRACTION_BATCH_MAX_TOKENS]
+    assert result["feedback"] == feedback
@@ -0,0 +1,148 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_manager import FilenameMapStore
+from tests.benchmark import print_header, save_results
+
+
+def legacy_add_to_filename_map(path, filename, file_id):
+    """The previous update: read, mutate and rewrite the whole JSON file without locking."""
+    filename_map = {}
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                filename_map = json.load(f)
+        except Exception:
+            pass
+    filename_map[filename] = file_id
+    with open(path, "w") as f:
+        json.dump(filename_map, f, indent=2)
+
+
+def legacy_lookup(path, filename):
+    with open(path, "r") as f:
+        return json.load(f).get(filename)
+
+
+def make_store(directory, legacy_json_path=None):
+    return FilenameMapStore(os.path.join(directory, "filename_map.sqlite3"), legacy_json_path)
+
+
+def test_upsert_and_lookup():
+    with tempfile.TemporaryDirectory() as directory:
+        store = make_store(directory)
+        store.upsert("report.pdf", "id-1")
+        store.upsert("report.pdf", "id-2")
+        assert store.get_file_id("report.pdf") == "id-2"
+        assert store.get_file_id("missing.pdf") is None
+        assert store.has_file_id("id-2")
+        assert not store.has_file_id("id-3")
+        assert len(store) == 1
+
+
+def test_concurrent_uploads_keep_every_entry(uploads=200):
+    with tempfile.TemporaryDirectory() as directory:
+        store = make_store(directory)
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(lambda i: store.upsert(f"file_{i}.pdf", f"id-{i}"), range(uploads)))
+        assert len(store) == uploads
+        # A second store on the same database, as another worker would open it
+        other = make_store(directory)
+        assert all(other.get_file_id(f"file_{i}.pdf") == f"id-{i}" for i in range(uploads))
+
+
+def test_reupload_by_another_worker_is_seen():
+    with tempfile.TemporaryDirectory() as directory:
+        store, other = make_store(directory), make_store(directory)
+        store.upsert("report.pdf", "id-1")
+        assert store.get_file_id("report.pdf") == "id-1"
+        other.upsert("report.pdf", "id-2")
+        assert store.get_file_id("report.pdf") == "id-2"
+
+
+def test_lookup_by_content_hash():
+    with tempfile.TemporaryDirectory() as directory:
+        store = make_store(directory)
+        store.upsert("report.pdf", "id-1", "hash-1")
+        store.upsert("legacy.pdf", "id-2")
+        assert store.get_file_id("report.pdf", "hash-1") == "id-1"
+        # A different file uploaded under the same name doesn't match
+        assert store.get_file_id("report.pdf", "hash-2") is None
+        assert store.get_file_id("legacy.pdf", "hash-1") is None
+        assert store.get_file_id("legacy.pdf") == "id-2"
+
+
+def test_legacy_json_is_imported_once():
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_path = os.path.join(directory, "filename_map.json")
+        with open(legacy_path, "w") as f:
+            json.dump({"id-1": "id-1"}, f)
+        store = make_store(directory, legacy_path)
+        assert store.has_file_id("id-1")
+        store.upsert("new.pdf", "id-2")
+        assert len(make_store(directory, legacy_path)) == 2
+
+
+def run_benchmark(entries, uploads, lookups):
+    """Compare the JSON filename map with the SQLite store for parallel uploads and lookups."""
+    print_header("FILENAME MAP BENCHMARK", f"{entries} existing entries, {uploads} parallel uploads, {lookups} lookups")
+
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_path = os.path.join(directory, "filename_map.json")
+        with open(legacy_path, "w") as f:
+            json.dump({f"existing_{i}.pdf": f"existing-{i}" for i in range(entries)}, f)
+        store = make_store(directory, legacy_path)
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(lambda i: legacy_add_to_filename_map(legacy_path, f"file_{i}.pdf", f"id-{i}"), range(uploads)))
+        legacy_upload_time = time.time() - start
+        try:
+            with open(legacy_path, "r") as f:
+                legacy_kept = sum(1 for key in json.load(f) if key.startswith("file_"))
+        except json.JSONDecodeError:
+            legacy_kept = 0
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(lambda i: store.upsert(f"file_{i}.pdf", f"id-{i}"), range(uploads)))
+        store_upload_time = time.time() - start
+        store_kept = sum(1 for i in range(uploads) if store.get_file_id(f"file_{i}.pdf"))
+
+        start = time.time()
+        for i in range(lookups):
+            legacy_lookup(legacy_path, f"existing_{i % entries}.pdf")
+        legacy_lookup_time = time.time() - start
+
+        start = time.time()
+        for i in range(lookups):
+            store.get_file_id(f"existing_{i % entries}.pdf")
+        store_lookup_time = time.time() - start
+
+    print(f"JSON map:     uploads {legacy_upload_time * 1000:.1f} ms, kept {legacy_kept}/{uploads}, lookups {legacy_lookup_time * 1000:.1f} ms")
+    print(f"SQLite store: uploads {store_upload_time * 1000:.1f} ms, kept {store_kept}/{uploads}, lookups {store_lookup_time * 1000:.1f} ms")
+
+    return save_results("filename_map", {
+        "config": {"entries": entries, "uploads": uploads, "lookups": lookups},
+        "json_map": {"upload_ms": legacy_upload_time * 1000, "kept": legacy_kept, "lookup_ms": legacy_lookup_time * 1000},
+        "sqlite_store": {"upload_ms": store_upload_time * 1000, "kept": store_kept, "lookup_ms": store_lookup_time * 1000}
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the filename map under parallel uploads.")
+    parser.add_argument("--entries", type=int, default=2000, help="Existing entries in the map")
+    parser.add_argument("--uploads", type=int, default=200, help="Parallel uploads")
+    parser.add_argument("--lookups", type=int, default=500, help="Lookups to time")
+
+    args = parser.parse_args()
+
+    run_benchmark(args.entries, args.uploads, args.lookups)
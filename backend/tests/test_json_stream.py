@@ -0,0 +1,206 @@
+import os
+import sys
+import json
+import random
+import argparse
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.json_stream import IncrementalJSONParser, parse_partial_json
+
+WORDS = ["leadership", "strategic", "He", "said", "team", "\"quoted\"", "50%", "C:\\path", "naïve", "{x}", "[y]", "a,b", "line\nbreak", "tab\there"]
+
+
+def random_text(rng):
+    """Build a random string including characters that need escaping."""
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 6)))
+
+
+def random_value(rng, depth=0):
+    """Build a random JSON value."""
+    kind = rng.randint(0, 7 if depth < 3 else 3)
+    if kind == 0:
+        return random_text(rng)
+    if kind == 1:
+        return rng.choice([True, False, None])
+    if kind == 2:
+        return rng.randint(-1000, 1000)
+    if kind == 3:
+        return round(rng.uniform(-100, 100), 3)
+    if kind in (4, 5):
+        return {random_text(rng) or "key": random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))}
+    return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+
+
+def random_evidence(rng):
+    """Build a sorted-evidence style document: a list of headings with evidence."""
+    return [
+        {
+            "heading": random_text(rng),
+            "evidence": [
+                {"quote": random_text(rng), "name": random_text(rng), "position": random_text(rng), "isStrong": rng.random() < 0.5}
+                for _ in range(rng.randint(0, 5))
+            ],
+            "extra": random_value(rng, 1),
+        }
+        for _ in range(rng.randint(0, 8))
+    ]
+
+
+def random_chunks(text, rng):
+    """Split text into random chunks, like a streamed response."""
+    chunks = []
+    i = 0
+    while i < len(text):
+        size = rng.randint(1, 40)
+        chunks.append(text[i:i + size])
+        i += size
+    return chunks
+
+
+def dumps_with_trailing_commas(value):
+    """Serialize JSON with a trailing comma after the last item of every container."""
+    if isinstance(value, list):
+        return "[" + "".join(dumps_with_trailing_commas(item) + "," for item in value) + "]"
+    if isinstance(value, dict):
+        return "{" + "".join(json.dumps(key) + ": " + dumps_with_trailing_commas(item) + "," for key, item in value.items()) + "}"
+    return json.dumps(value)
+
+
+def serialize(document, rng):
+    """Serialize a document the way an LLM might: valid JSON or with trailing commas."""
+    if rng.random() < 0.3:
+        return dumps_with_trailing_commas(document)
+    return json.dumps(document, indent=rng.choice([None, 2]), ensure_ascii=rng.random() < 0.5)
+
+
+def dumps_with_broken_commas(value, rng):
+    """Serialize JSON leaving out or repeating some of the commas between items."""
+    separator = lambda: rng.choice([", ", ", ", " ", ",, ", " ,,"])
+    if isinstance(value, list):
+        return "[" + separator().join(dumps_with_broken_commas(item, rng) for item in value) + "]"
+    if isinstance(value, dict):
+        return "{" + separator().join(
+            json.dumps(key) + ": " + dumps_with_broken_commas(item, rng) for key, item in value.items()
+        ) + "}"
+    return json.dumps(value)
+
+
+# Damaged but bracket-balanced: the parser resynchronises on the bracket structure
+MALFORMED_ELEMENTS = ['{"quote": tru}', '{"quote" "x"}', 'nonsense', '{"evidence": [1 2, "x" "y":]}', '{"a": {"b" 1}}']
+
+
+def damage(text, rng):
+    """Wrap JSON text in the prose and code fences seen in LLM output."""
+    if rng.random() < 0.5:
+        text = rng.choice(["Here is the JSON:\n```json\n", "Sure! ", ""]) + text + rng.choice(["\n```", "\nLet me know if you need more.", ""])
+    return text
+
+
+def parse_stream(text, rng, element_depth=1):
+    parser = IncrementalJSONParser(element_depth=element_depth)
+    for chunk in random_chunks(text, rng):
+        parser.feed(chunk)
+    return parser
+
+
+def test_chunked_text_matches_document(iterations=300, seed=1):
+    rng = random.Random(seed)
+    for _ in range(iterations):
+        document = random_evidence(rng)
+        text = damage(serialize(document, rng), rng)
+        assert parse_stream(text, rng).finish() == document, text
+
+
+def test_nested_elements(iterations=200, seed=2):
+    rng = random.Random(seed)
+    for _ in range(iterations):
+        headings = random_evidence(rng)
+        text = damage(serialize({"headings": headings}, rng), rng)
+        assert parse_stream(text, rng, element_depth=2).finish() == {"headings": headings}, text
+
+
+def test_raw_control_characters_in_strings(iterations=200, seed=3):
+    rng = random.Random(seed)
+    for _ in range(iterations):
+        document = [random_value(rng) for _ in range(rng.randint(1, 5))]
+        # Unescape newlines and tabs inside strings, as models sometimes do
+        text = json.dumps(document).replace("\\n", "\n").replace("\\t", "\t")
+        assert parse_partial_json(text) == document, text
+
+
+def test_truncated_output_recovers_prefix(iterations=100, seed=4):
+    rng = random.Random(seed)
+    for _ in range(iterations):
+        document = random_evidence(rng)
+        text = json.dumps(document)
+        cut = rng.randint(0, len(text))
+        recovered = parse_stream(text[:cut], rng).finish()
+        if cut == 0:
+            assert recovered is None
+        else:
+            assert isinstance(recovered, list), text[:cut]
+            # Every element before the one that was cut off is kept whole
+            complete = max(len(recovered) - 1, 0)
+            assert recovered[:complete] == document[:complete], text[:cut]
+
+
+def test_random_values_round_trip(iterations=500, seed=5):
+    rng = random.Random(seed)
+    for _ in range(iterations):
+        document = random_value(rng)
+        if not isinstance(document, (dict, list)):
+            document = [document]
+        text = damage(serialize(document, rng), rng)
+        assert parse_partial_json(text) == document, text
+
+
+def test_missing_and_repeated_commas(iterations=300, seed=6):
+    rng = random.Random(seed)
+    for _ in range(iterations):
+        document = random_evidence(rng)
+        text = dumps_with_broken_commas(document, rng)
+        parser = parse_stream(text, rng)
+        assert parser.finish() == document and parser.skipped == 0, text
+        assert parse_partial_json(dumps_with_broken_commas({"headings": document}, rng)) == {"headings": document}
+
+
+def test_malformed_elements_are_skipped(iterations=300, seed=7):
+    rng = random.Random(seed)
+    for _ in range(iterations):
+        document = random_evidence(rng)
+        items = [json.dumps(item) for item in document]
+        bad = rng.randint(1, 3)
+        for _ in range(bad):
+            items.insert(rng.randint(0, len(items)), rng.choice(MALFORMED_ELEMENTS))
+        text = damage("[" + ", ".join(items) + "]", rng)
+        parser = parse_stream(text, rng)
+        assert parser.finish() == document and parser.skipped == bad, text
+        assert parse_partial_json(text) == document, text
+
+    # Members of a top-level object are skipped the same way
+    assert parse_partial_json('{"a": 1, "b": tru, "c" "x", "d": [2, 3]}') == {"a": 1, "d": [2, 3]}
+
+
+def test_no_json():
+    assert parse_partial_json("") is None
+    assert parse_partial_json("I could not find any feedback.") is None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fuzz test the incremental JSON parser.")
+    parser.add_argument("--iterations", type=int, default=1000, help="Random documents per test")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+    args = parser.parse_args()
+
+    test_chunked_text_matches_document(args.iterations, args.seed + 1)
+    test_nested_elements(args.iterations, args.seed + 2)
+    test_raw_control_characters_in_strings(args.iterations, args.seed + 3)
+    test_truncated_output_recovers_prefix(args.iterations, args.seed + 4)
+    test_random_values_round_trip(args.iterations, args.seed + 5)
+    test_missing_and_repeated_commas(args.iterations, args.seed + 6)
+    test_malformed_elements_are_skipped(args.iterations, args.seed + 7)
+    test_no_json()
+    print("All JSON stream fuzz tests passed")
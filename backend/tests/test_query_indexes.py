@@ -0,0 +1,192 @@
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, desc, select
+
+from db.models import DBAdvice, DBFeedBack, DBProcessedAssessment, DBSnapshot, DBTask
+from tests.benchmark import print_header, save_results
+
+# Columns the lookups touch; the JSONB columns are left out so the schema runs on SQLite
+TABLES = [
+    "CREATE TABLE task (id INTEGER PRIMARY KEY, created_at TIMESTAMP, user_id VARCHAR, name VARCHAR, "
+    "file_id VARCHAR, file_name VARCHAR)",
+    "CREATE TABLE feedback (id INTEGER PRIMARY KEY, task_id INTEGER)",
+    "CREATE TABLE advice (id INTEGER PRIMARY KEY, task_id INTEGER)",
+    "CREATE TABLE processed_assessment (id INTEGER PRIMARY KEY, task_id INTEGER)",
+    "CREATE TABLE snapshot (id INTEGER PRIMARY KEY, task_id INTEGER, created_at TIMESTAMP, trigger_type VARCHAR)",
+]
+
+MODELS = [DBTask, DBFeedBack, DBAdvice, DBProcessedAssessment, DBSnapshot]
+
+
+def lookup_queries(user_id, file_id, file_name, task_id):
+    """The statements db/file.py, db/feedback.py, db/advice.py and db/snapshot.py run on every request."""
+    return {
+        "task_by_user_and_file_id": select(DBTask.id).filter(DBTask.file_id == file_id, DBTask.user_id == user_id),
+        "task_by_user_and_file_name": select(DBTask.id).filter(DBTask.file_name == file_name, DBTask.user_id == user_id),
+        "tasks_of_user": select(DBTask.id).filter(DBTask.user_id == user_id).order_by(desc(DBTask.created_at)),
+        "feedback_of_task": select(DBFeedBack.id).filter(DBFeedBack.task_id == task_id),
+        "advice_of_task": select(DBAdvice.id).filter(DBAdvice.task_id == task_id),
+        "processed_assessment_of_task": select(DBProcessedAssessment.id).filter(DBProcessedAssessment.task_id == task_id),
+        "latest_snapshot": select(DBSnapshot.id).filter(DBSnapshot.task_id == task_id)
+            .order_by(desc(DBSnapshot.created_at)).limit(1),
+        "latest_manual_snapshot": select(DBSnapshot.id)
+            .filter(DBSnapshot.task_id == task_id, DBSnapshot.trigger_type == "manual")
+            .order_by(desc(DBSnapshot.created_at)).limit(1),
+    }
+
+
+def build_database(task_count, users=1000, snapshots_per_task=3, seed=0):
+    """Fill an in-memory SQLite database with synthetic tasks and their rows."""
+    rng = random.Random(seed)
+    engine = create_engine("sqlite://")
+    start = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        for ddl in TABLES:
+            conn.exec_driver_sql(ddl)
+        tasks = [
+            (i, start + timedelta(minutes=i), f"user_{i % users}", f"task {i}", f"file-{i:07d}", f"report_{i}.pdf")
+            for i in range(1, task_count + 1)
+        ]
+        rng.shuffle(tasks)
+        conn.exec_driver_sql("INSERT INTO task VALUES (?, ?, ?, ?, ?, ?)", tasks)
+        for table in ("feedback", "advice", "processed_assessment"):
+            conn.exec_driver_sql(f"INSERT INTO {table} VALUES (?, ?)", [(i, i) for i in range(1, task_count + 1)])
+        snapshots = [
+            (task_id * snapshots_per_task + n, task_id, start + timedelta(minutes=task_id, seconds=n),
+             "manual" if n % 2 else "auto")
+            for task_id in range(1, task_count + 1) for n in range(snapshots_per_task)
+        ]
+        rng.shuffle(snapshots)
+        conn.exec_driver_sql("INSERT INTO snapshot VALUES (?, ?, ?, ?)", snapshots)
+    return engine
+
+
+def lookup_indexes(model):
+    """B-tree indexes added by the lookup index migration; the GIN indexes on JSONB come later."""
+    return [
+        index for index in model.__table__.indexes
+        if index.name != "ix_task_id" and not index.dialect_options["postgresql"]["using"]
+    ]
+
+
+def create_indexes(engine):
+    """Create the indexes declared on the models, as the migration does."""
+    with engine.begin() as conn:
+        for model in MODELS:
+            for index in lookup_indexes(model):
+                index.create(conn)
+        conn.exec_driver_sql("ANALYZE")
+
+
+def query_plans(engine, queries):
+    plans = {}
+    with engine.connect() as conn:
+        for name, stmt in queries.items():
+            sql = str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+            plans[name] = " / ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+    return plans
+
+
+def time_queries(engine, task_count, repeats, users=1000, seed=1):
+    """Average milliseconds per lookup for random tasks."""
+    rng = random.Random(seed)
+    timings = {}
+    with engine.connect() as conn:
+        for _ in range(repeats):
+            i = rng.randint(1, task_count)
+            for name, stmt in lookup_queries(f"user_{i % users}", f"file-{i:07d}", f"report_{i}.pdf", i).items():
+                start = time.perf_counter()
+                conn.execute(stmt).fetchall()
+                timings[name] = timings.get(name, 0) + time.perf_counter() - start
+    return {name: elapsed * 1000 / repeats for name, elapsed in timings.items()}
+
+
+def test_lookups_use_the_new_indexes():
+    engine = build_database(2000)
+    queries = lookup_queries("user_7", "file-0000007", "report_7.pdf", 7)
+    before = query_plans(engine, queries)
+    assert all("INDEX" not in plan for plan in before.values()), before
+
+    create_indexes(engine)
+    after = query_plans(engine, queries)
+    expected = {
+        "task_by_user_and_file_id": "ix_task_user_id_file_id",
+        "task_by_user_and_file_name": "ix_task_user_id_file_name",
+        "tasks_of_user": "ix_task_user_id_created_at",
+        "feedback_of_task": "ix_feedback_task_id",
+        "advice_of_task": "ix_advice_task_id",
+        "processed_assessment_of_task": "ix_processed_assessment_task_id",
+        "latest_snapshot": "ix_snapshot_task_id_created_at",
+        "latest_manual_snapshot": "ix_snapshot_task_id_trigger_type_created_at",
+    }
+    for name, index in expected.items():
+        assert index in after[name], (name, after[name])
+    # Newest-first listings are read in index order, without sorting
+    assert "TEMP B-TREE" not in after["tasks_of_user"]
+    assert "TEMP B-TREE" not in after["latest_manual_snapshot"]
+
+
+def test_migration_matches_model_indexes():
+    migration_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic", "versions")
+    with open(os.path.join(migration_dir, "9d4f6b2c8a17_add_lookup_indexes.py")) as f:
+        source = f.read()
+    namespace = {}
+    exec(source.split("\n\ndef upgrade")[0], namespace)
+    migrated = {(name, table, tuple(columns)) for name, table, columns in namespace["INDEXES"]}
+    declared = {
+        (index.name, model.__tablename__, tuple(column.name for column in index.columns))
+        for model in MODELS for index in lookup_indexes(model)
+    }
+    assert migrated == declared
+
+
+def run_benchmark(task_count, repeats):
+    """Compare query plans and lookup times before and after the indexes."""
+    print_header("QUERY INDEX BENCHMARK", f"{task_count} synthetic tasks, {repeats} lookups per query")
+
+    start = time.time()
+    engine = build_database(task_count)
+    print(f"Built database in {time.time() - start:.1f}s")
+
+    queries = lookup_queries("user_7", "file-0000007", "report_7.pdf", 7)
+    before_plans = query_plans(engine, queries)
+    before_ms = time_queries(engine, task_count, repeats)
+    start = time.time()
+    create_indexes(engine)
+    index_seconds = time.time() - start
+    after_plans = query_plans(engine, queries)
+    after_ms = time_queries(engine, task_count, repeats)
+
+    queries_result = {}
+    for name in queries:
+        print(f"{name}:")
+        print(f"  before: {before_ms[name]:8.3f} ms  {before_plans[name]}")
+        print(f"  after:  {after_ms[name]:8.3f} ms  {after_plans[name]}")
+        queries_result[name] = {
+            "before_ms": before_ms[name], "after_ms": after_ms[name],
+            "before_plan": before_plans[name], "after_plan": after_plans[name]
+        }
+
+    return save_results("query_indexes", {
+        "config": {"tasks": task_count, "repeats": repeats},
+        "index_build_seconds": index_seconds,
+        "queries": queries_result
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark task, feedback, advice and snapshot lookups before and after the lookup indexes.")
+    parser.add_argument("--tasks", type=int, default=100000, help="Number of synthetic tasks")
+    parser.add_argument("--repeats", type=int, default=50, help="Lookups per query")
+
+    args = parser.parse_args()
+
+    run_benchmark(args.tasks, args.repeats)
@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import asyncio
+import argparse
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_report_llm import (TokenUsage, build_prompt_dag,
+                                 get_development_prompts, get_reflection_prompts,
+                                 get_strengths_prompts, parse_gpt_response,
+                                 process_prompts, run_prompt_dag)
+from tests.benchmark import print_header, save_results
+from tests.fake_llm import FakeAsyncAnthropic
+from utils.llm_gateway import llm_gateway
+
+EXECUTIVE_INTERVIEW = "Executive: I have been in the role for two years."
+
+ANSWER = "Stakeholders describe a thoughtful, strategic leader. " * 40
+
+
+def report_responder(kwargs):
+    """Answer format prompts with JSON naming the section they format, and other prompts with prose."""
+    prompt = json.dumps(kwargs["messages"][-1]["content"])
+    if "jsonify" in prompt.lower():
+        for section in ("Next Steps and Potential Actions", "Areas to Target", "Strengths"):
+            if section in prompt:
+                return json.dumps({section: [{"Heading": ["Content"]}]})
+    return ANSWER
+
+
+def make_transcript(chars):
+    line = "Peer: She sets a clear direction and listens to the team before deciding.\n"
+    return line * (chars // len(line))
+
+
+def report_categories():
+    return [get_reflection_prompts(EXECUTIVE_INTERVIEW), get_strengths_prompts(), get_development_prompts()]
+
+
+async def legacy_process_single_prompt(client, prompt_category, file_content, system_prompt, token_usage):
+    """The previous chain: every turn resends the transcript and all earlier turns uncached."""
+    messages = []
+    final_response1 = "{}"
+    for i, prompt in enumerate(prompt_category):
+        if i == 0:
+            messages.append({"role": "user", "content": f"{prompt}\n\nContent:\n{file_content}"})
+        else:
+            messages.append({"role": "user", "content": prompt})
+        response = await client.messages.create(model="claude-3-5-sonnet-20241022", max_tokens=4000, temperature=0,
+                                                messages=messages, system=system_prompt)
+        token_usage.record(response.usage)
+        response_text = response.content[0].text
+        if len(prompt_category) > 5 and i == 6:
+            final_response1 = response_text
+            messages = messages[:-1]
+            continue
+        messages.append({"role": "assistant", "content": response_text})
+    return parse_gpt_response(final_response1), parse_gpt_response(messages[-1]["content"])
+
+
+async def run_report(transcript, legacy, latency=0.0):
+    """Generate the report results against the fake backend and return them with their token usage."""
+    client = FakeAsyncAnthropic(latency=latency, responder=report_responder)
+    usage = TokenUsage()
+    if legacy:
+        # Categories in parallel, prompts within a category strictly in sequence
+        pairs = await asyncio.gather(*(
+            legacy_process_single_prompt(client, category, transcript, "", usage) for category in report_categories()
+        ))
+        results = [result for pair in pairs for result in pair]
+    else:
+        llm_gateway.client = client
+        results = await process_prompts(transcript, EXECUTIVE_INTERVIEW, "", "", token_usage=usage)
+    return results, usage
+
+
+async def compare_reports(transcript):
+    legacy = await run_report(transcript, legacy=True)
+    cached = await run_report(transcript, legacy=False)
+    return legacy, cached
+
+
+def test_results_match_legacy_chain_and_use_fewer_tokens(gateway):
+    (legacy_results, legacy_usage), (results, usage) = asyncio.run(compare_reports(make_transcript(40000)))
+    assert results == legacy_results
+    assert results[4] == {"Areas to Target": [{"Heading": ["Content"]}]}
+    assert results[5] == {"Next Steps and Potential Actions": [{"Heading": ["Content"]}]}
+    assert usage.calls == legacy_usage.calls
+    # Uncached prompt tokens drop far below the legacy chain's
+    assert usage.input_tokens + usage.cache_creation_input_tokens < legacy_usage.input_tokens / 3
+    assert usage.total_input_tokens < legacy_usage.total_input_tokens
+
+
+def test_prompt_dag_dependencies():
+    nodes, outputs = build_prompt_dag({"development": get_development_prompts()})
+    after = {node.name: node.after for node in nodes}
+    # The areas JSON and the next steps turn both depend only on the softened write-up
+    assert after["development_6"] == "development_5"
+    assert after["development_7"] == "development_5"
+    assert after["development_8"] == "development_7"
+    assert outputs["development"] == ["development_6", "development_8"]
+
+
+def test_independent_nodes_run_concurrently(gateway, latency=0.05):
+    gateway.configure(max_concurrent=10, max_calls_per_minute=10000)
+    client = FakeAsyncAnthropic(latency=latency, responder=report_responder)
+    gateway.client = client
+    nodes, _ = build_prompt_dag({
+        "a": ["First turn", "Second turn", "Now jsonify this"],
+        "b": ["First turn"],
+        "c": ["First turn", "Now jsonify this"],
+    })
+
+    async def timed():
+        start = asyncio.get_running_loop().time()
+        answers = await run_prompt_dag(nodes, "Transcript", "")
+        return asyncio.get_running_loop().time() - start, answers
+
+    elapsed, answers = asyncio.run(timed())
+    assert set(answers) == {node.name for node in nodes}
+    assert client.peak_active == 3
+    # The longest chain is three calls
+    assert elapsed < 4 * latency
+
+
+async def run_benchmark(transcript_chars, latency):
+    """Compare prompt tokens and wall time per report for the legacy chains and the cached prompt graph."""
+    print_header(
+        "REPORT PROMPT BENCHMARK",
+        f"Transcript: {transcript_chars} characters, fake LLM latency: {latency:.2f}s",
+    )
+
+    transcript = make_transcript(transcript_chars)
+    llm_gateway.configure(max_concurrent=10, max_calls_per_minute=100000)
+    runs = {}
+    for label, legacy in (("legacy", True), ("graph", False)):
+        start = asyncio.get_running_loop().time()
+        _, usage = await run_report(transcript, legacy, latency)
+        elapsed = asyncio.get_running_loop().time() - start
+        runs[label] = {**usage.snapshot(), "elapsed": elapsed}
+        print(f"{label:>7}: {usage.calls} calls, {usage.input_tokens} uncached input, "
+              f"{usage.cache_creation_input_tokens} cache write, {usage.cache_read_input_tokens} cache read, "
+              f"{usage.output_tokens} output tokens, {elapsed:.2f}s")
+
+    return save_results("report_tokens", {
+        "config": {"transcript_chars": transcript_chars, "latency": latency},
+        "runs": runs
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure prompt tokens and wall time per report against a fake LLM backend.")
+    parser.add_argument("--transcript-chars", type=int, default=120000, help="Size of the synthetic feedback transcript")
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated seconds per LLM call")
+
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args.transcript_chars, args.latency))
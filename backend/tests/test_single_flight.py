@@ -0,0 +1,265 @@
+import os
+import sys
+import asyncio
+import argparse
+from contextlib import asynccontextmanager
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from single_flight import SingleFlight, advisory_lock_key
+from tests.benchmark import print_header, save_results
+
+
+class FakeLockConnection:
+    """Answers the advisory lock statements used by SingleFlight from a shared lock table."""
+    def __init__(self, engine):
+        self.engine = engine
+
+    async def execution_options(self, **options):
+        return self
+
+    async def execute(self, statement, params):
+        sql, key = str(statement), params["key"]
+        self.engine.statements += 1
+        if "pg_try_advisory_lock" in sql:
+            acquired = self.engine.locks.setdefault(key, self) is self
+            return FakeResult(acquired)
+        if "pg_advisory_unlock" in sql:
+            return FakeResult(self.engine.locks.pop(key, None) is self)
+        raise AssertionError(f"Unexpected statement: {sql}")
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+class FakeLockEngine:
+    """Stand-in for the async engine of a Postgres database shared by several workers."""
+    def __init__(self):
+        self.locks = {}
+        self.statements = 0
+
+    @asynccontextmanager
+    async def connect(self):
+        yield FakeLockConnection(self)
+
+
+class FakePipeline:
+    """A slow generation that saves one row per run, like get_feedback inserting DBFeedBack."""
+    def __init__(self, latency):
+        self.latency = latency
+        self.rows = []
+
+    async def generate(self, file_id):
+        await asyncio.sleep(self.latency)
+        result = {"file_id": file_id, "version": len(self.rows) + 1}
+        self.rows.append(result)
+        return result
+
+    async def saved(self, file_id):
+        rows = [row for row in self.rows if row["file_id"] == file_id]
+        return rows[-1] if rows else None
+
+
+class SessionClosedError(Exception):
+    pass
+
+
+class FakeSession:
+    """Raises once closed, like a session used after FastAPI's dependency teardown."""
+    def __init__(self):
+        self.closed = False
+
+    async def execute(self):
+        if self.closed:
+            raise SessionClosedError("Session is closed")
+        await asyncio.sleep(0.005)
+
+    async def close(self):
+        await asyncio.sleep(0.005)
+        self.closed = True
+
+
+class FakeSessionFactory:
+    """Stand-in for async_session_local, remembering every session it opened."""
+    def __init__(self):
+        self.sessions = []
+
+    @asynccontextmanager
+    async def __call__(self):
+        session = FakeSession()
+        self.sessions.append(session)
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def duplicate_requests(flight, pipeline, count, key=("get_feedback", "user", "abc")):
+    return await asyncio.gather(*(
+        flight.run(key, lambda: pipeline.generate("abc"), reuse=lambda: pipeline.saved("abc"))
+        for _ in range(count)
+    ))
+
+
+def test_duplicates_share_one_computation():
+    flight, pipeline = SingleFlight(advisory_locks=False), FakePipeline(0.02)
+    results = asyncio.run(duplicate_requests(flight, pipeline, 5))
+    assert results == [{"file_id": "abc", "version": 1}] * 5
+    assert len(pipeline.rows) == 1
+    assert flight.stats["computed"] == 1 and flight.stats["coalesced"] == 4
+    assert not flight.in_flight(("get_feedback", "user", "abc"))
+
+
+def test_different_keys_and_later_requests_compute_again():
+    flight, pipeline = SingleFlight(advisory_locks=False), FakePipeline(0.01)
+
+    async def scenario():
+        await asyncio.gather(
+            flight.run(("get_strength_evidences", "user", "abc", 3), lambda: pipeline.generate("abc")),
+            flight.run(("get_strength_evidences", "user", "abc", 5), lambda: pipeline.generate("abc")),
+        )
+        await flight.run(("get_strength_evidences", "user", "abc", 3), lambda: pipeline.generate("abc"))
+
+    asyncio.run(scenario())
+    assert len(pipeline.rows) == 3
+
+
+def test_errors_reach_every_caller_and_release_the_key():
+    flight = SingleFlight(advisory_locks=False)
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("Feedback transcript not found")
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.run("key", failing) for _ in range(3)), return_exceptions=True)
+        await asyncio.sleep(0)
+        return results, flight.in_flight("key")
+
+    results, in_flight = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert calls == [1] and not in_flight
+
+
+def test_cancelled_caller_doesnt_cancel_the_computation():
+    flight, pipeline = SingleFlight(advisory_locks=False), FakePipeline(0.03)
+
+    async def scenario():
+        key = ("get_advice", "user", "abc")
+        first = asyncio.ensure_future(flight.run(key, lambda: pipeline.generate("abc")))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(flight.run(key, lambda: pipeline.generate("abc")))
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == {"file_id": "abc", "version": 1}
+    assert len(pipeline.rows) == 1
+
+
+def test_computation_outlives_the_session_of_a_cancelled_caller():
+    flight, sessions = SingleFlight(advisory_locks=False), FakeSessionFactory()
+    key = ("get_feedback", "user", "abc")
+
+    async def generate(db):
+        for _ in range(6):
+            await db.execute()
+        return {"file_id": "abc"}
+
+    async def generate_in_own_session():
+        # Like generate_feedback, which opens its own session from async_session_local
+        async with sessions() as db:
+            return await generate(db)
+
+    async def request(compute):
+        # Like an endpoint with db = Depends(get_async_db)
+        async with sessions() as request_db:
+            return await flight.run(key, lambda: compute(request_db))
+
+    async def scenario(compute):
+        first = asyncio.ensure_future(request(compute))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(request(compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await asyncio.gather(first, second, return_exceptions=True)
+
+    first, second = asyncio.run(scenario(lambda request_db: generate_in_own_session()))
+    assert isinstance(first, asyncio.CancelledError)
+    assert second == {"file_id": "abc"}
+    assert all(session.closed for session in sessions.sessions)
+    assert flight.stats["computed"] == 1 and flight.stats["coalesced"] == 1
+
+    # Using the first caller's session breaks the computation for everyone who joined it
+    first, second = asyncio.run(scenario(generate))
+    assert isinstance(second, SessionClosedError)
+
+
+def test_workers_serialize_on_advisory_lock_and_reuse_the_saved_result():
+    engine, pipeline = FakeLockEngine(), FakePipeline(0.03)
+    workers = [SingleFlight(advisory_locks=True, lock_engine=engine, poll_interval=0.005) for _ in range(3)]
+
+    async def scenario():
+        return await asyncio.gather(*(duplicate_requests(worker, pipeline, 2) for worker in workers))
+
+    results = [result for worker_results in asyncio.run(scenario()) for result in worker_results]
+    assert results == [{"file_id": "abc", "version": 1}] * 6
+    assert len(pipeline.rows) == 1
+    assert sum(worker.stats["reused_after_lock"] for worker in workers) == 2
+    assert engine.locks == {}
+
+
+def test_advisory_lock_keys_are_stable_signed_bigints():
+    key = ("get_feedback", "user", "abc")
+    assert advisory_lock_key(key) == advisory_lock_key(("get_feedback", "user", "abc"))
+    assert advisory_lock_key(key) != advisory_lock_key(("get_advice", "user", "abc"))
+    assert -2**63 <= advisory_lock_key(key) < 2**63
+
+
+async def run_benchmark(requests, latency, workers):
+    """Compare pipeline runs and saved rows for duplicate requests with and without single-flight."""
+    print_header(
+        "SINGLE-FLIGHT BENCHMARK",
+        f"{requests} duplicate requests per worker, {workers} workers, pipeline latency: {latency:.2f}s",
+    )
+
+    runs = {}
+
+    # Every request runs the pipeline, as before
+    pipeline = FakePipeline(latency)
+    start = asyncio.get_running_loop().time()
+    await asyncio.gather(*(pipeline.generate("abc") for _ in range(requests * workers)))
+    runs["uncoalesced"] = {"rows": len(pipeline.rows), "elapsed": asyncio.get_running_loop().time() - start}
+
+    for label, advisory_locks in (("in_process", False), ("advisory_lock", True)):
+        engine, pipeline = FakeLockEngine(), FakePipeline(latency)
+        flights = [SingleFlight(advisory_locks=advisory_locks, lock_engine=engine, poll_interval=0.01) for _ in range(workers)]
+        start = asyncio.get_running_loop().time()
+        await asyncio.gather(*(duplicate_requests(flight, pipeline, requests) for flight in flights))
+        runs[label] = {"rows": len(pipeline.rows), "elapsed": asyncio.get_running_loop().time() - start}
+
+    for label, run in runs.items():
+        print(f"{label:>14}: {run['rows']} pipeline runs / saved rows, {run['elapsed']:.2f}s")
+
+    return save_results("single_flight", {
+        "config": {"requests": requests, "latency": latency, "workers": workers},
+        "runs": runs
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark coalescing of duplicate generation requests.")
+    parser.add_argument("--requests", type=int, default=5, help="Duplicate requests per worker")
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated seconds per pipeline run")
+    parser.add_argument("--workers", type=int, default=3, help="Number of simulated workers")
+
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args.requests, args.latency, args.workers))
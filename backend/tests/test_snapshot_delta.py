@@ -0,0 +1,254 @@
+import os
+import sys
+import copy
+import time
+import random
+import argparse
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+
+from db.models import Base, DBSnapshot, DBTask
+from db.snapshot_delta import (KEYFRAME_INTERVAL, detach_children, document_cache, encode_snapshot,
+                               load_documents, load_many)
+from utils.json_patch import apply_patch, make_patch
+from tests.benchmark import print_header, save_results
+
+
+# SQLite has no JSONB; its JSON type stores the same documents
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+def make_report(stakeholders=10, quotes=6, seed=0):
+    """Snapshot documents shaped like the ones the editor saves."""
+    rng = random.Random(seed)
+    evidence = {
+        f"Heading {h}": {
+            "evidence": [
+                {"feedback": f"Quote {h}.{q} " + "detail " * rng.randint(5, 20), "source": f"Stakeholder {q % stakeholders}",
+                 "role": "Peer", "is_strong": q % 3 == 0}
+                for q in range(quotes)
+            ]
+        }
+        for h in range(stakeholders)
+    }
+    report = {"editable": {"strengths": evidence}, "sorted_by": {"stakeholders": {}, "competency": copy.deepcopy(evidence)}}
+    return {
+        "manual_report": {"selectedPath": None, **copy.deepcopy(report)},
+        "full_report": copy.deepcopy(report),
+        "ai_Competencies": {"editable": {}, "sorted_by": {"stakeholders": {}, "competency": {}}},
+    }
+
+
+def edit(documents, rng):
+    """One editor change: rewrite, add or remove a quote."""
+    documents = copy.deepcopy(documents)
+    heading = rng.choice(sorted(documents["manual_report"]["editable"]["strengths"]))
+    evidence = documents["manual_report"]["editable"]["strengths"][heading]["evidence"]
+    action = rng.random()
+    if action < 0.6 and evidence:
+        evidence[rng.randrange(len(evidence))]["feedback"] += " (edited)"
+    elif action < 0.8:
+        evidence.append({"feedback": "New quote", "source": "Stakeholder 0", "role": "Peer", "is_strong": False})
+    elif evidence:
+        evidence.pop(rng.randrange(len(evidence)))
+    return documents
+
+
+def build_database():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(DBTask(id=1, user_id="user", name="task", file_id="file-1", file_name="report.pdf"))
+        session.commit()
+    return engine
+
+
+def add_snapshot(session, documents, parent=None, delta=True):
+    """Save a snapshot the way db/snapshot.create_snapshot does."""
+    snapshot = DBSnapshot(task_id=1, trigger_type="auto", parent_id=parent.id if parent else None)
+    if delta:
+        encode_snapshot(snapshot, documents, parent, load_documents(session, parent) if parent else None)
+    else:
+        encode_snapshot(snapshot, documents)
+    session.add(snapshot)
+    session.commit()
+    return snapshot
+
+
+def count_statements(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_json_patch_round_trips():
+    rng = random.Random(3)
+    documents = make_report()
+    for _ in range(50):
+        edited = edit(documents, rng)
+        assert apply_patch(documents, make_patch(documents, edited)) == edited
+        documents = edited
+    assert make_patch(documents, documents) == []
+    assert apply_patch({"a/b": {"~k": 1}}, make_patch({"a/b": {"~k": 1}}, {"a/b": {"~k": 2}, "x": [1]})) == {"a/b": {"~k": 2}, "x": [1]}
+    assert apply_patch([1, 2, 3], make_patch([1, 2, 3], [1])) == [1]
+    assert apply_patch({"a": 1}, make_patch({"a": 1}, ["b"])) == ["b"]
+
+
+def test_chain_is_stored_as_deltas_with_periodic_keyframes():
+    engine, rng = build_database(), random.Random(1)
+    document_cache.clear()
+    history, snapshots = [make_report()], []
+    with Session(engine) as session:
+        snapshots.append(add_snapshot(session, history[0]))
+        for _ in range(2 * KEYFRAME_INTERVAL + 3):
+            history.append(edit(history[-1], rng))
+            snapshots.append(add_snapshot(session, history[-1], snapshots[-1]))
+        distances = [s.keyframe_distance for s in snapshots]
+        ids = [s.id for s in snapshots]
+
+    assert distances[:KEYFRAME_INTERVAL + 1] == list(range(KEYFRAME_INTERVAL)) + [0]
+    assert distances.count(0) == 3
+
+    # Cold cache: one recursive query per snapshot, and the documents match what was saved
+    document_cache.clear()
+    statements = count_statements(engine)
+    with Session(engine) as session:
+        latest = session.get(DBSnapshot, ids[-1])
+        statements.clear()
+        assert load_documents(session, latest) == history[-1]
+        assert len(statements) == 1
+        assert latest.manual_report == history[-1]["manual_report"]
+        assert latest.stored_manual_report is None
+
+        # Every snapshot on that chain is now cached
+        statements.clear()
+        middle = session.get(DBSnapshot, ids[-2])
+        assert load_documents(session, middle) == history[-2]
+        assert len(statements) == 1  # the session.get, no chain query
+
+    document_cache.clear()
+    with Session(engine) as session:
+        snapshots = [session.get(DBSnapshot, snapshot_id) for snapshot_id in ids]
+        load_many(session, reversed(snapshots))
+        assert [s.documents for s in snapshots] == history
+
+
+def test_large_changes_are_stored_as_keyframes():
+    engine = build_database()
+    with Session(engine) as session:
+        first = add_snapshot(session, make_report(seed=1))
+        second = add_snapshot(session, make_report(stakeholders=12, seed=2), first)
+        assert second.delta is None and second.keyframe_distance == 0
+        assert second.stored_full_report == make_report(stakeholders=12, seed=2)["full_report"]
+
+
+def test_deleting_a_parent_turns_its_children_into_keyframes():
+    engine, rng = build_database(), random.Random(2)
+    with Session(engine) as session:
+        root = add_snapshot(session, make_report())
+        middle = add_snapshot(session, edit(root.documents, rng), root)
+        child_documents = edit(middle.documents, rng)
+        child = add_snapshot(session, child_documents, middle)
+        grandchild_documents = edit(child_documents, rng)
+        grandchild = add_snapshot(session, grandchild_documents, child)
+        assert child.delta is not None
+        ids = (middle.id, child.id, grandchild.id)
+
+        assert detach_children(session, middle) == 1
+        session.delete(middle)
+        session.commit()
+
+    document_cache.clear()
+    with Session(engine) as session:
+        assert session.get(DBSnapshot, ids[0]) is None
+        child, grandchild = session.get(DBSnapshot, ids[1]), session.get(DBSnapshot, ids[2])
+        assert child.delta is None and child.stored_manual_report == child_documents["manual_report"]
+        assert load_documents(session, grandchild) == grandchild_documents
+
+
+def test_unreconstructed_delta_snapshot_raises():
+    engine, rng = build_database(), random.Random(4)
+    with Session(engine) as session:
+        root = add_snapshot(session, make_report())
+        child_id = add_snapshot(session, edit(root.documents, rng), root).id
+    with Session(engine) as session:
+        child = session.get(DBSnapshot, child_id)
+        try:
+            child.full_report
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("Expected RuntimeError")
+
+
+def run_benchmark(edits, stakeholders, quotes):
+    """Compare stored bytes, written bytes and read times of full and delta-encoded snapshots."""
+    print_header("SNAPSHOT DELTA BENCHMARK", f"{edits} edits, {stakeholders} headings with {quotes} quotes each")
+
+    runs = {}
+    for label, delta in (("full", False), ("delta", True)):
+        engine, rng = build_database(), random.Random(0)
+        document_cache.clear()
+        documents = make_report(stakeholders, quotes)
+        written = 0
+        start = time.perf_counter()
+        with Session(engine) as session:
+            snapshot = add_snapshot(session, documents, delta=delta)
+            ids = [snapshot.id]
+            for _ in range(edits):
+                documents = edit(documents, rng)
+                snapshot = add_snapshot(session, documents, snapshot, delta=delta)
+                written += len(orjson.dumps(snapshot.delta if snapshot.delta is not None else documents))
+                ids.append(snapshot.id)
+        write_ms = (time.perf_counter() - start) * 1000 / edits
+
+        with engine.connect() as conn:
+            stored = conn.exec_driver_sql(
+                "SELECT SUM(LENGTH(COALESCE(manual_report, '')) + LENGTH(COALESCE(full_report, '')) "
+                "+ LENGTH(COALESCE(ai_Competencies, '')) + LENGTH(COALESCE(delta, ''))) FROM snapshot"
+            ).scalar()
+
+        timings = {}
+        for cache_state in ("cold", "warm"):
+            if cache_state == "cold":
+                document_cache.clear()
+            start = time.perf_counter()
+            with Session(engine) as session:
+                for snapshot_id in ids[-20:]:
+                    load_documents(session, session.get(DBSnapshot, snapshot_id))
+            timings[cache_state] = (time.perf_counter() - start) * 1000 / 20
+
+        runs[label] = {
+            "stored_bytes": stored, "written_bytes_per_edit": written / edits, "write_ms": write_ms,
+            "read_ms_cold": timings["cold"], "read_ms_warm": timings["warm"]
+        }
+        print(f"{label:>6}: {stored:10d} bytes stored, {written / edits:9.0f} bytes written per edit, "
+              f"{write_ms:.2f} ms per write, reads {timings['cold']:.2f} ms cold / {timings['warm']:.2f} ms warm")
+
+    print(f"Storage reduction: {runs['full']['stored_bytes'] / runs['delta']['stored_bytes']:.1f}x")
+
+    return save_results("snapshot_delta", {
+        "config": {"edits": edits, "stakeholders": stakeholders, "quotes": quotes,
+                   "keyframe_interval": KEYFRAME_INTERVAL},
+        "runs": runs
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark delta-encoded snapshot storage against full copies.")
+    parser.add_argument("--edits", type=int, default=200, help="Number of auto snapshots after the first")
+    parser.add_argument("--stakeholders", type=int, default=10, help="Headings in the report")
+    parser.add_argument("--quotes", type=int, default=6, help="Quotes per heading")
+
+    args = parser.parse_args()
+
+    run_benchmark(args.edits, args.stakeholders, args.quotes)
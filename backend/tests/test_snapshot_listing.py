@@ -0,0 +1,172 @@
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timedelta
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+from sqlalchemy import create_engine, desc, event, select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+
+from db.models import Base, DBSnapshot, DBTask
+from db.snapshot_listing import decode_cursor, page_from_rows, snapshot_summaries_statement
+from tests.benchmark import print_header, save_results
+
+
+# SQLite has no JSONB; its JSON type stores the same documents
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+def make_report(headings=10, quotes=6):
+    evidence = {
+        f"Heading {h}": {"evidence": [{"feedback": f"Quote {h}.{q} " + "detail " * 12, "source": f"Stakeholder {q}",
+                                       "role": "Peer", "is_strong": False} for q in range(quotes)]}
+        for h in range(headings)
+    }
+    return {"editable": {"strengths": evidence}, "sorted_by": {"stakeholders": {}, "competency": evidence}}
+
+
+def build_database(snapshot_count, headings=10, quotes=6):
+    """Snapshots of one task; every third pair shares a created_at, so ties are broken by id."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    start = datetime(2025, 1, 1)
+    report = make_report(headings, quotes)
+    with Session(engine) as session:
+        session.add(DBTask(id=1, user_id="user", name="task", file_id="file-1", file_name="report.pdf"))
+        for i in range(1, snapshot_count + 1):
+            session.add(DBSnapshot(
+                id=i, task_id=1, created_at=start + timedelta(minutes=i - (i % 3 == 0)),
+                snapshot_name=f"Snapshot {i}", parent_id=i - 1 or None,
+                trigger_type="manual" if i % 4 == 0 else "auto",
+                manual_report={"selectedPath": None, **report}, full_report=report, ai_Competencies=report,
+            ))
+        session.commit()
+    return engine
+
+
+def summary(snapshot):
+    """The fields of SnapshotSummary in routers/snapshot.py"""
+    return {
+        "id": snapshot.id, "task_id": snapshot.task_id, "snapshot_name": snapshot.snapshot_name,
+        "created_at": snapshot.created_at.isoformat(), "parent_id": snapshot.parent_id,
+        "trigger_type": snapshot.trigger_type,
+    }
+
+
+def full_response(snapshot):
+    """The fields of SnapshotResponse in routers/snapshot.py"""
+    return {**summary(snapshot), "manual_report": snapshot.manual_report, "full_report": snapshot.full_report,
+            "ai_Competencies": snapshot.ai_Competencies}
+
+
+def all_pages(session, limit, trigger_type=None):
+    pages, cursor = [], None
+    while True:
+        rows = session.execute(snapshot_summaries_statement(1, trigger_type, limit, cursor)).scalars().all()
+        page, cursor = page_from_rows(rows, limit)
+        pages.append([snapshot.id for snapshot in page])
+        if cursor is None:
+            return pages
+
+
+def test_keyset_pages_cover_the_history_in_order():
+    engine = build_database(47)
+    with Session(engine) as session:
+        expected = session.execute(
+            select(DBSnapshot.id).filter(DBSnapshot.task_id == 1)
+            .order_by(desc(DBSnapshot.created_at), desc(DBSnapshot.id))
+        ).scalars().all()
+        pages = all_pages(session, 10)
+        assert [len(page) for page in pages] == [10, 10, 10, 10, 7]
+        assert [snapshot_id for page in pages for snapshot_id in page] == expected
+
+        manual = [snapshot_id for page in all_pages(session, 5, "manual") for snapshot_id in page]
+        assert manual == [snapshot_id for snapshot_id in expected if snapshot_id % 4 == 0]
+
+
+def test_summaries_leave_the_documents_in_the_database():
+    engine = build_database(5)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    with Session(engine) as session:
+        page = session.execute(snapshot_summaries_statement(1, limit=3)).scalars().all()
+        assert len(page) == 4
+        assert all(column not in statements[-1] for column in ("manual_report", "full_report", "ai_Competencies", "delta"))
+        try:
+            page[0].stored_full_report
+        except InvalidRequestError:
+            pass
+        else:
+            raise AssertionError("Expected the unloaded documents to raise")
+        assert len(statements) == 1
+
+
+def test_invalid_cursor_is_rejected():
+    for cursor in ("garbage", "2025-01-01T00:00:00_x"):
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"Expected ValueError for {cursor}")
+
+
+def run_benchmark(snapshot_count, page_size, repeats):
+    """Compare response size and latency of full history listings with metadata-only pages."""
+    print_header("SNAPSHOT LISTING BENCHMARK", f"{snapshot_count} snapshots, page size {page_size}, {repeats} repeats")
+
+    engine = build_database(snapshot_count)
+    listings = {
+        # What /history/{file_id} loads and returns
+        "full_history": lambda session: [
+            full_response(snapshot) for snapshot in session.execute(
+                select(DBSnapshot).filter(DBSnapshot.task_id == 1).order_by(desc(DBSnapshot.created_at))
+            ).scalars().all()
+        ],
+        "summaries_all": lambda session: [
+            summary(snapshot) for snapshot in page_from_rows(session.execute(
+                snapshot_summaries_statement(1, limit=snapshot_count)).scalars().all(), snapshot_count)[0]
+        ],
+        "summaries_page": lambda session: [
+            summary(snapshot) for snapshot in page_from_rows(session.execute(
+                snapshot_summaries_statement(1, limit=page_size)).scalars().all(), page_size)[0]
+        ],
+        # The body of one snapshot, fetched when it is opened
+        "body_on_demand": lambda session: full_response(session.get(DBSnapshot, snapshot_count // 2)),
+    }
+
+    listings_result = {}
+    for name, listing in listings.items():
+        elapsed = 0
+        for _ in range(repeats):
+            with Session(engine) as session:
+                start = time.perf_counter()
+                body = orjson.dumps(listing(session))
+                elapsed += time.perf_counter() - start
+        listings_result[name] = {"bytes": len(body), "ms": elapsed * 1000 / repeats}
+        print(f"{name:>15}: {len(body):10d} bytes, {elapsed * 1000 / repeats:8.2f} ms")
+
+    return save_results("snapshot_listing", {
+        "config": {"snapshots": snapshot_count, "page_size": page_size, "repeats": repeats},
+        "listings": listings_result
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark snapshot history listings with and without report bodies.")
+    parser.add_argument("--snapshots", type=int, default=200, help="Number of snapshots of the task")
+    parser.add_argument("--page-size", type=int, default=50, help="Snapshots per metadata page")
+    parser.add_argument("--repeats", type=int, default=5, help="Listings per measurement")
+
+    args = parser.parse_args()
+
+    run_benchmark(args.snapshots, args.page_size, args.repeats)
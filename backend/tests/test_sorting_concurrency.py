@@ -0,0 +1,113 @@
+import os
+import re
+import sys
+import time
+import asyncio
+import argparse
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from evidence_sorting import process_batches_parallel
+from tests.benchmark import print_header, save_results
+from tests.fake_llm import FakeAsyncAnthropic
+from utils.llm_gateway import llm_gateway
+
+HEADINGS = ["Strategic thinking", "Leadership", "Communication"]
+
+
+def sorted_evidence_responder(kwargs):
+    """Answer each sort call with one evidence item per heading for each stakeholder in the prompt."""
+    stakeholders = re.findall(r'"(Stakeholder \d+)": \{', kwargs["messages"][0]["content"])
+    return {
+        "headings": [
+            {
+                "heading": heading,
+                "evidence": [
+                    {"quote": f"Quote from {name} for {heading}", "name": name, "position": "Peer", "isStrong": False}
+                    for name in stakeholders
+                ]
+            }
+            for heading in HEADINGS
+        ]
+    }
+
+
+def make_stakeholders(count):
+    """Build synthetic stakeholder feedback for the sort engine."""
+    return {
+        f"Stakeholder {i}": {
+            "role": "Peer",
+            "feedback": [{"text": f"Feedback item {j} from stakeholder {i}", "is_strong": False} for j in range(5)]
+        }
+        for i in range(count)
+    }
+
+
+async def time_sort(batch_count, latency):
+    """Sort batch_count single-stakeholder batches against the fake backend and time it."""
+    fake = FakeAsyncAnthropic(latency=latency, responder=sorted_evidence_responder)
+    llm_gateway.client = fake
+    start = time.time()
+    result = await process_batches_parallel(make_stakeholders(batch_count), HEADINGS, batch_size=1, is_strengths=True)
+    elapsed = time.time() - start
+    return elapsed, fake, result
+
+
+def test_sort_batches_run_concurrently(gateway, batch_count=8, latency=0.05):
+    gateway.configure(max_concurrent=batch_count, max_calls_per_minute=10000)
+    elapsed, fake, result = asyncio.run(time_sort(batch_count, latency))
+    assert fake.calls == batch_count
+    assert fake.peak_active == batch_count
+    # Serial execution would take batch_count * latency
+    assert elapsed < 3 * latency
+    assert sum(len(item["evidence"]) for item in result) == batch_count * len(HEADINGS)
+
+
+def test_sort_batches_respect_global_limit(gateway, batch_count=8, latency=0.05, max_concurrent=2):
+    gateway.configure(max_concurrent=max_concurrent, max_calls_per_minute=10000)
+    elapsed, fake, _ = asyncio.run(time_sort(batch_count, latency))
+    assert fake.peak_active == max_concurrent
+    assert elapsed >= (batch_count / max_concurrent) * latency * 0.9
+
+
+async def run_benchmark(batch_counts, latency, max_concurrent):
+    """Measure sort wall time for increasing batch counts."""
+    print_header(
+        "SORTING CONCURRENCY BENCHMARK",
+        f"Fake LLM latency: {latency:.2f}s, gateway max concurrent calls: {max_concurrent}",
+    )
+
+    llm_gateway.configure(max_concurrent=max_concurrent, max_calls_per_minute=100000)
+    runs = []
+    for batch_count in batch_counts:
+        elapsed, fake, _ = await time_sort(batch_count, latency)
+        serial_time = batch_count * latency
+        speedup = serial_time / elapsed
+        print(f"{batch_count:>4} batches: {elapsed:.2f}s (serial {serial_time:.2f}s, speedup {speedup:.1f}x, peak concurrency {fake.peak_active})")
+        runs.append({
+            "batches": batch_count,
+            "elapsed": elapsed,
+            "serial_time": serial_time,
+            "speedup": speedup,
+            "peak_concurrency": fake.peak_active
+        })
+
+    return save_results("sorting_concurrency", {
+        "config": {
+            "latency": latency,
+            "max_concurrent_api_calls": max_concurrent
+        },
+        "runs": runs
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent evidence sorting against a fake LLM backend.")
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="Batch counts to measure")
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated seconds per LLM call")
+    parser.add_argument("--max-concurrent", type=int, default=16, help="Gateway concurrency limit")
+
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args.batches, args.latency, args.max_concurrent))
@@ -0,0 +1,145 @@
+import os
+import re
+import sys
+import json
+import asyncio
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from evidence_classifier import preclassify_evidence
+from evidence_sorting import (format_stream_event, process_batches_parallel, stream_batches_parallel,
+                              stream_sorted_evidence)
+from tests.fake_llm import FakeAsyncAnthropic
+
+HEADINGS = ["Strategic thinking.", "Team development.", "Additional areas."]
+
+# The first quote is assigned locally by the classifier, the vague ones are left to Claude
+FEEDBACK = [
+    "She needs to think more about the long term strategy and big picture vision",
+    "He could do more coaching and mentoring of his direct reports",
+    "He is nice",
+    "Great person to work with",
+    "Always on time",
+]
+
+
+def make_stakeholder_data(texts=FEEDBACK):
+    return {
+        f"Stakeholder {i}": {"role": "Peer", "feedback": [{"text": text, "is_strong": False}]}
+        for i, text in enumerate(texts)
+    }
+
+
+def echo_responder(kwargs):
+    """Put every stakeholder's feedback in the prompt under the fallback heading."""
+    prompt = kwargs["messages"][0]["content"]
+    return {
+        "headings": [{
+            "heading": "Additional areas.",
+            "evidence": [
+                {"quote": text, "name": name, "position": "Peer", "isStrong": False}
+                for name, text in re.findall(r'"(Stakeholder \d+)": \{\s*"role": "Peer",\s*"feedback": \[\s*\{\s*"text": "([^"]+)"', prompt)
+            ]
+        }]
+    }
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+def read_body(response):
+    """Read a streaming response's body the way the server would send it."""
+    async def read():
+        return "".join([chunk async for chunk in response.body_iterator])
+    return asyncio.run(read())
+
+
+def parse_sse(body):
+    events = []
+    for message in body.split("\n\n")[:-1]:
+        event_line, data_line = message.split("\n")
+        event = json.loads(data_line[len("data: "):])
+        assert event_line == f"event: {event['type']}"
+        events.append(event)
+    return events
+
+
+def parse_ndjson(body):
+    assert body.endswith("\n")
+    return [json.loads(line) for line in body.splitlines()]
+
+
+def test_events_are_framed_as_sse_or_ndjson():
+    event = {"type": "batch", "completed": 1, "total": 2, "headings": []}
+    assert format_stream_event(event, "sse") == f"event: batch\ndata: {json.dumps(event)}\n\n"
+    assert format_stream_event(event, "ndjson") == json.dumps(event) + "\n"
+
+
+def test_streamed_response_in_both_formats(gateway):
+    gateway.configure(max_concurrent=4, max_calls_per_minute=10000)
+    gateway.client = FakeAsyncAnthropic(latency=0, responder=echo_responder)
+    stakeholder_data = make_stakeholder_data()
+
+    sse = stream_sorted_evidence(stakeholder_data, HEADINGS, True, "sse")
+    ndjson = stream_sorted_evidence(stakeholder_data, HEADINGS, True, "ndjson")
+
+    assert sse.media_type == "text/event-stream" and ndjson.media_type == "application/x-ndjson"
+    sse_events, ndjson_events = parse_sse(read_body(sse)), parse_ndjson(read_body(ndjson))
+    assert [event["type"] for event in sse_events] == [event["type"] for event in ndjson_events]
+    assert sse_events[-1] == ndjson_events[-1] and sse_events[-1]["type"] == "complete"
+
+
+def test_event_order_and_complete_result(gateway, batch_size=1):
+    # One call at a time, so batches complete in order and both paths merge the same way
+    gateway.configure(max_concurrent=1, max_calls_per_minute=10000)
+    gateway.client = FakeAsyncAnthropic(latency=0, responder=echo_responder)
+    stakeholder_data = make_stakeholder_data()
+
+    events = asyncio.run(collect(stream_batches_parallel(stakeholder_data, HEADINGS, batch_size=batch_size,
+                                                         preclassify=True)))
+    expected = asyncio.run(process_batches_parallel(stakeholder_data, HEADINGS, batch_size=batch_size,
+                                                    preclassify=True))
+
+    # Locally assigned evidence first, then one event per batch, then the merged result
+    local_result, remaining = preclassify_evidence(stakeholder_data, HEADINGS)
+    batches = len(remaining)
+    assert local_result and batches
+    assert [event["type"] for event in events] == ["batch"] * (batches + 1) + ["complete"]
+    assert [event["completed"] for event in events[:-1]] == list(range(batches + 1))
+    assert all(event["total"] == batches for event in events[:-1])
+    assert [item["heading"] for item in events[0]["headings"]] == [item["heading"] for item in local_result]
+    assert events[-1]["result"] == expected
+
+
+def test_failed_batch_ends_the_stream_with_an_error_event(gateway):
+    gateway.configure(max_concurrent=4, max_calls_per_minute=10000)
+    gateway.client = FakeAsyncAnthropic(latency=0, responder=lambda kwargs: {"headings": "Additional areas."})
+
+    events = parse_ndjson(read_body(stream_sorted_evidence(make_stakeholder_data(), HEADINGS, True, "ndjson")))
+
+    assert events == [{"type": "error", "detail": "AI response did not match the sorted evidence schema"}]
+
+
+def test_client_disconnect_cancels_pending_batches(gateway, latency=0.05):
+    gateway.configure(max_concurrent=1, max_calls_per_minute=10000)
+    answered = []
+    gateway.client = FakeAsyncAnthropic(latency=latency, responder=lambda kwargs: answered.append(1) or echo_responder(kwargs))
+    # Quotes long enough that each stakeholder is planned into a batch of its own
+    stakeholder_data = make_stakeholder_data([text.ljust(4000, ".") for text in FEEDBACK[2:]])
+    response = stream_sorted_evidence(stakeholder_data, HEADINGS, True, "ndjson")
+
+    async def disconnect_after_first_event():
+        first = await response.body_iterator.__anext__()
+        # The server closes the body iterator when the client goes away
+        await response.body_iterator.aclose()
+        await asyncio.sleep(3 * latency)
+        pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        return json.loads(first), pending
+
+    first, pending = asyncio.run(disconnect_after_first_event())
+
+    assert first["type"] == "batch" and first["completed"] == 1
+    assert pending == []
+    assert len(answered) == 1
@@ -0,0 +1,94 @@
+import os
+import sys
+import asyncio
+from types import SimpleNamespace
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.structured_output import (Headings, StructuredOutputError, TruncatedOutputError, UpdatedReport,
+                                     async_create_structured, create_structured, tool_from_model)
+
+
+def tool_response(tool_input, stop_reason="tool_use"):
+    block = SimpleNamespace(type="tool_use", name="record_headings", input=tool_input)
+    return SimpleNamespace(content=[block], stop_reason=stop_reason)
+
+
+def text_response(text, stop_reason="end_turn"):
+    return SimpleNamespace(content=[SimpleNamespace(type="text", text=text)], stop_reason=stop_reason)
+
+
+class ScriptedMessages:
+    """Answers each call with the next scripted response and records the call arguments."""
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(dict(kwargs))
+        return self.responses.pop(0)
+
+
+class AsyncScriptedMessages(ScriptedMessages):
+    async def create(self, **kwargs):
+        return ScriptedMessages.create(self, **kwargs)
+
+
+def scripted_client(*responses, is_async=False):
+    messages = (AsyncScriptedMessages if is_async else ScriptedMessages)(responses)
+    return SimpleNamespace(messages=messages)
+
+
+def call(client, is_async, max_tokens=1000):
+    kwargs = dict(model="model", max_tokens=max_tokens, messages=[{"role": "user", "content": "Headings?"}])
+    if is_async:
+        return asyncio.run(async_create_structured(client, Headings, "record_headings", "The headings", **kwargs))
+    return create_structured(client, Headings, "record_headings", "The headings", **kwargs)
+
+
+def expect_error(error_type, client, is_async, **kwargs):
+    try:
+        call(client, is_async, **kwargs)
+    except error_type as e:
+        return e
+    raise AssertionError(f"Expected {error_type.__name__}")
+
+
+def test_tool_is_forced_and_input_validated():
+    for is_async in (False, True):
+        client = scripted_client(tool_response({"headings": ["Drive", "Judgement"]}), is_async=is_async)
+        assert call(client, is_async).headings == ["Drive", "Judgement"]
+        sent = client.messages.calls[0]
+        assert sent["tools"] == [tool_from_model(Headings, "record_headings", "The headings")]
+        assert sent["tool_choice"] == {"type": "tool", "name": "record_headings"}
+
+
+def test_truncated_output_raises_without_resending():
+    for is_async in (False, True):
+        client = scripted_client(tool_response({"headings": ["Dri"]}, "max_tokens"),
+                                 tool_response({"headings": ["Drive"]}), is_async=is_async)
+        error = expect_error(TruncatedOutputError, client, is_async, max_tokens=1000)
+        assert "max_tokens=1000" in str(error)
+        # Callers split their input instead of paying for the same request again
+        assert len(client.messages.calls) == 1
+
+
+def test_missing_tool_call_raises():
+    for is_async in (False, True):
+        error = expect_error(StructuredOutputError, scripted_client(text_response("No tool"), is_async=is_async), is_async)
+        assert not isinstance(error, TruncatedOutputError)
+        assert "No 'record_headings' tool call" in str(error)
+
+
+def test_schema_mismatch_raises():
+    for is_async in (False, True):
+        for tool_input in ({}, {"headings": "Drive"}, {"headings": [{"name": "Drive"}]}):
+            error = expect_error(StructuredOutputError, scripted_client(tool_response(tool_input), is_async=is_async), is_async)
+            assert "does not match schema" in str(error)
+
+
+def test_updated_report_keeps_the_context_summary_among_next_steps():
+    next_steps = [{"main": "Discuss the report", "sub_points": ["Strengths", "Areas"]}, "Context summary paragraph"]
+    report = UpdatedReport.model_validate({"name": "Ann Lee", "date": "June 2024", "next_steps": next_steps})
+    assert report.model_dump()["next_steps"] == next_steps
@@ -0,0 +1,183 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from db.models import Base, DBAdvice, DBFeedBack, DBTask
+from db.sub_documents import (feedback_category, feedback_category_statement, feedback_file_ids_statement,
+                              advice_file_ids_statement, stakeholder_advice_statement,
+                              stakeholder_feedback_statement)
+from tests.benchmark import print_header, save_results
+
+
+# SQLite has no JSONB; its JSON type and -> operator handle the same documents
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+def make_feedback(stakeholders, quotes):
+    """A feedback document shaped like the one routers/feedback.py saves."""
+    return {
+        category: {
+            f"Stakeholder {n}": {
+                "role": "Peer" if n % 2 else "Direct Report",
+                "feedback": [
+                    {"text": f"{category} quote {q} from stakeholder {n}, " + "with some detail " * 8, "is_strong": q % 3 == 0}
+                    for q in range(quotes)
+                ]
+            }
+            for n in range(stakeholders)
+        }
+        for category in ("strengths", "areas_to_target")
+    }
+
+
+def make_advice(stakeholders):
+    return {
+        f"Stakeholder {n}": {"role": "Peer", "advice": [f"Advice {a} from stakeholder {n}" for a in range(4)]}
+        for n in range(stakeholders)
+    }
+
+
+def build_database(task_count=2, stakeholders=5, quotes=4):
+    """SQLite database with feedback and advice documents; the GIN indexes are Postgres-only."""
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            conn.execute(CreateTable(table))
+    with Session(engine) as session:
+        for i in range(1, task_count + 1):
+            session.add(DBTask(id=i, user_id="user", name=f"task {i}", file_id=f"file-{i}", file_name=f"report_{i}.pdf"))
+            session.add(DBFeedBack(task_id=i, feedback=make_feedback(stakeholders, quotes)))
+            session.add(DBAdvice(task_id=i, advice=make_advice(stakeholders)))
+        # A task whose feedback isn't generated yet
+        session.add(DBTask(id=task_count + 1, user_id="user", name="new", file_id="file-new", file_name="new.pdf"))
+        session.commit()
+    return engine
+
+
+def test_category_is_extracted_server_side():
+    engine = build_database()
+    with Session(engine) as session:
+        task_id, feedback_id, strengths = session.execute(feedback_category_statement("user", "file-1", "strengths")).first()
+        assert strengths == make_feedback(5, 4)["strengths"]
+        assert (task_id, feedback_id) == (1, 1)
+
+        # Without feedback the feedback id is None; an unknown task has no row
+        assert session.execute(feedback_category_statement("user", "file-new", "strengths")).first()[1:] == (None, None)
+        assert session.execute(feedback_category_statement("user", "missing", "strengths")).first() is None
+
+
+def test_stakeholder_entries_are_extracted_server_side():
+    engine = build_database()
+    with Session(engine) as session:
+        row = session.execute(stakeholder_feedback_statement("user", "file-2", "Stakeholder 3")).first()
+        feedback = make_feedback(5, 4)
+        assert row[2:] == (feedback["strengths"]["Stakeholder 3"], feedback["areas_to_target"]["Stakeholder 3"])
+        assert session.execute(stakeholder_feedback_statement("user", "file-2", "Nobody")).first()[2:] == (None, None)
+
+        row = session.execute(stakeholder_advice_statement("user", "file-1", "Stakeholder 0")).first()
+        assert row[2] == make_advice(5)["Stakeholder 0"]
+
+
+def test_unknown_category_is_rejected():
+    try:
+        feedback_category("opportunities")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Expected ValueError")
+
+
+def test_stakeholder_searches_use_the_gin_index_expressions():
+    indexed = {
+        str(CreateIndex(index).compile(dialect=postgresql.dialect())).split(" USING gin ")[1]
+        for model in (DBFeedBack, DBAdvice) for index in model.__table__.indexes
+        if index.dialect_options["postgresql"]["using"] == "gin"
+    }
+    assert indexed == {"((feedback -> 'strengths'))", "((feedback -> 'areas_to_target'))", "(advice)"}
+
+    feedback_sql = str(feedback_file_ids_statement("user", "Stakeholder 1").compile(dialect=postgresql.dialect()))
+    assert "(feedback.feedback -> 'strengths') ?" in feedback_sql
+    assert "(feedback.feedback -> 'areas_to_target') ?" in feedback_sql
+    advice_sql = str(advice_file_ids_statement("user", "Stakeholder 1").compile(dialect=postgresql.dialect()))
+    assert "advice.advice ?" in advice_sql
+
+
+def test_migration_matches_model_gin_indexes():
+    migration_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic", "versions")
+    with open(os.path.join(migration_dir, "e3a7c1f05b92_feedback_and_advice_jsonb.py")) as f:
+        source = f.read()
+    namespace = {}
+    exec(source.split("\n\ndef upgrade")[0], namespace)
+    migrated = {(name, table) for name, table, _ in namespace["GIN_INDEXES"]}
+    declared = {
+        (index.name, model.__tablename__)
+        for model in (DBFeedBack, DBAdvice) for index in model.__table__.indexes
+        if index.dialect_options["postgresql"]["using"] == "gin"
+    }
+    assert migrated == declared
+    assert {column for _, column in namespace["COLUMNS"]} == {"feedback", "advice"}
+    assert all(isinstance(model.__table__.c[column].type, JSONB) for model, column in ((DBFeedBack, "feedback"), (DBAdvice, "advice")))
+
+
+def fetched_bytes(session, statement):
+    row = session.execute(statement).first()
+    return len(json.dumps([value for value in row if not isinstance(value, int)]))
+
+
+def run_benchmark(stakeholders, quotes, repeats):
+    """Compare bytes fetched and time for whole documents and server-side sub-documents."""
+    print_header(
+        "SUB-DOCUMENT BENCHMARK",
+        f"{stakeholders} stakeholders, {quotes} quotes per category, {repeats} fetches per query",
+    )
+
+    engine = build_database(task_count=1, stakeholders=stakeholders, quotes=quotes)
+    stakeholder = f"Stakeholder {stakeholders // 2}"
+    queries = {
+        "whole_feedback": select(DBFeedBack.feedback).filter(DBFeedBack.task_id == 1),
+        "strengths_category": feedback_category_statement("user", "file-1", "strengths"),
+        "stakeholder_feedback": stakeholder_feedback_statement("user", "file-1", stakeholder),
+        "whole_advice": select(DBAdvice.advice).filter(DBAdvice.task_id == 1),
+        "stakeholder_advice": stakeholder_advice_statement("user", "file-1", stakeholder),
+    }
+
+    queries_result = {}
+    with Session(engine) as session:
+        for name, statement in queries.items():
+            size = fetched_bytes(session, statement)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                session.execute(statement).first()
+            elapsed_ms = (time.perf_counter() - start) * 1000 / repeats
+            queries_result[name] = {"bytes": size, "ms": elapsed_ms}
+            print(f"{name:>22}: {size:8d} bytes, {elapsed_ms:.3f} ms")
+
+    return save_results("sub_documents", {
+        "config": {"stakeholders": stakeholders, "quotes": quotes, "repeats": repeats},
+        "queries": queries_result
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark fetching feedback and advice sub-documents server-side.")
+    parser.add_argument("--stakeholders", type=int, default=15, help="Stakeholders per document")
+    parser.add_argument("--quotes", type=int, default=8, help="Quotes per stakeholder and category")
+    parser.add_argument("--repeats", type=int, default=200, help="Fetches per query")
+
+    args = parser.parse_args()
+
+    run_benchmark(args.stakeholders, args.quotes, args.repeats)
@@ -0,0 +1,157 @@
+import os
+import sys
+import time
+import argparse
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+
+from db.models import Base, DBAdvice, DBFeedBack, DBProcessedAssessment, DBSnapshot, DBTask
+from db.task_lookup import get_task, get_task_with, remembered_task
+from tests.benchmark import print_header, save_results
+
+
+# SQLite has no JSONB; its JSON type stores the same documents
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+def build_database(task_count=3):
+    """SQLite database with tasks owning a feedback, an advice, an assessment and a current snapshot."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        for i in range(1, task_count + 1):
+            task = DBTask(id=i, user_id="user", name=f"task {i}", file_id=f"file-{i}", file_name=f"report_{i}.pdf")
+            session.add(task)
+            session.flush()
+            session.add_all([
+                DBFeedBack(task_id=i, feedback={"version": 1}),
+                DBFeedBack(task_id=i, feedback={"version": 2}),
+                DBAdvice(task_id=i, advice={"task": i}),
+                DBProcessedAssessment(task_id=i, filtered_data=f"filtered {i}"),
+            ])
+            snapshot = DBSnapshot(task_id=i, manual_report={}, full_report={}, ai_Competencies={})
+            session.add(snapshot)
+            session.flush()
+            task.current_snapshot_id = snapshot.id
+        session.commit()
+    return engine
+
+
+def count_statements(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def legacy_fetch(user_id, file_id, model, session):
+    """Task lookup followed by a query for its row, as the getters did before."""
+    task = session.execute(
+        select(DBTask).filter(DBTask.file_id == file_id, DBTask.user_id == user_id)
+    ).scalars().first()
+    if model is DBSnapshot:
+        return task, session.execute(select(DBSnapshot).filter(DBSnapshot.id == task.current_snapshot_id)).scalars().first()
+    return task, session.execute(select(model).filter(model.task_id == task.id)).scalars().first()
+
+
+def test_task_and_related_row_in_one_query():
+    engine = build_database()
+    statements = count_statements(engine)
+    with Session(engine) as session:
+        task, feedback = get_task_with("user", "file-2", "feedback", session)
+        assert task.id == 2 and feedback.feedback == {"version": 2}
+        assert len(statements) == 1
+
+        task, snapshot = get_task_with("user", "file-3", "current_snapshot", session)
+        assert snapshot.id == task.current_snapshot_id
+        task, assessment = get_task_with("user", "file-1", "processed_assessment", session)
+        assert assessment.filtered_data == "filtered 1"
+        assert len(statements) == 3
+
+
+def test_missing_task_and_missing_row():
+    engine = build_database()
+    with Session(engine) as session:
+        assert get_task_with("user", "file-9", "advice", session) == (None, None)
+        assert get_task_with("other", "file-1", "advice", session) == (None, None)
+        session.add(DBTask(id=9, user_id="user", name="new", file_id="file-9", file_name="new.pdf"))
+        session.commit()
+        task, advice = get_task_with("user", "file-9", "advice", session)
+        assert task.id == 9 and advice is None
+
+
+def test_task_is_remembered_for_the_session():
+    engine = build_database()
+    statements = count_statements(engine)
+    with Session(engine) as session:
+        task = get_task("user", "file-1", session)
+        assert get_task("user", "file-1", session) is task
+        assert len(statements) == 1
+
+        # The task is known, so only the related row is queried
+        same_task, advice = get_task_with("user", "file-1", "advice", session)
+        assert same_task is task and advice.advice == {"task": 1}
+        assert len(statements) == 2
+
+    with Session(engine) as session:
+        assert remembered_task(session, "user", "file-1") is None
+
+
+def test_rollback_forgets_remembered_tasks():
+    engine = build_database()
+    with Session(engine) as session:
+        get_task("user", "file-1", session)
+        session.rollback()
+        assert remembered_task(session, "user", "file-1") is None
+
+
+def run_benchmark(task_count, repeats):
+    """Compare round trips and time of the legacy two-query fetches with the joined fetches."""
+    print_header("TASK LOOKUP BENCHMARK", f"{task_count} synthetic tasks, {repeats} fetches per approach")
+
+    engine = build_database(task_count)
+    statements = count_statements(engine)
+    related = {"feedback": DBFeedBack, "advice": DBAdvice,
+               "processed_assessment": DBProcessedAssessment, "current_snapshot": DBSnapshot}
+
+    runs = {}
+    for label in ("legacy", "joined", "joined_same_request"):
+        statements.clear()
+        start = time.perf_counter()
+        with Session(engine) as session:
+            for i in range(repeats):
+                file_id = f"file-{i % task_count + 1}"
+                for name, model in related.items():
+                    if label == "legacy":
+                        legacy_fetch("user", file_id, model, session)
+                    else:
+                        get_task_with("user", file_id, name, session)
+                if label != "joined_same_request":
+                    session.info.clear()
+                    session.expunge_all()
+        elapsed = time.perf_counter() - start
+        fetches = repeats * len(related)
+        runs[label] = {"queries_per_fetch": len(statements) / fetches, "ms_per_fetch": elapsed * 1000 / fetches}
+        print(f"{label:>20}: {runs[label]['queries_per_fetch']:.2f} queries, {runs[label]['ms_per_fetch']:.3f} ms per fetch")
+
+    return save_results("task_lookup", {
+        "config": {"tasks": task_count, "repeats": repeats},
+        "runs": runs
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark task lookups with their feedback, advice, assessment and snapshot.")
+    parser.add_argument("--tasks", type=int, default=1000, help="Number of synthetic tasks")
+    parser.add_argument("--repeats", type=int, default=500, help="Fetches per related row type")
+
+    args = parser.parse_args()
+
+    run_benchmark(args.tasks, args.repeats)
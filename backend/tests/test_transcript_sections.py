@@ -0,0 +1,76 @@
+import os
+import sys
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.transcript_sections import (MAX_SECTION_HEADER_LENGTH, find_section_header, get_stakeholder_section,
+                                       locate_stakeholder_sections)
+
+TRANSCRIPT = """Carlyle - Ian Fujiyama - US Buyout Q360 2024
+Coach: Mike
+Matt Savino interview, 20 June 2024
+Context: worked together for ten years.
+Mark Marengo is great
+I think Mark Marengo interviewed him for the role years ago.
+Mark Marengo and I both saw how he built the team, and how he brought the whole deal team along with him when the market turned.
+- Mark Marengo (MD, JP Morgan) interview
+Worked with him for over 20 years.
+Ann Leeds interview, 14 June 2024
+Would like to see more delegation.
+"""
+
+
+def make_stakeholders(*names):
+    return [{"name": name, "role": ""} for name in names]
+
+
+def header_offset(line):
+    return TRANSCRIPT.index(line)
+
+
+def test_sections_run_from_each_header_to_the_next():
+    stakeholders = locate_stakeholder_sections(make_stakeholders("Matt Savino", "Mark Marengo", "Ann Leeds"), TRANSCRIPT)
+    starts = [header_offset("Matt Savino interview"), header_offset("- Mark Marengo"), header_offset("Ann Leeds interview")]
+    assert [s["section_start"] for s in stakeholders] == starts
+    assert [s["section_end"] for s in stakeholders] == starts[1:] + [len(TRANSCRIPT)]
+    assert get_stakeholder_section(stakeholders[1], TRANSCRIPT, margin=0).startswith("- Mark Marengo (MD, JP Morgan) interview")
+
+
+def test_header_false_positives():
+    # A one-line comment, a mid-sentence mention and a long line starting with the name are not his header
+    assert find_section_header("Mark Marengo", TRANSCRIPT) == header_offset("- Mark Marengo")
+    long_line = "Mark Marengo " + "x" * MAX_SECTION_HEADER_LENGTH
+    assert find_section_header("Mark Marengo", f"Notes\n{long_line}\n") is None
+    assert find_section_header("Mark Marengo", "He said Mark Marengo was right.\n") is None
+    # A name is not matched inside a longer name
+    assert find_section_header("Ann Lee", TRANSCRIPT) is None
+    # Case and spacing of the name may differ
+    assert find_section_header("matt  savino", TRANSCRIPT) == header_offset("Matt Savino interview")
+
+
+def test_stakeholder_without_a_header_uses_the_full_transcript():
+    stakeholders = locate_stakeholder_sections(make_stakeholders("Matt Savino", "Doug Brandely", "Ann Leeds"), TRANSCRIPT)
+    assert "section_start" not in stakeholders[1]
+    assert get_stakeholder_section(stakeholders[1], TRANSCRIPT) == TRANSCRIPT
+    # The section of the stakeholder before him runs to the next located header
+    assert stakeholders[0]["section_end"] == header_offset("Ann Leeds interview")
+
+
+def test_falls_back_to_the_full_transcript_without_boundaries():
+    # A single header gives nothing to slice on
+    stakeholders = locate_stakeholder_sections(make_stakeholders("Matt Savino", "Doug Brandely", "Unknown", ""), TRANSCRIPT)
+    assert all("section_start" not in stakeholder for stakeholder in stakeholders)
+    assert all(get_stakeholder_section(stakeholder, TRANSCRIPT) == TRANSCRIPT for stakeholder in stakeholders)
+
+    # Stakeholders sharing one header give a single boundary too
+    stakeholders = locate_stakeholder_sections(make_stakeholders("Matt Savino", "matt savino"), TRANSCRIPT)
+    assert all("section_start" not in stakeholder for stakeholder in stakeholders)
+
+
+def test_section_margin_is_clamped_to_the_transcript():
+    stakeholders = locate_stakeholder_sections(make_stakeholders("Matt Savino", "Ann Leeds"), TRANSCRIPT)
+    first, last = stakeholders
+    assert get_stakeholder_section(first, TRANSCRIPT, margin=10000) == TRANSCRIPT
+    section = get_stakeholder_section(last, TRANSCRIPT, margin=5)
+    assert section == TRANSCRIPT[last["section_start"] - 5:]
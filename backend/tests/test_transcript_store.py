@@ -0,0 +1,104 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcript_store import TranscriptStore, read_text
+from tests.benchmark import print_header, save_results
+
+
+def write_transcript(save_dir, file_id, kind, text):
+    with open(os.path.join(save_dir, f"{kind}_{file_id}.txt"), "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_reads_files_through_cache_until_invalidated():
+    with tempfile.TemporaryDirectory() as save_dir:
+        store = TranscriptStore(save_dir)
+        write_transcript(save_dir, "abc", "filtered", "Peer: décisive and clear.\n")
+        assert store.get("abc") == "Peer: décisive and clear.\n"
+
+        # Served from memory even after the file changes
+        write_transcript(save_dir, "abc", "filtered", "Reprocessed")
+        assert store.get("abc") == "Peer: décisive and clear.\n"
+        assert (store.hits, store.misses) == (1, 1)
+
+        store.invalidate("abc")
+        assert store.get("abc") == "Reprocessed"
+        assert store.get("abc", "executive") is None
+
+
+def test_empty_file_and_missing_file():
+    with tempfile.TemporaryDirectory() as save_dir:
+        write_transcript(save_dir, "abc", "executive", "")
+        assert read_text(os.path.join(save_dir, "executive_abc.txt")) == ""
+        assert read_text(os.path.join(save_dir, "missing.txt")) is None
+
+
+def test_cache_is_bounded_by_size():
+    with tempfile.TemporaryDirectory() as save_dir:
+        store = TranscriptStore(save_dir, max_bytes=25)
+        store.put("a", "filtered", "x" * 10)
+        store.put("b", "filtered", "y" * 10)
+        store.put("c", "filtered", "z" * 10)
+        assert store.size == 20
+        # The least recently used transcript was evicted and isn't on disk either
+        assert store.get("a") is None
+        assert store.get("c") == "z" * 10
+        # Transcripts larger than the budget are never cached
+        store.put("d", "filtered", "w" * 30)
+        assert store.size == 20
+
+
+def test_async_get_falls_back_to_file_without_session():
+    with tempfile.TemporaryDirectory() as save_dir:
+        store = TranscriptStore(save_dir)
+        write_transcript(save_dir, "abc", "filtered", "From file")
+        assert asyncio.run(store.async_get("abc", "filtered")) == "From file"
+        assert asyncio.run(store.async_get("abc", "filtered")) == "From file"
+        assert store.hits == 1
+
+
+def run_benchmark(transcript_chars, reads):
+    """Compare repeated transcript reads with open().read() against the transcript store."""
+    print_header("TRANSCRIPT STORE BENCHMARK", f"Transcript: {transcript_chars} characters, {reads} reads")
+
+    with tempfile.TemporaryDirectory() as save_dir:
+        write_transcript(save_dir, "bench", "filtered", "Peer: clear direction.\n" * (transcript_chars // 23))
+        path = os.path.join(save_dir, "filtered_bench.txt")
+
+        start = time.time()
+        for _ in range(reads):
+            with open(path, "r") as f:
+                f.read()
+        open_time = time.time() - start
+
+        store = TranscriptStore(save_dir)
+        start = time.time()
+        for _ in range(reads):
+            store.get("bench")
+        store_time = time.time() - start
+
+    print(f"open().read(): {open_time * 1000:.1f} ms")
+    print(f"Transcript store: {store_time * 1000:.1f} ms ({store.hits} hits, {store.misses} misses)")
+
+    return save_results("transcript_store", {
+        "config": {"transcript_chars": transcript_chars, "reads": reads},
+        "open_read_ms": open_time * 1000,
+        "store_ms": store_time * 1000
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark transcript reads through the transcript store.")
+    parser.add_argument("--transcript-chars", type=int, default=200000, help="Size of the synthetic transcript")
+    parser.add_argument("--reads", type=int, default=1000, help="Number of reads")
+
+    args = parser.parse_args()
+
+    run_benchmark(args.transcript_chars, args.reads)
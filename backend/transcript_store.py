@@ -0,0 +1,172 @@
+"""
+Transcript repository for processed assessments.
+
+Every endpoint that needs a processed transcript goes through one store instead of
+re-reading filtered_{file_id}.txt / executive_{file_id}.txt or re-querying
+DBProcessedAssessment on each call. Decoded transcripts are kept in an LRU bounded
+by their total size in bytes.
+Ingest and task deletion call invalidate() so a reprocessed or deleted task is
+never served from the cache.
+"""
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from db.models import DBProcessedAssessment
+from dir_config import SAVE_DIR
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from utils.loggers.db_logger import logger as dbLogger
+
+# Total size of the decoded transcripts kept in memory
+MAX_CACHED_TRANSCRIPT_BYTES = 64 * 1024 * 1024
+
+# Transcript kinds, their file name prefix and DBProcessedAssessment column
+TRANSCRIPT_KINDS = {
+    "filtered": "filtered_data",
+    "executive": "executive_data",
+    "cover": "cover_text",
+}
+
+
+def read_text(path: str) -> Optional[str]:
+    """
+    Read a UTF-8 text file.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        The decoded text, or None if the file doesn't exist
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+class TranscriptStore:
+    """Size-bounded LRU of decoded transcripts, backed by the database and SAVE_DIR"""
+
+    def __init__(self, save_dir: str = SAVE_DIR, max_bytes: int = MAX_CACHED_TRANSCRIPT_BYTES):
+        self.save_dir = save_dir
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, int]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, file_id: str, kind: str = "filtered") -> str:
+        """Path of the file-backed copy of a transcript"""
+        if kind not in TRANSCRIPT_KINDS:
+            raise ValueError(f"Unknown transcript kind: {kind}")
+        return os.path.join(self.save_dir, f"{kind}_{file_id}.txt")
+
+    def _get_cached(self, key: Tuple[str, str]) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, file_id: str, kind: str, text: str) -> None:
+        """Cache a transcript; transcripts larger than the whole budget are not cached."""
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        key = (file_id, kind)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._entries[key] = (text, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def invalidate(self, file_id: str) -> None:
+        """Drop every cached transcript of a file, e.g. when its task is reprocessed or deleted."""
+        with self._lock:
+            for kind in TRANSCRIPT_KINDS:
+                entry = self._entries.pop((file_id, kind), None)
+                if entry is not None:
+                    self._size -= entry[1]
+        dbLogger.debug(f"Invalidated cached transcripts for file_id: {file_id}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    @property
+    def size(self) -> int:
+        """Total size in bytes of the cached transcripts"""
+        return self._size
+
+    def get(self, file_id: str, kind: str = "filtered") -> Optional[str]:
+        """
+        Get a transcript from the cache or its file in SAVE_DIR.
+
+        Args:
+            file_id: The file ID of the assessment
+            kind: "filtered", "executive" or "cover"
+
+        Returns:
+            The transcript, or None if it hasn't been generated
+        """
+        key = (file_id, kind)
+        text = self._get_cached(key)
+        if text is not None:
+            return text
+        text = read_text(self.path(file_id, kind))
+        if text is not None:
+            self.put(file_id, kind, text)
+        return text
+
+    async def async_get(self, file_id: str, kind: str = "filtered", task_id: Optional[int] = None,
+                        session: Optional[AsyncSession] = None) -> Optional[str]:
+        """
+        Get a transcript from the cache, the processed assessment or its file in SAVE_DIR.
+
+        The processed assessment is only queried when a task_id and session are given;
+        file reads run in a worker thread.
+
+        Args:
+            file_id: The file ID of the assessment
+            kind: "filtered", "executive" or "cover"
+            task_id: ID of the task whose processed assessment holds the transcript
+            session: Async database session
+
+        Returns:
+            The transcript, or None if it hasn't been generated
+        """
+        key = (file_id, kind)
+        text = self._get_cached(key)
+        if text is not None:
+            return text
+
+        if task_id is not None and session is not None:
+            column = getattr(DBProcessedAssessment, TRANSCRIPT_KINDS[kind])
+            stmt = select(column).filter(DBProcessedAssessment.task_id == task_id).order_by(DBProcessedAssessment.id.desc())
+            result = await session.execute(stmt)
+            text = result.scalars().first()
+            if text:
+                dbLogger.debug(f"[ASYNC] Loaded {kind} transcript from processed assessment for task_id: {task_id}")
+
+        if not text:
+            text = await asyncio.to_thread(read_text, self.path(file_id, kind))
+
+        if text is not None:
+            self.put(file_id, kind, text)
+        return text
+
+
+transcript_store = TranscriptStore()
@@ -0,0 +1,214 @@
+"""
+Token-aware batch planning for LLM calls that process stakeholders in batches.
+
+Stakeholders are packed into as few calls as possible while keeping both the
+estimated prompt size and the estimated response size under the call limits,
+so that responses are not truncated at max_tokens.
+"""
+import json
+import math
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.loggers.feedback_logger import feedbackLogger
+from utils.transcript_sections import TRANSCRIPT_SECTION_MARGIN, section_range
+
+# Rough characters-per-token ratio used for token estimates
+CHARS_PER_TOKEN = 4
+
+# Fraction of max_tokens a planned batch may fill, leaving room for estimation error
+OUTPUT_SAFETY_RATIO = 0.8
+
+# Largest prompt a planned batch may produce
+MAX_INPUT_TOKENS = 100000
+
+# Estimated response tokens per feedback item on top of its text (keys, name, role, flags)
+ITEM_OUTPUT_OVERHEAD_TOKENS = 35
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of tokens in a piece of text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def estimate_feedback_output_tokens(feedback_items: List[Any]) -> int:
+    """
+    Estimate the response tokens needed to echo a stakeholder's feedback items back.
+
+    Args:
+        feedback_items: List of feedback items (dicts with "text" or plain strings)
+
+    Returns:
+        The estimated number of output tokens
+    """
+    total = 0
+    for item in feedback_items:
+        text = item.get("text", "") if isinstance(item, dict) else str(item)
+        total += estimate_tokens(text) + ITEM_OUTPUT_OVERHEAD_TOKENS
+    return total
+
+
+def plan_token_batches(
+    items: List[Any],
+    input_cost: Callable[[Any], int],
+    output_cost: Callable[[Any], int],
+    max_output_tokens: int,
+    base_input_tokens: int = 0,
+    base_output_tokens: int = 0,
+    max_input_tokens: int = MAX_INPUT_TOKENS,
+) -> List[List[Any]]:
+    """
+    Pack items into batches using first-fit decreasing bin packing.
+
+    Items are placed largest first into the first batch that still has room for
+    both their estimated input and output tokens. An item that does not fit in
+    an empty batch gets a batch of its own.
+
+    Args:
+        items: Items to batch (e.g. stakeholder feedback dictionaries)
+        input_cost: Function returning the estimated prompt tokens of an item
+        output_cost: Function returning the estimated response tokens of an item
+        max_output_tokens: The max_tokens limit of the call
+        base_input_tokens: Prompt tokens shared by every call (template, headings)
+        base_output_tokens: Response tokens shared by every call (JSON skeleton)
+        max_input_tokens: Largest prompt a batch may produce
+
+    Returns:
+        A list of batches, each a list of items in their original order
+    """
+    output_budget = int(max_output_tokens * OUTPUT_SAFETY_RATIO) - base_output_tokens
+    input_budget = max_input_tokens - base_input_tokens
+
+    costs = [(index, input_cost(item), output_cost(item)) for index, item in enumerate(items)]
+    costs.sort(key=lambda cost: cost[2], reverse=True)
+
+    bins: List[Tuple[List[int], int, int]] = []
+    for index, item_input, item_output in costs:
+        for i, (members, used_input, used_output) in enumerate(bins):
+            if used_input + item_input <= input_budget and used_output + item_output <= output_budget:
+                bins[i] = (members + [index], used_input + item_input, used_output + item_output)
+                break
+        else:
+            if item_output > output_budget:
+                feedbackLogger.warning(f"Batch item {index} needs ~{item_output} output tokens, over the {output_budget} budget; processing it alone")
+            bins.append(([index], item_input, item_output))
+
+    return [[items[index] for index in sorted(members)] for members, _, _ in bins]
+
+
+def batch_plan_report(label: str, item_count: int, planned_batches: int, fixed_batch_size: Optional[int]) -> Dict[str, Any]:
+    """
+    Log and return how many batches were planned versus the fixed-size approach.
+
+    Args:
+        label: Name of the batched operation for the log line
+        item_count: Number of items that were batched
+        planned_batches: Number of batches produced by the planner
+        fixed_batch_size: Batch size the operation used before adaptive planning
+
+    Returns:
+        A dictionary with the planned and fixed-size batch counts
+    """
+    fixed_batches = math.ceil(item_count / fixed_batch_size) if fixed_batch_size else None
+    report = {
+        "label": label,
+        "items": item_count,
+        "planned_batches": planned_batches,
+        "fixed_batch_size": fixed_batch_size,
+        "fixed_size_batches": fixed_batches,
+    }
+    feedbackLogger.info(f"Batch plan for {label}: {planned_batches} batches planned for {item_count} stakeholders (fixed size {fixed_batch_size} would use {fixed_batches})")
+    return report
+
+
+def plan_stakeholder_batches(
+    stakeholders: List[Any],
+    feedback_of: Callable[[Any], List[Any]],
+    prompt_template: str,
+    max_output_tokens: int,
+    base_output_tokens: int = 0,
+    label: str = "stakeholder batches",
+    fixed_batch_size: Optional[int] = None,
+) -> Tuple[List[List[Any]], Dict[str, Any]]:
+    """
+    Plan batches of stakeholders whose prompts embed their feedback as JSON.
+
+    Args:
+        stakeholders: Items to batch, one per stakeholder
+        feedback_of: Function returning a stakeholder's feedback items
+        prompt_template: The unfilled prompt, used to estimate the shared prompt tokens
+        max_output_tokens: The max_tokens limit of the call
+        base_output_tokens: Response tokens shared by every call
+        label: Name of the batched operation for the report
+        fixed_batch_size: Previous fixed batch size, for the report
+
+    Returns:
+        A tuple of (batches, report)
+    """
+    batches = plan_token_batches(
+        stakeholders,
+        input_cost=lambda stakeholder: estimate_tokens(json.dumps(stakeholder, indent=2)),
+        output_cost=lambda stakeholder: estimate_feedback_output_tokens(feedback_of(stakeholder)),
+        max_output_tokens=max_output_tokens,
+        base_input_tokens=estimate_tokens(prompt_template),
+        base_output_tokens=base_output_tokens,
+    )
+    report = batch_plan_report(label, len(stakeholders), len(batches), fixed_batch_size)
+    return batches, report
+
+
+def plan_section_batches(
+    stakeholders: List[Dict[str, Any]],
+    transcript: str,
+    token_budget: int,
+    solo_threshold: int,
+    margin: int = TRANSCRIPT_SECTION_MARGIN,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Group stakeholders into extraction calls that each send their transcript sections.
+
+    Stakeholders whose located section is small are packed together, in transcript
+    order, until the estimated input reaches the token budget. A section that overlaps
+    the text already in its batch (adjacent interviews share their margins) only adds
+    its uncovered part, as the sections are merged before they are sent. Large sections
+    and stakeholders without a located section get a call of their own.
+
+    Args:
+        stakeholders: List of stakeholder dictionaries (with optional section offsets)
+        transcript: The full transcript text
+        token_budget: Maximum estimated input tokens for a packed call
+        solo_threshold: Estimated section size above which a stakeholder is extracted alone
+        margin: Characters of context kept on either side of each section
+
+    Returns:
+        A list of stakeholder groups, each handled by a single API call
+    """
+    solo = []
+    packable = []
+    for stakeholder in stakeholders:
+        bounds = section_range(stakeholder, len(transcript), margin)
+        if bounds is None or estimate_tokens(transcript[bounds[0]:bounds[1]]) > solo_threshold:
+            solo.append([stakeholder])
+        else:
+            packable.append((stakeholder, bounds))
+
+    batches = []
+    current = []
+    current_tokens = 0
+    current_end = 0
+    for stakeholder, (start, end) in sorted(packable, key=lambda item: item[1]):
+        # Only the text not yet covered by the batch's sections adds tokens
+        tokens = estimate_tokens(transcript[max(start, current_end):end])
+        if current and current_tokens + tokens > token_budget:
+            batches.append(current)
+            current = []
+            current_tokens = 0
+            current_end = 0
+            tokens = estimate_tokens(transcript[start:end])
+        current.append(stakeholder)
+        current_tokens += tokens
+        current_end = max(current_end, end)
+    if current:
+        batches.append(current)
+
+    feedbackLogger.info(f"Planned {len(solo) + len(batches)} extraction calls for {len(stakeholders)} stakeholders ({len(solo)} solo, {len(batches)} packed)")
+    return solo + batches
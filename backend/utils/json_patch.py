@@ -0,0 +1,107 @@
+"""
+JSON Patch (RFC 6902) diffs between JSON documents.
+
+make_patch() produces "add", "remove" and "replace" operations that turn one
+document into another, descending into objects and into arrays of equal
+length so an edit to one evidence quote costs one small operation rather than
+a copy of the report. Arrays that grow or shrink are diffed element-wise over
+their common prefix, with the tail added or removed. apply_patch() applies
+such a patch to a copy of the document.
+"""
+import copy
+from typing import Any, Dict, List
+
+Patch = List[Dict[str, Any]]
+
+
+def _escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _diff(src: Any, dst: Any, path: str, patch: Patch) -> None:
+    if type(src) is not type(dst):
+        patch.append({"op": "replace", "path": path, "value": copy.deepcopy(dst)})
+    elif isinstance(src, dict):
+        for key in src:
+            if key not in dst:
+                patch.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in dst.items():
+            if key in src:
+                _diff(src[key], value, f"{path}/{_escape(key)}", patch)
+            else:
+                patch.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": copy.deepcopy(value)})
+    elif isinstance(src, list):
+        common = min(len(src), len(dst))
+        for i in range(common):
+            _diff(src[i], dst[i], f"{path}/{i}", patch)
+        # Removed from the end first, so the indexes of the remaining elements don't shift
+        for i in range(len(src) - 1, common - 1, -1):
+            patch.append({"op": "remove", "path": f"{path}/{i}"})
+        for value in dst[common:]:
+            patch.append({"op": "add", "path": f"{path}/-", "value": copy.deepcopy(value)})
+    elif src != dst:
+        patch.append({"op": "replace", "path": path, "value": copy.deepcopy(dst)})
+
+
+def make_patch(src: Any, dst: Any) -> Patch:
+    """
+    Create a JSON Patch that turns src into dst.
+
+    Returns:
+        The list of operations; empty if the documents are equal
+    """
+    patch: Patch = []
+    _diff(src, dst, "", patch)
+    return patch
+
+
+def apply_patch(doc: Any, patch: Patch) -> Any:
+    """
+    Apply a JSON Patch made by make_patch to a copy of doc.
+
+    Raises:
+        ValueError: If an operation is unsupported or its path doesn't exist in the document
+    """
+    doc = copy.deepcopy(doc)
+    for operation in patch:
+        op, path = operation["op"], operation["path"]
+        if path == "":
+            if op != "replace":
+                raise ValueError(f"Unsupported operation on the document root: {op}")
+            doc = copy.deepcopy(operation["value"])
+            continue
+
+        *parents, last = [_unescape(token) for token in path.split("/")[1:]]
+        target = doc
+        try:
+            for token in parents:
+                target = target[int(token)] if isinstance(target, list) else target[token]
+        except (KeyError, IndexError, ValueError, TypeError) as e:
+            raise ValueError(f"Path {path} not found: {e}")
+
+        if isinstance(target, list):
+            index = len(target) if last == "-" else int(last)
+            if op == "add":
+                target.insert(index, copy.deepcopy(operation["value"]))
+            elif op == "remove":
+                del target[index]
+            elif op == "replace":
+                target[index] = copy.deepcopy(operation["value"])
+            else:
+                raise ValueError(f"Unsupported operation: {op}")
+        elif isinstance(target, dict):
+            if op in ("add", "replace"):
+                if op == "replace" and last not in target:
+                    raise ValueError(f"Path {path} not found")
+                target[last] = copy.deepcopy(operation["value"])
+            elif op == "remove":
+                del target[last]
+            else:
+                raise ValueError(f"Unsupported operation: {op}")
+        else:
+            raise ValueError(f"Path {path} not found")
+    return doc
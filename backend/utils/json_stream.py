@@ -0,0 +1,243 @@
+"""
+Single-pass tolerant JSON parser for malformed LLM output.
+
+IncrementalJSONParser consumes text in chunks and walks every character once.
+While doing so it:
+
+- skips prose or code fences before the first bracket
+- escapes raw newlines and tabs inside strings
+- drops trailing and repeated commas, and inserts missing ones between values
+- skips a malformed element of the container at ``element_depth`` (an array item
+  or an object member) and carries on at the next one
+
+finish() returns the whole document, cut back to the last complete value and
+closed off if the output was truncated.
+"""
+import json
+from typing import Any, List, Optional
+
+_CLOSERS = {"[": "]", "{": "}"}
+_STRING_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+
+class IncrementalJSONParser:
+    """
+    Incremental, linear-time JSON parser that tolerates common LLM output damage.
+
+    Args:
+        element_depth: Nesting depth of the container whose elements are checked one by
+            one (1 for the elements of a top-level array or the members of a top-level
+            object, 2 for e.g. {"headings": [...]})
+        start_chars: Characters that may open the document; text before them is skipped
+    """
+    def __init__(self, element_depth: int = 1, start_chars: str = "[{"):
+        self.element_depth = element_depth
+        self.start_chars = start_chars
+        self._out: List[str] = []
+        self._stack: List[str] = []
+        # For each open object: whether the next string is a key
+        self._expect_key: List[bool] = []
+        self._started = False
+        self._done = False
+        self._in_string = False
+        self._escape = False
+        self._string_is_key = False
+        self._in_scalar = False
+        self._scalar_start = 0
+        # Start of the element currently being read at element_depth, in _out
+        self._element_start: Optional[int] = None
+        # Malformed elements left out of the document
+        self.skipped = 0
+        # End of the last complete value in _out and the stack depth at that point
+        self._safe_end = 0
+        self._safe_depth = 0
+
+    def feed(self, chunk: str):
+        """
+        Consume a chunk of text.
+
+        Args:
+            chunk: The next piece of the response
+        """
+        for char in chunk:
+            if self._done:
+                break
+            if not self._started:
+                if char in self.start_chars:
+                    self._started = True
+                    self._open(char)
+                continue
+            if self._in_string:
+                self._read_string_char(char)
+            elif self._in_scalar and (char in ",]}" or char.isspace()):
+                self._in_scalar = False
+                self._end_value()
+                self._read_structural(char)
+            elif self._in_scalar:
+                self._out.append(char)
+            else:
+                self._read_structural(char)
+
+    def finish(self) -> Any:
+        """
+        Finish parsing and return the whole document.
+
+        Truncated output is cut back to the last complete value and its open
+        containers are closed.
+
+        Returns:
+            The parsed document, or None if no JSON document was found
+        """
+        if not self._started:
+            return None
+        if self._done:
+            return json.loads("".join(self._out))
+        if self._in_scalar:
+            try:
+                json.loads("".join(self._out[self._scalar_start:]))
+                self._in_scalar = False
+                self._end_value()
+            except ValueError:
+                pass
+        text = "".join(self._out[:self._safe_end]).rstrip()
+        if text.endswith(","):
+            text = text[:-1]
+        closers = "".join(_CLOSERS[opener] for opener in reversed(self._stack[:self._safe_depth]))
+        return json.loads(text + closers)
+
+    def _open(self, char: str):
+        self._start_value()
+        self._out.append(char)
+        self._stack.append(char)
+        self._expect_key.append(char == "{")
+        self._mark_safe()
+
+    def _mark_safe(self):
+        self._safe_end = len(self._out)
+        self._safe_depth = len(self._stack)
+
+    def _read_string_char(self, char: str):
+        if self._escape:
+            self._escape = False
+            self._out.append(char)
+        elif char == "\\":
+            self._escape = True
+            self._out.append(char)
+        elif char == '"':
+            self._in_string = False
+            self._out.append(char)
+            if not self._string_is_key:
+                self._end_value()
+        else:
+            self._out.append(_STRING_ESCAPES.get(char, char))
+
+    def _read_structural(self, char: str):
+        if char.isspace():
+            return
+        if char in "[{":
+            self._insert_missing_comma()
+            self._open(char)
+        elif char in "]}":
+            self._close(char)
+        elif char == '"':
+            self._insert_missing_comma()
+            self._string_is_key = self._expecting_key()
+            if not self._string_is_key:
+                self._start_value()
+            elif len(self._stack) == self.element_depth:
+                # An object member starts at its key
+                self._drop_member_without_value()
+                self._element_start = len(self._out)
+            self._in_string = True
+            self._out.append(char)
+        elif char == ",":
+            self._drop_member_without_value()
+            if self._out and self._out[-1] not in "[{,":
+                self._out.append(char)
+            if self._stack and self._stack[-1] == "{":
+                self._expect_key[-1] = True
+        elif char == ":":
+            self._out.append(char)
+            if self._stack and self._stack[-1] == "{":
+                self._expect_key[-1] = False
+        else:
+            # Start of a number, true, false or null
+            self._insert_missing_comma()
+            self._start_value()
+            self._in_scalar = True
+            self._scalar_start = len(self._out)
+            self._out.append(char)
+
+    def _expecting_key(self) -> bool:
+        return bool(self._stack) and self._stack[-1] == "{" and self._expect_key[-1]
+
+    def _insert_missing_comma(self):
+        """Separate a value from the value before it when the comma was left out."""
+        if not self._stack or not self._out or self._out[-1] in "[{,:":
+            return
+        if self._stack[-1] == "[" or not self._expect_key[-1]:
+            self._out.append(",")
+            if self._stack[-1] == "{":
+                self._expect_key[-1] = True
+
+    def _drop_member_without_value(self):
+        """Leave out a member of the object at element_depth whose key got no value."""
+        if (self._element_start is not None and len(self._stack) == self.element_depth
+                and self._stack[-1] == "{"):
+            del self._out[self._element_start:]
+            self._element_start = None
+            self.skipped += 1
+            self._mark_safe()
+
+    def _start_value(self):
+        # Array items start at their value, object members at their key
+        if len(self._stack) == self.element_depth and (not self._stack or self._stack[-1] == "["):
+            self._element_start = len(self._out)
+
+    def _close(self, char: str):
+        if not self._stack:
+            return
+        self._drop_member_without_value()
+        # Drop a trailing comma before the closing bracket
+        if self._out and self._out[-1] == ",":
+            self._out.pop()
+        opener = self._stack.pop()
+        self._expect_key.pop()
+        self._out.append(_CLOSERS[opener])
+        if not self._stack:
+            self._done = True
+        self._end_value()
+
+    def _end_value(self):
+        if self._stack and len(self._stack) == self.element_depth and self._element_start is not None:
+            text = "".join(self._out[self._element_start:])
+            try:
+                json.loads(text if self._stack[-1] == "[" else "{" + text + "}")
+            except ValueError:
+                # Leave the malformed element out and resynchronise at the next one
+                del self._out[self._element_start:]
+                self.skipped += 1
+            self._element_start = None
+        self._mark_safe()
+
+
+def parse_partial_json(text: str, start_chars: str = "[{") -> Any:
+    """
+    Parse possibly malformed or truncated JSON from an LLM response in one pass.
+
+    Malformed items of the top-level array, or members of the top-level object,
+    are left out rather than failing the whole response.
+
+    Args:
+        text: The response text
+        start_chars: Characters that may open the document
+
+    Returns:
+        The parsed document, or None if no JSON document could be recovered
+    """
+    parser = IncrementalJSONParser(element_depth=1, start_chars=start_chars)
+    try:
+        parser.feed(text)
+        return parser.finish()
+    except ValueError:
+        return None
@@ -0,0 +1,137 @@
+"""
+Async gateway for Claude calls made from the event loop.
+
+All calls go through one AsyncAnthropic client and share a global concurrency
+limit and a rolling per-minute rate limit, so coroutines can issue requests
+concurrently without blocking the event loop or exceeding API limits.
+"""
+import asyncio
+import time
+from typing import Any, List, Optional, Type, TypeVar
+
+from pydantic import BaseModel
+
+from utils.loggers.feedback_logger import feedbackLogger
+from utils.structured_output import async_create_structured
+
+# Import the API config
+try:
+    from config.api_config import MAX_CONCURRENT_API_CALLS, MAX_API_CALLS_PER_MINUTE
+except ImportError:
+    # Default values if config file doesn't exist
+    MAX_CONCURRENT_API_CALLS = 3
+    MAX_API_CALLS_PER_MINUTE = 50
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class LLMGateway:
+    """
+    Bounds concurrent and per-minute Claude calls across all coroutines.
+
+    The limiter primitives are created for the running event loop on first use,
+    so the gateway can be shared by the app and by scripts that start their own loop.
+    """
+    def __init__(self, client=None, max_concurrent=MAX_CONCURRENT_API_CALLS, max_calls_per_minute=MAX_API_CALLS_PER_MINUTE):
+        self._client = client
+        self.max_concurrent = max_concurrent
+        self.max_calls_per_minute = max_calls_per_minute
+        self.calls: List[float] = []
+        self.active_calls = 0
+        self.peak_active_calls = 0
+        self.total_calls = 0
+        self._loop = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._rate_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def client(self):
+        """The AsyncAnthropic client, created on first use"""
+        if self._client is None:
+            import anthropic
+            import env_variables
+            self._client = anthropic.AsyncAnthropic(api_key=env_variables.ANTHROPIC_API_KEY)
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    def configure(self, max_concurrent: Optional[int] = None, max_calls_per_minute: Optional[int] = None):
+        """Change the limits; they apply from the next event loop or call"""
+        if max_concurrent is not None:
+            self.max_concurrent = max_concurrent
+            self._loop = None
+        if max_calls_per_minute is not None:
+            self.max_calls_per_minute = max_calls_per_minute
+
+    def _limiters(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._rate_lock = asyncio.Lock()
+        return self._semaphore, self._rate_lock
+
+    async def _wait_for_rate_limit(self, rate_lock: asyncio.Lock):
+        """Wait if we've exceeded our rate limit"""
+        async with rate_lock:
+            now = time.time()
+            # Remove calls older than 1 minute
+            self.calls = [t for t in self.calls if now - t < 60]
+
+            # If we're at the limit, wait
+            if len(self.calls) >= self.max_calls_per_minute:
+                sleep_time = 60 - (now - self.calls[0])
+                if sleep_time > 0:
+                    feedbackLogger.info(f"[ASYNC] Rate limit reached, waiting {sleep_time:.2f} seconds")
+                    await asyncio.sleep(sleep_time)
+
+            # Add this call
+            self.calls.append(time.time())
+
+    async def _run(self, call):
+        semaphore, rate_lock = self._limiters()
+        await self._wait_for_rate_limit(rate_lock)
+        async with semaphore:
+            self.active_calls += 1
+            self.total_calls += 1
+            self.peak_active_calls = max(self.peak_active_calls, self.active_calls)
+            feedbackLogger.debug(f"[ASYNC] API call started. Active calls: {self.active_calls}/{self.max_concurrent}")
+            try:
+                return await call()
+            finally:
+                self.active_calls -= 1
+
+    async def create(self, **kwargs) -> Any:
+        """
+        Make a Claude call through the global limits.
+
+        Args:
+            **kwargs: Arguments for client.messages.create
+
+        Returns:
+            The Claude response
+        """
+        return await self._run(lambda: self.client.messages.create(**kwargs))
+
+    async def create_structured(self, output_model: Type[T], tool_name: str, tool_description: str, **kwargs) -> T:
+        """
+        Make a schema-constrained Claude call through the global limits.
+
+        Args:
+            output_model: The pydantic model the tool input must match
+            tool_name: Name of the declared tool
+            tool_description: Description of the declared tool
+            **kwargs: Arguments for client.messages.create
+
+        Returns:
+            The validated output model instance
+        """
+        return await self._run(
+            lambda: async_create_structured(self.client, output_model, tool_name, tool_description, **kwargs)
+        )
+
+
+# Create a global instance
+llm_gateway = LLMGateway()
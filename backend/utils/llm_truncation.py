@@ -0,0 +1,42 @@
+"""
+Counters for Claude responses that stop at the max_tokens limit.
+
+Structured calls (utils/structured_output.py) raise TruncatedOutputError instead
+of re-sending a truncated call. Callers that batch their input split the batch
+and retry the halves, and record the outcome here, so benchmarks can report how
+often responses were cut off and how many retries the splits cost.
+"""
+import threading
+from typing import Dict
+
+
+class TruncationStats:
+    """
+    Thread-safe counters for truncated responses and the retries they caused.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.truncated_responses = 0
+        self.retries = 0
+        self.incomplete_responses = 0
+
+    def record(self, retries: int):
+        """Record one truncated response and the number of calls made to replace it (0 if it could not be split)"""
+        with self.lock:
+            self.truncated_responses += 1
+            self.retries += retries
+            if not retries:
+                self.incomplete_responses += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        """Return the current counter values"""
+        with self.lock:
+            return {
+                "truncated_responses": self.truncated_responses,
+                "retries": self.retries,
+                "incomplete_responses": self.incomplete_responses,
+            }
+
+
+# Create a global instance
+truncation_stats = TruncationStats()
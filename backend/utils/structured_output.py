@@ -0,0 +1,314 @@
+"""
+Schema-constrained Claude outputs using tool use.
+
+Each structured call declares a single tool whose input schema is generated
+from a pydantic model and forces Claude to call it. The tool input arrives as
+already-parsed JSON and is validated once against the model, so responses no
+longer go through string repair passes.
+"""
+from typing import Any, Dict, List, Optional, Type, TypeVar, Union
+
+from pydantic import BaseModel, ConfigDict, RootModel, ValidationError
+
+from utils.loggers.feedback_logger import feedbackLogger
+
+
+class StructuredOutputError(Exception):
+    """Raised when Claude does not return a valid tool call for the declared schema"""
+    pass
+
+
+class TruncatedOutputError(StructuredOutputError):
+    """Raised when the tool input is cut off at the max_tokens limit"""
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Feedback extraction (feedback_extraction.py)
+# ---------------------------------------------------------------------------
+
+class Stakeholder(BaseModel):
+    name: str
+    role: str = ""
+
+
+class StakeholderList(BaseModel):
+    stakeholders: List[Stakeholder]
+
+
+class ExtractedFeedbackItem(BaseModel):
+    text: str
+    location: Optional[str] = None
+
+
+class StakeholderFeedback(BaseModel):
+    name: str
+    role: str = ""
+    feedback: List[ExtractedFeedbackItem] = []
+
+
+class StakeholderFeedbackList(BaseModel):
+    stakeholders: List[StakeholderFeedback]
+
+
+class CategorizedFeedbackItem(BaseModel):
+    text: str
+    is_strong: bool = False
+
+
+class CategorizedStakeholder(BaseModel):
+    role: str = ""
+    feedback: List[CategorizedFeedbackItem] = []
+
+
+class CategorizedFeedback(BaseModel):
+    strengths: Dict[str, CategorizedStakeholder] = {}
+    areas_to_target: Dict[str, CategorizedStakeholder] = {}
+    advice: Dict[str, CategorizedStakeholder] = {}
+
+
+class MissingFeedback(BaseModel):
+    stakeholder: str
+    text: str
+    category: str
+
+
+class MiscategorizedFeedback(BaseModel):
+    stakeholder: str
+    text: str
+    current_category: str
+    correct_category: str
+
+
+class VerificationResult(BaseModel):
+    missing_stakeholders: List[str] = []
+    missing_feedback: List[MissingFeedback] = []
+    miscategorized_feedback: List[MiscategorizedFeedback] = []
+
+
+# ---------------------------------------------------------------------------
+# Evidence sorting and headings (main.py)
+# ---------------------------------------------------------------------------
+
+class Evidence(BaseModel):
+    quote: str
+    name: str = ""
+    position: str = ""
+    isStrong: bool = False
+
+
+class HeadingEvidence(BaseModel):
+    heading: str
+    evidence: List[Evidence] = []
+
+
+class SortedEvidence(BaseModel):
+    headings: List[HeadingEvidence]
+
+
+class Headings(BaseModel):
+    headings: List[str]
+
+
+# ---------------------------------------------------------------------------
+# Next steps and uploaded reports (main.py)
+# ---------------------------------------------------------------------------
+
+class NextStep(BaseModel):
+    main: str
+    sub_points: List[str] = []
+
+
+class NextSteps(BaseModel):
+    next_steps: List[NextStep]
+
+
+class ReflectionPrompts(BaseModel):
+    discussion_prompt: str
+    bullet_points: List[str] = []
+    context_summary: str = ""
+
+
+class ReflectionPoints(BaseModel):
+    reflection_prompts: ReflectionPrompts
+
+
+class UpdatedReport(BaseModel):
+    name: str = ""
+    date: str = ""
+    strengths: Dict[str, str] = {}
+    areas_to_target: Dict[str, str] = {}
+    # Discussion and action points, with the context summary paragraph as a plain string
+    next_steps: List[Union[NextStep, str]] = []
+
+
+# ---------------------------------------------------------------------------
+# Single-call feedback (old_get_feedback in main.py)
+# ---------------------------------------------------------------------------
+
+class QuotedStakeholder(BaseModel):
+    role: str = ""
+    feedback: List[str] = []
+
+
+class StrengthsFeedback(BaseModel):
+    strengths: Dict[str, QuotedStakeholder] = {}
+
+
+class AreasFeedback(BaseModel):
+    areas_to_target: Dict[str, QuotedStakeholder] = {}
+
+
+# ---------------------------------------------------------------------------
+# Advice (routers/advice.py)
+# ---------------------------------------------------------------------------
+
+class StakeholderAdvice(BaseModel):
+    role: str = ""
+    advice: List[str] = []
+
+
+class AdviceByStakeholder(RootModel[Dict[str, StakeholderAdvice]]):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Raw quote data (generate_raw_data.py)
+# ---------------------------------------------------------------------------
+
+class StakeholderQuotes(BaseModel):
+    name: str = ""
+    role: str = ""
+    quotes: List[str] = []
+
+
+class StrengthsData(BaseModel):
+    strengths: Dict[str, List[StakeholderQuotes]] = {}
+
+
+class AreasToTargetData(BaseModel):
+    areas_to_target: Dict[str, List[StakeholderQuotes]] = {}
+
+
+class RawData(BaseModel):
+    strengths: Dict[str, List[StakeholderQuotes]] = {}
+    areas_to_target: Dict[str, List[StakeholderQuotes]] = {}
+
+
+# ---------------------------------------------------------------------------
+# Free-form report (special_name_processor.py)
+# ---------------------------------------------------------------------------
+
+class ReportPayload(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+
+def _inline_refs(schema: Any, defs: Dict[str, Any]) -> Any:
+    """Replace $ref pointers with the referenced definitions."""
+    if isinstance(schema, dict):
+        if "$ref" in schema:
+            return _inline_refs(defs[schema["$ref"].split("/")[-1]], defs)
+        return {key: _inline_refs(value, defs) for key, value in schema.items() if key != "$defs"}
+    if isinstance(schema, list):
+        return [_inline_refs(value, defs) for value in schema]
+    return schema
+
+
+def tool_from_model(model: Type[BaseModel], name: str, description: str) -> Dict[str, Any]:
+    """
+    Build a tool definition whose input schema is generated from a pydantic model.
+
+    Args:
+        model: The pydantic model describing the tool input
+        name: The tool name
+        description: What the tool input represents
+
+    Returns:
+        A tool definition for client.messages.create
+    """
+    schema = model.model_json_schema()
+    return {
+        "name": name,
+        "description": description,
+        "input_schema": _inline_refs(schema, schema.get("$defs", {})),
+    }
+
+
+T = TypeVar("T", bound=BaseModel)
+
+
+def _with_forced_tool(output_model: Type[BaseModel], tool_name: str, tool_description: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the single declared tool and force Claude to call it."""
+    kwargs["tools"] = [tool_from_model(output_model, tool_name, tool_description)]
+    kwargs["tool_choice"] = {"type": "tool", "name": tool_name}
+    return kwargs
+
+
+def _validate_tool_call(response, output_model: Type[T], tool_name: str, max_tokens: int) -> T:
+    """Validate the tool input of a response against the output model."""
+    if response.stop_reason == "max_tokens":
+        feedbackLogger.info(f"Tool call '{tool_name}' stopped at max_tokens={max_tokens}")
+        raise TruncatedOutputError(f"Tool call '{tool_name}' truncated at max_tokens={max_tokens}")
+
+    tool_input = next((block.input for block in response.content if block.type == "tool_use"), None)
+    if tool_input is None:
+        raise StructuredOutputError(f"No '{tool_name}' tool call in response (stop_reason={response.stop_reason})")
+
+    try:
+        return output_model.model_validate(tool_input)
+    except ValidationError as e:
+        raise StructuredOutputError(f"Tool call '{tool_name}' does not match schema: {str(e)}")
+
+
+def create_structured(client, output_model: Type[T], tool_name: str, tool_description: str, **kwargs) -> T:
+    """
+    Call Claude with a single forced tool and validate its input against a model.
+
+    Tool input cannot be continued after max_tokens, and re-sending the whole request
+    with a larger max_tokens pays for a second call that may still not fit, so a
+    truncated call raises TruncatedOutputError and callers split their input instead.
+
+    Args:
+        client: The Anthropic client for API calls
+        output_model: The pydantic model the tool input must match
+        tool_name: Name of the declared tool
+        tool_description: Description of the declared tool
+        **kwargs: Arguments for client.messages.create (model, max_tokens, messages, ...)
+
+    Returns:
+        The validated output model instance
+
+    Raises:
+        TruncatedOutputError: If the tool input is cut off at max_tokens
+        StructuredOutputError: If no valid tool call was returned
+    """
+    kwargs = _with_forced_tool(output_model, tool_name, tool_description, kwargs)
+
+    response = client.messages.create(**kwargs)
+
+    return _validate_tool_call(response, output_model, tool_name, kwargs["max_tokens"])
+
+
+async def async_create_structured(client, output_model: Type[T], tool_name: str, tool_description: str, **kwargs) -> T:
+    """
+    Asynchronous version of create_structured for an AsyncAnthropic client.
+
+    Args:
+        client: The AsyncAnthropic client for API calls
+        output_model: The pydantic model the tool input must match
+        tool_name: Name of the declared tool
+        tool_description: Description of the declared tool
+        **kwargs: Arguments for client.messages.create (model, max_tokens, messages, ...)
+
+    Returns:
+        The validated output model instance
+
+    Raises:
+        TruncatedOutputError: If the tool input is cut off at max_tokens
+        StructuredOutputError: If no valid tool call was returned
+    """
+    kwargs = _with_forced_tool(output_model, tool_name, tool_description, kwargs)
+
+    response = await client.messages.create(**kwargs)
+
+    return _validate_tool_call(response, output_model, tool_name, kwargs["max_tokens"])
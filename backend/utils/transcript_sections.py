@@ -0,0 +1,199 @@
+"""
+Locating each stakeholder's interview in a feedback transcript.
+
+Interviews open with a short header line naming the stakeholder, such as
+"Matt Savino interview, 20 June 2024" or "- Matt Savino (MD, Capital Markets)
+interview". The same header patterns are used to list the interviewed
+stakeholders at ingest and to slice the transcript per stakeholder for
+feedback extraction.
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.loggers.feedback_logger import feedbackLogger
+
+# Characters of surrounding context kept on either side of a stakeholder's
+# located interview section when slicing the transcript for Stage 2
+TRANSCRIPT_SECTION_MARGIN = 500
+
+# Longest line that is still treated as an interview header by the locator
+MAX_SECTION_HEADER_LENGTH = 120
+
+# Start of a header line, optionally a bullet or markdown marker
+_HEADER_PREFIX = r"^[ \t]*(?:[-•*#>]+[ \t]*)?"
+
+_NAME = r"(?:[A-Z][a-zA-Z'’\-]+\.?[ \t]+){1,3}[A-Z][a-zA-Z'’\-]+"
+
+_INTERVIEW_WORD = re.compile(r"\binterview\b", re.IGNORECASE)
+
+# Headers of interviews whose stakeholder isn't known yet
+_INTERVIEW_HEADER = re.compile(
+    rf"{_HEADER_PREFIX}(?P<name>{_NAME})(?:[ \t]*\((?P<role>[^)\n]+)\))?[ \t,]+interview\b",
+    re.MULTILINE,
+)
+
+
+def find_interview_headers(transcript: str) -> List[Tuple[int, str, str]]:
+    """
+    Find the interview headers of a transcript without knowing the stakeholders.
+
+    Args:
+        transcript: The full transcript text
+
+    Returns:
+        (offset, name, role) of each header in order of appearance; the role is
+        empty when the header doesn't state it
+    """
+    return [
+        (match.start(), " ".join(match.group("name").split()), (match.group("role") or "").strip())
+        for match in _INTERVIEW_HEADER.finditer(transcript or "")
+    ]
+
+
+def find_section_header(name: str, transcript: str) -> Optional[int]:
+    """
+    Find the offset of the header line that opens a stakeholder's interview.
+
+    A header is a short line that starts with the stakeholder's name, optionally
+    preceded by a bullet or markdown marker (e.g. "Matt Savino interview, 20 June 2024").
+    Such a line that mentions an interview is preferred over an earlier short line
+    that merely starts with the name, like a one-line comment in another interview.
+
+    Args:
+        name: The stakeholder's full name
+        transcript: The full transcript text
+
+    Returns:
+        The character offset of the header line, or None if no header was found
+    """
+    name_pattern = r"\s+".join(re.escape(part) for part in name.split())
+    if not name_pattern:
+        return None
+
+    header_pattern = re.compile(
+        rf"{_HEADER_PREFIX}{name_pattern}\b[^\n]{{0,{MAX_SECTION_HEADER_LENGTH}}}$",
+        re.IGNORECASE | re.MULTILINE,
+    )
+    matches = list(header_pattern.finditer(transcript))
+    for match in matches:
+        if _INTERVIEW_WORD.search(match.group(0)):
+            return match.start()
+    if matches:
+        return matches[0].start()
+
+    # Fall back to any line that names the stakeholder together with "interview"
+    interview_pattern = re.compile(
+        rf"^[^\n]{{0,{MAX_SECTION_HEADER_LENGTH}}}\b{name_pattern}\b[^\n]*\binterview",
+        re.IGNORECASE | re.MULTILINE,
+    )
+    match = interview_pattern.search(transcript)
+    if match:
+        return match.start()
+
+    return None
+
+
+def locate_stakeholder_sections(stakeholders: List[Dict[str, Any]], transcript: str) -> List[Dict[str, Any]]:
+    """
+    Locate the contiguous transcript section of each stakeholder's interview.
+
+    Each interview is assumed to run from its header up to the next stakeholder's
+    header. Located stakeholders get "section_start" and "section_end" character
+    offsets; stakeholders without a header are left untouched so that Stage 2
+    falls back to the full transcript for them.
+
+    Args:
+        stakeholders: List of stakeholder dictionaries (updated in place)
+        transcript: The full transcript text
+
+    Returns:
+        The same list of stakeholder dictionaries
+    """
+    starts = {}
+    for i, stakeholder in enumerate(stakeholders):
+        name = stakeholder.get("name", "")
+        if not name or name == "Unknown":
+            continue
+        start = find_section_header(name, transcript)
+        if start is not None:
+            starts[i] = start
+
+    # A single header gives no boundaries to slice on, so keep the full transcript
+    if len(set(starts.values())) < 2:
+        feedbackLogger.info("Transcript sections not located, Stage 2 will use the full transcript")
+        return stakeholders
+
+    boundaries = sorted(set(starts.values()))
+    for i, start in starts.items():
+        next_index = boundaries.index(start) + 1
+        end = boundaries[next_index] if next_index < len(boundaries) else len(transcript)
+        stakeholders[i]["section_start"] = start
+        stakeholders[i]["section_end"] = end
+
+    feedbackLogger.info(f"Located transcript sections for {len(starts)}/{len(stakeholders)} stakeholders")
+    return stakeholders
+
+
+def section_range(stakeholder: Dict[str, Any], transcript_length: int, margin: int = TRANSCRIPT_SECTION_MARGIN) -> Optional[Tuple[int, int]]:
+    """
+    Character range of a stakeholder's located section plus margin.
+
+    Returns:
+        (start, end) offsets clamped to the transcript, or None if no section was located
+    """
+    start = stakeholder.get("section_start")
+    end = stakeholder.get("section_end")
+    if start is None or end is None:
+        return None
+    return max(0, start - margin), min(transcript_length, end + margin)
+
+
+def merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge overlapping or touching character ranges, in transcript order."""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def get_stakeholder_section(stakeholder: Dict[str, Any], transcript: str, margin: int = TRANSCRIPT_SECTION_MARGIN) -> str:
+    """
+    Return the part of the transcript that belongs to a stakeholder.
+
+    Args:
+        stakeholder: Stakeholder dictionary, optionally with section offsets
+        transcript: The full transcript text
+        margin: Characters of context to keep on either side of the section
+
+    Returns:
+        The stakeholder's section plus margin, or the full transcript if no section was located
+    """
+    bounds = section_range(stakeholder, len(transcript), margin)
+    if bounds is None:
+        return transcript
+    return transcript[bounds[0]:bounds[1]]
+
+
+def get_sections_text(stakeholders: List[Dict[str, Any]], transcript: str, margin: int = TRANSCRIPT_SECTION_MARGIN) -> str:
+    """
+    Return the transcript text covering the sections of several stakeholders.
+
+    Sections whose margins overlap, e.g. adjacent interviews, are merged so no
+    text is repeated. If any stakeholder has no located section, the full
+    transcript is returned.
+
+    Args:
+        stakeholders: Stakeholder dictionaries with section offsets
+        transcript: The full transcript text
+        margin: Characters of context to keep on either side of each section
+
+    Returns:
+        The merged sections in transcript order, separated by blank lines
+    """
+    ranges = [section_range(stakeholder, len(transcript), margin) for stakeholder in stakeholders]
+    if any(bounds is None for bounds in ranges):
+        return transcript
+    return "\n\n".join(transcript[start:end] for start, end in merge_ranges(ranges))